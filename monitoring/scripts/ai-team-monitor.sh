@@ -218,11 +218,10 @@ generate_daily_report() {
         todo_tasks in_progress_tasks completed_tasks blocked_tasks \
         avg_progress due_today overdue_tasks <<< "$stats"
     
-    # Get tasks completed today
+    # Get tasks completed today (daily_rollup rows, kept current by triggers)
     local completed_today=$(sqlite3 "$DB_PATH" "
-        SELECT COUNT(*) FROM tasks 
-        WHERE status = 'done' 
-        AND DATE(completed_at) = DATE('now')" 2>/dev/null || echo "0")
+        SELECT COALESCE(SUM(completed), 0) FROM daily_rollup
+        WHERE day = DATE('now')" 2>/dev/null || echo "0")
     
     # Get active agents with their current tasks
     local active_agent_tasks=$(sqlite3 "$DB_PATH" "
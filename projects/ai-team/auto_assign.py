@@ -7,39 +7,180 @@ Automatically assign idle agents to todo tasks with context awareness
 import os
 import sqlite3
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from operator import add
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
+
+from context_index import ContextIndex, refresh_index
+from learnings import LearningsView
+from matching import FORBIDDEN, max_weight_matching
+from role_rules import add_rule, compile_rules, load_rules, remove_rule
+from storage import connect
+from task_graph import READY_TASKS_QUERY
+from transitions import describe_failure, transition
+
+try:
+    import numpy
+except ImportError:  # optional: plan_optimal builds the same weights in lists
+    numpy = None
 
 os.environ['TZ'] = 'Asia/Bangkok'
 
 DB_PATH = Path(__file__).parent / "team.db"
 TELEGRAM_CHANNEL = "1268858185"
 
-# Role matching for task assignment
-ROLE_MATCH = {
-    'dev': ['dev', 'solo-dev'],
-    'frontend': ['dev', 'ux-designer'],
-    'backend': ['dev', 'architect'],
-    'database': ['architect', 'dev'],
-    'api': ['dev', 'architect'],
-    'ui': ['ux-designer'],
-    'ux': ['ux-designer'],
-    'test': ['qa'],
-    'qa': ['qa'],
-    'doc': ['tech-writer'],
-    'document': ['tech-writer'],
-    'design': ['ux-designer'],
-    'plan': ['pm', 'analyst'],
-    'analyze': ['analyst'],
-    'review': ['qa'],
-}
+# Assignment strategies: greedy takes the queue in order, optimal solves a matching
+STRATEGIES = ('greedy', 'optimal')
+# Ready tasks the optimal strategy considers per idle agent
+OPTIMAL_WINDOW = 5
+# Agents x tasks past which plan_optimal takes about half a second or more;
+# the pure Python solver gets there at a quarter of the size NumPy does
+OPTIMAL_WARN_PAIRS = 400_000 if numpy is not None else 100_000
+PRIORITY_LEVELS = {'critical': 3, 'high': 2, 'normal': 1, 'low': 0}
+# Spawns in flight at once, and seconds each may take before it counts as failed
+SPAWN_WORKERS = 8
+SPAWN_TIMEOUT = 60
+
+def task_text_of(task: Dict) -> str:
+    """Title and description, the text a task is matched on"""
+    return task['title'] + ' ' + (task.get('description') or '')
+
+
+def run_spawn(task_id: str, agent_id: str, message: str, timeout: int = SPAWN_TIMEOUT) -> Dict:
+    """One openclaw sessions_spawn; touches no database, so it can run on a pool thread"""
+    start = time.monotonic()
+    try:
+        result = subprocess.run(
+            ['openclaw', 'sessions_spawn',
+             '--task', message,
+             '--agent', agent_id,
+             '--label', f"auto-task-{task_id}",
+             '--runTimeoutSeconds', '1800'],  # 30 min timeout
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        error = None if result.returncode == 0 else (result.stderr.strip() or f"exit code {result.returncode}")
+    except subprocess.TimeoutExpired:
+        error = f"no answer within {timeout}s"
+    except OSError as e:
+        error = str(e)
+    return {'task': task_id, 'agent': agent_id, 'ok': error is None, 'error': error,
+            'seconds': round(time.monotonic() - start, 3)}
+
+
+# Idle agents with their in_progress load, one GROUP BY over idx_tasks_assignee_status
+IDLE_AGENTS_QUERY = '''
+    SELECT a.id, a.name, a.role, a.total_tasks_completed, ac.context,
+           COUNT(t.id) AS active_count
+    FROM agents a
+    LEFT JOIN agent_context ac ON a.id = ac.agent_id
+    LEFT JOIN tasks t ON t.assignee_id = a.id AND t.status = 'in_progress'
+    WHERE a.status = 'idle'
+    AND (a.current_task_id IS NULL OR a.current_task_id = '')
+    GROUP BY a.id
+    ORDER BY a.total_tasks_completed ASC, a.id
+'''
+
+
+class AssignmentSnapshot:
+    """Idle agents with their load, role and context, loaded by one query
+
+    Nothing here changes while a run assigns tasks (an assigned agent just
+    leaves the pool), so every task is scored against every agent in
+    memory. Role keywords are resolved to agent IDs once per snapshot, and
+    context relevance comes from the TF-IDF ContextIndex. With refresh its
+    stale entries are rebuilt and committed first; without, the snapshot
+    only reads (ContextIndex tokenizes them in memory).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, agents: List[Dict] = None, refresh: bool = False):
+        if agents is None:
+            agents = [dict(row) for row in conn.execute(IDLE_AGENTS_QUERY)]
+        else:
+            agents = [dict(agent) for agent in agents]
+            missing = [agent['id'] for agent in agents if 'active_count' not in agent]
+            if missing:
+                counts = dict(conn.execute(f'''
+                    SELECT assignee_id, COUNT(*) FROM tasks
+                    WHERE status = 'in_progress' AND assignee_id IN ({', '.join('?' * len(missing))})
+                    GROUP BY assignee_id
+                ''', missing).fetchall())
+                for agent in agents:
+                    agent.setdefault('active_count', counts.get(agent['id'], 0))
+        self.agents = agents
+        self._ids = [agent['id'] for agent in agents]
+        self._index = {agent_id: i for i, agent_id in enumerate(self._ids)}
+        if refresh and refresh_index(conn):
+            conn.commit()
+        self.context_index = ContextIndex(conn, self._ids)
+        self._load_scores = [-5 * agent['active_count'] for agent in agents]
+        by_role: Dict[str, Set[str]] = {}
+        for agent in agents:
+            by_role.setdefault(agent['role'].lower(), set()).add(agent['id'])
+        # Each rule keyword resolved to the idle agents it points to, by role or by ID
+        rules = load_rules(conn)
+        self.matcher = compile_rules(tuple((keyword, tuple(roles)) for keyword, roles in rules.items()))
+        self._keyword_agents: Dict[str, Set[str]] = {}
+        for keyword, matching_roles in rules.items():
+            matched = set(matching_roles) & self._index.keys()
+            for role in matching_roles:
+                matched |= by_role.get(role.lower(), set())
+            self._keyword_agents[keyword] = matched
+        self._role_matches: Dict[str, Dict[str, Set[str]]] = {}
+
+    def covers(self, agents: List[Dict]) -> bool:
+        """Whether every one of agents is in the snapshot"""
+        return all(agent['id'] in self._index for agent in agents)
+
+    def role_matches(self, task: Dict) -> Dict[str, Set[str]]:
+        """IDs of the agents each role_match_rules keyword in the task points to
+
+        An agent matches by role or by ID. One pass over the task's words
+        finds its keywords (whole words, see role_rules); keywords it does
+        not contain are left out. Cached per task.
+        """
+        matches = self._role_matches.get(task['id'])
+        if matches is None:
+            matches = {keyword: self._keyword_agents[keyword]
+                       for keyword in sorted(self.matcher.find(task_text_of(task)))}
+            self._role_matches[task['id']] = matches
+        return matches
+
+    def scores(self, task: Dict, role_matches: Dict[str, Set[str]] = None) -> Dict[str, int]:
+        """Score of every agent for task: +10 per matching role keyword, up to
+        CONTEXT_POINTS for context relevance, -5 per in_progress task
+
+        role_matches can pass in what role_matches(task) already returned.
+        """
+        totals = map(add, self._load_scores, self.context_index.points(task_text_of(task)))
+        scores = dict(zip(self._ids, totals))
+        for matched in (self.role_matches(task) if role_matches is None else role_matches).values():
+            for agent_id in matched:
+                scores[agent_id] += 10
+        return scores
+
+    def score_matrix(self, tasks: List[Dict], agent_ids: List[str]):
+        """scores() of each task for agent_ids as the rows of a NumPy array"""
+        keyword_columns = {keyword: [self._index[agent_id] for agent_id in matched]
+                           for keyword, matched in self._keyword_agents.items()}
+        matrix = self.context_index.points_matrix([task_text_of(task) for task in tasks])
+        matrix += numpy.array(self._load_scores, dtype=numpy.int64)
+        for row, task in zip(matrix, tasks):
+            for keyword in self.role_matches(task):
+                row[keyword_columns[keyword]] += 10
+        return matrix[:, [self._index[agent_id] for agent_id in agent_ids]]
+
 
 class AutoAssign:
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
-        self.conn.row_factory = sqlite3.Row
+        self.conn = connect(db_path)
+        self.learnings = LearningsView(self.conn)
+        self.snapshot: Optional[AssignmentSnapshot] = None
         
     def close(self):
         self.conn.close()
@@ -54,16 +195,16 @@ class AutoAssign:
         """Get agent's context from database"""
         cursor = self.conn.cursor()
         cursor.execute('''
-            SELECT context, learnings, preferences, last_updated
+            SELECT context, preferences, last_updated
             FROM agent_context WHERE agent_id = ?
         ''', (agent_id,))
         row = cursor.fetchone()
         if row:
             return {
                 'context': row[0] or '',
-                'learnings': row[1] or '',
-                'preferences': row[2] or '',
-                'last_updated': row[3]
+                'learnings': self.learnings.render(agent_id),
+                'preferences': row[1] or '',
+                'last_updated': row[2]
             }
         return {'context': '', 'learnings': '', 'preferences': '', 'last_updated': None}
 
@@ -77,90 +218,195 @@ class AutoAssign:
         ''', (content, agent_id))
         self.conn.commit()
 
-    def get_idle_agents(self) -> List[Dict]:
-        """Get list of idle agents with their roles and context"""
+    def get_idle_agents(self, refresh: bool = False) -> List[Dict]:
+        """Idle agents with role, context and active_count (in_progress tasks)
+
+        Also keeps them as self.snapshot for find_best_agent. refresh
+        writes stale context index entries back (only run() does).
+        """
+        self.snapshot = AssignmentSnapshot(self.conn, refresh=refresh)
+        return self.snapshot.agents
+
+    def get_unassigned_todo_tasks(self, limit: int = None) -> List[Dict]:
+        """Get ready todo tasks (no assignee, all dependencies done), sorted by priority"""
+        query, params = READY_TASKS_QUERY, ()
+        if limit is not None:
+            query += ' LIMIT ?'
+            params = (limit,)
         cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT a.id, a.name, a.role, a.total_tasks_completed,
-                   ac.context, ac.learnings
-            FROM agents a
-            LEFT JOIN agent_context ac ON a.id = ac.agent_id
-            WHERE a.status = 'idle'
-            AND (a.current_task_id IS NULL OR a.current_task_id = '')
-            ORDER BY a.total_tasks_completed ASC
-        ''')
+        cursor.execute(query, params)
         return [dict(row) for row in cursor.fetchall()]
 
-    def get_unassigned_todo_tasks(self) -> List[Dict]:
-        """Get todo tasks without assignee, sorted by priority"""
+    def count_unassigned_todo_tasks(self) -> Dict[str, int]:
+        """Unassigned todo tasks that are ready vs still waiting on dependencies"""
         cursor = self.conn.cursor()
         cursor.execute('''
-            SELECT t.id, t.title, t.description, t.priority, t.project_id,
-                   t.prerequisites, t.acceptance_criteria, t.expected_outcome
-            FROM tasks t
-            WHERE t.status = 'todo'
-            AND (t.assignee_id IS NULL OR t.assignee_id = '')
-            ORDER BY 
-                CASE t.priority 
-                    WHEN 'critical' THEN 1
-                    WHEN 'high' THEN 2
-                    WHEN 'normal' THEN 3
-                    WHEN 'low' THEN 4
-                END,
-                t.created_at ASC
+            SELECT COALESCE(SUM(open_dependencies = 0), 0), COALESCE(SUM(open_dependencies > 0), 0)
+            FROM tasks
+            WHERE status = 'todo' AND (assignee_id IS NULL OR assignee_id = '')
         ''')
-        return [dict(row) for row in cursor.fetchall()]
+        ready, waiting = cursor.fetchone()
+        return {'ready': ready, 'waiting': waiting}
 
     def find_best_agent(self, task: Dict, agents: List[Dict]) -> Optional[Dict]:
-        """Find best matching agent for a task based on keywords and context"""
-        title_lower = task['title'].lower()
-        desc_lower = (task.get('description') or '').lower()
-        task_text = title_lower + ' ' + desc_lower
+        """Find best matching agent for a task based on keywords and context
+        
+        Scores come from the snapshot loaded by get_idle_agents (no queries
+        per task or agent); agents it does not know get their own snapshot.
+        """
+        snapshot = self.snapshot
+        if snapshot is None or not snapshot.covers(agents):
+            snapshot = AssignmentSnapshot(self.conn, agents)
+        scores = snapshot.scores(task)
         
         best_agent = None
         best_score = -1
-        
         for agent in agents:
-            score = 0
-            agent_role = agent['role'].lower()
-            context = (agent.get('context') or '').lower()
-            
-            # Check role matches
-            for keyword, matching_roles in ROLE_MATCH.items():
-                if keyword in task_text:
-                    if agent['id'] in matching_roles or agent_role in matching_roles:
-                        score += 10
-            
-            # Check context relevance
-            for word in task_text.split():
-                if len(word) > 3 and word in context:
-                    score += 2
-            
-            # Prefer agents with fewer active tasks
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT COUNT(*) FROM tasks 
-                WHERE assignee_id = ? AND status = 'in_progress'
-            ''', (agent['id'],))
-            active_count = cursor.fetchone()[0]
-            score -= active_count * 5
-            
-            if score > best_score:
-                best_score = score
+            if scores[agent['id']] > best_score:
+                best_score = scores[agent['id']]
                 best_agent = agent
         
         return best_agent
 
+    def plan_optimal(self, tasks: List[Dict], agents: List[Dict]) -> Dict[str, Dict]:
+        """Agent for each task from a maximum-weight matching of tasks x agents
+
+        Priority comes first: a lower-priority task is only taken when no
+        agent allowed on a higher one is left for it. Among equal priorities
+        the summed find_best_agent scores decide, and equal scores go to the
+        older task. When a task names role keywords (role_match_rules) and an
+        idle agent has one of those roles, only such agents may take it.
+        Returns {task_id: agent}; tasks without an agent stay in the queue.
+        """
+        if not tasks or not agents:
+            return {}
+        snapshot = self.snapshot
+        if snapshot is None or not snapshot.covers(agents):
+            snapshot = AssignmentSnapshot(self.conn, agents)
+        agent_ids = [agent['id'] for agent in agents]
+        # Integer weights: each priority level outweighs any sum of scores
+        # over all agents, and every task outweighs leaving its agent idle
+        levels = [PRIORITY_LEVELS.get(task.get('priority'), PRIORITY_LEVELS['normal']) for task in tasks]
+
+        if numpy is not None:
+            # tasks x agents with FORBIDDEN as NaN, then turned to agents x
+            # tasks with one "stay idle" column per agent, below any real task
+            scores = snapshot.score_matrix(tasks, agent_ids).astype(float)
+            position = {agent_id: i for i, agent_id in enumerate(agent_ids)}
+            for row, task in zip(scores, tasks):
+                qualified = [position[agent_id] for matched in snapshot.role_matches(task).values()
+                             for agent_id in matched if agent_id in position]
+                if qualified:
+                    allowed = numpy.zeros(len(agent_ids), dtype=bool)
+                    allowed[qualified] = True
+                    row[~allowed] = numpy.nan
+            low, high = numpy.nanmin(scores), numpy.nanmax(scores)
+            level_span = (high - low + 1) * len(agents) + 1
+            weights = numpy.hstack([(numpy.array(levels)[:, None] * level_span + scores - low + 1).T,
+                                    numpy.zeros((len(agents), len(agents)))])
+        else:
+            columns = []
+            for task in tasks:
+                role_matches = snapshot.role_matches(task)
+                scores = snapshot.scores(task, role_matches)
+                qualified = set().union(*role_matches.values()) & set(agent_ids)
+                columns.append([scores[agent_id] if not qualified or agent_id in qualified else FORBIDDEN
+                                for agent_id in agent_ids])
+            allowed = [score for column in columns for score in column if score is not FORBIDDEN]
+            low, high = min(allowed), max(allowed)
+            level_span = (high - low + 1) * len(agents) + 1
+            weights = [[] for _ in agents]
+            for level, column in zip(levels, columns):
+                for row, score in zip(weights, column):
+                    row.append(FORBIDDEN if score is FORBIDDEN else level * level_span + score - low + 1)
+            for row in weights:
+                row.extend([0] * len(agents))
+
+        matched = max_weight_matching(weights)
+        # Equal weights leave the solver free to pick the newer task; hand the
+        # agent an older one it scores the same on, the total stays optimal.
+        # A row that moves keeps its weight, so its older ties stay the same
+        holder = {column: row for row, column in enumerate(matched) if column < len(tasks)}
+        tied: Dict[int, List[int]] = {}
+        for column, row in sorted(holder.items(), key=lambda item: item[1]):
+            if numpy is not None:
+                older_ties = numpy.flatnonzero(weights[row, :column] == weights[row, column]).tolist()
+            else:
+                older_ties = [older for older in range(column) if weights[row][older] == weights[row][column]]
+            for older in older_ties:
+                tied.setdefault(older, []).append(row)
+        for older in sorted(tied):
+            if older in holder:
+                continue
+            for row in tied[older]:
+                if older < matched[row]:
+                    del holder[matched[row]]
+                    holder[older] = row
+                    matched[row] = older
+                    break
+
+        return {tasks[column]['id']: agents[row] for column, row in holder.items()}
+
+    def explain(self, task_id: str, top: int = 10) -> Optional[Dict]:
+        """How every idle agent scores for a task, in the order find_best_agent ranks them
+
+        Each row splits the score into role keywords, context relevance
+        (with the task terms that earned it) and load. None if no such task.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, title, description, priority, status FROM tasks WHERE id = ?', (task_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        task = dict(row)
+        agents = self.get_idle_agents()
+        snapshot = self.snapshot
+        index = snapshot.context_index
+        text = task_text_of(task)
+        role_matches = snapshot.role_matches(task)
+        scores = snapshot.scores(task, role_matches)
+        points = dict(zip(index.agent_ids, index.points(text)))
+
+        rows = []
+        for agent in agents:
+            roles = [keyword for keyword, matched in role_matches.items() if agent['id'] in matched]
+            rows.append({
+                'agent_id': agent['id'],
+                'name': agent['name'],
+                'role': agent['role'],
+                'score': scores[agent['id']],
+                'role_points': 10 * len(roles),
+                'keywords': roles,
+                'context_points': points[agent['id']],
+                'terms': [{'term': term, 'points': round(share, 2)}
+                          for term, _, _, share in index.explain(text, agent['id'])],
+                'load_points': -5 * agent['active_count'],
+            })
+        # Stable sort: equal scores keep snapshot order, as find_best_agent breaks ties
+        rows.sort(key=lambda r: -r['score'])
+        return {
+            'task': task,
+            'terms': sorted(({'term': term, 'weight': weight / 1000}
+                             for term, weight in index.task_vector(text).items()),
+                            key=lambda t: (-t['weight'], t['term'])),
+            'keywords': sorted(role_matches),
+            'idle_agents': len(agents),
+            'indexed_contexts': index.documents,
+            'agents': rows[:top],
+        }
+
     def assign_task(self, task_id: str, agent_id: str) -> bool:
         """Assign task to agent"""
         cursor = self.conn.cursor()
         
         try:
-            cursor.execute('''
-                UPDATE tasks 
-                SET assignee_id = ?, status = 'todo', updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (agent_id, task_id))
+            # Claim the task only if it is still an unassigned todo
+            result = transition(cursor, task_id, 'auto_assign', agent_id=agent_id,
+                                notes='Auto-assigned by system with context')
+            if not result['ok']:
+                self.conn.rollback()
+                print(f"[Skip] {describe_failure(result)}")
+                return False
             
             cursor.execute('''
                 UPDATE agents 
@@ -170,25 +416,20 @@ class AutoAssign:
                 WHERE id = ?
             ''', (task_id, agent_id))
             
-            cursor.execute('''
-                INSERT INTO task_history (task_id, agent_id, action, notes)
-                VALUES (?, ?, 'auto_assigned', 'Auto-assigned by system with context')
-            ''', (task_id, agent_id))
-            
             self.conn.commit()
             return True
         except Exception as e:
+            self.conn.rollback()
             print(f"[Error] Failed to assign task: {e}")
             return False
 
-    def spawn_subagent(self, task: Dict, agent: Dict) -> bool:
-        """Spawn subagent via openclaw with full context"""
-        try:
-            # Build context-aware task message
-            context = agent.get('context', '')
-            learnings = agent.get('learnings', '')
-            
-            task_message = f"""## Task Assignment
+    def build_task_message(self, task: Dict, agent: Dict) -> str:
+        """Assignment message for the subagent, with the agent's context and learnings"""
+        context = agent.get('context', '')
+        # Newest unique learnings within the token budget, cached per agent
+        learnings = self.learnings.render(agent['id'])
+
+        return f"""## Task Assignment
 
 **Agent:** {agent['name']} ({agent['role']})
 **Task:** {task['id']} - {task['title']}
@@ -212,46 +453,72 @@ class AutoAssign:
 
 ### Instructions
 1. Review prerequisites - ensure all are met
-2. Start task: python3 team_db.py task start {task['id']}
+2. Start task: python3 team_client.py task start {task['id']}
 3. Work on the task using your expertise
 4. Update progress regularly
-5. When done: python3 team_db.py task done {task['id']}
-6. Document learnings in your context
+5. When done: python3 team_client.py task done {task['id']}
+6. Record learnings: python3 team_client.py agent context learn {agent['id']} "..." --task {task['id']}
 
 **Remember:** You are {agent['name']}. Use your expertise and context to complete this task effectively.
 """
 
-            # Spawn subagent
-            result = subprocess.run(
-                ['openclaw', 'sessions_spawn', 
-                 '--task', task_message,
-                 '--agent', agent['id'],
-                 '--label', f"auto-task-{task['id']}",
-                 '--runTimeoutSeconds', '1800'],  # 30 min timeout
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            success = result.returncode == 0
-            if success:
+    def spawn_subagent(self, task: Dict, agent: Dict) -> bool:
+        """Spawn subagent via openclaw with full context"""
+        return self.spawn_all([(task, agent)], workers=1)[0]['ok']
+
+    def spawn_all(self, assignments: List[Tuple[Dict, Dict]], workers: int = SPAWN_WORKERS,
+                  timeout: int = SPAWN_TIMEOUT) -> List[Dict]:
+        """Spawn a subagent for each assigned (task, agent), at most `workers` at a time
+
+        Messages are built and results written on this thread; the pool only
+        waits on openclaw. A spawn that succeeds marks its agent active. One
+        that fails or takes longer than `timeout` seconds hands the task back
+        to todo, so the next run retries it. Returns one result per
+        assignment, in the order given.
+        """
+        if not assignments:
+            return []
+        messages = [self.build_task_message(task, agent) for task, agent in assignments]
+        results: List[Optional[Dict]] = [None] * len(assignments)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(assignments))),
+                                thread_name_prefix='spawn') as pool:
+            futures = {pool.submit(run_spawn, task['id'], agent['id'], message, timeout): i
+                       for i, ((task, agent), message) in enumerate(zip(assignments, messages))}
+            for future in as_completed(futures):
+                i = futures[future]
+                task, agent = assignments[i]
+                results[i] = future.result()
+                self.record_spawn(task, agent, results[i])
+        return results
+
+    def record_spawn(self, task: Dict, agent: Dict, result: Dict):
+        """Write a spawn's outcome: agent active, or task back in the queue"""
+        cursor = self.conn.cursor()
+        try:
+            if result['ok']:
                 print(f"  🚀 Spawned {agent['name']} for {task['id']}")
-                # Update agent status
-                cursor = self.conn.cursor()
                 cursor.execute('''
-                    UPDATE agents 
+                    UPDATE agents
                     SET status = 'active', last_heartbeat = CURRENT_TIMESTAMP
                     WHERE id = ?
                 ''', (agent['id'],))
-                self.conn.commit()
             else:
-                print(f"  ⚠️ Spawn failed: {result.stderr}")
-            
-            return success
-            
+                print(f"  ⚠️ Spawn failed for {task['id']}: {result['error']}")
+                released = transition(cursor, task['id'], 'release', agent_id=agent['id'],
+                                      notes=f"Spawn failed: {result['error']}", expected='todo')
+                if not released['ok']:
+                    print(f"  ⏭️ {describe_failure(released)}")
+                cursor.execute('''
+                    UPDATE agents
+                    SET current_task_id = NULL,
+                        total_tasks_assigned = total_tasks_assigned - 1,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ? AND current_task_id = ?
+                ''', (agent['id'], task['id']))
+            self.conn.commit()
         except Exception as e:
-            print(f"[Error] Failed to spawn: {e}")
-            return False
+            self.conn.rollback()
+            print(f"[Error] Failed to record spawn of {task['id']}: {e}")
 
     def send_notification(self, message: str) -> bool:
         """Send notification to Telegram"""
@@ -268,64 +535,110 @@ class AutoAssign:
             print(f"[Notification Error] {e}")
             return False
 
-    def run(self) -> Dict:
-        """Main auto-assign logic"""
+    def run(self, strategy: str = 'greedy', workers: int = SPAWN_WORKERS,
+            spawn_timeout: int = SPAWN_TIMEOUT) -> Dict:
+        """Main auto-assign logic
+
+        greedy gives each ready task, in priority order, the best agent still
+        idle; optimal plans all of them at once with plan_optimal. Tasks are
+        claimed first, then their subagents spawn concurrently (spawn_all).
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}")
         print("🤖 AI Team Auto-Assign with Context Starting...")
         print("=" * 60)
         
-        idle_agents = self.get_idle_agents()
-        todo_tasks = self.get_unassigned_todo_tasks()
+        idle_agents = self.get_idle_agents(refresh=True)
+        counts = self.count_unassigned_todo_tasks()
         
         print(f"\n📊 Status:")
         print(f"   Idle agents: {len(idle_agents)}")
-        print(f"   Unassigned tasks: {len(todo_tasks)}")
+        print(f"   Unassigned tasks: {counts['ready']} ready, {counts['waiting']} waiting on dependencies")
         
         if not idle_agents:
             print("\n⚠️ No idle agents available")
-            return {'assigned': 0, 'agents': 0, 'tasks': len(todo_tasks)}
-        
-        if not todo_tasks:
-            print("\n✅ No unassigned tasks")
-            return {'assigned': 0, 'agents': len(idle_agents), 'tasks': 0}
+            return {'assigned': 0, 'failed': 0, 'agents': 0, 'tasks': counts['ready']}
         
-        assigned_count = 0
-        assigned_pairs = []
+        agent_count = len(idle_agents)
+        pairs = agent_count * min(counts['ready'], agent_count * OPTIMAL_WINDOW)
+        if strategy == 'optimal' and pairs > OPTIMAL_WARN_PAIRS:
+            print(f"\n⚠️ Optimal plan over {pairs:,} agent x task pairs (past {OPTIMAL_WARN_PAIRS:,}"
+                  f"{'' if numpy is not None else ' without NumPy'}) may take a second or more; greedy stays fast")
+        assignments = []
+        tried: Set[str] = set()
         
-        for task in todo_tasks:
-            if not idle_agents:
+        while idle_agents:
+            # Each agent takes one task, so greedy only needs the head of the ready
+            # queue; optimal looks further down it for tasks that fit the agents better.
+            # Tasks already tried this run are skipped, so a claim lost to another
+            # runner lets its agent go on to the next ready task instead of idling
+            window = len(idle_agents) * (OPTIMAL_WINDOW if strategy == 'optimal' else 1)
+            todo_tasks = [task for task in self.get_unassigned_todo_tasks(limit=window + len(tried))
+                          if task['id'] not in tried]
+            if not todo_tasks:
+                if not tried:
+                    print("\n✅ No unassigned tasks")
+                    return {'assigned': 0, 'failed': 0, 'agents': agent_count, 'tasks': 0}
                 break
+            tried.update(task['id'] for task in todo_tasks)
             
-            best_agent = self.find_best_agent(task, idle_agents)
-            if not best_agent:
-                best_agent = idle_agents[0]
+            plan = self.plan_optimal(todo_tasks, idle_agents) if strategy == 'optimal' else None
+            lost_claims = 0
             
-            print(f"\n📝 Task: {task['id']}")
-            print(f"   Title: {task['title']}")
-            print(f"   → Agent: {best_agent['name']} (match score: context + role)")
-            
-            if self.assign_task(task['id'], best_agent['id']):
-                if self.spawn_subagent(task, best_agent):
-                    assigned_count += 1
-                    assigned_pairs.append({
-                        'task': task['id'],
-                        'agent': best_agent['name']
-                    })
+            for task in todo_tasks:
+                if not idle_agents:
+                    break
+                
+                if plan is not None:
+                    best_agent = plan.get(task['id'])
+                    if not best_agent:
+                        continue
+                else:
+                    best_agent = self.find_best_agent(task, idle_agents)
+                    if not best_agent:
+                        best_agent = idle_agents[0]
+                
+                print(f"\n📝 Task: {task['id']}")
+                print(f"   Title: {task['title']}")
+                print(f"   → Agent: {best_agent['name']} (match score: context + role)")
+                
+                if self.assign_task(task['id'], best_agent['id']):
+                    assignments.append((task, best_agent))
                     idle_agents = [a for a in idle_agents if a['id'] != best_agent['id']]
+                else:
+                    lost_claims += 1
+            
+            # Without a lost claim every agent left idle had no task (or, for
+            # optimal, none it was allowed on) in the window already searched
+            if not lost_claims:
+                break
         
-        if assigned_count > 0:
-            message = f"🤖 *Auto-Assigned {assigned_count} Tasks*\n\n"
-            for pair in assigned_pairs:
-                message += f"• {pair['task']} → {pair['agent']}\n"
+        if assignments:
+            print(f"\n🚀 Spawning {len(assignments)} subagents ({min(workers, len(assignments))} at a time)...")
+        results = self.spawn_all(assignments, workers, spawn_timeout)
+        spawned = [(task, agent) for (task, agent), r in zip(assignments, results) if r['ok']]
+        failed = [(task, agent, r['error']) for (task, agent), r in zip(assignments, results) if not r['ok']]
+        
+        if assignments:
+            message = f"🤖 *Auto-Assigned {len(spawned)} Tasks*\n\n"
+            for task, agent in spawned:
+                message += f"• {task['id']} → {agent['name']}\n"
+            if failed:
+                message += f"\n⚠️ *{len(failed)} Spawns Failed* (back in the queue)\n"
+                for task, agent, error in failed:
+                    message += f"• {task['id']} → {agent['name']}: {error[:100]}\n"
             message += f"\n⏰ {datetime.now().strftime('%H:%M')}"
             self.send_notification(message)
         
         print("\n" + "=" * 60)
-        print(f"✅ Auto-assign complete: {assigned_count} tasks")
+        print(f"✅ Auto-assign complete: {len(spawned)} tasks ({strategy})"
+              + (f", {len(failed)} spawns failed" if failed else ''))
         
         return {
-            'assigned': assigned_count,
-            'agents': len(idle_agents) + assigned_count,
-            'tasks': len(todo_tasks)
+            'assigned': len(spawned),
+            'failed': len(failed),
+            'agents': agent_count,
+            'tasks': counts['ready']
         }
 
 
@@ -334,16 +647,65 @@ def main():
     parser = argparse.ArgumentParser(description='AI Team Auto-Assign with Context')
     parser.add_argument('--run', action='store_true', help='Run auto-assign once')
     parser.add_argument('--status', action='store_true', help='Show status')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='greedy',
+                        help='greedy: best idle agent per task in queue order; optimal: best matching overall')
+    parser.add_argument('--explain', metavar='TASK_ID', help='Show how each idle agent scores for a task')
+    parser.add_argument('--top', type=int, default=10, help='Agents shown by --explain')
+    parser.add_argument('--workers', type=int, default=SPAWN_WORKERS, help='Subagents spawned at once')
+    parser.add_argument('--spawn-timeout', type=int, default=SPAWN_TIMEOUT,
+                        help='Seconds a spawn may take before its task goes back to the queue')
+    parser.add_argument('--rules', action='store_true', help='List role match rules')
+    parser.add_argument('--add-rule', nargs=2, metavar=('KEYWORD', 'ROLE'),
+                        help='Send tasks naming KEYWORD to agents of ROLE (or with that ID)')
+    parser.add_argument('--remove-rule', nargs=2, metavar=('KEYWORD', 'ROLE'), help='Drop a role match rule')
     args = parser.parse_args()
-    
+
     with AutoAssign() as assigner:
-        if args.status:
+        if args.rules:
+            rules = load_rules(assigner.conn)
+            print(f"📋 {len(rules)} role keywords:")
+            for keyword, roles in rules.items():
+                print(f"   {keyword}: {', '.join(roles)}")
+        elif args.add_rule:
+            keyword, role = args.add_rule
+            try:
+                added = add_rule(assigner.conn.cursor(), keyword, role)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            assigner.conn.commit()
+            print(f"✅ Rule added: {keyword} -> {role}" if added else f"ℹ️ Rule exists: {keyword} -> {role}")
+        elif args.remove_rule:
+            keyword, role = args.remove_rule
+            removed = remove_rule(assigner.conn.cursor(), keyword, role)
+            assigner.conn.commit()
+            print(f"🗑️ Rule removed: {keyword} -> {role}" if removed else f"❌ No rule {keyword} -> {role}")
+        elif args.explain:
+            result = assigner.explain(args.explain, args.top)
+            if not result:
+                print(f"❌ Task {args.explain} not found")
+                return
+            task = result['task']
+            terms = ', '.join(f"{t['term']} {t['weight']:.3f}" for t in result['terms']) or '-'
+            print(f"🔍 {task['id']}: {task['title']} ({task['priority']}, {task['status']})")
+            print(f"   Terms (TF-IDF over {result['indexed_contexts']} agent contexts): {terms}")
+            print(f"   Role keywords: {', '.join(result['keywords']) or '-'}")
+            print(f"   Idle agents: {result['idle_agents']}")
+            for rank, row in enumerate(result['agents'], 1):
+                print(f"\n   {rank}. {row['name']} ({row['agent_id']}, {row['role']}): {row['score']}"
+                      f" = role {row['role_points']} + context {row['context_points']} + load {row['load_points']}")
+                if row['keywords']:
+                    print(f"      role keywords: {', '.join(row['keywords'])}")
+                if row['terms']:
+                    shares = ', '.join(f"{t['term']} {t['points']}" for t in row['terms'][:5])
+                    print(f"      context terms: {shares}")
+        elif args.status:
             agents = assigner.get_idle_agents()
-            tasks = assigner.get_unassigned_todo_tasks()
+            counts = assigner.count_unassigned_todo_tasks()
             print(f"Idle agents: {len(agents)}")
-            print(f"Unassigned tasks: {len(tasks)}")
+            print(f"Unassigned tasks: {counts['ready']} ready, {counts['waiting']} waiting on dependencies")
         else:
-            result = assigner.run()
+            result = assigner.run(args.strategy, args.workers, args.spawn_timeout)
 
 
 if __name__ == '__main__':
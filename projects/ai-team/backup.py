@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+AI Team Backups
+Online backups of team.db with the SQLite backup API, snapshot rotation,
+verify and restore
+
+Copying team.db with cp while agents write can miss commits still in the
+WAL or catch pages mid-write. backup() copies through the connection
+instead, BACKUP_PAGES pages per step, into a .partial file that is checked
+and renamed into place only when complete. A commit from another connection
+restarts a stepped backup; after MAX_RESTARTS restarts the copy finishes in
+one step, which in WAL mode reads a single snapshot while writers carry on
+(only checkpoints wait for it).
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from migrations import LATEST_VERSION, migrate
+from storage import database_path
+
+BACKUP_PAGES = 1024          # 4 MB per step with 4 KB pages
+MAX_RESTARTS = 3
+KEEP_SNAPSHOTS = 7
+SNAPSHOT_FORMAT = '%Y%m%d-%H%M%S'
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _stepped_copy(source: sqlite3.Connection, target: sqlite3.Connection, pages: int, pause: float) -> int:
+    """Backup in steps of pages, returns how often writers made it start over"""
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _TooManyRestarts()  # aborts this backup
+        last_remaining = remaining
+        if pause:
+            time.sleep(pause)
+
+    source.backup(target, pages=pages, progress=progress)
+    return restarts
+
+
+def backup(conn: sqlite3.Connection, dest: Path, pages: int = BACKUP_PAGES, pause: float = 0) -> Dict:
+    """Copy the database behind conn to dest while it stays in use
+
+    pause sleeps between steps to leave disk bandwidth to writers. Raises
+    sqlite3.DatabaseError if the copy fails quick_check (dest untouched).
+    Returns {path, bytes, seconds, mode ('stepped' | 'snapshot'), restarts}.
+    """
+    dest = Path(dest)
+    partial = dest.with_name(dest.name + '.partial')
+    partial.unlink(missing_ok=True)
+    start = time.perf_counter()
+    target = sqlite3.connect(str(partial))
+    try:
+        try:
+            mode, restarts = 'stepped', _stepped_copy(conn, target, pages, pause)
+        except _TooManyRestarts:
+            conn.backup(target)
+            mode, restarts = 'snapshot', MAX_RESTARTS + 1
+        # A standalone copy: no -wal / -shm files next to it
+        target.execute('PRAGMA journal_mode = DELETE')
+        check = target.execute('PRAGMA quick_check').fetchone()[0]
+    finally:
+        target.close()
+    if check != 'ok':
+        partial.unlink()
+        raise sqlite3.DatabaseError(f"Backup failed quick_check: {check}")
+    os.replace(partial, dest)
+    return {'path': dest, 'bytes': dest.stat().st_size, 'seconds': round(time.perf_counter() - start, 2),
+            'mode': mode, 'restarts': restarts}
+
+
+def list_snapshots(db_path: Path) -> List[Dict]:
+    """[{path, bytes, taken}] of <db>.backup.<timestamp> files, newest first"""
+    db_path = Path(db_path)
+    snapshots = [path for path in db_path.parent.glob(f"{db_path.name}.backup.*")
+                 if not path.name.endswith('.partial')]
+    return [{'path': path, 'bytes': path.stat().st_size,
+             'taken': path.name[len(db_path.name) + len('.backup.'):]}
+            for path in sorted(snapshots, reverse=True)]
+
+
+def rotate_snapshots(db_path: Path, keep: int = KEEP_SNAPSHOTS) -> List[Path]:
+    """Delete all but the keep newest snapshots, returns the deleted paths"""
+    removed = [snapshot['path'] for snapshot in list_snapshots(db_path)[keep:]]
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+def snapshot(conn: sqlite3.Connection, keep: int = KEEP_SNAPSHOTS, suffix: str = '') -> Dict:
+    """Back up to <db>.backup.<timestamp><suffix> and rotate old snapshots"""
+    db_path = database_path(conn)
+    result = backup(conn, db_path.with_name(f"{db_path.name}.backup.{datetime.now():{SNAPSHOT_FORMAT}}{suffix}"))
+    result['rotated'] = rotate_snapshots(db_path, keep)
+    return result
+
+
+def verify_backup(path: Path) -> Dict:
+    """Full integrity_check of a backup file, opened read-only
+
+    Returns {ok, errors, user_version, tasks, bytes, seconds}; user_version
+    below migrations.LATEST_VERSION is fine, a restore migrates it.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"No backup at {path}")
+    start = time.perf_counter()
+    conn = sqlite3.connect(f"file:{path.resolve()}?mode=ro", uri=True)
+    try:
+        errors = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+        ok = errors == ['ok']
+        user_version = conn.execute('PRAGMA user_version').fetchone()[0]
+        has_tasks = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks'").fetchone()
+        tasks = conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0] if ok and has_tasks else None
+    except sqlite3.DatabaseError as e:
+        ok, errors, user_version, tasks = False, [str(e)], None, None
+    finally:
+        conn.close()
+    return {'ok': ok, 'errors': [] if ok else errors, 'user_version': user_version,
+            'latest_version': LATEST_VERSION, 'tasks': tasks, 'bytes': path.stat().st_size,
+            'seconds': round(time.perf_counter() - start, 2)}
+
+
+def restore(conn: sqlite3.Connection, source: Path, keep: int = KEEP_SNAPSHOTS) -> Dict:
+    """Replace the database behind conn with a verified backup
+
+    The current contents are snapshotted first (suffix -pre-restore). The
+    copy goes through conn, so other connections see the restored data
+    instead of a file swapped under them. The change feed is emptied and its
+    seq moved past every event consumers may have seen, so follow() sends
+    them a reset; an older backup is migrated to the current schema.
+    Raises ValueError if the backup fails verification.
+    """
+    check = verify_backup(source)
+    if not check['ok']:
+        raise ValueError(f"Backup {source} failed integrity_check: {'; '.join(check['errors'][:5])}")
+    saved = snapshot(conn, keep=keep, suffix='-pre-restore')
+
+    def feed_seq():
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    last_seq = feed_seq()
+    backup_conn = sqlite3.connect(f"file:{Path(source).resolve()}?mode=ro", uri=True)
+    try:
+        backup_conn.backup(conn)
+    finally:
+        backup_conn.close()
+    migrate(conn)
+    # The restored events describe the backup's past, not what consumers saw;
+    # leaving a gap after last_seq makes every one of them start over
+    reset_seq = max(last_seq, feed_seq()) + 1
+    conn.execute('DELETE FROM changes')
+    if not conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'changes'", (reset_seq,)).rowcount:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('changes', ?)", (reset_seq,))
+    conn.commit()
+    return {'restored': Path(source), 'tasks': check['tasks'], 'pre_restore': saved['path']}
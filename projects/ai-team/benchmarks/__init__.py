@@ -0,0 +1,4 @@
+"""
+AI Team Benchmarks
+Run from projects/ai-team, e.g. python3 -m benchmarks.bench_contention
+"""
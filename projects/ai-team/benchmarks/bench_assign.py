@@ -0,0 +1,261 @@
+"""
+Auto-assign benchmark: per-agent COUNT queries vs the assignment snapshot
+
+Builds a fixture with --agents idle agents (roles cycled, each with a few
+hundred bytes of context and some in_progress tasks) and --tasks todo tasks,
+then scores every task against every agent two ways:
+
+  legacy    find_best_agent as it was: one COUNT(*) of in_progress tasks
+            per agent per task, each task word substring-searched in every
+            context
+  snapshot  AssignmentSnapshot: one GROUP BY for all loads, context
+            relevance from the TF-IDF index, scoring in memory
+
+Reports the statements each runs, how long each takes (building the
+context index on first use is timed on its own), and how often both pick
+the same agent; they differ where substring hits and TF-IDF disagree.
+
+Then plans one run with each strategy: greedy (the head of the queue, best
+idle agent per task) and optimal (plan_optimal over OPTIMAL_WINDOW ready
+tasks per agent). For each it reports the planning time, the summed match
+score, how many tasks went to an agent of a role they name, and the
+priorities assigned. With NumPy installed the optimal plan is timed again
+on the pure Python path (matching and the weight matrix built in lists),
+which must come out the same. Finally times AutoAssign.run per strategy
+with benchmarks/bin first on PATH, so openclaw is a no-op.
+
+Usage: python3 -m benchmarks.bench_assign [--agents 200] [--tasks 1000] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import auto_assign  # noqa: E402
+import matching  # noqa: E402
+from auto_assign import OPTIMAL_WINDOW, STRATEGIES, AssignmentSnapshot, AutoAssign  # noqa: E402
+from benchmarks.schema import create_database  # noqa: E402
+from context_index import refresh_index  # noqa: E402
+from migrations import ROLE_MATCH_DEFAULTS as ROLE_MATCH  # noqa: E402
+from storage import connect  # noqa: E402
+
+ROLES = sorted({role for roles in ROLE_MATCH.values() for role in roles})
+WORDS = ['api', 'backend', 'frontend', 'database', 'schema', 'migration', 'dashboard', 'report',
+         'design', 'review', 'test', 'deploy', 'document', 'plan', 'analyze', 'cache', 'index',
+         'login', 'session', 'payment', 'search', 'upload', 'export', 'mobile', 'layout']
+PRIORITIES = ['critical'] * 1 + ['high'] * 3 + ['normal'] * 5 + ['low'] * 3
+FAKE_OPENCLAW = Path(__file__).resolve().parent / "bin"
+
+
+def _populate(conn, agents: int, tasks: int, seed: int):
+    rng = random.Random(seed)
+    conn.execute('DELETE FROM agents')
+    for i in range(agents):
+        agent_id = f"agent-{i:04d}"
+        conn.execute("INSERT INTO agents (id, name, role, status, total_tasks_completed) VALUES (?, ?, ?, 'idle', ?)",
+                     (agent_id, f"Agent {i}", ROLES[i % len(ROLES)], rng.randrange(50)))
+        context = ' '.join(rng.choice(WORDS) + rng.choice(['', 's', 'ing', ' service']) for _ in range(60))
+        conn.execute('INSERT INTO agent_context (agent_id, context) VALUES (?, ?)', (agent_id, context))
+        for j in range(rng.randrange(4)):
+            conn.execute("INSERT INTO tasks (id, title, project_id, status, assignee_id) "
+                         "VALUES (?, 'Ongoing work', 'PROJ-001', 'in_progress', ?)", (f"T-LOAD-{i:04d}-{j}", agent_id))
+    for i in range(tasks):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+        description = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 20)))
+        conn.execute("INSERT INTO tasks (id, title, description, project_id, status, priority) "
+                     "VALUES (?, ?, ?, 'PROJ-001', 'todo', ?)",
+                     (f"T-TODO-{i:05d}", title, description, rng.choice(PRIORITIES)))
+    conn.commit()
+
+
+def legacy_find_best_agent(conn, task: dict, agents: list) -> dict:
+    """find_best_agent before the snapshot, kept here as the baseline"""
+    task_text = task['title'].lower() + ' ' + (task.get('description') or '').lower()
+    best_agent = None
+    best_score = -1
+    for agent in agents:
+        score = 0
+        agent_role = agent['role'].lower()
+        context = (agent.get('context') or '').lower()
+        for keyword, matching_roles in ROLE_MATCH.items():
+            if keyword in task_text:
+                if agent['id'] in matching_roles or agent_role in matching_roles:
+                    score += 10
+        for word in task_text.split():
+            if len(word) > 3 and word in context:
+                score += 2
+        active_count = conn.execute('''
+            SELECT COUNT(*) FROM tasks
+            WHERE assignee_id = ? AND status = 'in_progress'
+        ''', (agent['id'],)).fetchone()[0]
+        score -= active_count * 5
+        if score > best_score:
+            best_score = score
+            best_agent = agent
+    return best_agent
+
+
+@contextmanager
+def _without_numpy():
+    """plan_optimal and max_weight_matching on their pure Python paths"""
+    saved = auto_assign.numpy, matching.numpy
+    auto_assign.numpy = matching.numpy = None
+    try:
+        yield
+    finally:
+        auto_assign.numpy, matching.numpy = saved
+
+
+def _plan(assigner: AutoAssign, strategy: str) -> dict:
+    """Pairs one run of strategy would start, without starting them"""
+    start = time.perf_counter()
+    idle = assigner.get_idle_agents()
+    if strategy == 'optimal':
+        tasks = assigner.get_unassigned_todo_tasks(limit=len(idle) * OPTIMAL_WINDOW)
+        plan = assigner.plan_optimal(tasks, idle)
+        pairs = [(task, plan[task['id']]) for task in tasks if task['id'] in plan]
+    else:
+        pairs = []
+        for task in assigner.get_unassigned_todo_tasks(limit=len(idle)):
+            agent = assigner.find_best_agent(task, idle) or idle[0]
+            pairs.append((task, agent))
+            idle = [a for a in idle if a['id'] != agent['id']]
+    seconds = time.perf_counter() - start
+
+    snapshot = assigner.snapshot
+    priorities = {}
+    for task, _ in pairs:
+        priorities[task['priority']] = priorities.get(task['priority'], 0) + 1
+    return {
+        'seconds': round(seconds, 3),
+        'tasks': len(pairs),
+        'score': sum(snapshot.scores(task)[agent['id']] for task, agent in pairs),
+        # Tasks naming a role keyword that got an agent of that role
+        'role_fit': sum(any(agent['id'] in matched for matched in snapshot.role_matches(task).values())
+                        for task, agent in pairs),
+        'role_tasks': sum(bool(snapshot.role_matches(task)) for task, _ in pairs),
+        'priorities': {p: priorities.get(p, 0) for p in ('critical', 'high', 'normal', 'low')},
+        'pairs': {task['id']: agent['id'] for task, agent in pairs},
+    }
+
+
+def run(agents: int, tasks: int, seed: int = 0) -> dict:
+    os.environ['PATH'] = f"{FAKE_OPENCLAW}{os.pathsep}{os.environ.get('PATH', '')}"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "team.db")
+        conn = connect(db_path)
+        _populate(conn, agents, tasks, seed)
+        todo = [dict(row) for row in conn.execute("SELECT * FROM tasks WHERE status = 'todo' ORDER BY id")]
+        start = time.perf_counter()
+        indexed = refresh_index(conn)
+        conn.commit()
+        index_s = time.perf_counter() - start
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        with AutoAssign(db_path) as assigner:
+            idle = assigner.get_idle_agents()
+
+        start = time.perf_counter()
+        legacy = [legacy_find_best_agent(conn, task, idle)['id'] for task in todo]
+        legacy_s = time.perf_counter() - start
+        legacy_statements = len(statements)
+
+        del statements[:]
+        start = time.perf_counter()
+        snapshot = AssignmentSnapshot(conn)
+        picks = []
+        for task in todo:
+            scores = snapshot.scores(task)
+            best_agent, best_score = None, -1
+            for agent in snapshot.agents:
+                if scores[agent['id']] > best_score:
+                    best_agent, best_score = agent, scores[agent['id']]
+            picks.append(best_agent['id'])
+        snapshot_s = time.perf_counter() - start
+        snapshot_statements = len(statements)
+        conn.set_trace_callback(None)
+        conn.close()
+
+        strategies = {}
+        for strategy in STRATEGIES:
+            with AutoAssign(db_path) as assigner:
+                strategies[strategy] = _plan(assigner, strategy)
+        optimal = strategies['optimal']
+        optimal['numpy'] = matching.numpy is not None
+        if optimal['numpy']:
+            with AutoAssign(db_path) as assigner, _without_numpy():
+                pure = _plan(assigner, 'optimal')
+            optimal['pure_python'] = {'seconds': pure['seconds'], 'same_plan': pure['pairs'] == optimal['pairs']}
+        for plan in strategies.values():
+            del plan['pairs']
+
+        # Each run starts the tasks it assigns, so every strategy gets its own copy
+        for strategy in STRATEGIES:
+            copy = Path(tmp) / f"team-{strategy}.db"
+            source, target = connect(db_path), connect(copy, apply_migrations=False)
+            source.backup(target)
+            source.close()
+            target.close()
+            with AutoAssign(copy) as assigner, redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                assigned = assigner.run(strategy)['assigned']
+                strategies[strategy]['run'] = {'seconds': round(time.perf_counter() - start, 3),
+                                               'assigned': assigned}
+
+    return {
+        'agents': agents, 'tasks': tasks,
+        'legacy': {'seconds': round(legacy_s, 3), 'statements': legacy_statements},
+        'snapshot': {'seconds': round(snapshot_s, 3), 'statements': snapshot_statements},
+        'index': {'seconds': round(index_s, 3), 'contexts': indexed},
+        'speedup': round(legacy_s / snapshot_s, 1) if snapshot_s else None,
+        'same_picks': sum(a == b for a, b in zip(legacy, picks)),
+        'strategies': strategies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Auto-assign scoring benchmark')
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    result = run(args.agents, args.tasks, args.seed)
+    print(f"{result['tasks']} todo tasks × {result['agents']} idle agents")
+    print(f"{'method':>9} {'seconds':>8} {'statements':>11}")
+    for name in ('legacy', 'snapshot'):
+        print(f"{name:>9} {result[name]['seconds']:>8} {result[name]['statements']:>11}")
+    print(f"context index built once for {result['index']['contexts']} agents in {result['index']['seconds']} s")
+    print(f"speedup {result['speedup']}x, same pick for {result['same_picks']} of {result['tasks']} tasks")
+    print(f"\n{'strategy':>9} {'plan s':>7} {'tasks':>6} {'score':>7} {'role fit':>10} "
+          f"{'critical':>9} {'high':>5} {'normal':>7} {'low':>5} {'run s':>6} {'assigned':>9}")
+    for name, s in result['strategies'].items():
+        p = s['priorities']
+        print(f"{name:>9} {s['seconds']:>7} {s['tasks']:>6} {s['score']:>7} "
+              f"{s['role_fit']:>4}/{s['role_tasks']:<5} {p['critical']:>9} {p['high']:>5} {p['normal']:>7} "
+              f"{p['low']:>5} {s['run']['seconds']:>6} {s['run']['assigned']:>9}")
+    optimal = result['strategies']['optimal']
+    if optimal['numpy']:
+        pure = optimal['pure_python']
+        print(f"optimal plan {optimal['seconds']} s with NumPy, {pure['seconds']} s in pure Python"
+              f" ({'same' if pure['same_plan'] else 'DIFFERENT'} plan)")
+    else:
+        print(f"optimal plan {optimal['seconds']} s in pure Python (NumPy not installed)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Backup benchmark: cp vs the backup API on a live, 1 GB+ database
+
+Grows a fixture database to --size-mb with a filler table (the backup copies
+pages, so what fills them does not matter), then keeps one writer committing
+small task updates plus history rows, as agents do, while each method runs:
+
+  cp        copy team.db the old way (the -wal file is left behind)
+  stepped   backup.backup(): BACKUP_PAGES per step, one step when writers
+            keep restarting it
+  snapshot  Connection.backup in a single step
+
+Reports how long each takes, the writer's commit rate and latency meanwhile,
+whether the copy passes quick_check and how many committed history rows it
+is missing compared with the live database when the copy started, plus
+what a full verify_backup() of the result takes.
+
+Usage: python3 -m benchmarks.bench_backup [--size-mb 1024] [--json out.json]
+"""
+
+import argparse
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backup import backup, verify_backup  # noqa: E402
+from benchmarks.schema import create_database  # noqa: E402
+from storage import connect  # noqa: E402
+
+BLOB_BYTES = 3500
+BASELINE_SECONDS = 3
+
+
+def _grow(conn, size_mb: int):
+    conn.execute('CREATE TABLE bench_filler (id INTEGER PRIMARY KEY, payload BLOB)')
+    rows = size_mb * 1_000_000 // BLOB_BYTES
+    for start in range(0, rows, 20000):
+        conn.execute('''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO bench_filler (payload) SELECT randomblob(?) FROM n
+        ''', (min(20000, rows - start), BLOB_BYTES))
+        conn.commit()
+
+
+def _writer(db_path: Path, stop: threading.Event, samples: list):
+    conn = connect(db_path, apply_migrations=False)
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute("UPDATE tasks SET progress = ? WHERE id = 'T-BENCH-0001'", (i % 100,))
+        conn.execute("INSERT INTO task_history (task_id, action, new_progress) VALUES ('T-BENCH-0001', 'progress', ?)",
+                     (i % 100,))
+        conn.commit()
+        samples.append(time.perf_counter() - start)
+        i += 1
+        time.sleep(0.005)
+    conn.close()
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def _check(path: Path, live_max_id: int) -> dict:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        ok = conn.execute('PRAGMA quick_check').fetchone()[0] == 'ok'
+        copied = conn.execute('SELECT COALESCE(MAX(id), 0) FROM task_history').fetchone()[0]
+    except sqlite3.DatabaseError:
+        ok, copied = False, 0
+    finally:
+        conn.close()
+    return {'quick_check_ok': ok, 'missing_commits': max(0, live_max_id - copied)}
+
+
+def run(size_mb: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "live.db")
+        conn = connect(db_path)
+        conn.execute("INSERT INTO tasks (id, title, project_id) VALUES ('T-BENCH-0001', 'Busy task', 'PROJ-001')")
+        start = time.perf_counter()
+        _grow(conn, size_mb)
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        grow_s = time.perf_counter() - start
+        db_mb = db_path.stat().st_size / 1e6
+        print(f"Database grown to {db_mb:.0f} MB in {grow_s:.1f} s")
+
+        def copy_file(dest):
+            shutil.copyfile(db_path, dest)
+            return {'mode': 'cp', 'restarts': 0}
+
+        def stepped(dest):
+            return backup(conn, dest)
+
+        def single_step(dest):
+            target = sqlite3.connect(str(dest))
+            conn.backup(target)
+            target.close()
+            return {'mode': 'snapshot', 'restarts': 0}
+
+        methods = [('baseline', None), ('cp', copy_file), ('stepped', stepped), ('snapshot', single_step)]
+        for name, method in methods:
+            stop, samples = threading.Event(), []
+            writer = threading.Thread(target=_writer, args=(db_path, stop, samples))
+            writer.start()
+            time.sleep(0.5)
+            before = len(samples)
+            live_max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM task_history').fetchone()[0]
+            dest = Path(tmp) / f"copy-{name}.db"
+            start = time.perf_counter()
+            info = method(dest) if method else (time.sleep(BASELINE_SECONDS) or {'mode': '-', 'restarts': 0})
+            elapsed = time.perf_counter() - start
+            during = samples[before:]
+            stop.set()
+            writer.join()
+            wal = Path(f"{db_path}-wal")
+
+            row = {
+                'method': name,
+                'seconds': round(elapsed, 2),
+                'mode': info['mode'],
+                'restarts': info['restarts'],
+                'commits_per_s': round(len(during) / elapsed, 1),
+                'write_p50_ms': round(_percentile(during, 0.5) * 1000, 2),
+                'write_p99_ms': round(_percentile(during, 0.99) * 1000, 2),
+                'write_max_ms': round(max(during, default=0) * 1000, 2),
+                'wal_mb': round(wal.stat().st_size / 1e6, 1) if wal.exists() else 0.0,
+            }
+            if method:
+                row.update(_check(dest, live_max_id))
+                if name == 'stepped':
+                    row['verify_s'] = verify_backup(dest)['seconds']
+                dest.unlink()
+            results.append(row)
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backup benchmark')
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = run(args.size_mb)
+    print(f"{'method':>9} {'seconds':>8} {'mode':>9} {'restarts':>8} {'commits/s':>10} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'max ms':>8} {'wal MB':>7} {'check':>6} {'missing':>8}")
+    for r in results:
+        check = '' if 'quick_check_ok' not in r else ('ok' if r['quick_check_ok'] else 'FAIL')
+        print(f"{r['method']:>9} {r['seconds']:>8} {r['mode']:>9} {r['restarts']:>8} {r['commits_per_s']:>10} "
+              f"{r['write_p50_ms']:>7} {r['write_p99_ms']:>7} {r['write_max_ms']:>8} {r['wal_mb']:>7} "
+              f"{check:>6} {r.get('missing_commits', ''):>8}")
+
+    verify = next((r['verify_s'] for r in results if 'verify_s' in r), None)
+    if verify is not None:
+        print(f"verify_backup (integrity_check): {verify} s")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Bulk import benchmark: create_task per row vs create_tasks_bulk
+
+Also streams a large generated .jsonl file through `iter_task_file` to show
+that peak memory does not grow with the file size.
+
+Usage: python3 -m benchmarks.bench_bulk_import [--tasks 500] [--stream-rows 100000 200000] [--json out.json]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from team_db import AITeamDB, iter_task_file  # noqa: E402
+
+
+def _task(i: int) -> dict:
+    return {'title': f"Sprint task {i}", 'project_id': 'PROJ-001',
+            'priority': ('critical', 'high', 'normal', 'low')[i % 4],
+            'description': f"Generated task number {i}"}
+
+
+def bench_sprint(tasks: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "single.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            start = time.perf_counter()
+            for i in range(tasks):
+                db.create_task(**_task(i))
+            single = time.perf_counter() - start
+
+        db_path = create_database(Path(tmp) / "bulk.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            start = time.perf_counter()
+            db.create_tasks_bulk(_task(i) for i in range(tasks))
+            bulk = time.perf_counter() - start
+            outbox = db.conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+    return {'tasks': tasks, 'create_task_s': round(single, 3), 'bulk_s': round(bulk, 3),
+            'speedup': round(single / bulk, 1), 'bulk_notifications': outbox}
+
+
+def bench_stream(rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "tasks.jsonl"
+        with open(source, 'w') as f:
+            for i in range(rows):
+                f.write(json.dumps(_task(i)) + "\n")
+
+        # Timing and memory are measured in separate runs: tracemalloc slows inserts
+        db_path = create_database(Path(tmp) / "stream.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            start = time.perf_counter()
+            result = db.create_tasks_bulk(iter_task_file(source))
+            elapsed = time.perf_counter() - start
+
+        db_path = create_database(Path(tmp) / "stream-mem.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            tracemalloc.start()
+            db.create_tasks_bulk(iter_task_file(source))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    return {'rows': rows, 'created': result['created'], 'seconds': round(elapsed, 2),
+            'rows_per_sec': round(rows / elapsed), 'peak_mb': round(peak / 1e6, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk task import benchmark')
+    parser.add_argument('--tasks', type=int, default=500)
+    parser.add_argument('--stream-rows', type=int, nargs='+', default=[50000, 200000])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    sprint = bench_sprint(args.tasks)
+    print(f"{sprint['tasks']} tasks: create_task loop {sprint['create_task_s']}s, "
+          f"bulk {sprint['bulk_s']}s ({sprint['speedup']}x), "
+          f"{sprint['bulk_notifications']} notification queued")
+
+    streams = []
+    print(f"\n{'rows':>8} {'seconds':>8} {'rows/s':>8} {'peak MB':>8}")
+    for rows in args.stream_rows:
+        r = bench_stream(rows)
+        streams.append(r)
+        print(f"{r['rows']:>8} {r['seconds']:>8} {r['rows_per_sec']:>8} {r['peak_mb']:>8}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'sprint': sprint, 'stream': streams}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
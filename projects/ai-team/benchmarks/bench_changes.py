@@ -0,0 +1,136 @@
+"""
+Change feed benchmark: re-polling whole views vs following the changes log
+
+For a board of N tasks, compares what a consumer pays per check when
+nothing or a little has changed: re-reading the task and agent views (what
+the dashboard and cron scripts do) against a PRAGMA data_version check plus
+the changes after the last seq. Also reports what the change triggers add
+to update_progress, and how soon follow() delivers a commit made by
+another connection.
+
+Usage: python3 -m benchmarks.bench_changes [--sizes 1000 10000] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from change_feed import follow, latest_seq, read_changes  # noqa: E402
+from storage import connect  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+READS = 50
+UPDATES = 500
+COMMITS = 100
+
+
+def _median_ms(fn, reads: int = READS) -> float:
+    samples = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 4)
+
+
+def _full_poll(conn):
+    conn.execute('SELECT * FROM v_task_summary').fetchall()
+    conn.execute('SELECT * FROM agents').fetchall()
+
+
+def _committer(db_path: Path, task_ids, sent: dict):
+    conn = connect(db_path, apply_migrations=False)
+    for i, task_id in enumerate(task_ids):
+        conn.execute('UPDATE tasks SET progress = ? WHERE id = ?', (i % 100, task_id))
+        conn.commit()
+        sent[task_id] = time.perf_counter()
+        time.sleep(0.02)
+    conn.close()
+
+
+def bench_size(size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "changes.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db, redirect_stdout(io.StringIO()):
+            db.create_tasks_bulk(({'title': f"Task {i}", 'project_id': 'PROJ-001'} for i in range(size)),
+                                 chunk_size=5000)
+            task_ids = [row[0] for row in db.conn.execute('SELECT id FROM tasks ORDER BY id')]
+            conn = connect(db_path, readonly=True)
+
+            full_ms = _median_ms(lambda: _full_poll(conn))
+            idle_ms = _median_ms(lambda: conn.execute('PRAGMA data_version').fetchone())
+            seq = latest_seq(conn)
+            for task_id in task_ids[:10]:
+                db.update_progress(task_id, 10)
+            delta_ms = _median_ms(lambda: read_changes(conn, seq))
+
+            start = time.perf_counter()
+            for task_id in task_ids[:UPDATES]:
+                db.update_progress(task_id, 50, 'halfway')
+            update_ms = (time.perf_counter() - start) / UPDATES * 1000
+            triggers = db.conn.execute('''
+                SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_changes_%'
+            ''').fetchall()
+            for name, _ in triggers:
+                db.conn.execute(f'DROP TRIGGER {name}')
+            start = time.perf_counter()
+            for task_id in task_ids[UPDATES:2 * UPDATES]:
+                db.update_progress(task_id, 50, 'halfway')
+            update_plain_ms = (time.perf_counter() - start) / UPDATES * 1000
+            for _, sql in triggers:
+                db.conn.execute(sql)
+            db.conn.commit()
+
+            sent, latencies = {}, []
+            writer = threading.Thread(target=_committer, args=(db_path, task_ids[:COMMITS], sent))
+            since = latest_seq(conn)
+            writer.start()
+            for event in follow(conn, since, ['task'], idle_timeout=1):
+                latencies.append(time.perf_counter() - sent.get(event['id'], time.perf_counter()))
+            writer.join()
+            conn.close()
+
+    latencies.sort()
+    return {
+        'tasks': size,
+        'full_poll_ms': full_ms,
+        'idle_check_ms': idle_ms,
+        'delta_read_ms': delta_ms,
+        'update_ms': round(update_ms, 3),
+        'update_without_feed_ms': round(update_plain_ms, 3),
+        'events': len(latencies),
+        'latency_p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+        'latency_max_ms': round(latencies[-1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Change feed benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = [bench_size(size) for size in args.sizes]
+    print(f"{'tasks':>7} {'full poll ms':>13} {'idle check ms':>14} {'delta ms':>9} "
+          f"{'update ms':>10} {'w/o feed':>9} {'events':>7} {'p50 ms':>7} {'max ms':>7}")
+    for r in results:
+        print(f"{r['tasks']:>7} {r['full_poll_ms']:>13} {r['idle_check_ms']:>14} {r['delta_read_ms']:>9} "
+              f"{r['update_ms']:>10} {r['update_without_feed_ms']:>9} {r['events']:>7} "
+              f"{r['latency_p50_ms']:>7} {r['latency_max_ms']:>7}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Write contention benchmark: bare sqlite3.connect vs storage.connect (WAL + pragmas)
+
+Several writer processes heartbeat and update task progress while reader
+processes poll the dashboard views, like cron + agents do in production.
+
+Usage: python3 -m benchmarks.bench_contention [--writers 6] [--readers 2] [--seconds 5] [--json out.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+import storage  # noqa: E402
+
+AGENTS = 20
+TASKS = 200
+
+
+def _open(db_path: str, mode: str, readonly: bool = False) -> sqlite3.Connection:
+    if mode == 'legacy':
+        return sqlite3.connect(db_path)
+    return storage.connect(Path(db_path), readonly=readonly, apply_migrations=False)
+
+
+def _writer(db_path: str, mode: str, seconds: float, seed: int, out):
+    rng = random.Random(seed)
+    conn = _open(db_path, mode)
+    ops = errors = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            if rng.random() < 0.5:
+                conn.execute('''
+                    UPDATE agents SET last_heartbeat = CURRENT_TIMESTAMP,
+                                      updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (f"agent-{rng.randint(1, AGENTS):03d}",))
+            else:
+                task_id = f"T-BENCH-{rng.randint(1, TASKS):05d}"
+                progress = rng.randint(0, 100)
+                conn.execute('''
+                    UPDATE tasks SET progress = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (progress, task_id))
+                conn.execute('''
+                    INSERT INTO task_history (task_id, action, new_progress)
+                    VALUES (?, 'updated', ?)
+                ''', (task_id, progress))
+            conn.commit()
+            ops += 1
+            latencies.append(time.perf_counter() - start)
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.rollback()
+    conn.close()
+    out.put({'ops': ops, 'errors': errors, 'latencies': latencies})
+
+
+def _reader(db_path: str, mode: str, seconds: float, out):
+    conn = _open(db_path, mode, readonly=True)
+    reads = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            # Hold a read transaction across several statements like the dashboard does
+            conn.execute('BEGIN')
+            conn.execute('SELECT * FROM v_dashboard_stats').fetchall()
+            conn.execute('SELECT * FROM v_task_summary ORDER BY due_date, priority').fetchall()
+            conn.execute('SELECT * FROM v_agent_workload').fetchall()
+            conn.execute('COMMIT')
+            reads += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.rollback()
+    conn.close()
+    out.put({'reads': reads, 'read_errors': errors})
+
+
+def _prepare(db_path: Path, mode: str):
+    create_database(db_path, agents=AGENTS)
+    conn = sqlite3.connect(str(db_path))
+    conn.executemany(
+        'INSERT INTO tasks (id, title, project_id, status) VALUES (?, ?, ?, ?)',
+        [(f"T-BENCH-{i:05d}", f"Bench task {i}", 'PROJ-001', 'in_progress') for i in range(1, TASKS + 1)]
+    )
+    conn.commit()
+    conn.close()
+    if mode == 'tuned':
+        storage.connect(db_path).close()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_mode(mode: str, writers: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / f"contention-{mode}.db"
+        _prepare(db_path, mode)
+
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_writer, args=(str(db_path), mode, seconds, i, out))
+                 for i in range(writers)]
+        procs += [multiprocessing.Process(target=_reader, args=(str(db_path), mode, seconds, out))
+                  for _ in range(readers)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    latencies = [l for r in results for l in r.get('latencies', [])]
+    ops = sum(r.get('ops', 0) for r in results)
+    return {
+        'mode': mode,
+        'writers': writers,
+        'readers': readers,
+        'seconds': seconds,
+        'write_ops': ops,
+        'writes_per_sec': round(ops / seconds, 1),
+        'write_errors': sum(r.get('errors', 0) for r in results),
+        'reads': sum(r.get('reads', 0) for r in results),
+        'read_errors': sum(r.get('read_errors', 0) for r in results),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite write contention benchmark')
+    parser.add_argument('--writers', type=int, default=6)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = [run_mode(mode, args.writers, args.readers, args.seconds)
+               for mode in ('legacy', 'tuned')]
+
+    print(f"{'Mode':<8} {'writes/s':>10} {'w-errors':>9} {'reads':>7} {'r-errors':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['writes_per_sec']:>10} {r['write_errors']:>9} {r['reads']:>7} "
+              f"{r['read_errors']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
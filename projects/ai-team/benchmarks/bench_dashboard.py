@@ -0,0 +1,83 @@
+"""
+Dashboard stats benchmark: full aggregate recount vs trigger-maintained counters
+
+Usage: python3 -m benchmarks.bench_dashboard [--sizes 10000 100000 1000000] [--reads 50] [--json out.json]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from migrations import DASHBOARD_COUNTERS_RECOMPUTE  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+STATUSES = ('todo', 'todo', 'in_progress', 'review', 'done', 'done', 'done', 'blocked', 'backlog')
+
+
+def _tasks(count: int):
+    for i in range(count):
+        yield {'title': f"Task {i}", 'project_id': f"PROJ-00{i % 3 + 1}",
+               'due_date': f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}"}
+
+
+def _time(fn, reads: int) -> float:
+    samples = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def bench_size(size: int, reads: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "dash.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            start = time.perf_counter()
+            db.create_tasks_bulk(_tasks(size), chunk_size=5000)
+            # Status mix through UPDATEs so the update trigger does the bookkeeping
+            db.conn.execute(f'''
+                UPDATE tasks SET status = CASE abs(random()) % {len(STATUSES)}
+                    {' '.join(f"WHEN {i} THEN '{s}'" for i, s in enumerate(STATUSES))} END,
+                    progress = abs(random()) % 101
+            ''')
+            db.conn.commit()
+            load = time.perf_counter() - start
+
+            recount = _time(lambda: db.conn.execute(DASHBOARD_COUNTERS_RECOMPUTE).fetchone(), reads)
+            counters = _time(db.get_dashboard_stats, reads)
+            verify = db.verify_dashboard_counters()
+
+    return {'tasks': size, 'load_s': round(load, 2), 'recount_ms': recount,
+            'counters_ms': counters, 'speedup': round(recount / max(counters, 0.001)),
+            'drift': len(verify['drift'])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dashboard stats benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--reads', type=int, default=50)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'tasks':>10} {'load s':>8} {'recount ms':>11} {'counters ms':>12} {'speedup':>8} {'drift':>6}")
+    for size in args.sizes:
+        r = bench_size(size, args.reads)
+        results.append(r)
+        print(f"{r['tasks']:>10} {r['load_s']:>8} {r['recount_ms']:>11} {r['counters_ms']:>12} "
+              f"{r['speedup']:>7}x {r['drift']:>6}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Duration stats benchmark: exact percentiles over done tasks vs duration_sketches
+
+Seeds completed tasks with log-normal durations spread over a year, then
+times per-agent p50/p90/p99 computed the old way (load every duration,
+sort in Python) against get_duration_stats(by='agent'), reports the worst
+relative error of the sketch percentiles and the extra cost the sketch
+triggers add to complete_task.
+
+Usage: python3 -m benchmarks.bench_duration_sketches [--sizes 10000 100000] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+AGENTS = 10
+DAYS = 365
+COMPLETIONS = 200
+QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+def _seed(db: AITeamDB, size: int, rng: random.Random):
+    rows = [(f"T-DUR-{i:07d}", f"Task {i}", f"PROJ-00{i % 3 + 1}", f"agent-{i % AGENTS + 1:03d}",
+             ('critical', 'high', 'normal', 'low')[i % 4], f"-{rng.randrange(DAYS * 24)} hours",
+             max(1, int(rng.lognormvariate(4.5, 1.2))))
+            for i in range(size)]
+    db.conn.executemany('''
+        INSERT INTO tasks (id, title, project_id, assignee_id, priority, status, progress,
+                           completed_at, actual_duration_minutes)
+        VALUES (?, ?, ?, ?, ?, 'done', 100, datetime('now', ?), ?)
+    ''', rows)
+    db.conn.execute('''
+        INSERT INTO tasks (id, title, project_id, assignee_id, status, started_at)
+        SELECT 'T-OPEN-' || id, title, project_id, assignee_id, 'in_progress', datetime('now', '-2 hours')
+        FROM tasks WHERE id LIKE 'T-DUR-%' LIMIT ?
+    ''', (COMPLETIONS * 2,))
+    db.conn.commit()
+
+
+def _exact(values, fraction):
+    """Nearest-rank percentile, the value the sketch approximates"""
+    return values[int(fraction * (len(values) - 1))]
+
+
+def _legacy_stats(db: AITeamDB) -> dict:
+    durations = {}
+    for agent, minutes in db.conn.execute('''
+        SELECT assignee_id, actual_duration_minutes FROM tasks
+        WHERE status = 'done' AND actual_duration_minutes IS NOT NULL
+    '''):
+        durations.setdefault(agent, []).append(minutes)
+    stats = {}
+    for agent, values in durations.items():
+        values.sort()
+        stats[agent] = {name: _exact(values, q) for name, q in QUANTILES.items()}
+    return stats
+
+
+def _time(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _complete_ms(db: AITeamDB, task_ids) -> float:
+    start = time.perf_counter()
+    for task_id in task_ids:
+        db.complete_task(task_id)
+    return (time.perf_counter() - start) / len(task_ids) * 1000
+
+
+def bench_size(size: int) -> dict:
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "durations.db", agents=AGENTS)
+        with AITeamDB(db_path, spawn_dispatcher=False) as db, redirect_stdout(io.StringIO()):
+            _seed(db, size, rng)
+
+            legacy = _legacy_stats(db)
+            sketch = {r['key']: r for r in db.get_duration_stats('agent')}
+            max_error = max(abs(sketch[a][name] - exact) / exact
+                            for a, row in legacy.items() for name, exact in row.items())
+
+            legacy_s = _time(lambda: _legacy_stats(db))
+            sketch_s = _time(lambda: db.get_duration_stats('agent'))
+            rows = db.conn.execute('SELECT COUNT(*) FROM duration_sketches').fetchone()[0]
+
+            open_ids = [row[0] for row in db.conn.execute(
+                "SELECT id FROM tasks WHERE status = 'in_progress' ORDER BY id")]
+            complete_ms = _complete_ms(db, open_ids[:COMPLETIONS])
+            for trigger in ('insert', 'delete', 'update'):
+                db.conn.execute(f'DROP TRIGGER trg_sketch_tasks_{trigger}')
+            complete_plain_ms = _complete_ms(db, open_ids[COMPLETIONS:])
+
+    return {
+        'tasks': size,
+        'legacy_ms': round(legacy_s * 1000, 2),
+        'sketch_ms': round(sketch_s * 1000, 3),
+        'sketch_rows': rows,
+        'max_error_pct': round(max_error * 100, 2),
+        'complete_ms': round(complete_ms, 3),
+        'complete_without_trigger_ms': round(complete_plain_ms, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Duration sketch benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'tasks':>8} {'scan ms':>9} {'sketch ms':>10} {'rows':>6} {'max err %':>10} "
+          f"{'done ms (trigger/none)':>23}")
+    for size in args.sizes:
+        r = bench_size(size)
+        results.append(r)
+        done = f"{r['complete_ms']} / {r['complete_without_trigger_ms']}"
+        print(f"{size:>8} {r['legacy_ms']:>9} {r['sketch_ms']:>10} {r['sketch_rows']:>6} "
+              f"{r['max_error_pct']:>10} {done:>23}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
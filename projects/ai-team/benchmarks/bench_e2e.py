@@ -0,0 +1,228 @@
+"""
+End-to-end benchmark: a mixed agent workload and full cron cycles on a synthetic team.db
+
+Builds (or reuses from --cache-dir) a loadgen database at the chosen scale,
+then runs --cycles rounds of:
+
+  1. --ops / --cycles agent operations drawn from loadgen.OP_MIX (create,
+     assign + start, progress, done, heartbeat), with the dashboard,
+     report, search and history reads every READ_EVERY ops
+  2. one AutoAssign.run, HealthMonitor.run_health_check and
+     MemoryMaintenance.run, each on a fresh object as cron starts them
+
+Every AITeamDB method and cycle is timed per call. benchmarks/bin is put
+first on PATH, so openclaw is a no-op that succeeds: spawns and alerts
+cost one process start and reach no one.
+
+Results go to --json with the commit, scale and environment, and
+--compare prints per-method ratios between two result files, exiting 1
+when a p50 regressed by more than --threshold.
+
+Usage:
+  python3 -m benchmarks.bench_e2e --scale small [--ops 2000] [--cycles 3] [--json HEAD.json]
+  python3 -m benchmarks.bench_e2e --agents 100 --tasks 1000000 --cache-dir /tmp/ai-team-bench
+  python3 -m benchmarks.bench_e2e --compare base.json HEAD.json [--threshold 1.25]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auto_assign import AutoAssign  # noqa: E402
+from benchmarks.loadgen import SCALES, Workload, build_database  # noqa: E402
+from health_monitor import HealthMonitor  # noqa: E402
+from memory_maintenance import MemoryMaintenance  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+READ_EVERY = 100
+FAKE_OPENCLAW = Path(__file__).resolve().parent / "bin"
+
+
+def _summary(samples: list) -> dict:
+    samples = sorted(samples)
+
+    def pct(fraction):
+        return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 3)
+
+    return {'calls': len(samples), 'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+            'p50_ms': pct(0.5), 'p95_ms': pct(0.95), 'p99_ms': pct(0.99),
+            'max_ms': round(samples[-1] * 1000, 3), 'total_s': round(sum(samples), 3)}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _prepare(workdir: Path, agents: int, tasks: int, seed: int, cache_dir: Path = None) -> dict:
+    """Database to run on in workdir, built from scratch or copied from the cache"""
+    db_path = workdir / "team.db"
+    if cache_dir is None:
+        return dict(build_database(db_path, agents=agents, tasks=tasks, seed=seed), cached=False)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cached = cache_dir / f"loadgen-{agents}a-{tasks}t-s{seed}.db"
+    meta_path = cached.with_name(cached.name + '.json')
+    hit = cached.exists() and meta_path.exists()
+    if not hit:
+        meta = build_database(cached, agents=agents, tasks=tasks, seed=seed)
+        meta_path.write_text(json.dumps(meta, default=str))
+    meta = json.loads(meta_path.read_text())
+    shutil.copyfile(cached, db_path)
+    archive = cached.with_name(cached.name + '.archive')
+    if archive.is_dir():
+        shutil.copytree(archive, workdir / "team.db.archive")
+    return dict(meta, path=db_path, cached=hit)
+
+
+def _reads(db: AITeamDB, timed, task_id: str):
+    week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+    timed('get_dashboard_stats', db.get_dashboard_stats)
+    timed('get_project_status', db.get_project_status)
+    timed('get_agents', db.get_agents)
+    timed('get_tasks(in_progress)', db.get_tasks, 'in_progress')
+    timed('get_ready_tasks', db.get_ready_tasks, 10)
+    timed('search', db.search, 'api')
+    timed('get_task_history', db.get_task_history, task_id)
+    timed('get_rollup', db.get_rollup, week_ago)
+    timed('get_duration_stats', db.get_duration_stats, 'agent')
+    timed('generate_daily_report', db.generate_daily_report)
+
+
+def run(agents: int, tasks: int, ops: int, cycles: int, seed: int = 0, cache_dir: Path = None) -> dict:
+    os.environ['PATH'] = f"{FAKE_OPENCLAW}{os.pathsep}{os.environ.get('PATH', '')}"
+    samples = defaultdict(list)
+
+    def timed(name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        samples[name].append(time.perf_counter() - start)
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build = _prepare(Path(tmp), agents, tasks, seed, cache_dir)
+        db_path = Path(build['path'])
+        outcomes = defaultdict(int)
+        op_seconds = 0.0
+        with AITeamDB(db_path, spawn_dispatcher=False) as db, redirect_stdout(io.StringIO()):
+            for cycle in range(cycles):
+                workload = Workload(db.conn, seed=seed + cycle)
+                start = time.perf_counter()
+                for i in range(ops // cycles):
+                    op, args = workload.next()
+                    if op == 'create':
+                        title, project_id, priority = args
+                        result = timed('create_task', db.create_task, title, project_id=project_id,
+                                       priority=priority)
+                    elif op == 'start':
+                        result = (timed('assign_task', db.assign_task, *args)
+                                  and timed('start_task', db.start_task, *args))
+                    elif op == 'progress':
+                        result = timed('update_progress', db.update_progress, *args)
+                    elif op == 'done':
+                        result = timed('complete_task', db.complete_task, *args)
+                    else:
+                        result = timed('update_agent_heartbeat', db.update_agent_heartbeat, *args)
+                    workload.applied(op, args, result)
+                    outcomes[f"{op}_{'ok' if result else 'failed'}"] += 1
+                    if i % READ_EVERY == 0:
+                        _reads(db, timed, workload.last_task)
+                op_seconds += time.perf_counter() - start
+
+                with AutoAssign(db_path) as assigner:
+                    outcomes['auto_assigned'] += timed('AutoAssign.run', assigner.run)['assigned']
+                with HealthMonitor(db_path) as monitor:
+                    outcomes['auto_blocked'] += timed('HealthMonitor.run_health_check',
+                                                      monitor.run_health_check)['auto_resolved']
+                with MemoryMaintenance(db_path) as maintenance:
+                    outcomes['archived'] += timed('MemoryMaintenance.run', maintenance.run)['archived']
+
+    return {
+        'meta': {'commit': _commit(), 'date': datetime.now().isoformat(timespec='seconds'),
+                 'agents': agents, 'tasks': tasks, 'ops': ops, 'cycles': cycles, 'seed': seed,
+                 'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                 'machine': platform.machine()},
+        'build': {key: build[key] for key in ('seconds', 'bytes', 'history', 'archived', 'cached')},
+        # Agent operations per second of workload time, the interleaved reads included
+        'ops_per_s': round(ops // cycles * cycles / op_seconds, 1),
+        'outcomes': dict(outcomes),
+        'timings': {name: _summary(values) for name, values in sorted(samples.items())},
+    }
+
+
+def compare(base: dict, head: dict, threshold: float) -> int:
+    """Print p50/p95 ratios head/base per timing, returns how many p50s regressed past threshold"""
+    print(f"base {base['meta'].get('commit')} ({base['meta']['tasks']} tasks) → "
+          f"head {head['meta'].get('commit')} ({head['meta']['tasks']} tasks)")
+    print(f"{'timing':>32} {'base p50':>9} {'head p50':>9} {'ratio':>6} {'base p95':>9} {'head p95':>9} {'ratio':>6}")
+    regressions = 0
+    for name in sorted(set(base['timings']) & set(head['timings'])):
+        b, h = base['timings'][name], head['timings'][name]
+        p50 = h['p50_ms'] / b['p50_ms'] if b['p50_ms'] else float('inf')
+        p95 = h['p95_ms'] / b['p95_ms'] if b['p95_ms'] else float('inf')
+        flag = ''
+        if p50 > threshold:
+            regressions += 1
+            flag = ' ⚠️'
+        print(f"{name:>32} {b['p50_ms']:>9} {h['p50_ms']:>9} {p50:>6.2f} "
+              f"{b['p95_ms']:>9} {h['p95_ms']:>9} {p95:>6.2f}{flag}")
+    for name in sorted(set(base['timings']) ^ set(head['timings'])):
+        print(f"{name:>32} only in {'base' if name in base['timings'] else 'head'}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end workload benchmark')
+    parser.add_argument('--scale', choices=sorted(SCALES), help='Preset agents/tasks (loadgen.SCALES)')
+    parser.add_argument('--agents', type=int, default=10)
+    parser.add_argument('--tasks', type=int, default=10_000)
+    parser.add_argument('--ops', type=int, default=2000, help='Agent operations in total')
+    parser.add_argument('--cycles', type=int, default=3, help='Auto-assign / health / maintenance rounds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache-dir', type=Path, help='Build each scale once here and copy it per run')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='Compare two result files')
+    parser.add_argument('--threshold', type=float, default=1.25, help='p50 ratio counted as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        base, head = (json.loads(Path(path).read_text()) for path in args.compare)
+        regressions = compare(base, head, args.threshold)
+        print(f"\n{regressions} p50 regression(s) over {args.threshold}x")
+        sys.exit(1 if regressions else 0)
+
+    agents, tasks = SCALES[args.scale] if args.scale else (args.agents, args.tasks)
+    result = run(agents, tasks, args.ops, args.cycles, args.seed, args.cache_dir)
+    build = result['build']
+    origin = 'cached' if build['cached'] else f"built in {build['seconds']} s"
+    print(f"{agents} agents, {tasks} tasks, {build['history']} history rows, "
+          f"{build['bytes'] / 1e6:.0f} MB ({origin})")
+    print(f"{result['ops_per_s']} agent ops/s, outcomes: {result['outcomes']}")
+    print(f"{'timing':>32} {'calls':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, t in result['timings'].items():
+        print(f"{name:>32} {t['calls']:>6} {t['mean_ms']:>9} {t['p50_ms']:>9} {t['p95_ms']:>9} "
+              f"{t['p99_ms']:>9} {t['max_ms']:>9}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Heartbeat ingestion benchmark: UPDATE + commit per beat vs the coalescing collector
+
+Sender processes beat for random agents at a fixed total rate while one
+writer keeps updating task progress, the transition traffic heartbeats
+compete with. Compares task write latency and heartbeat commits per mode.
+
+Usage: python3 -m benchmarks.bench_heartbeats [--agents 200] [--rate 2000] [--seconds 5] [--json out.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from heartbeat_ingest import send_heartbeat  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+SENDERS = 4
+TASKS = 50
+SOURCE_DIR = Path(__file__).resolve().parent.parent
+
+
+def _sender(db_path: str, mode: str, agents: int, rate: float, seconds: float, seed: int, out):
+    rng = random.Random(seed)
+    db_path = Path(db_path)
+    sent = fallbacks = 0
+    interval = 1.0 / rate
+    with AITeamDB(db_path, spawn_dispatcher=False) as db:
+        start = time.monotonic()
+        while time.monotonic() - start < seconds:
+            agent_id = f"agent-{rng.randint(1, agents):03d}"
+            if mode == 'direct' or not send_heartbeat(agent_id, db_path):
+                fallbacks += mode != 'direct'
+                db.update_agent_heartbeat(agent_id)
+            sent += 1
+            # Fixed-rate pacing; a sender that falls behind just runs flat out
+            delay = start + sent * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    out.put({'sent': sent, 'fallbacks': fallbacks})
+
+
+def _task_writer(db_path: str, seconds: float, out):
+    latencies = []
+    with AITeamDB(Path(db_path), spawn_dispatcher=False) as db:
+        task_ids = [row[0] for row in db.conn.execute("SELECT id FROM tasks")]
+        start = time.monotonic()
+        i = 0
+        while time.monotonic() - start < seconds:
+            t0 = time.perf_counter()
+            db.update_progress(task_ids[i % len(task_ids)], i % 100, 'bench')
+            latencies.append(time.perf_counter() - t0)
+            i += 1
+    out.put({'latencies': latencies})
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+def run_mode(mode: str, agents: int, rate: float, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "team.db", agents=agents)
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            db.create_tasks_bulk({'title': f"Task {i}", 'project_id': 'PROJ-001'} for i in range(TASKS))
+            from notify_outbox import _try_lock
+            dispatcher_lock = _try_lock(db_path)  # keep notifications queued, nothing is sent
+
+        collector = None
+        if mode == 'coalesced':
+            collector = subprocess.Popen([sys.executable, str(SOURCE_DIR / "heartbeat_ingest.py"),
+                                          '--db', str(db_path), '--interval', '1'],
+                                         stdout=subprocess.DEVNULL)
+            while not Path(f"{db_path}.heartbeat.sock").exists():
+                time.sleep(0.05)
+
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_sender, args=(str(db_path), mode, agents, rate / SENDERS,
+                                                               seconds, i, out))
+                 for i in range(SENDERS)]
+        procs.append(multiprocessing.Process(target=_task_writer, args=(str(db_path), seconds, out)))
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        metrics = None
+        if collector:
+            collector.terminate()
+            collector.wait(timeout=10)
+            metrics = json.loads(Path(f"{db_path}.heartbeat.metrics.json").read_text())
+        dispatcher_lock.close()
+
+    sent = sum(r.get('sent', 0) for r in results)
+    fallbacks = sum(r.get('fallbacks', 0) for r in results)
+    latencies = [l for r in results for l in r.get('latencies', [])]
+    return {
+        'mode': mode,
+        'beats': sent,
+        'beats_per_sec': round(sent / seconds),
+        'heartbeat_commits': sent if mode == 'direct' else metrics['flushes'] + fallbacks,
+        'fallbacks': fallbacks,
+        'task_writes': len(latencies),
+        'task_p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'task_p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'collector': metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Heartbeat ingestion benchmark')
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=2000, help='Total beats per second')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = [run_mode(mode, args.agents, args.rate, args.seconds) for mode in ('direct', 'coalesced')]
+
+    print(f"{'mode':<10} {'beats/s':>8} {'hb commits':>11} {'task writes':>12} {'task p50 ms':>12} {'task p99 ms':>12}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['beats_per_sec']:>8} {r['heartbeat_commits']:>11} {r['task_writes']:>12} "
+              f"{r['task_p50_ms']:>12} {r['task_p99_ms']:>12}")
+    m = results[1]['collector']
+    print(f"\nCollector: {m['received']} beats, {m['coalesced']} coalesced, {m['flushes']} flushes, "
+          f"flush avg {m['avg_flush_ms']} ms / max {m['max_flush_ms']} ms, "
+          f"{results[1]['fallbacks']} direct fallbacks")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+History archive benchmark: one big DELETE vs chunked moves into monthly files
+
+Seeds task_history with rows spread over the last six months, then clears
+everything older than 30 days either the legacy way (a single DELETE in one
+transaction) or with archive_history(). Meanwhile a second connection keeps
+appending history rows, as agents do, and records how long each insert
+waits for the write lock. Also times `task history` for one task (live +
+archives) and a one-month range.
+
+Usage: python3 -m benchmarks.bench_history_archive [--rows 200000] [--json out.json]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from history_archive import archive_history, list_archives, task_history  # noqa: E402
+from storage import connect  # noqa: E402
+
+TASKS = 2000
+DAYS = 180
+
+
+def _seed(conn, rows: int):
+    conn.executemany('''
+        INSERT INTO task_history (task_id, agent_id, action, old_progress, new_progress, notes, timestamp)
+        VALUES (?, 'agent-001', 'progress', 40, 50, 'halfway, waiting on review', datetime('now', ?))
+    ''', [(f"T-HIST-{i % TASKS:05d}", f"-{i * DAYS * 86400 // rows} seconds") for i in range(rows)])
+    conn.commit()
+
+
+def _writer(db_path: Path, stop: threading.Event, waits: list):
+    conn = connect(db_path, apply_migrations=False)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute("INSERT INTO task_history (task_id, action, notes) VALUES ('T-LIVE', 'progress', 'tick')")
+        conn.commit()
+        waits.append((start, time.perf_counter() - start))
+        time.sleep(0.002)
+    conn.close()
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def run(mode: str, rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "history.db")
+        conn = connect(db_path)
+        _seed(conn, rows)
+
+        stop, waits = threading.Event(), []
+        writer = threading.Thread(target=_writer, args=(db_path, stop, waits))
+        writer.start()
+        time.sleep(0.2)
+        start = time.perf_counter()
+        if mode == 'legacy':
+            moved = conn.execute("DELETE FROM task_history WHERE timestamp < datetime('now', '-30 days')").rowcount
+            conn.commit()
+        else:
+            moved = archive_history(conn)['moved']
+        elapsed = time.perf_counter() - start
+        stop.set()
+        writer.join()
+        # Inserts that started while rows were being moved, however long they waited
+        during = [wait for began, wait in waits if start <= began <= start + elapsed]
+
+        result = {
+            'mode': mode,
+            'rows': rows,
+            'moved': moved,
+            'seconds': round(elapsed, 2),
+            'writer_inserts': len(during),
+            'writer_p99_ms': round(_percentile(during, 0.99) * 1000, 1),
+            'writer_max_ms': round(max(during, default=0) * 1000, 1),
+            'live_rows': conn.execute('SELECT COUNT(*) FROM task_history').fetchone()[0],
+        }
+        if mode == 'archive':
+            archives = list_archives(conn)
+            month = archives[1]['month']
+            timings = {}
+            for name, query in (('one task', lambda: task_history(conn, 'T-HIST-00042')),
+                                ('one month', lambda: task_history(conn, since=f"{month}-01",
+                                                                   until=f"{month}-31"))):
+                start = time.perf_counter()
+                found = query()
+                timings[name] = {'rows': len(found), 'ms': round((time.perf_counter() - start) * 1000, 1)}
+            result['archives'] = len(archives)
+            result['archive_mb'] = round(sum(a['bytes'] for a in archives) / 1e6, 1)
+            result['history_queries'] = timings
+        conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='History archive benchmark')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = [run(mode, args.rows) for mode in ('legacy', 'archive')]
+    print(f"{'mode':>8} {'moved':>8} {'seconds':>8} {'inserts':>8} {'p99 ms':>7} {'max ms':>7} {'live rows':>9}")
+    for r in results:
+        print(f"{r['mode']:>8} {r['moved']:>8} {r['seconds']:>8} {r['writer_inserts']:>8} "
+              f"{r['writer_p99_ms']:>7} {r['writer_max_ms']:>7} {r['live_rows']:>9}")
+    archived = results[1]
+    print(f"\n{archived['archives']} archive files, {archived['archive_mb']} MB")
+    for name, t in archived['history_queries'].items():
+        print(f"task history, {name}: {t['rows']} rows in {t['ms']} ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
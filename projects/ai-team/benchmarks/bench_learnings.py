@@ -0,0 +1,130 @@
+"""
+Agent learnings benchmark: text blob read-modify-write vs agent_learnings rows
+
+Each agent completes a few tasks per hour; memory maintenance runs hourly.
+The legacy run rebuilds every agent's blob from its last five completions
+and prepends them, the way update_agent_learnings did; the new run appends
+one row per task. Reports the time per maintenance run, how many of the
+lines an agent ends up with are duplicates, and how long building the
+subagent learnings section takes (blob read vs LearningsView with and
+without its cache).
+
+Usage: python3 -m benchmarks.bench_learnings [--agents 10] [--runs 48] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from learnings import LearningsView  # noqa: E402
+from memory_maintenance import MemoryMaintenance  # noqa: E402
+from storage import connect  # noqa: E402
+
+TASKS_PER_RUN = 2
+SPAWNS = 1000
+
+
+def _legacy_update(conn):
+    """update_agent_learnings before agent_learnings existed"""
+    agents = conn.execute('''
+        SELECT DISTINCT a.id FROM agents a JOIN tasks t ON a.id = t.assignee_id
+        WHERE t.status = 'done' AND t.completed_at > datetime('now', '-7 days')
+    ''').fetchall()
+    for (agent_id,) in agents:
+        titles = conn.execute('''
+            SELECT title FROM tasks WHERE assignee_id = ? AND status = 'done'
+            AND completed_at > datetime('now', '-7 days') ORDER BY completed_at DESC LIMIT 5
+        ''', (agent_id,)).fetchall()
+        new = '\n'.join(f"- Completed: {title}" for (title,) in titles)
+        existing = conn.execute('SELECT learnings FROM agent_context WHERE agent_id = ?',
+                                (agent_id,)).fetchone()[0]
+        lines = [line for line in (f"{new}\n{existing}" if existing else new).split('\n') if line.strip()]
+        conn.execute("UPDATE agent_context SET learnings = ?, last_updated = datetime('now') WHERE agent_id = ?",
+                     ('\n'.join(lines[:20]), agent_id))
+    conn.commit()
+
+
+def _complete_tasks(conn, agents: int, run: int):
+    conn.executemany('''
+        INSERT INTO tasks (id, title, project_id, assignee_id, status, completed_at)
+        VALUES (?, ?, 'PROJ-001', ?, 'done', datetime('now'))
+    ''', [(f"T-LRN-{run:03d}-{a:03d}-{i}", f"Task {run}.{a}.{i}", f"agent-{a:03d}")
+          for a in range(1, agents + 1) for i in range(TASKS_PER_RUN)])
+    conn.commit()
+
+
+def run(mode: str, agents: int, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "learnings.db", agents=agents)
+        conn = connect(db_path)
+        elapsed = 0.0
+        with MemoryMaintenance(db_path) as mm, redirect_stdout(io.StringIO()):
+            for r in range(runs):
+                _complete_tasks(conn, agents, r)
+                start = time.perf_counter()
+                if mode == 'legacy':
+                    _legacy_update(mm.conn)
+                else:
+                    mm.update_agent_learnings()
+                elapsed += time.perf_counter() - start
+
+        if mode == 'legacy':
+            lines = conn.execute("SELECT learnings FROM agent_context WHERE agent_id = 'agent-001'").fetchone()[0]
+            lines = lines.split('\n')
+        else:
+            lines = [row[0] for row in conn.execute(
+                "SELECT content FROM agent_learnings WHERE agent_id = 'agent-001'")]
+        duplicates = len(lines) - len(set(lines))
+
+        def blob(agent_id):
+            return conn.execute('SELECT learnings FROM agent_context WHERE agent_id = ?', (agent_id,)).fetchone()
+
+        view = LearningsView(conn)
+        readers = ({'blob': blob} if mode == 'legacy'
+                   else {'cached': view.render, 'uncached': lambda a: LearningsView(conn).render(a)})
+        view_us = {}
+        for name, read in readers.items():
+            start = time.perf_counter()
+            for i in range(SPAWNS):
+                read(f"agent-{i % agents + 1:03d}")
+            view_us[name] = round((time.perf_counter() - start) / SPAWNS * 1e6, 1)
+        conn.close()
+
+    return {
+        'mode': mode,
+        'agents': agents,
+        'runs': runs,
+        'ms_per_run': round(elapsed / runs * 1000, 3),
+        'lines_kept': len(lines),
+        'duplicate_lines': duplicates,
+        'view_us': view_us,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Agent learnings benchmark')
+    parser.add_argument('--agents', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=48, help='Hourly maintenance runs to simulate')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = [run(mode, args.agents, args.runs) for mode in ('legacy', 'rows')]
+    print(f"{'mode':>7} {'ms/run':>8} {'lines':>6} {'dupes':>6}  learnings section us")
+    for r in results:
+        view = ', '.join(f"{name} {us}" for name, us in r['view_us'].items())
+        print(f"{r['mode']:>7} {r['ms_per_run']:>8} {r['lines_kept']:>6} {r['duplicate_lines']:>6}  {view}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Ready queue benchmark: legacy todo scan vs the dependency-aware ready queue
+
+Seeds unassigned todo tasks where a share of them wait on unfinished
+prerequisites, then compares one AutoAssign pick for 10 idle agents:
+the legacy query (sort every todo task, ignore dependencies) against the
+idx_tasks_ready head. Also reports how many legacy picks were not ready and
+the extra cost the dependency triggers add to complete_task.
+
+Usage: python3 -m benchmarks.bench_ready_queue [--sizes 10000 100000] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+IDLE_AGENTS = 10
+COMPLETIONS = 200
+
+LEGACY_QUERY = '''
+    SELECT t.id, t.title, t.description, t.priority, t.project_id,
+           t.prerequisites, t.acceptance_criteria, t.expected_outcome
+    FROM tasks t
+    WHERE t.status = 'todo'
+    AND (t.assignee_id IS NULL OR t.assignee_id = '')
+    ORDER BY
+        CASE t.priority
+            WHEN 'critical' THEN 1
+            WHEN 'high' THEN 2
+            WHEN 'normal' THEN 3
+            WHEN 'low' THEN 4
+        END,
+        t.created_at ASC
+'''
+
+
+def _seed(db: AITeamDB, size: int, rng: random.Random):
+    db.create_tasks_bulk(({'title': f"Task {i}", 'project_id': f"PROJ-00{i % 3 + 1}",
+                           'priority': ('critical', 'high', 'normal', 'low')[i % 4]}
+                          for i in range(size)), chunk_size=5000)
+    ids = [row[0] for row in db.conn.execute('SELECT id FROM tasks ORDER BY id')]
+    # Half the tasks wait on one to three earlier tasks (edges point backwards: no cycles)
+    edges = set()
+    for index in range(1, len(ids)):
+        if rng.random() < 0.5:
+            continue
+        for _ in range(rng.randint(1, 3)):
+            edges.add((ids[index], ids[rng.randrange(index)]))
+    db.conn.executemany('''
+        INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_task_id) VALUES (?, ?)
+    ''', edges)
+    db.conn.commit()
+    return ids
+
+
+def _time(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(size: int) -> dict:
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "ready.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db, redirect_stdout(io.StringIO()):
+            ids = _seed(db, size, rng)
+
+            legacy_s = _time(lambda: db.conn.execute(LEGACY_QUERY).fetchall()[:IDLE_AGENTS])
+            ready_s = _time(lambda: db.get_ready_tasks(limit=IDLE_AGENTS))
+            legacy_picks = [row['id'] for row in db.conn.execute(LEGACY_QUERY).fetchall()[:IDLE_AGENTS]]
+            not_ready = sum(1 for task_id in legacy_picks
+                            if db.conn.execute('SELECT open_dependencies FROM tasks WHERE id = ?',
+                                               (task_id,)).fetchone()[0])
+
+            # Completing prerequisites releases their dependents through the triggers
+            start = time.perf_counter()
+            for task_id in rng.sample(ids, COMPLETIONS):
+                db.complete_task(task_id)
+            complete_ms = (time.perf_counter() - start) / COMPLETIONS * 1000
+            db.conn.execute('DROP TRIGGER trg_deps_tasks_status')
+            start = time.perf_counter()
+            for task_id in rng.sample(ids, COMPLETIONS):
+                db.complete_task(task_id)
+            complete_plain_ms = (time.perf_counter() - start) / COMPLETIONS * 1000
+
+    return {
+        'tasks': size,
+        'legacy_ms': round(legacy_s * 1000, 2),
+        'ready_ms': round(ready_s * 1000, 3),
+        'legacy_not_ready_picks': not_ready,
+        'complete_ms': round(complete_ms, 3),
+        'complete_without_trigger_ms': round(complete_plain_ms, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ready queue benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'tasks':>8} {'legacy ms':>10} {'ready ms':>9} {'not ready':>10} "
+          f"{'done ms (trigger/none)':>23}")
+    for size in args.sizes:
+        r = bench_size(size)
+        results.append(r)
+        done = f"{r['complete_ms']} / {r['complete_without_trigger_ms']}"
+        print(f"{size:>8} {r['legacy_ms']:>10} {r['ready_ms']:>9} "
+              f"{r['legacy_not_ready_picks']:>7}/{IDLE_AGENTS} {done:>23}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
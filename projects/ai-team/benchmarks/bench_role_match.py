@@ -0,0 +1,172 @@
+"""
+Role keyword matching benchmark: substring loops vs the compiled matcher
+
+Generates task titles and descriptions from a vocabulary that holds the
+role keywords, their inflections and words that merely contain one
+("build" holds "ui", "latest" holds "test"), then finds the role keywords
+of every task four ways:
+
+- per agent: every keyword tested against the text once per (task, agent),
+  as find_best_agent did before the assignment snapshot
+- per task: every keyword tested once per task (the snapshot's old loop)
+- compiled: one scan with role_rules.KeywordMatcher
+- cached: AssignmentSnapshot.role_matches asked again for a task it has seen
+
+The same runs repeat with extra rules appended to the defaults, as a team
+would grow role_match_rules. Also counts the tasks on which substring and
+whole-word matching disagree, with a few examples.
+
+--corpus titles uses loadgen task titles instead, which name one role
+keyword each, like most real tasks. The substring loop's cost grows with
+the rules while the matcher's stays flat. With the 15 default rules the
+loop is still cheaper: by about 2 µs per task on titles, about 2x on the
+keyword-dense vocabulary. From about 30 rules the matcher is faster. It
+also gets whole-word matches right, which the loop does not: 900 of 5000
+titles match differently.
+
+Usage: python3 -m benchmarks.bench_role_match [--tasks 5000] [--agents 20] [--extra-rules 0 200]
+                                              [--corpus vocabulary|titles] [--json out.json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.loadgen import _title  # noqa: E402
+from migrations import ROLE_MATCH_DEFAULTS  # noqa: E402
+from role_rules import KeywordMatcher  # noqa: E402
+
+FILLER = ['build', 'guide', 'latest', 'fix', 'login', 'page', 'report', 'export', 'cache', 'rapid',
+          'contest', 'protest', 'planet', 'apiary', 'review', 'development', 'documentation', 'tests',
+          'planning', 'designer', 'analyzing', 'dashboard', 'schema', 'deploy', 'quick', 'mobile']
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'tu', 'ra', 'so', 'vi', 'de', 'po', 'gu', 'ba']
+
+
+def _tasks(rng: random.Random, count: int, rules: dict):
+    vocabulary = FILLER + list(rules)
+    tasks = []
+    for i in range(count):
+        title = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(2, 6)))
+        description = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 30)))
+        tasks.append({'id': f"T-RM-{i:05d}", 'title': title.capitalize(), 'description': description})
+    return tasks
+
+
+def _titles(rng: random.Random, count: int):
+    return [{'id': f"T-RM-{i:05d}", 'title': _title(rng), 'description': f"Synthetic task {i}"}
+            for i in range(count)]
+
+
+def _extra_rules(rng: random.Random, count: int) -> dict:
+    rules = {}
+    while len(rules) < count:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        rules[word] = [rng.choice(['dev', 'qa', 'architect', 'analyst'])]
+    return rules
+
+
+def _text(task) -> str:
+    return task['title'] + ' ' + (task.get('description') or '')
+
+
+def per_agent(tasks, agents, rules):
+    found = []
+    for task in tasks:
+        text = _text(task).lower()
+        for agent in agents:
+            keywords = set()
+            for keyword, roles in rules.items():
+                if keyword in text and (agent['id'] in roles or agent['role'] in roles):
+                    keywords.add(keyword)
+        found.append(keywords)
+    return found
+
+
+def per_task(tasks, rules):
+    found = []
+    for task in tasks:
+        text = _text(task).lower()
+        found.append({keyword for keyword in rules if keyword in text})
+    return found
+
+
+def compiled(tasks, matcher):
+    return [matcher.find(_text(task)) for task in tasks]
+
+
+def _time(fn, repeat: int = 3):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(task_count: int, agent_count: int, extra: int, corpus: str = 'vocabulary') -> dict:
+    rng = random.Random(extra)
+    rules = dict(ROLE_MATCH_DEFAULTS)
+    rules.update(_extra_rules(rng, extra))
+    tasks = _tasks(rng, task_count, rules) if corpus == 'vocabulary' else _titles(rng, task_count)
+    roles = sorted({role for roles in rules.values() for role in roles})
+    agents = [{'id': f"agent-{i:03d}", 'role': roles[i % len(roles)]} for i in range(agent_count)]
+
+    per_agent_s, _ = _time(lambda: per_agent(tasks, agents, rules), repeat=1)
+    per_task_s, substring = _time(lambda: per_task(tasks, rules))
+    compile_s, matcher = _time(lambda: KeywordMatcher(rules), repeat=1)
+    compiled_s, words = _time(lambda: compiled(tasks, matcher))
+
+    cache = {task['id']: words[i] for i, task in enumerate(tasks)}
+    cached_s, _ = _time(lambda: [cache.get(task['id']) for task in tasks])
+
+    differ = [(task, sorted(a - b), sorted(b - a)) for task, a, b in zip(tasks, substring, words) if a != b]
+    examples = []
+    for task, only_substring, only_words in differ[:3]:
+        examples.append({'text': _text(task)[:70], 'substring_only': only_substring, 'words_only': only_words})
+    return {
+        'rules': len(rules), 'tasks': task_count, 'agents': agent_count, 'corpus': corpus,
+        'per_agent_ms': round(per_agent_s * 1000, 1),
+        'per_task_ms': round(per_task_s * 1000, 1),
+        'compile_ms': round(compile_s * 1000, 2),
+        'compiled_ms': round(compiled_s * 1000, 1),
+        'cached_ms': round(cached_s * 1000, 2),
+        'tasks_differing': len(differ),
+        'examples': examples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Role keyword matching benchmark')
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--extra-rules', type=int, nargs='+', default=[0, 200])
+    parser.add_argument('--corpus', choices=('vocabulary', 'titles'), default='vocabulary',
+                        help='Keyword-dense generated text, or loadgen task titles')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    for extra in args.extra_rules:
+        r = bench(args.tasks, args.agents, extra, args.corpus)
+        results.append(r)
+        print(f"\n{r['rules']} rules, {r['tasks']} tasks ({r['corpus']}), {r['agents']} agents")
+        print(f"   per (task, agent) loop: {r['per_agent_ms']:>9} ms")
+        print(f"   per task loop:          {r['per_task_ms']:>9} ms")
+        print(f"   compiled matcher:       {r['compiled_ms']:>9} ms (compiled in {r['compile_ms']} ms)")
+        print(f"   cached, asked again:    {r['cached_ms']:>9} ms")
+        print(f"   tasks where substring and whole-word matches differ: {r['tasks_differing']}")
+        for example in r['examples']:
+            print(f"      {example['text']!r}: substring only {example['substring_only']}, "
+                  f"words only {example['words_only']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
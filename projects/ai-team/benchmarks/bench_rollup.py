@@ -0,0 +1,136 @@
+"""
+Report benchmark: scanning tasks / task_history vs reading daily_rollup
+
+Seeds completed tasks spread over 90 days plus their block history, then
+times a 30-day per-agent report (completions, median / p90 duration, blocks)
+computed the old way against get_rollup(by='agent'), and the monitor's
+"completed today" count with DATE(completed_at) against the rollup row.
+
+Usage: python3 -m benchmarks.bench_rollup [--sizes 10000 100000] [--json out.json]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+AGENTS = 10
+DAYS = 90
+
+
+def _seed(db: AITeamDB, size: int, rng: random.Random):
+    rows = []
+    for i in range(size):
+        minutes = int(rng.lognormvariate(4.5, 1.0))
+        rows.append((f"T-ROLL-{i:07d}", f"Task {i}", f"PROJ-00{i % 3 + 1}", f"agent-{i % AGENTS + 1:03d}",
+                     f"-{rng.randrange(DAYS * 24)} hours", minutes))
+    db.conn.executemany('''
+        INSERT INTO tasks (id, title, project_id, assignee_id, status, progress,
+                           completed_at, actual_duration_minutes)
+        VALUES (?, ?, ?, ?, 'done', 100, datetime('now', ?), ?)
+    ''', rows)
+    db.conn.executemany('''
+        INSERT INTO task_history (task_id, action, notes, timestamp)
+        VALUES (?, 'blocked', 'waiting', datetime('now', ?))
+    ''', [(row[0], row[4]) for row in rows if rng.random() < 0.1])
+    db.conn.commit()
+
+
+def _legacy_report(db: AITeamDB, start: str, end: str) -> dict:
+    durations, blocks = {}, {}
+    for agent, minutes in db.conn.execute('''
+        SELECT assignee_id, actual_duration_minutes FROM tasks
+        WHERE status = 'done' AND DATE(completed_at) BETWEEN ? AND ?
+    ''', (start, end)):
+        durations.setdefault(agent, []).append(minutes)
+    for agent, count in db.conn.execute('''
+        SELECT t.assignee_id, COUNT(*) FROM task_history h JOIN tasks t ON t.id = h.task_id
+        WHERE h.action = 'blocked' AND DATE(h.timestamp) BETWEEN ? AND ?
+        GROUP BY t.assignee_id
+    ''', (start, end)):
+        blocks[agent] = count
+    return {agent: {'completed': len(values), 'p50': statistics.median(values),
+                    'p90': statistics.quantiles(values, n=10)[-1] if len(values) > 1 else values[0],
+                    'blocked': blocks.get(agent, 0)}
+            for agent, values in durations.items()}
+
+
+def _time(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(size: int) -> dict:
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "rollup.db", agents=AGENTS)
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            start = time.perf_counter()
+            _seed(db, size, rng)
+            seed_s = time.perf_counter() - start
+            end_day, start_day = db.conn.execute(
+                "SELECT DATE('now'), DATE('now', '-29 days')").fetchone()
+
+            legacy = _legacy_report(db, start_day, end_day)
+            rollup = {r['key']: r for r in db.get_rollup(start_day, end_day, by='agent')}
+            # Histogram percentiles are estimates; report how far off the median is
+            median_error = statistics.mean(
+                abs(rollup[a]['p50_duration'] - legacy[a]['p50']) / legacy[a]['p50'] for a in legacy)
+            counts_match = all(rollup[a]['completed'] == legacy[a]['completed'] for a in legacy)
+
+            legacy_s = _time(lambda: _legacy_report(db, start_day, end_day))
+            rollup_s = _time(lambda: db.get_rollup(start_day, end_day, by='agent'))
+            today_legacy_s = _time(lambda: db.conn.execute('''
+                SELECT COUNT(*) FROM tasks WHERE status = 'done' AND DATE(completed_at) = DATE('now')
+            ''').fetchone())
+            today_rollup_s = _time(lambda: db.conn.execute('''
+                SELECT COALESCE(SUM(completed), 0) FROM daily_rollup WHERE day = DATE('now')
+            ''').fetchone())
+
+    return {
+        'tasks': size,
+        'seed_s': round(seed_s, 2),
+        'range_report_ms': {'legacy': round(legacy_s * 1000, 2), 'rollup': round(rollup_s * 1000, 3)},
+        'completed_today_ms': {'legacy': round(today_legacy_s * 1000, 2),
+                               'rollup': round(today_rollup_s * 1000, 3)},
+        'counts_match': counts_match,
+        'median_error_pct': round(median_error * 100, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Daily rollup report benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'tasks':>8} {'30d report ms (scan/rollup)':>28} {'today ms (scan/rollup)':>23} "
+          f"{'counts':>7} {'p50 err %':>10}")
+    for size in args.sizes:
+        r = bench_size(size)
+        results.append(r)
+        report = f"{r['range_report_ms']['legacy']} / {r['range_report_ms']['rollup']}"
+        today = f"{r['completed_today_ms']['legacy']} / {r['completed_today_ms']['rollup']}"
+        print(f"{size:>8} {report:>28} {today:>23} {'ok' if r['counts_match'] else 'DIFF':>7} "
+              f"{r['median_error_pct']:>10}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Task search benchmark: LIKE scans vs the FTS5 index
+
+Seeds tasks whose text follows a Zipf-like vocabulary (a few common words,
+a long tail of rare ones), then times searches for a common word, a rare
+word, two words and a prefix, with and without project / status / date
+filters: a LIKE scan collecting every match in the same columns (what
+grepping `task list` amounts to, unranked) against AITeamDB.search(), which
+ranks all matches and returns the best 20. Also reports what the sync triggers
+add to an update_progress call, which rewrites notes.
+
+Usage: python3 -m benchmarks.bench_search [--sizes 10000 100000] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+VOCABULARY = 5000
+UPDATES = 500
+FILTERS = {'project_id': 'PROJ-001', 'status': 'done', 'since': '2026-01-01'}
+
+
+def _words(rng: random.Random):
+    syllables = ['ka', 'lo', 'mi', 'ne', 'tu', 'ra', 'so', 'vi', 'de', 'po', 'gu', 'ba']
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+    return words, weights
+
+
+def _seed(db: AITeamDB, size: int, rng: random.Random):
+    words, weights = _words(rng)
+
+    def text(n):
+        return ' '.join(rng.choices(words, weights, k=n))
+
+    db.conn.executemany('''
+        INSERT INTO tasks (id, title, project_id, status, description, notes, acceptance_criteria, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('2026-06-01', ?))
+    ''', [(f"T-SRCH-{i:07d}", text(6), f"PROJ-00{i % 3 + 1}", rng.choice(('todo', 'in_progress', 'done')),
+           text(40), text(15), text(10), f"-{rng.randrange(365)} days") for i in range(size)])
+    db.conn.commit()
+    return words
+
+
+def _like(db: AITeamDB, terms, filters: bool):
+    sql = 'SELECT id, title FROM tasks WHERE 1'
+    params = []
+    for term in terms:
+        sql += (" AND (title LIKE ? OR description LIKE ? OR notes LIKE ? OR acceptance_criteria LIKE ?)")
+        params += [f"%{term.rstrip('*')}%"] * 4
+    if filters:
+        sql += ' AND project_id = ? AND status = ? AND created_at >= ?'
+        params += [FILTERS['project_id'], FILTERS['status'], FILTERS['since']]
+    return db.conn.execute(sql, params).fetchall()
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(size: int) -> dict:
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "search.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db, redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            words = _seed(db, size, rng)
+            seed_s = time.perf_counter() - start
+
+            queries = {'common': [words[0]], 'rare': [words[3000]],
+                       'two words': [words[5], words[40]], 'prefix': [words[100][:4] + '*']}
+            searches = {}
+            for name, terms in queries.items():
+                for filters in (False, True):
+                    kwargs = FILTERS if filters else {}
+                    label = name + (' +filters' if filters else '')
+                    hits = len(db.search(' '.join(terms), limit=size, **kwargs)['tasks'])
+                    searches[label] = {
+                        'hits': hits,
+                        'like_ms': round(_time(lambda: _like(db, terms, filters)) * 1000, 2),
+                        'fts_ms': round(_time(lambda: db.search(' '.join(terms), **kwargs)) * 1000, 2),
+                    }
+
+            task_ids = [f"T-SRCH-{i:07d}" for i in rng.sample(range(size), UPDATES * 2)]
+            start = time.perf_counter()
+            for task_id in task_ids[:UPDATES]:
+                db.update_progress(task_id, 50, 'halfway, waiting on review')
+            update_ms = (time.perf_counter() - start) / UPDATES * 1000
+            db.conn.execute('DROP TRIGGER trg_tasks_fts_update')
+            start = time.perf_counter()
+            for task_id in task_ids[UPDATES:]:
+                db.update_progress(task_id, 50, 'halfway, waiting on review')
+            update_plain_ms = (time.perf_counter() - start) / UPDATES * 1000
+            db_mb = db_path.stat().st_size / 1e6
+
+    return {'tasks': size, 'seed_s': round(seed_s, 1), 'db_mb': round(db_mb, 1), 'searches': searches,
+            'update_ms': round(update_ms, 3), 'update_without_trigger_ms': round(update_plain_ms, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Task search benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        r = bench_size(size)
+        results.append(r)
+        print(f"\n{size} tasks (seeded in {r['seed_s']} s, {r['db_mb']} MB), "
+              f"update_progress {r['update_ms']} ms vs {r['update_without_trigger_ms']} ms without the index")
+        print(f"{'query':>20} {'hits':>7} {'LIKE ms':>9} {'FTS ms':>8}")
+        for label, s in r['searches'].items():
+            print(f"{label:>20} {s['hits']:>7} {s['like_ms']:>9} {s['fts_ms']:>8}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Per-command latency benchmark: `python3 team_db.py ...` vs `python3 team_client.py ...`
+
+Runs the commands agents issue most (progress, heartbeat, a short task list)
+as separate processes, like the spawned agents do, in three modes:
+  direct    python3 team_db.py <cmd>
+  fallback  python3 team_client.py <cmd> with no daemon running
+  daemon    python3 team_client.py <cmd> answered by `team_db.py serve`
+plus the socket round trip alone (send_command from this process).
+
+The modules are copied next to a fixture team.db in a temp dir so the
+default DB_PATH / SOCKET_PATH point at the fixture.
+
+Usage: python3 -m benchmarks.bench_server [--runs 30] [--json out.json]
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent
+COMMANDS = [
+    ['task', 'progress', '{task}', '40', '--notes', 'bench'],
+    ['agent', 'heartbeat', 'agent-001'],
+    ['task', 'list', '--limit', '5'],
+]
+
+
+def _sandbox(tmp: Path) -> str:
+    for source in SOURCE_DIR.glob('*.py'):
+        shutil.copy(source, tmp / source.name)
+    create_database(tmp / "team.db")
+    sys.path.insert(0, str(tmp))
+    from team_db import AITeamDB
+    with AITeamDB(tmp / "team.db", spawn_dispatcher=False) as db:
+        return db.create_task('Bench task', project_id='PROJ-001', assignee_id='agent-001')
+
+
+def _stats(samples) -> dict:
+    samples = sorted(samples)
+    return {
+        'mean_ms': round(statistics.mean(samples) * 1000, 2),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+    }
+
+
+def _run_cli(script: Path, commands, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        for argv in commands:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(script)] + argv, check=True,
+                           stdout=subprocess.DEVNULL, cwd=script.parent)
+            samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='team_db daemon latency benchmark')
+    parser.add_argument('--runs', type=int, default=30, help='Rounds over the command mix')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        task_id = _sandbox(tmp)
+        commands = [[part.format(task=task_id) for part in argv] for argv in COMMANDS]
+        # Hold the dispatcher lock: notifications only queue, nothing is sent
+        from notify_outbox import _try_lock
+        dispatcher_lock = _try_lock(tmp / "team.db")
+
+        results = {
+            'direct': _run_cli(tmp / "team_db.py", commands, args.runs),
+            'fallback': _run_cli(tmp / "team_client.py", commands, args.runs),
+        }
+
+        from team_client import SOCKET_PATH, send_command
+        daemon = subprocess.Popen([sys.executable, str(tmp / "team_db.py"), 'serve'],
+                                  cwd=tmp, stdout=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while send_command(['dashboard'], SOCKET_PATH) is None:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("daemon did not start")
+                time.sleep(0.05)
+
+            direct_out = subprocess.run([sys.executable, 'team_db.py', 'task', 'list'], cwd=tmp,
+                                        capture_output=True, text=True).stdout
+            results['same_output'] = send_command(['task', 'list'], SOCKET_PATH)['stdout'] == direct_out
+
+            results['daemon'] = _run_cli(tmp / "team_client.py", commands, args.runs)
+            samples = []
+            for _ in range(args.runs):
+                for argv in commands:
+                    start = time.perf_counter()
+                    send_command(argv, SOCKET_PATH)
+                    samples.append(time.perf_counter() - start)
+            results['round_trip'] = _stats(samples)
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+            dispatcher_lock.close()
+
+    print(f"{'mode':<11} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ('direct', 'fallback', 'daemon', 'round_trip'):
+        r = results[mode]
+        print(f"{mode:<11} {r['mean_ms']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8}")
+    print(f"\nDaemon output identical to direct mode: {results['same_output']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Subagent spawn benchmark: one spawn at a time vs the bounded pool
+
+Puts benchmarks/bin first on PATH and makes its fake openclaw behave like a
+slow, unreliable spawner: every sessions_spawn sleeps --delay seconds,
+spawns of tasks whose ID ends in one of --fail-digits exit 1, and the
+first assigned task's spawn never answers, so it runs into --spawn-timeout.
+Then runs AutoAssign.run on a copy of the same fixture per --workers value
+(1 is the old serial loop) and reports the wall time.
+
+Each run is also checked against the database and the notification it
+sent: every succeeded spawn must leave its task assigned and its agent
+active, every failed one its task back in todo with no assignee and its
+agent idle without a current task, and the notification must list exactly
+those successes and failures.
+
+Usage: python3 -m benchmarks.bench_spawn [--agents 20] [--delay 0.5] [--workers 1 4 8 16] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auto_assign import AutoAssign  # noqa: E402
+from benchmarks.bench_assign import FAKE_OPENCLAW, _populate  # noqa: E402
+from benchmarks.schema import create_database  # noqa: E402
+from storage import connect  # noqa: E402
+
+
+def _check(db_path: Path, results: list, message: str) -> list:
+    """Problems in how a run's spawn results were written back, [] if none"""
+    problems = []
+    conn = connect(db_path)
+    try:
+        for r in results:
+            task = conn.execute('SELECT status, assignee_id FROM tasks WHERE id = ?', (r['task'],)).fetchone()
+            agent = conn.execute('SELECT status, current_task_id FROM agents WHERE id = ?', (r['agent'],)).fetchone()
+            if r['ok']:
+                expected = (('todo', r['agent']), ('active', r['task']))
+            else:
+                expected = (('todo', None), ('idle', None))
+            if (tuple(task), tuple(agent)) != expected:
+                problems.append(f"{r['task']}: task {tuple(task)}, agent {tuple(agent)}, expected {expected}")
+    finally:
+        conn.close()
+
+    succeeded = sum(r['ok'] for r in results)
+    if f"Auto-Assigned {succeeded} Tasks" not in message:
+        problems.append(f"notification does not report {succeeded} successes")
+    failed = len(results) - succeeded
+    if failed and f"{failed} Spawns Failed" not in message:
+        problems.append(f"notification does not report {failed} failures")
+    listed = message.count('\n• ')
+    if listed != len(results):
+        problems.append(f"notification lists {listed} tasks, {len(results)} were spawned")
+    return problems
+
+
+def _run(db_path: Path, workers: int, spawn_timeout: int) -> dict:
+    with AutoAssign(db_path) as assigner, redirect_stdout(io.StringIO()):
+        results, messages = [], []
+        spawn_all = assigner.spawn_all
+
+        def recording_spawn_all(*args):
+            results.extend(spawn_all(*args))
+            return results
+        assigner.spawn_all = recording_spawn_all
+        assigner.send_notification = lambda message: messages.append(message) or True
+        start = time.perf_counter()
+        summary = assigner.run('greedy', workers, spawn_timeout)
+        seconds = time.perf_counter() - start
+
+    message = messages[0] if messages else ''
+    return {
+        'workers': workers, 'seconds': round(seconds, 2),
+        'assigned': summary['assigned'], 'failed': summary['failed'],
+        'timed_out': sum(1 for r in results if r['error'] and 'no answer' in r['error']),
+        'problems': _check(db_path, results, message),
+    }
+
+
+def run(agents: int, delay: float, fail_digits: str, spawn_timeout: int, workers_list: list) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "team.db")
+        conn = connect(db_path)
+        _populate(conn, agents, agents * 2, seed=0)
+        first_task = conn.execute('''
+            SELECT id FROM tasks WHERE status = 'todo' ORDER BY id LIMIT 1
+        ''').fetchone()[0]
+        conn.close()
+
+        os.environ['PATH'] = f"{FAKE_OPENCLAW}{os.pathsep}{os.environ.get('PATH', '')}"
+        os.environ['FAKE_OPENCLAW_SPAWN_DELAY'] = str(delay)
+        os.environ['FAKE_OPENCLAW_FAIL'] = ' '.join(f"*{digit}" for digit in fail_digits)
+        # The oldest ready task is the first one any strategy hands out
+        os.environ['FAKE_OPENCLAW_HANG'] = f"auto-task-{first_task}"
+
+        runs = []
+        for workers in workers_list:
+            copy = Path(tmp) / f"team-{workers}.db"
+            source, target = connect(db_path), connect(copy, apply_migrations=False)
+            source.backup(target)
+            source.close()
+            target.close()
+            runs.append(_run(copy, workers, spawn_timeout))
+
+    return {'agents': agents, 'delay': delay, 'spawn_timeout': spawn_timeout, 'fail_digits': fail_digits,
+            'hanging_task': first_task, 'runs': runs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Subagent spawn benchmark')
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--delay', type=float, default=0.5, help='Seconds each fake spawn takes')
+    parser.add_argument('--fail-digits', default='37', help='Spawns of task IDs ending in these digits fail')
+    parser.add_argument('--spawn-timeout', type=int, default=2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    result = run(args.agents, args.delay, args.fail_digits, args.spawn_timeout, args.workers)
+    print(f"{result['agents']} idle agents, spawns take {result['delay']} s, "
+          f"IDs ending in {result['fail_digits']} fail, {result['hanging_task']} hangs "
+          f"(timeout {result['spawn_timeout']} s)")
+    print(f"{'workers':>8} {'seconds':>8} {'spawned':>8} {'failed':>7} {'timed out':>10}  check")
+    serial = result['runs'][0]['seconds']
+    for r in result['runs']:
+        check = 'ok' if not r['problems'] else f"{len(r['problems'])} problems"
+        print(f"{r['workers']:>8} {r['seconds']:>8} {r['assigned']:>8} {r['failed']:>7} {r['timed_out']:>10}  "
+              f"{check} ({serial / r['seconds']:.1f}x)")
+        for problem in r['problems'][:5]:
+            print(f"      {problem}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Task ID allocation benchmark: legacy MAX(SUBSTR(id)) scan vs task_sequences upsert
+
+Measures create_task latency as the tasks table grows, and checks that
+concurrent creators never collide on an ID.
+
+Usage: python3 -m benchmarks.bench_task_ids [--sizes 1000 100000 1000000] [--creates 200] [--json out.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+LEGACY_QUERY = '''
+    SELECT COALESCE(MAX(CAST(SUBSTR(id, 12) AS INTEGER)), 0) FROM tasks
+    WHERE id LIKE ?
+'''
+
+
+def _fill(conn: sqlite3.Connection, total: int):
+    """Fill tasks with `total` rows spread over past days (plus today's first 500)"""
+    today = datetime.now()
+    rows = []
+    per_day = 500
+    for i in range(total):
+        day = (today - timedelta(days=i // per_day)).strftime('%Y%m%d')
+        rows.append((f"T-{day}-{i % per_day + 1:03d}", f"Filler task {i}", 'PROJ-001', 'done'))
+        if len(rows) >= 50000:
+            conn.executemany('INSERT INTO tasks (id, title, project_id, status) VALUES (?, ?, ?, ?)', rows)
+            rows = []
+    if rows:
+        conn.executemany('INSERT INTO tasks (id, title, project_id, status) VALUES (?, ?, ?, ?)', rows)
+    conn.commit()
+
+
+def _ms(samples):
+    return {
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+        'p99_ms': round(sorted(samples)[int(len(samples) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def bench_size(size: int, creates: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "ids.db")
+        conn = sqlite3.connect(str(db_path))
+        _fill(conn, size)
+        pattern = f"T-{datetime.now().strftime('%Y%m%d')}-%"
+        legacy = []
+        for _ in range(creates):
+            start = time.perf_counter()
+            conn.execute(LEGACY_QUERY, (pattern,)).fetchone()
+            legacy.append(time.perf_counter() - start)
+        conn.close()
+
+        current = []
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            for i in range(creates):
+                start = time.perf_counter()
+                db.create_task(f"Bench {i}", project_id='PROJ-001')
+                current.append(time.perf_counter() - start)
+
+    return {
+        'tasks': size,
+        'legacy_id_lookup': _ms(legacy),
+        'create_task': _ms(current),
+    }
+
+
+def _creator(db_path: str, count: int, out):
+    ids = []
+    with AITeamDB(Path(db_path), spawn_dispatcher=False) as db:
+        for i in range(count):
+            ids.append(db.create_task(f"Concurrent {i}", project_id='PROJ-001'))
+    out.put(ids)
+
+
+def bench_concurrency(workers: int = 8, per_worker: int = 50) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "race.db")
+        AITeamDB(db_path, spawn_dispatcher=False).close()
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_creator, args=(str(db_path), per_worker, out))
+                 for _ in range(workers)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        ids = [i for _ in procs for i in out.get()]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+    return {
+        'workers': workers,
+        'created': len(ids),
+        'unique_ids': len(set(ids)),
+        'failed_workers': sum(1 for p in procs if p.exitcode != 0),
+        'seconds': round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Task ID allocation benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--creates', type=int, default=200)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = {'sizes': [], 'concurrency': None}
+    print(f"{'tasks':>10} {'legacy lookup ms':>17} {'create_task ms':>15} {'create p99 ms':>14}")
+    for size in args.sizes:
+        r = bench_size(size, args.creates)
+        results['sizes'].append(r)
+        print(f"{size:>10} {r['legacy_id_lookup']['mean_ms']:>17} {r['create_task']['mean_ms']:>15} "
+              f"{r['create_task']['p99_ms']:>14}")
+
+    race = bench_concurrency()
+    results['concurrency'] = race
+    print(f"\nConcurrent creators: {race['workers']} workers, {race['created']} tasks, "
+          f"{race['unique_ids']} unique IDs, {race['failed_workers']} failed workers")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
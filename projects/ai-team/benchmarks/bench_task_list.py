@@ -0,0 +1,102 @@
+"""
+Task listing benchmark: legacy fetchall + dict(row) vs keyset-paged iter_tasks
+
+Reports peak Python memory for a full listing, time to the first row and
+the cost of a 50-row page deep into the table (`task list --limit 50 --after ...`).
+
+Usage: python3 -m benchmarks.bench_task_list [--sizes 10000 100000 300000] [--json out.json]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+
+LEGACY_QUERY = 'SELECT * FROM v_task_summary WHERE 1=1 ORDER BY due_date, priority'
+
+
+def _tasks(count: int):
+    for i in range(count):
+        yield {'title': f"Task {i}", 'project_id': f"PROJ-00{i % 3 + 1}",
+               'priority': ('critical', 'high', 'normal', 'low')[i % 4],
+               'due_date': f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}" if i % 10 else None}
+
+
+def _legacy(db: AITeamDB):
+    return [dict(row) for row in db.conn.execute(LEGACY_QUERY).fetchall()]
+
+
+def _measure(fn) -> dict:
+    """Wall time of fn() in one run, peak traced memory in another"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 1e6, 2)}
+
+
+def bench_size(size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "list.db")
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            db.create_tasks_bulk(_tasks(size), chunk_size=5000)
+
+            legacy = _measure(lambda: len(_legacy(db)))
+            streamed = _measure(lambda: sum(1 for _ in db.iter_tasks()))
+
+            start = time.perf_counter()
+            _legacy(db)[0]
+            legacy_first = time.perf_counter() - start
+            start = time.perf_counter()
+            next(db.iter_tasks())
+            stream_first = time.perf_counter() - start
+
+            middle = list(db.iter_tasks(columns=('id',), limit=size // 2))[-1]['id']
+            start = time.perf_counter()
+            page = db.get_tasks(limit=50, after=middle)
+            deep_page = time.perf_counter() - start
+
+    return {
+        'tasks': size,
+        'legacy': legacy,
+        'iter_tasks': streamed,
+        'first_row_ms': {'legacy': round(legacy_first * 1000, 2), 'iter_tasks': round(stream_first * 1000, 2)},
+        'deep_page_ms': round(deep_page * 1000, 2),
+        'deep_page_rows': len(page),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Task listing benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 300000])
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'tasks':>8} {'legacy s':>9} {'legacy MB':>10} {'iter s':>7} {'iter MB':>8} "
+          f"{'1st row ms (legacy/iter)':>25} {'page ms':>8}")
+    for size in args.sizes:
+        r = bench_size(size)
+        results.append(r)
+        first = f"{r['first_row_ms']['legacy']} / {r['first_row_ms']['iter_tasks']}"
+        print(f"{size:>8} {r['legacy']['seconds']:>9} {r['legacy']['peak_mb']:>10} "
+              f"{r['iter_tasks']['seconds']:>7} {r['iter_tasks']['peak_mb']:>8} {first:>25} "
+              f"{r['deep_page_ms']:>8}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
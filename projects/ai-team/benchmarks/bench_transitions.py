@@ -0,0 +1,218 @@
+"""
+Task transition race benchmark: read-then-write updates vs compare-and-swap transitions
+
+Every task starts in_progress and four writers race to move it at once, the
+way an agent, the health monitor, memory maintenance and a reviewer can:
+complete, auto-block, release to todo and send to review. Only one of them
+may win unless the graph allows a follow-up (review then done). A trigger
+logs every status edge; the benchmark reports edges the graph does not
+allow (done -> blocked, blocked -> todo ...) and history rows whose
+old_status does not match the status the task was actually in.
+
+Usage: python3 -m benchmarks.bench_transitions [--tasks 500] [--json out.json]
+"""
+
+import argparse
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from storage import connect  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+from transitions import TRANSITIONS, transition  # noqa: E402
+
+AGENTS = 10
+ACTIONS = ('complete', 'block', 'release', 'review')
+
+
+# ---- Read-then-write, as the code did before transitions.py ----
+
+def _legacy_complete(conn, task_id):
+    conn.execute('''
+        UPDATE tasks SET status = 'done', progress = 100, completed_at = CURRENT_TIMESTAMP,
+                         updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (task_id,))
+    conn.execute('''
+        UPDATE agents SET total_tasks_completed = total_tasks_completed + 1,
+                          current_task_id = NULL, status = 'idle'
+        WHERE id = (SELECT assignee_id FROM tasks WHERE id = ?)
+    ''', (task_id,))
+    conn.execute('''
+        INSERT INTO task_history (task_id, action, old_status, new_status)
+        SELECT id, 'completed', status, 'done' FROM tasks WHERE id = ?
+    ''', (task_id,))
+    conn.commit()
+    return True
+
+
+def _legacy_block(conn, task_id):
+    conn.execute('''
+        UPDATE tasks SET status = 'blocked', blocked_reason = 'Auto-blocked: Stuck',
+                         updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (task_id,))
+    conn.execute('''
+        INSERT INTO task_history (task_id, action, notes)
+        VALUES (?, 'blocked', 'Auto-blocked by health monitor')
+    ''', (task_id,))
+    conn.commit()
+    return True
+
+
+def _legacy_release(conn, task_id):
+    conn.execute('''
+        UPDATE tasks SET status = 'todo', assignee_id = NULL, updated_at = datetime('now')
+        WHERE id = ?
+    ''', (task_id,))
+    conn.execute('''
+        INSERT INTO task_history (task_id, action, notes)
+        VALUES (?, 'updated', 'Reset: agent stale, task returned to todo')
+    ''', (task_id,))
+    conn.commit()
+    return True
+
+
+def _legacy_review(conn, task_id):
+    row = conn.execute('SELECT status FROM tasks WHERE id = ?', (task_id,)).fetchone()
+    if row[0] != 'in_progress':
+        return False
+    conn.execute('''
+        UPDATE tasks SET status = 'review', updated_at = CURRENT_TIMESTAMP WHERE id = ?
+    ''', (task_id,))
+    conn.execute('''
+        INSERT INTO task_history (task_id, action, old_status, new_status)
+        VALUES (?, 'updated', 'in_progress', 'review')
+    ''', (task_id,))
+    conn.commit()
+    return True
+
+
+LEGACY = {'complete': _legacy_complete, 'block': _legacy_block,
+          'release': _legacy_release, 'review': _legacy_review}
+
+
+# ---- Compare-and-swap through transitions.py ----
+
+def _cas(db: AITeamDB, action: str, task_id: str) -> bool:
+    if action == 'complete':
+        return db.complete_task(task_id)
+    if action == 'review':
+        return db.send_to_review(task_id)
+    # Health monitor / memory maintenance call transition() with what they saw
+    result = transition(db.conn.cursor(), task_id, action, reason='bench', expected='in_progress')
+    if result['ok']:
+        db.conn.commit()
+    else:
+        db.conn.rollback()
+    return result['ok']
+
+
+def _seed(db_path: Path, tasks: int):
+    """Insert the race tasks and a trigger logging every status edge"""
+    conn = connect(db_path)
+    conn.executemany('''
+        INSERT INTO tasks (id, title, project_id, status, assignee_id, started_at)
+        VALUES (?, ?, 'PROJ-001', 'in_progress', ?, datetime('now', '-1 hour'))
+    ''', [(f"T-RACE-{i:05d}", f"Race {i}", f"agent-{i % AGENTS + 1:03d}") for i in range(tasks)])
+    conn.executescript('''
+        CREATE TABLE status_edges (task_id TEXT, old_status TEXT, new_status TEXT);
+        CREATE TRIGGER log_status_edge AFTER UPDATE OF status ON tasks
+        WHEN OLD.status != NEW.status
+        BEGIN
+            INSERT INTO status_edges VALUES (NEW.id, OLD.status, NEW.status);
+        END;
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def _worker(db_path: Path, mode: str, action: str, task_ids, barrier, wins, errors):
+    db = AITeamDB(db_path, spawn_dispatcher=False)
+    barrier.wait()
+    for task_id in task_ids:
+        try:
+            ok = LEGACY[action](db.conn, task_id) if mode == 'legacy' else _cas(db, action, task_id)
+        except Exception:
+            db.conn.rollback()
+            errors.append(action)
+            continue
+        if ok:
+            wins.append((task_id, action))
+    db.close()
+
+
+def run(mode: str, tasks: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(Path(tmp) / "race.db", agents=AGENTS)
+        _seed(db_path, tasks)
+        task_ids = [f"T-RACE-{i:05d}" for i in range(tasks)]
+
+        wins, errors = [], []
+        barrier = threading.Barrier(len(ACTIONS))
+        threads = [threading.Thread(target=_worker, args=(db_path, mode, action, task_ids,
+                                                          barrier, wins, errors))
+                   for action in ACTIONS]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        conn = connect(db_path)
+        legal = {(old, new) for allowed, new, _ in TRANSITIONS.values() for old in allowed}
+        illegal = sum(1 for edge in conn.execute('SELECT old_status, new_status FROM status_edges')
+                      if tuple(edge) not in legal)
+        # History rows must chain: each old_status is the previous new_status
+        broken = 0
+        for task_id in task_ids:
+            status = 'in_progress'
+            for old, new in conn.execute('''
+                SELECT old_status, new_status FROM task_history WHERE task_id = ? ORDER BY id
+            ''', (task_id,)):
+                if old != status:
+                    broken += 1
+                status = new if new is not None else status
+        conn.close()
+
+    return {
+        'mode': mode,
+        'tasks': tasks,
+        'applied': len(wins),
+        'illegal_edges': illegal,
+        'broken_history_rows': broken,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Task transition race benchmark')
+    parser.add_argument('--tasks', type=int, default=500)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    # Lost races print a warning per task; sys.stdout is process-wide so silence it here
+    with redirect_stdout(io.StringIO()):
+        results = [run(mode, args.tasks) for mode in ('legacy', 'cas')]
+    print(f"{'mode':>7} {'applied':>8} {'illegal edges':>14} {'bad history':>12} "
+          f"{'errors':>7} {'s':>7}")
+    for r in results:
+        print(f"{r['mode']:>7} {r['applied']:>8} {r['illegal_edges']:>14} {r['broken_history_rows']:>12} "
+              f"{r['errors']:>7} {r['seconds']:>7}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""
+Synthetic team.db builder and mixed workload generator
+
+build_database() creates a fully migrated database at a chosen scale. A
+task's status depends on its age: old tasks are nearly all done, recent
+ones are a realistic open mix, and each busy agent holds one in_progress
+task. Every task gets a history that follows its status (created, assigned,
+started, a few progress updates, completed). Heartbeats include stale and
+offline agents, in_progress tasks include stuck ones, and some todo tasks
+wait on dependencies, so the health monitor, auto-assign and memory
+maintenance all find work. The build ends in steady state: history older
+than 30 days is archived and the change feed starts empty, as it would be
+after maintenance has been running.
+
+Workload yields (op, args) tuples from OP_MIX for a benchmark to replay
+against AITeamDB.
+
+Usage: python3 -m benchmarks.loadgen team-1m.db --agents 100 --tasks 1000000
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+from history_archive import archive_history  # noqa: E402
+from migrations import learning_hash  # noqa: E402
+from storage import connect  # noqa: E402
+
+# name: (agents, tasks)
+SCALES = {
+    'small': (10, 10_000),
+    'medium': (50, 100_000),
+    'large': (100, 1_000_000),
+}
+
+# Tasks created within RECENT_DAYS use STATUS_MIX, older ones OLD_STATUS_MIX;
+# in_progress is not drawn: each busy agent gets one
+RECENT_DAYS = 14
+STATUS_MIX = (('done', 0.50), ('todo', 0.30), ('backlog', 0.08), ('cancelled', 0.04),
+              ('review', 0.03), ('blocked', 0.05))
+OLD_STATUS_MIX = (('done', 0.93), ('cancelled', 0.05), ('backlog', 0.02))
+PRIORITY_MIX = (('critical', 0.05), ('high', 0.20), ('normal', 0.60), ('low', 0.15))
+
+BUSY_AGENTS = 0.6
+STALE_AGENTS = 0.10                   # heartbeat 30-60 min old
+OFFLINE_AGENTS = 0.05                 # heartbeat over an hour old
+STUCK_TASKS = 0.15                    # in_progress, no update for 2-5 hours
+DEPENDENT_TODO = 0.10
+LEARNING_SHARE = 0.2                  # done tasks that left a learning
+
+# One replayed operation: create / start (assign + start) / progress / done / heartbeat
+OP_MIX = (('create', 0.10), ('start', 0.10), ('progress', 0.40), ('done', 0.10), ('heartbeat', 0.30))
+
+VERBS = ['Build', 'Fix', 'Refactor', 'Review', 'Test', 'Document', 'Design', 'Plan', 'Analyze', 'Migrate']
+AREAS = ['frontend', 'backend', 'api', 'database', 'ui', 'ux', 'qa', 'doc', 'design', 'test']
+NOUNS = ['login flow', 'billing page', 'search index', 'report export', 'user settings',
+         'notification queue', 'dashboard cards', 'audit log', 'upload service', 'cache layer',
+         'onboarding wizard', 'permission model', 'webhook retries', 'rate limiter', 'sync job']
+
+
+def _pick(rng: random.Random, mix) -> str:
+    return rng.choices([name for name, _ in mix], weights=[weight for _, weight in mix])[0]
+
+
+def _ts(moment: datetime) -> str:
+    """UTC text timestamp, the format CURRENT_TIMESTAMP writes"""
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _title(rng: random.Random) -> str:
+    return f"{rng.choice(VERBS)} {rng.choice(NOUNS)} ({rng.choice(AREAS)})"
+
+
+def _task_rows(rng: random.Random, count: int, days: int, agent_ids: List[str], project_ids: List[str],
+               history_depth: int, now: datetime) -> Iterator[Tuple[tuple, List[tuple], str]]:
+    """(task row, history rows, status) for count tasks created oldest first over days"""
+    numbers: Dict[str, int] = {}
+    span = days * 86400
+    for i in range(count):
+        created = now - timedelta(seconds=span * (1 - i / count) + rng.uniform(0, 60))
+        day = created.astimezone().strftime('%Y%m%d')
+        numbers[day] = numbers.get(day, 0) + 1
+        task_id = f"T-{day}-{numbers[day]:03d}"
+        recent = now - created < timedelta(days=RECENT_DAYS)
+        status = _pick(rng, STATUS_MIX if recent else OLD_STATUS_MIX)
+        priority = _pick(rng, PRIORITY_MIX)
+        title = _title(rng)
+
+        assignee = started = completed = duration = None
+        progress = 0
+        updated = created
+        history = [(task_id, None, 'created', None, None, None, None,
+                    f"Task created with priority {priority}", _ts(created))]
+        if status in ('done', 'review', 'blocked') or (status == 'todo' and rng.random() < 0.3):
+            assignee = rng.choice(agent_ids)
+            assigned = created + timedelta(minutes=rng.uniform(1, 240))
+            history.append((task_id, assignee, 'assigned', 'todo', 'todo', None, None,
+                            f"Assigned to {assignee}", _ts(min(assigned, now))))
+            updated = assigned
+        if status in ('done', 'review', 'blocked'):
+            started = min(updated + timedelta(minutes=rng.uniform(1, 600)), now)
+            history.append((task_id, assignee, 'started', 'todo', 'in_progress', None, None, None, _ts(started)))
+            # Log-normal durations: median about 90 minutes, a long tail of multi-day tasks
+            duration = max(1, int(rng.lognormvariate(math.log(90), 1.0)))
+            finished = min(started + timedelta(minutes=duration), now)
+            steps = rng.randint(0, max(0, 2 * (history_depth - 4)))
+            for step in range(1, steps + 1):
+                at = started + (finished - started) * step / (steps + 1)
+                history.append((task_id, assignee, 'updated', None, None, progress,
+                                min(99, progress + 100 // (steps + 1)), None, _ts(at)))
+                progress = min(99, progress + 100 // (steps + 1))
+            updated = finished
+            if status == 'done':
+                completed, progress = finished, 100
+                duration = int((finished - started).total_seconds() // 60)
+                history.append((task_id, assignee, 'completed', 'in_progress', 'done', progress, 100,
+                                None, _ts(finished)))
+            else:
+                duration = None
+                action = 'updated' if status == 'review' else 'blocked'
+                history.append((task_id, assignee, action, 'in_progress', status, None, None, None, _ts(finished)))
+        elif status in ('backlog', 'cancelled'):
+            updated = min(created + timedelta(hours=rng.uniform(1, 72)), now)
+            history.append((task_id, None, 'backlogged' if status == 'backlog' else 'updated', 'todo', status,
+                            None, None, None, _ts(updated)))
+
+        row = (task_id, title, f"Synthetic task {i}", rng.choice(project_ids), assignee, status,
+               'Waiting on upstream' if status == 'blocked' else None, priority, progress,
+               round(rng.uniform(0.5, 16), 1), duration, _ts(created),
+               _ts(started) if started else None, _ts(completed) if completed else None,
+               _ts(created + timedelta(days=rng.uniform(1, 30))) if rng.random() < 0.4 else None,
+               _ts(updated))
+        yield row, history, status
+
+
+def build_database(db_path: Path, agents: int = 10, tasks: int = 10_000, projects: int = 10,
+                   days: int = 120, history_depth: int = 6, seed: int = 0,
+                   chunk_size: int = 10_000) -> Dict:
+    """Create db_path with synthetic agents, projects, tasks and history
+
+    history_depth is the average number of history rows per finished task.
+    Returns {path, agents, tasks, history, archived, seconds, bytes}.
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    db_path = create_database(db_path, agents=agents, projects=projects)
+    conn = connect(db_path)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    agent_ids = [row[0] for row in conn.execute('SELECT id FROM agents ORDER BY id')]
+    project_ids = [row[0] for row in conn.execute('SELECT id FROM projects ORDER BY id')]
+
+    history_count = 0
+    todo_ids: List[str] = []
+    learnings = []
+    rows = _task_rows(rng, tasks, days, agent_ids, project_ids, history_depth, now)
+    while True:
+        chunk = [next(rows, None) for _ in range(chunk_size)]
+        chunk = [item for item in chunk if item]
+        if not chunk:
+            break
+        conn.executemany('''
+            INSERT INTO tasks (id, title, description, project_id, assignee_id, status, blocked_reason,
+                               priority, progress, estimated_hours, actual_duration_minutes, created_at,
+                               started_at, completed_at, due_date, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [row for row, _, _ in chunk])
+        history = [entry for _, entries, _ in chunk for entry in entries]
+        conn.executemany('''
+            INSERT INTO task_history (task_id, agent_id, action, old_status, new_status,
+                                      old_progress, new_progress, notes, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', history)
+        history_count += len(history)
+        for row, _, status in chunk:
+            if status == 'todo' and row[4] is None:
+                todo_ids.append(row[0])
+            elif status == 'done' and rng.random() < LEARNING_SHARE:
+                content = f"Completed: {row[1]}"
+                learnings.append((row[4], content, learning_hash(content), row[0], row[13]))
+        conn.commit()
+
+    conn.executemany('''
+        INSERT OR IGNORE INTO agent_learnings (agent_id, content, content_hash, source_task_id, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', learnings)
+    conn.execute('''
+        INSERT INTO task_sequences (day, last_number)
+        SELECT SUBSTR(id, 3, 8), MAX(CAST(SUBSTR(id, 12) AS INTEGER)) FROM tasks GROUP BY SUBSTR(id, 3, 8)
+        ON CONFLICT(day) DO UPDATE SET last_number = MAX(last_number, excluded.last_number)
+    ''')
+
+    # Later todo tasks wait on earlier ones: edges point backwards, no cycles
+    edges = {(todo_ids[i], todo_ids[rng.randrange(i)])
+             for i in range(1, len(todo_ids)) if rng.random() < DEPENDENT_TODO}
+    conn.executemany('INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_task_id) VALUES (?, ?)',
+                     edges)
+
+    # Busy agents hold one in_progress task each, some of them stuck
+    for index, agent_id in enumerate(agent_ids):
+        roll = rng.random()
+        age = (rng.uniform(30, 60) if roll < STALE_AGENTS
+               else rng.uniform(61, 600) if roll < STALE_AGENTS + OFFLINE_AGENTS
+               else rng.uniform(0, 5))
+        heartbeat = _ts(now - timedelta(minutes=age))
+        if index >= len(todo_ids) or rng.random() >= BUSY_AGENTS:
+            conn.execute("UPDATE agents SET status = 'idle', last_heartbeat = ?, health_status = 'healthy' "
+                         "WHERE id = ?", (heartbeat, agent_id))
+            continue
+        task_id = todo_ids.pop()
+        quiet = rng.uniform(120, 300) if rng.random() < STUCK_TASKS else rng.uniform(0, 60)
+        started = now - timedelta(minutes=quiet + rng.uniform(0, 120))
+        conn.execute('''
+            UPDATE tasks SET status = 'in_progress', assignee_id = ?, progress = ?, started_at = ?, updated_at = ?
+            WHERE id = ?
+        ''', (agent_id, rng.randint(5, 90), _ts(started), _ts(now - timedelta(minutes=quiet)), task_id))
+        conn.executemany('''
+            INSERT INTO task_history (task_id, agent_id, action, old_status, new_status, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(task_id, agent_id, 'assigned', 'todo', 'todo', _ts(started - timedelta(minutes=5))),
+              (task_id, agent_id, 'started', 'todo', 'in_progress', _ts(started))])
+        conn.execute('''
+            UPDATE agents SET status = 'active', current_task_id = ?, last_heartbeat = ?,
+                              health_status = 'healthy', total_tasks_assigned = total_tasks_assigned + 1
+            WHERE id = ?
+        ''', (task_id, heartbeat, agent_id))
+    conn.execute('''
+        UPDATE agents SET total_tasks_completed = (
+            SELECT COUNT(*) FROM tasks WHERE assignee_id = agents.id AND status = 'done')
+    ''')
+    conn.commit()
+
+    # Steady state: maintenance has already archived old history and pruned the feed
+    archived = archive_history(conn, chunk_rows=50_000)['moved']
+    conn.execute('DELETE FROM changes')
+    conn.commit()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.execute('PRAGMA optimize')
+    conn.close()
+    return {'path': db_path, 'agents': agents, 'tasks': tasks, 'history': history_count,
+            'archived': archived, 'seconds': round(time.perf_counter() - start, 1),
+            'bytes': db_path.stat().st_size}
+
+
+class Workload:
+    """Mixed agent operations drawn from OP_MIX, consistent with the database
+
+    Tracks which tasks are ready, in progress and which agents are idle, so
+    every generated op is one an agent could really issue. Call the
+    matching AITeamDB method, then report back with applied().
+    """
+
+    def __init__(self, conn, seed: int = 0, mix=OP_MIX):
+        self.rng = random.Random(seed)
+        self.mix = mix
+        self.project_ids = [row[0] for row in conn.execute('SELECT id FROM projects')]
+        self.agent_ids = [row[0] for row in conn.execute('SELECT id FROM agents ORDER BY id')]
+        self.idle = [row[0] for row in conn.execute(
+            "SELECT id FROM agents WHERE status = 'idle' ORDER BY id")]
+        self.in_progress = {row[0]: row[1] for row in conn.execute(
+            "SELECT id, assignee_id FROM tasks WHERE status = 'in_progress'")}
+        self.ready = [row[0] for row in conn.execute('''
+            SELECT id FROM tasks
+            WHERE status = 'todo' AND (assignee_id IS NULL OR assignee_id = '') AND open_dependencies = 0
+            ORDER BY created_at DESC LIMIT 5000
+        ''')]
+        self.last_task = self.ready[0] if self.ready else next(iter(self.in_progress), None)
+
+    def next(self) -> Tuple[str, tuple]:
+        op = _pick(self.rng, self.mix)
+        if op == 'start' and not (self.idle and self.ready):
+            op = 'create'
+        if op in ('progress', 'done') and not self.in_progress:
+            op = 'heartbeat'
+        if op == 'create':
+            return op, (_title(self.rng), self.rng.choice(self.project_ids), _pick(self.rng, PRIORITY_MIX))
+        if op == 'start':
+            return op, (self.ready.pop(self.rng.randrange(len(self.ready))),
+                        self.idle.pop(self.rng.randrange(len(self.idle))))
+        if op == 'progress':
+            return op, (self.rng.choice(list(self.in_progress)), self.rng.randint(1, 99))
+        if op == 'done':
+            return op, (self.rng.choice(list(self.in_progress)),)
+        return op, (self.rng.choice(self.agent_ids),)
+
+    def applied(self, op: str, args: tuple, result):
+        """Update the tracked state after the op ran (result: its return value)"""
+        if op != 'heartbeat':
+            self.last_task = result if op == 'create' else args[0]
+        if op == 'create':
+            self.ready.append(result)
+        elif op == 'start' and result:
+            self.in_progress[args[0]] = args[1]
+        elif op == 'start':
+            self.idle.append(args[1])
+        elif op == 'done' and result:
+            agent_id = self.in_progress.pop(args[0])
+            if agent_id and agent_id not in self.idle:
+                self.idle.append(agent_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a synthetic team.db')
+    parser.add_argument('db', help='Path of the database to create (overwritten)')
+    parser.add_argument('--scale', choices=sorted(SCALES), help='Preset agents/tasks')
+    parser.add_argument('--agents', type=int, default=10)
+    parser.add_argument('--tasks', type=int, default=10_000)
+    parser.add_argument('--projects', type=int, default=10)
+    parser.add_argument('--days', type=int, default=120, help='Spread task creation over this many days')
+    parser.add_argument('--history-depth', type=int, default=6, help='Average history rows per finished task')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    agents, tasks = SCALES[args.scale] if args.scale else (args.agents, args.tasks)
+    result = build_database(Path(args.db), agents=agents, tasks=tasks, projects=args.projects,
+                            days=args.days, history_depth=args.history_depth, seed=args.seed)
+    print(f"✅ {result['path']}: {result['agents']} agents, {result['tasks']} tasks, "
+          f"{result['history']} history rows ({result['archived']} archived), "
+          f"{result['bytes'] / 1e6:.0f} MB in {result['seconds']} s")
+
+
+if __name__ == '__main__':
+    main()
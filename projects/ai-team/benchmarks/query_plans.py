@@ -0,0 +1,296 @@
+"""
+Query plan regression check for every production query
+
+Drives the code paths of AITeamDB, AutoAssign, HealthMonitor,
+HeartbeatCollector, MemoryMaintenance and the outbox dispatcher against a seeded fixture DB,
+captures each distinct statement with set_trace_callback and runs
+EXPLAIN QUERY PLAN on it. Exits 1 if a statement falls back to a full
+table scan that is not explicitly allowed below.
+
+Usage: python3 -m benchmarks.query_plans [--db team.db] [--verbose]
+  --db   explain the captured statements against another database (read-only)
+"""
+
+import argparse
+import io
+import itertools
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.schema import create_database  # noqa: E402
+import auto_assign  # noqa: E402
+import health_monitor  # noqa: E402
+from auto_assign import AutoAssign  # noqa: E402
+from health_monitor import HealthMonitor  # noqa: E402
+from history_archive import attach_archives, list_archives  # noqa: E402
+from heartbeat_ingest import HeartbeatCollector  # noqa: E402
+from memory_maintenance import MemoryMaintenance  # noqa: E402
+from notify_outbox import OutboxDispatcher  # noqa: E402
+from team_db import AITeamDB  # noqa: E402
+from tracing import normalize_sql  # noqa: E402
+
+# Statements that legitimately read a whole table: (regex on normalized SQL, reason)
+ALLOWED_SCANS = [
+    (r'AS progress_count$', 'dashboard --verify recounts everything by design'),
+    (r'AS open_tasks FROM tasks WHERE due_date IS NOT NULL', 'dashboard --verify recounts everything by design'),
+    (r'^SELECT day, open_tasks FROM dashboard_due_counters WHERE', 'dashboard --verify reads every due bucket'),
+    (r'^SELECT day, project_id, agent_id, completed, .* FROM daily_rollup WHERE completed != \?',
+     'report --verify reads every rollup row'),
+    (r'^SELECT dimension, key, month, bucket, count FROM duration_sketches WHERE count != \?',
+     'stats durations --verify reads every sketch bucket'),
+    (r"^SELECT dimension, key, strftime\(\?, completed_at\) AS month",
+     'stats durations --verify recounts every done task by design'),
+    (r'(tasks|learnings)_fts MATCH \?', 'FTS5 walks its own index; the SCAN is the virtual table cursor'),
+    (r'^SELECT k, v FROM \?\.\?$', 'FTS5 loads its few-row %_config table'),
+    (r"^SELECT COUNT\(\*\) FROM tasks WHERE id NOT IN \(SELECT ref FROM search_docs",
+     'task search --verify looks for unindexed rows by design'),
+    (r"^SELECT seq FROM changes WHERE at >= datetime\(\?, \?\) ORDER BY seq LIMIT \?$",
+     'change feed pruning walks from the oldest event to the first one it keeps'),
+    (r'(FROM|UPDATE) sqlite_sequence (SET seq = \? )?WHERE name = \?', 'one row per AUTOINCREMENT table'),
+    (r'FROM v_project_status', 'lists every project with its task counts'),
+    (r'^SELECT \* FROM v_\w+ LIMIT \?$', 'column probe with LIMIT 0, reads no rows'),
+    (r'FROM v_task_summary WHERE \?=\? ORDER BY due_date, priority, id LIMIT \?$',
+     'first task page walks idx_tasks_list in order and stops at LIMIT'),
+    (r'^SELECT id FROM projects$', 'project IDs loaded once per bulk import'),
+    (r'FROM agents a LEFT JOIN tasks t ON a.current_task_id = t.id ORDER BY', 'health check visits every agent'),
+    (r'SELECT health_status, COUNT\(\*\) as count FROM agents GROUP BY', 'health summary over all agents'),
+    (r'SELECT status, COUNT\(\*\) FROM outbox GROUP BY status', 'outbox status summary'),
+    (r"SELECT name FROM sqlite_master", 'schema lookup'),
+    (r'^INSERT OR IGNORE INTO task_dependencies .* WITH RECURSIVE upstream',
+     'cycle check walks the recursive CTE queue; each step is a PK search'),
+    (r'^SELECT id, project_id, estimated_hours FROM tasks WHERE status NOT IN',
+     'critical path loads every open task by design'),
+    (r'^SELECT d.task_id, d.depends_on_task_id FROM task_dependencies d JOIN tasks t',
+     'critical path loads every dependency edge by design'),
+    (r'^SELECT ac.agent_id, ac.context, ac.last_updated FROM agent_context ac LEFT JOIN agent_context_index',
+     'context index freshness check, one row per agent'),
+    (r'^SELECT agent_id, term, tf FROM agent_context_terms$', 'TF-IDF needs every context for document frequencies'),
+    (r'^SELECT keyword, role FROM role_match_rules ORDER BY', 'the matcher compiles every rule, in primary key order'),
+]
+
+@contextmanager
+def _fake_openclaw():
+    """Make openclaw calls return without running anything
+
+    Every other spawn fails, so both ways AutoAssign records a spawn run.
+    """
+    spawns = itertools.count()
+
+    def fake_run(args, **kwargs):
+        failed = 'sessions_spawn' in args and next(spawns) % 2 == 1
+        return subprocess.CompletedProcess(args, int(failed), stdout='', stderr='spawn failed' if failed else '')
+    originals = (auto_assign.subprocess.run, health_monitor.subprocess.run)
+    auto_assign.subprocess.run = fake_run
+    health_monitor.subprocess.run = fake_run
+    try:
+        yield
+    finally:
+        auto_assign.subprocess.run, health_monitor.subprocess.run = originals
+
+
+def _seed(db_path: Path):
+    """Add rows so every loop body (stuck tasks, stale agents, ...) executes"""
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript('''
+        INSERT INTO tasks (id, title, project_id, assignee_id, status, priority, updated_at, started_at)
+        VALUES ('T-20200101-001', 'Stuck backend api', 'PROJ-001', 'agent-001', 'in_progress', 'high',
+                datetime('now', '-4 hours'), datetime('now', '-5 hours'));
+        UPDATE agents SET status = 'active', current_task_id = 'T-20200101-001',
+                          last_heartbeat = datetime('now', '-2 hours')
+        WHERE id = 'agent-001';
+        UPDATE agents SET status = 'active', last_heartbeat = datetime('now', '-45 minutes'),
+                          health_status = 'healthy'
+        WHERE id = 'agent-002';
+        INSERT INTO tasks (id, title, project_id, assignee_id, status, started_at, completed_at, updated_at)
+        VALUES ('T-20200101-002', 'Write docs', 'PROJ-001', 'agent-003', 'done',
+                datetime('now', '-2 days'), datetime('now', '-1 days'), datetime('now', '-1 days'));
+        INSERT INTO tasks (id, title, project_id, status, priority)
+        VALUES ('T-20200101-003', 'Design database schema', 'PROJ-002', 'todo', 'critical');
+        INSERT INTO task_history (task_id, agent_id, action, timestamp)
+        VALUES ('T-20200101-001', 'agent-001', 'started', datetime('now', '-4 hours')),
+               ('T-20200101-002', 'agent-003', 'completed', datetime('now', '-40 days'));
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def capture_statements(db_path: Path) -> Dict[str, str]:
+    """Run the production code paths, returns {template: example statement}"""
+    statements: Dict[str, str] = {}
+
+    def record(sql: str):
+        statements.setdefault(normalize_sql(sql), sql)
+
+    with _fake_openclaw(), redirect_stdout(io.StringIO()):
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            db.conn.set_trace_callback(record)
+            task_id = db.create_task('Build login api', description='backend', project_id='PROJ-001')
+            db.create_tasks_bulk([{'title': 'Bulk task', 'project_id': 'PROJ-002'}])
+            db.add_dependency(task_id, 'T-20200101-003')
+            db.add_dependency(task_id, 'T-20200101-003')
+            try:
+                db.add_dependency('T-20200101-003', task_id)
+            except ValueError:
+                pass
+            db.get_dependencies(task_id)
+            db.get_ready_tasks(limit=5)
+            db.remove_dependency(task_id, 'T-20200101-003')
+            db.assign_task(task_id, 'agent-004')
+            db.start_task(task_id)
+            db.update_progress(task_id, 50, 'halfway')
+            db.send_to_review(task_id)
+            db.block_task(task_id, 'waiting')
+            db.unblock_task(task_id)
+            db.complete_task(task_id)
+            db.backlog_task(task_id)
+            db.update_task_requirements(task_id, prerequisites='- [ ] token')
+            db.get_task_requirements(task_id)
+            db.get_task_duration(task_id)
+            db.recalculate_durations()
+            for status in (None, 'in_progress'):
+                db.get_tasks(status=status)
+            db.get_tasks(assignee='agent-001')
+            db.get_tasks(status='todo', assignee='agent-001')
+            db.get_tasks(limit=3, after=task_id)
+            list(db.iter_tasks(status='todo', columns=('id', 'title'), limit=4, page_size=1))
+            db.get_agents()
+            db.get_agents(status='idle')
+            db.get_agents(limit=2, after='agent-001')
+            db.update_agent_heartbeat('agent-004')
+            db.get_dashboard_stats()
+            db.verify_dashboard_counters()
+            db.get_project_status()
+            db.generate_daily_report()
+            for by in ('day', 'project', 'agent', 'total'):
+                db.get_rollup('2020-01-01', '2030-12-31', by=by)
+            db.verify_daily_rollup()
+            for by in ('agent', 'project', 'priority', 'all'):
+                db.get_duration_stats(by)
+            db.get_duration_stats('agent', key='agent-003', since='2020-01')
+            db.verify_duration_sketches()
+            db.search('login api')
+            db.search('schema*', project_id='PROJ-002', status='todo', since='2020-01-01', until='2030-12-31')
+            db.verify_search_index()
+            db.get_agent_context('agent-001')
+            db.update_agent_context('agent-001', 'preferences', 'short answers')
+            db.add_learning('agent-001', 'Always use transactions', task_id)
+            db.get_agent_context('agent-001')
+
+        with HealthMonitor(db_path) as monitor:
+            monitor.conn.set_trace_callback(record)
+            monitor.run_health_check()
+            monitor.get_health_status()
+
+        with HeartbeatCollector(db_path) as collector:
+            collector.conn.set_trace_callback(record)
+            collector.ingest('agent-005')
+            collector.flush()
+
+        with MemoryMaintenance(db_path) as mm:
+            mm.conn.set_trace_callback(record)
+            mm.run()
+
+        # After maintenance moved the 40-day-old row into an archive month
+        with AITeamDB(db_path, spawn_dispatcher=False) as db:
+            db.conn.set_trace_callback(record)
+            db.get_task_history('T-20200101-002')
+            db.get_task_history(since='2020-01-01', until='2030-12-31', limit=10)
+            db.get_history_archives()
+            db.get_changes(0, limit=-1)
+            db.get_changes(0, ['task', 'agent'])
+            list(db.watch(0, idle_timeout=0))
+            db.restore_backup(db.backup()['path'])
+            db.list_backups()
+
+        with AutoAssign(db_path) as assigner:
+            assigner.conn.set_trace_callback(record)
+            assigner.run()
+            assigner.run('optimal')
+
+        with OutboxDispatcher(db_path, sender=lambda message, target: True) as dispatcher:
+            dispatcher.conn.set_trace_callback(record)
+            dispatcher.dispatch_once()
+            dispatcher.get_status()
+            dispatcher.purge_sent()
+
+    return statements
+
+
+def _explainable(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)[0].upper()
+    if head in ('SELECT', 'UPDATE', 'DELETE', 'WITH'):
+        return True
+    return head in ('INSERT', 'REPLACE') and re.search(r'\bSELECT\b', sql, re.I) is not None
+
+
+def check_plans(statements: Dict[str, str], conn: sqlite3.Connection) -> List[Dict]:
+    """EXPLAIN each statement, returns one result per template"""
+    results = []
+    for template, sql in sorted(statements.items()):
+        if not _explainable(sql):
+            continue
+        try:
+            plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+        except sqlite3.OperationalError as e:
+            # e.g. --db points at a database that has not been migrated yet
+            results.append({'template': template, 'plan': [f"ERROR: {e}"],
+                            'scans': [], 'allowed': None, 'ok': False})
+            continue
+        scans = [step for step in plan
+                 if step.startswith('SCAN ') and not step.startswith('SCAN CONSTANT ROW')]
+        allowed = next((reason for pattern, reason in ALLOWED_SCANS
+                        if re.search(pattern, template)), None)
+        results.append({
+            'template': template,
+            'plan': plan,
+            'scans': scans,
+            'allowed': allowed,
+            'ok': not scans or allowed is not None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query plan regression check')
+    parser.add_argument('--db', help='Explain against this database instead of the fixture')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = create_database(Path(tmp) / "plans.db")
+        _seed(fixture)
+        statements = capture_statements(fixture)
+
+        if args.db:
+            conn = sqlite3.connect(f"file:{Path(args.db).resolve()}?mode=ro", uri=True)
+        else:
+            conn = sqlite3.connect(str(fixture))
+        # task_history() reads archive months under these schema names
+        attach_archives(conn, list_archives(conn))
+        results = check_plans(statements, conn)
+        conn.close()
+
+    failures = [r for r in results if not r['ok']]
+    for r in results:
+        if args.verbose or not r['ok']:
+            status = '✅' if r['ok'] else '❌'
+            print(f"{status} {r['template'][:140]}")
+            for step in r['plan']:
+                print(f"      {step}")
+            if r['allowed'] and r['scans']:
+                print(f"      (allowed: {r['allowed']})")
+
+    print(f"\n{len(results)} statements checked, {len(failures)} failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
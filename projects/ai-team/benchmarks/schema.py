@@ -0,0 +1,178 @@
+"""
+Base team.db schema for building throwaway benchmark databases
+Mirrors docs/AI-TEAM-SYSTEM.md plus the columns the scripts rely on
+"""
+
+import sqlite3
+from pathlib import Path
+
+BASE_SCHEMA = '''
+CREATE TABLE agents (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    model TEXT,
+    status TEXT DEFAULT 'idle'
+        CHECK (status IN ('idle', 'active', 'blocked', 'offline')),
+    current_task_id TEXT,
+    last_heartbeat DATETIME,
+    total_tasks_completed INTEGER DEFAULT 0,
+    total_tasks_assigned INTEGER DEFAULT 0,
+    health_status TEXT DEFAULT 'unknown'
+        CHECK (health_status IN ('healthy', 'stale', 'offline', 'unknown')),
+    last_alert_sent DATETIME,
+    last_alert_type TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE agent_context (
+    agent_id TEXT PRIMARY KEY,
+    context TEXT,
+    learnings TEXT,
+    preferences TEXT,
+    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    status TEXT DEFAULT 'planning'
+        CHECK (status IN ('planning', 'active', 'paused', 'completed', 'cancelled')),
+    start_date DATE,
+    end_date DATE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    project_id TEXT NOT NULL,
+    assignee_id TEXT,
+    status TEXT DEFAULT 'todo'
+        CHECK (status IN ('backlog', 'todo', 'in_progress', 'review', 'done', 'blocked', 'cancelled')),
+    blocked_reason TEXT,
+    priority TEXT DEFAULT 'normal'
+        CHECK (priority IN ('critical', 'high', 'normal', 'low')),
+    progress INTEGER DEFAULT 0 CHECK (progress >= 0 AND progress <= 100),
+    estimated_hours REAL,
+    actual_duration_minutes INTEGER,
+    fix_loop_count INTEGER DEFAULT 0,
+    actual_hours REAL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    completed_at DATETIME,
+    due_date DATETIME,
+    blocked_by TEXT,
+    notes TEXT,
+    prerequisites TEXT,
+    acceptance_criteria TEXT,
+    expected_outcome TEXT,
+    updated_at DATETIME
+);
+
+CREATE TABLE task_dependencies (
+    task_id TEXT NOT NULL,
+    depends_on_task_id TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (task_id, depends_on_task_id)
+);
+
+CREATE TABLE task_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    agent_id TEXT,
+    action TEXT NOT NULL,
+    old_status TEXT,
+    new_status TEXT,
+    old_progress INTEGER,
+    new_progress INTEGER,
+    notes TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE VIEW v_agent_workload AS
+SELECT
+    a.id, a.name, a.role, a.status,
+    (SELECT COUNT(*) FROM tasks t
+     WHERE t.assignee_id = a.id AND t.status IN ('todo', 'in_progress', 'review')) AS active_tasks,
+    a.total_tasks_completed,
+    (SELECT AVG(t.progress) FROM tasks t
+     WHERE t.assignee_id = a.id AND t.status = 'in_progress') AS avg_progress
+FROM agents a;
+
+CREATE VIEW v_project_status AS
+SELECT
+    p.id, p.name, p.status,
+    COUNT(t.id) AS total_tasks,
+    SUM(CASE WHEN t.status = 'done' THEN 1 ELSE 0 END) AS done_tasks,
+    SUM(CASE WHEN t.status = 'in_progress' THEN 1 ELSE 0 END) AS in_progress_tasks,
+    SUM(CASE WHEN t.status = 'blocked' THEN 1 ELSE 0 END) AS blocked_tasks,
+    ROUND(100.0 * SUM(CASE WHEN t.status = 'done' THEN 1 ELSE 0 END)
+          / MAX(COUNT(t.id), 1), 1) AS progress_pct
+FROM projects p
+LEFT JOIN tasks t ON t.project_id = p.id
+GROUP BY p.id;
+
+CREATE VIEW v_task_summary AS
+SELECT
+    t.id, t.title, t.status, t.priority, t.progress,
+    t.project_id, p.name AS project_name,
+    t.assignee_id, a.name AS assignee_name,
+    t.due_date, t.created_at, t.updated_at,
+    CASE
+        WHEN t.due_date < DATE('now') AND t.status != 'done' THEN 'overdue'
+        WHEN DATE(t.due_date) = DATE('now') THEN 'due_today'
+        ELSE 'on_track'
+    END AS urgency
+FROM tasks t
+LEFT JOIN projects p ON t.project_id = p.id
+LEFT JOIN agents a ON t.assignee_id = a.id;
+
+CREATE VIEW v_dashboard_stats AS
+SELECT
+    (SELECT COUNT(*) FROM agents) AS total_agents,
+    (SELECT COUNT(*) FROM agents WHERE status = 'active') AS active_agents,
+    (SELECT COUNT(*) FROM agents WHERE status = 'idle') AS idle_agents,
+    (SELECT COUNT(*) FROM agents WHERE status = 'blocked') AS blocked_agents,
+    (SELECT COUNT(*) FROM projects) AS total_projects,
+    (SELECT COUNT(*) FROM projects WHERE status = 'active') AS active_projects,
+    (SELECT COUNT(*) FROM tasks) AS total_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'todo') AS todo_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'in_progress') AS in_progress_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'done') AS completed_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'blocked') AS blocked_tasks,
+    (SELECT ROUND(AVG(progress), 1) FROM tasks WHERE status != 'cancelled') AS avg_progress,
+    (SELECT COUNT(*) FROM tasks WHERE DATE(due_date) = DATE('now') AND status != 'done') AS due_today,
+    (SELECT COUNT(*) FROM tasks WHERE due_date < DATE('now') AND status != 'done') AS overdue_tasks;
+'''
+
+ROLES = ['dev', 'solo-dev', 'architect', 'ux-designer', 'qa', 'tech-writer', 'pm', 'analyst']
+
+
+def create_database(db_path: Path, agents: int = 10, projects: int = 3) -> Path:
+    """Create a fresh database with the base schema and seed agents/projects"""
+    db_path = Path(db_path)
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        Path(str(db_path) + suffix).unlink(missing_ok=True)
+
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(BASE_SCHEMA)
+    conn.executemany(
+        'INSERT INTO projects (id, name, status) VALUES (?, ?, ?)',
+        [(f"PROJ-{i:03d}", f"Project {i}", 'active') for i in range(1, projects + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO agents (id, name, role) VALUES (?, ?, ?)',
+        [(f"agent-{i:03d}", f"Agent {i}", ROLES[i % len(ROLES)]) for i in range(1, agents + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO agent_context (agent_id, context, learnings) VALUES (?, ?, ?)',
+        [(f"agent-{i:03d}", f"{ROLES[i % len(ROLES)]} specialist", '') for i in range(1, agents + 1)]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+AI Team Change Feed
+Read and follow the changes log (migration 11)
+
+Triggers append one row per task, agent or history change with a growing
+seq, so a consumer that remembers the last seq it processed reads only the
+delta. follow() blocks between commits by watching PRAGMA data_version,
+which changes when another connection commits and costs no table read.
+"""
+
+import json
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Sequence
+
+CHANGE_ENTITIES = ('task', 'agent', 'history')
+
+# How often follow() checks data_version while nothing is happening
+POLL_INTERVAL = 0.05
+BATCH_SIZE = 500
+KEEP_DAYS = 7
+
+
+def latest_seq(conn: sqlite3.Connection) -> int:
+    # An emptied log still knows its last seq from sqlite_sequence (AUTOINCREMENT)
+    return conn.execute('''
+        SELECT COALESCE((SELECT MAX(seq) FROM changes),
+                        (SELECT seq FROM sqlite_sequence WHERE name = 'changes'), 0)
+    ''').fetchone()[0]
+
+
+def oldest_seq(conn: sqlite3.Connection) -> int:
+    """Seq of the oldest event still kept (the next one when the log is empty)"""
+    return conn.execute('''
+        SELECT COALESCE((SELECT MIN(seq) FROM changes),
+                        (SELECT seq + 1 FROM sqlite_sequence WHERE name = 'changes'), 1)
+    ''').fetchone()[0]
+
+
+def read_changes(conn: sqlite3.Connection, since: int = 0, entities: Sequence[str] = None,
+                 limit: int = BATCH_SIZE) -> List[Dict]:
+    """Events with seq > since, oldest first: {seq, at, entity, id, op, data}"""
+    sql = 'SELECT seq, at, entity, entity_id, op, data FROM changes WHERE seq > ?'
+    params: List = [since]
+    if entities:
+        sql += f" AND entity IN ({', '.join('?' * len(entities))})"
+        params += list(entities)
+    sql += ' ORDER BY seq LIMIT ?'
+    params.append(limit)
+    return [{'seq': row[0], 'at': row[1], 'entity': row[2], 'id': row[3], 'op': row[4],
+             'data': json.loads(row[5]) if row[5] else None}
+            for row in conn.execute(sql, params)]
+
+
+def follow(conn: sqlite3.Connection, since: int = 0, entities: Sequence[str] = None,
+           poll_interval: float = POLL_INTERVAL, idle_timeout: float = None) -> Iterator[Dict]:
+    """Yield events after since as they are committed, until idle_timeout seconds pass without one
+
+    Whenever since falls before the oldest event still kept, a
+    {'event': 'reset', 'oldest': seq} marker comes first: events were
+    pruned, or a backup was restored, so the consumer should reload
+    everything before applying more. This is checked again after every
+    commit, so a consumer already following sees a restore too.
+    """
+    version = None
+    idle_since = time.monotonic()
+    while True:
+        current = conn.execute('PRAGMA data_version').fetchone()[0]
+        if current != version:
+            version = current
+            oldest = oldest_seq(conn)
+            if since < oldest - 1:
+                since = oldest - 1
+                idle_since = time.monotonic()
+                yield {'event': 'reset', 'oldest': oldest}
+            while True:
+                events = read_changes(conn, since, entities)
+                for event in events:
+                    since = event['seq']
+                    idle_since = time.monotonic()
+                    yield event
+                if len(events) < BATCH_SIZE:
+                    break
+        if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+            return
+        time.sleep(poll_interval)
+
+
+def prune_changes(conn: sqlite3.Connection, keep_days: int = KEEP_DAYS) -> int:
+    """Drop events older than keep_days, the caller commits; returns how many went"""
+    # seq and at grow together: find the first event to keep, delete by seq range
+    first_kept = conn.execute('''
+        SELECT seq FROM changes WHERE at >= datetime('now', ?) ORDER BY seq LIMIT 1
+    ''', (f"-{keep_days} days",)).fetchone()
+    boundary = first_kept[0] if first_kept else latest_seq(conn) + 1
+    return conn.execute('DELETE FROM changes WHERE seq < ?', (boundary,)).rowcount
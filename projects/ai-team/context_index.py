@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+AI Team Agent Context Index
+TF-IDF relevance of each agent's context to a task
+
+agent_context_terms (migration 12) keeps the term counts of every agent
+context, rebuilt only when agent_context.last_updated moves. Relevance is
+the cosine of the task's and the agent's TF-IDF vectors: a sparse dot
+product over the task's terms, through the postings of each term (or one
+matrix product when NumPy is installed). Weights are integers, so both
+paths give the same scores on every machine.
+"""
+
+import math
+import re
+import sqlite3
+from collections import Counter
+from typing import Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError:  # optional: the pure Python path gives the same scores
+    numpy = None
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('''
+    a an and are as at be been but by can do for from has have in into is it its of on or our so
+    than that the their then this to use used using via was we were when will with you your
+'''.split())
+MIN_TOKEN_LENGTH = 2
+# Points for a context identical to the task (cosine 1); two role keywords
+# are worth as much
+CONTEXT_POINTS = 20
+# TF-IDF weights are kept in thousandths of a unit vector
+WEIGHT_SCALE = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of text, stopwords and single characters left out"""
+    return [token for token in TOKEN_RE.findall((text or '').lower())
+            if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS]
+
+
+# Contexts never indexed, or edited since they were
+STALE_CONTEXTS_QUERY = '''
+    SELECT ac.agent_id, ac.context, ac.last_updated
+    FROM agent_context ac
+    LEFT JOIN agent_context_index i ON i.agent_id = ac.agent_id
+    WHERE i.agent_id IS NULL OR i.last_updated IS NOT ac.last_updated
+'''
+
+
+def refresh_index(conn: sqlite3.Connection) -> int:
+    """Re-tokenize contexts whose last_updated moved since they were indexed
+
+    Returns how many agents were re-indexed; the caller commits.
+    """
+    stale = conn.execute(STALE_CONTEXTS_QUERY).fetchall()
+    for agent_id, context, last_updated in stale:
+        counts = Counter(tokenize(context))
+        conn.execute('DELETE FROM agent_context_terms WHERE agent_id = ?', (agent_id,))
+        conn.executemany('INSERT INTO agent_context_terms (agent_id, term, tf) VALUES (?, ?, ?)',
+                         [(agent_id, term, tf) for term, tf in counts.items()])
+        conn.execute('''
+            INSERT OR REPLACE INTO agent_context_index (agent_id, last_updated, terms) VALUES (?, ?, ?)
+        ''', (agent_id, last_updated, len(counts)))
+    return len(stale)
+
+
+def _unit_vector(weights: Dict[str, float]) -> Dict[str, int]:
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {term: round(WEIGHT_SCALE * w / norm) for term, w in weights.items()} if norm else {}
+
+
+class ContextIndex:
+    """TF-IDF vectors of the given agents' contexts, with postings per term
+
+    Document frequencies count every indexed context, not just these
+    agents, so a task scores an agent the same whoever else is idle.
+    Contexts refresh_index has not caught up with yet are tokenized in
+    memory, so read-only callers see current contexts without writing.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, agent_ids: List[str]):
+        self.agent_ids = list(agent_ids)
+        wanted = {agent_id: i for i, agent_id in enumerate(self.agent_ids)}
+        counts: Dict[str, Dict[str, int]] = {}
+        for agent_id, term, tf in conn.execute('SELECT agent_id, term, tf FROM agent_context_terms'):
+            counts.setdefault(agent_id, {})[term] = tf
+        for agent_id, context, _last_updated in conn.execute(STALE_CONTEXTS_QUERY):
+            terms = Counter(tokenize(context))
+            if terms:
+                counts[agent_id] = dict(terms)
+            else:
+                counts.pop(agent_id, None)
+        document_frequency = Counter(term for terms in counts.values() for term in terms)
+        self.documents = len(counts)
+        self.idf = {term: math.log((1 + self.documents) / (1 + df)) + 1
+                    for term, df in document_frequency.items()}
+        # Terms no context has get the highest weight, they only dilute the task vector
+        self.unseen_idf = math.log(1 + self.documents) + 1
+
+        self.vectors: List[Dict[str, int]] = [{} for _ in self.agent_ids]
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for agent_id, terms in counts.items():
+            if agent_id in wanted:
+                i = wanted[agent_id]
+                self.vectors[i] = _unit_vector({term: (1 + math.log(tf)) * self.idf[term]
+                                                for term, tf in terms.items()})
+                for term, weight in self.vectors[i].items():
+                    self.postings.setdefault(term, []).append((i, weight))
+
+        self._matrix = None
+        if numpy is not None and self.postings:
+            self._columns = {term: j for j, term in enumerate(self.postings)}
+            self._matrix = numpy.zeros((len(self.agent_ids), len(self._columns)), dtype=numpy.int64)
+            for term, j in self._columns.items():
+                for i, weight in self.postings[term]:
+                    self._matrix[i, j] = weight
+
+    def task_vector(self, text: str) -> Dict[str, int]:
+        """TF-IDF unit vector of a task's text, in WEIGHT_SCALE units"""
+        counts = Counter(tokenize(text))
+        return _unit_vector({term: (1 + math.log(tf)) * self.idf.get(term, self.unseen_idf)
+                             for term, tf in counts.items()})
+
+    def dot_products(self, vector: Dict[str, int]) -> List[int]:
+        """Task vector . agent vector for every agent, in WEIGHT_SCALE^2 units"""
+        terms = [(term, weight) for term, weight in vector.items() if term in self.postings]
+        if self._matrix is not None:
+            query = numpy.zeros(len(self._columns), dtype=numpy.int64)
+            for term, weight in terms:
+                query[self._columns[term]] = weight
+            return [int(dot) for dot in self._matrix @ query]
+        dots = [0] * len(self.agent_ids)
+        for term, weight in terms:
+            for i, agent_weight in self.postings[term]:
+                dots[i] += weight * agent_weight
+        return dots
+
+    def points(self, text: str) -> List[int]:
+        """Relevance of every agent's context to text, 0..CONTEXT_POINTS (rounded cosine)"""
+        unit = WEIGHT_SCALE * WEIGHT_SCALE
+        return [(2 * CONTEXT_POINTS * dot + unit) // (2 * unit)
+                for dot in self.dot_products(self.task_vector(text))]
+
+    def points_matrix(self, texts: List[str]):
+        """points() of each of texts as the rows of one NumPy array, from one matrix product"""
+        if self._matrix is None:
+            return numpy.zeros((len(texts), len(self.agent_ids)), dtype=numpy.int64)
+        queries = numpy.zeros((len(texts), len(self._columns)), dtype=numpy.int64)
+        for query, text in zip(queries, texts):
+            for term, weight in self.task_vector(text).items():
+                if term in self._columns:
+                    query[self._columns[term]] = weight
+        unit = WEIGHT_SCALE * WEIGHT_SCALE
+        return (2 * CONTEXT_POINTS * (queries @ self._matrix.T) + unit) // (2 * unit)
+
+    def explain(self, text: str, agent_id: str) -> List[Tuple[str, int, int, float]]:
+        """(term, task weight, agent weight, points) for each shared term, largest first"""
+        vector = self.task_vector(text)
+        agent_vector = self.vectors[self.agent_ids.index(agent_id)]
+        unit = WEIGHT_SCALE * WEIGHT_SCALE
+        shared = [(term, weight, agent_vector[term], CONTEXT_POINTS * weight * agent_vector[term] / unit)
+                  for term, weight in vector.items() if term in agent_vector]
+        return sorted(shared, key=lambda item: (-item[3], item[0]))
@@ -42,6 +42,25 @@ function fetchOne($db, $sql) {
     return $result->fetchArray(SQLITE3_ASSOC) ?: [];
 }
 
+// Latest change feed seq (0 until team_db.py has applied migration 11)
+function latestChangeSeq($db) {
+    if (!$db) return 0;
+    try {
+        return (int) $db->querySingle('SELECT COALESCE(MAX(seq), 0) FROM changes');
+    } catch (Exception $e) {
+        return 0;
+    }
+}
+
+// ?changes_since=N: cheap probe polled by the page, answered before any view query
+if (isset($_GET['changes_since'])) {
+    header('Content-Type: application/json');
+    $seq = latestChangeSeq($db);
+    echo json_encode(['seq' => $seq, 'changed' => $seq !== (int) $_GET['changes_since']]);
+    exit;
+}
+$changeSeq = latestChangeSeq($db);
+
 // Note: Health monitoring fields should be added via team_db.py schema migration
 // Dashboard is read-only, schema changes require write access
 
@@ -267,7 +286,7 @@ $statConfig = [
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta http-equiv="refresh" content="60">
+    <noscript><meta http-equiv="refresh" content="60"></noscript>
     <title>AI Team Dashboard - Kanban</title>
     <style>
         * {
@@ -848,7 +867,7 @@ $statConfig = [
 <body>
     <div class="container">
         <h1>🤖 AI Team Dashboard</h1>
-        <p class="last-updated">Last updated: <?= htmlspecialchars($lastUpdated) ?> (auto-refreshes every 60s)</p>
+        <p class="last-updated">Last updated: <?= htmlspecialchars($lastUpdated) ?> (refreshes when the data changes)</p>
 
         <?php if ($error): ?>
         <div class="error">
@@ -1190,6 +1209,25 @@ $statConfig = [
             }
         });
         
+        // Reload only after the change feed moves; heartbeat ages and due dates
+        // depend on the clock, so reload at least every 5 minutes regardless
+        const changeSeq = <?= (int) $changeSeq ?>;
+        const loadedAt = Date.now();
+        setInterval(async function() {
+            if (Date.now() - loadedAt > 300000) {
+                location.reload();
+                return;
+            }
+            try {
+                const response = await fetch('?changes_since=' + changeSeq);
+                if ((await response.json()).changed) {
+                    location.reload();
+                }
+            } catch (e) {
+                // Server restarting; try again on the next tick
+            }
+        }, 5000);
+        
         console.log('AI Team Dashboard - Read Only Mode with Task Details');
     </script>
 </body>
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+AI Team Duration Sketches
+Completion-duration quantiles per agent, project and priority
+
+duration_sketches (migration 8) keeps one count per log-spaced bucket,
+dimension, key and month; triggers update it as tasks complete. Merging
+keys or months is a sum of bucket counts, so p50/p90/p99 for any slice
+come from the sketch rows instead of every finished task.
+"""
+
+import sqlite3
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from migrations import (DURATION_BUCKETS, DURATION_SKETCH_DIMENSIONS, DURATION_SKETCH_GAMMA,
+                        DURATION_SKETCHES_RECOMPUTE)
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative duration (minutes) of a sketch bucket, within 2% of any member"""
+    if bucket < 0:
+        return 0.0
+    if bucket == 0:
+        return 1.0
+    return 2 * DURATION_SKETCH_GAMMA ** bucket / (DURATION_SKETCH_GAMMA + 1)
+
+
+def sketch_quantiles(counts: Dict[int, int], fractions=QUANTILES) -> List[Optional[float]]:
+    """Durations at the given quantiles of merged {bucket: count}, one pass over the buckets"""
+    total = sum(counts.values())
+    if not total:
+        return [None] * len(fractions)
+    ranks = sorted((fraction * (total - 1), i) for i, fraction in enumerate(fractions))
+    values: List[Optional[float]] = [None] * len(fractions)
+    seen = 0
+    buckets = sorted(counts)
+    for bucket in buckets:
+        seen += counts[bucket]
+        while ranks and seen > ranks[0][0]:
+            values[ranks.pop(0)[1]] = round(bucket_value(bucket), 1)
+    for _, i in ranks:
+        values[i] = round(bucket_value(buckets[-1]), 1)
+    return values
+
+
+def sketch_histogram(counts: Dict[int, int]) -> Dict[str, int]:
+    """Fold sketch buckets into the report histogram ranges (<15m, <30m ... >=3840m)"""
+    labels = [f"<{upper}" for upper in DURATION_BUCKETS] + [f">={DURATION_BUCKETS[-1]}"]
+    histogram = dict.fromkeys(labels, 0)
+    for bucket, count in counts.items():
+        histogram[labels[bisect_right(DURATION_BUCKETS, bucket_value(bucket))]] += count
+    return histogram
+
+
+def load_sketches(conn: sqlite3.Connection, by: str = 'all', key: str = None,
+                  since: str = None) -> Dict[str, Dict[int, int]]:
+    """Merged {key: {bucket: count}} for one dimension, months >= since (YYYY-MM)"""
+    if by not in DURATION_SKETCH_DIMENSIONS:
+        raise ValueError(f"Unknown dimension {by!r} (use {', '.join(DURATION_SKETCH_DIMENSIONS)})")
+    query = 'SELECT key, bucket, SUM(count) FROM duration_sketches WHERE dimension = ?'
+    params = [by]
+    if key is not None:
+        query += ' AND key = ?'
+        params.append(key)
+    if since:
+        query += ' AND month >= ?'
+        params.append(since)
+    query += ' GROUP BY key, bucket HAVING SUM(count) > 0'
+
+    sketches: Dict[str, Dict[int, int]] = {}
+    for row_key, bucket, count in conn.execute(query, params):
+        sketches.setdefault(row_key, {})[bucket] = count
+    return sketches
+
+
+def duration_stats(conn: sqlite3.Connection, by: str = 'all', key: str = None,
+                   since: str = None) -> List[Dict]:
+    """Count, p50/p90/p99 and histogram per key, sorted by key"""
+    rows = []
+    for row_key, counts in sorted(load_sketches(conn, by, key, since).items()):
+        row = {'key': row_key, 'count': sum(counts.values())}
+        for fraction, value in zip(QUANTILES, sketch_quantiles(counts)):
+            row[f"p{round(fraction * 100)}"] = value
+        row['histogram'] = sketch_histogram(counts)
+        rows.append(row)
+    return rows
+
+
+def verify_sketches(conn: sqlite3.Connection, repair: bool = False) -> Dict:
+    """Recount duration_sketches from tasks and report drift, the caller commits a repair"""
+    stored = {tuple(row[:4]): row[4] for row in conn.execute('''
+        SELECT dimension, key, month, bucket, count FROM duration_sketches WHERE count != 0
+    ''')}
+    actual = {tuple(row[:4]): row[4] for row in conn.execute(DURATION_SKETCHES_RECOMPUTE)}
+
+    drift = {'/'.join(map(str, k)): {'stored': stored.get(k, 0), 'actual': actual.get(k, 0)}
+             for k in sorted(set(stored) | set(actual), key=str)
+             if stored.get(k, 0) != actual.get(k, 0)}
+    if drift and repair:
+        conn.execute('DELETE FROM duration_sketches')
+        conn.execute(f'''
+            INSERT INTO duration_sketches (dimension, key, month, bucket, count)
+            {DURATION_SKETCHES_RECOMPUTE}
+        ''')
+    return {'ok': not drift, 'drift': drift, 'repaired': bool(drift and repair)}
@@ -5,13 +5,15 @@ Monitors agent health, detects stale/offline agents, and sends alerts
 """
 
 import os
-import sqlite3
 import subprocess
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from storage import connect
+from transitions import describe_failure, transition
+
 # Set timezone to Bangkok (+7)
 os.environ['TZ'] = 'Asia/Bangkok'
 
@@ -27,8 +29,7 @@ ALERT_COOLDOWN = 30        # Don't send same alert within 30 minutes
 class HealthMonitor:
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
-        self.conn.row_factory = sqlite3.Row
+        self.conn = connect(db_path)
         self.alerts_sent = []
         
     def close(self):
@@ -402,29 +403,25 @@ class HealthMonitor:
                 
                 print(f"  🔄 Auto-resolving stuck task {task_id} (>3h)")
                 
-                # 1. Block the task
-                cursor.execute('''
-                    UPDATE tasks 
-                    SET status = 'blocked', 
-                        blocked_reason = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (f"Auto-blocked: Stuck for {int(minutes)} minutes", task_id))
+                # 1. Block the task, only if it is still the in_progress task we saw
+                result = transition(cursor, task_id, 'block', agent_id=agent_id,
+                                    reason=f"Auto-blocked: Stuck for {int(minutes)} minutes",
+                                    notes=f"Auto-blocked by health monitor after {int(minutes)} minutes",
+                                    expected='in_progress')
+                if not result['ok']:
+                    # Lost the race (agent finished, reviewer moved it...): leave it alone
+                    self.conn.rollback()
+                    print(f"  ⏭️ {describe_failure(result)}")
+                    continue
                 
-                # 2. Release the agent (set to idle, clear current_task)
+                # 2. Release the agent (set to idle, clear current_task) unless it moved on
                 cursor.execute('''
                     UPDATE agents 
                     SET status = 'idle',
                         current_task_id = NULL,
                         updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (agent_id,))
-                
-                # 3. Log the action
-                cursor.execute('''
-                    INSERT INTO task_history (task_id, agent_id, action, notes)
-                    VALUES (?, ?, 'blocked', ?)
-                ''', (task_id, agent_id, f"Auto-blocked by health monitor after {int(minutes)} minutes"))
+                    WHERE id = ? AND (current_task_id IS NULL OR current_task_id = ?)
+                ''', (agent_id, task_id))
                 
                 self.conn.commit()
                 
@@ -586,15 +583,15 @@ def main():
             task_id = args.resolve_task
             print(f"🔄 Resolving task {task_id}...")
             cursor = monitor.conn.cursor()
-            cursor.execute('''
-                UPDATE tasks 
-                SET status = 'blocked', 
-                    blocked_reason = 'Manually resolved by health monitor',
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ? AND status = 'in_progress'
-            ''', (task_id,))
-            monitor.conn.commit()
-            print(f"✅ Task {task_id} blocked, agent released")
+            result = transition(cursor, task_id, 'block',
+                                reason='Manually resolved by health monitor',
+                                expected='in_progress')
+            if result['ok']:
+                monitor.conn.commit()
+                print(f"✅ Task {task_id} blocked, agent released")
+            else:
+                monitor.conn.rollback()
+                print(f"⚠️ {describe_failure(result)}")
         else:
             # Default: show status
             monitor.print_health_status()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+AI Team Heartbeat Collector
+Coalesce agent heartbeats in memory and write the latest one per agent in batches
+
+Beats arrive as "<agent_id> [<unix time>]" lines, either as datagrams on
+<db>.heartbeat.sock (send_heartbeat) or appended to <db>.heartbeat.spool
+(update-heartbeat.sh, no process spawn per beat). Every FLUSH_INTERVAL
+seconds the newest beat per agent is written in one transaction.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+from storage import connect
+
+os.environ['TZ'] = 'Asia/Bangkok'
+
+DB_PATH = Path(__file__).parent / "team.db"
+
+# Collector tuning
+FLUSH_INTERVAL = 5             # Seconds between batched writes
+SPOOL_MAX_BYTES = 1_000_000    # Rotate the spool file once this much has been read
+MAX_DATAGRAM = 256
+RECV_BUFFER_BYTES = 1 << 20
+MAX_CLOCK_SKEW = 60            # Beats claiming a time further in the future are clamped to now
+
+
+def _heartbeat_path(db_path: Path, suffix: str) -> Path:
+    return Path(f"{db_path}.heartbeat.{suffix}")
+
+
+def send_heartbeat(agent_id: str, db_path: Path = DB_PATH) -> bool:
+    """Hand a beat to the collector, returns False if no collector is listening"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        # Never block the caller: a full queue means "write it yourself"
+        sock.setblocking(False)
+        sock.sendto(f"{agent_id} {time.time():.0f}".encode('utf-8'),
+                    str(_heartbeat_path(db_path, 'sock')))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def collector_running(db_path: Path = DB_PATH) -> bool:
+    """Check the collector's pid file (same test update-heartbeat.sh does)"""
+    try:
+        pid = int(_heartbeat_path(db_path, 'pid').read_text().strip())
+        os.kill(pid, 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def _sql_time(ts: float) -> str:
+    """UTC text timestamp, the format CURRENT_TIMESTAMP writes"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts))
+
+
+class HeartbeatCollector:
+    def __init__(self, db_path: Path = DB_PATH, flush_interval: float = FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.conn = connect(db_path)
+        self.pending: Dict[str, float] = {}
+        self.spool_offset = 0
+        self.old_spool_offset = 0
+        self.sock = None
+        # Guards pending + metrics: the socket reader thread ingests while flushes run
+        self._lock = threading.Lock()
+        self.metrics = {
+            'started_at': time.time(),
+            'received': 0,          # beats accepted from socket + spool
+            'coalesced': 0,         # beats folded into an already pending agent
+            'rejected': 0,          # malformed lines
+            'flushes': 0,
+            'flush_errors': 0,
+            'rows_written': 0,
+            'skipped': 0,           # unknown agents or a newer beat already stored
+            'last_flush_ms': None,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+            'ingest_per_sec': 0.0,  # over the last flush interval
+        }
+        self._received_at_last_flush = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            _heartbeat_path(self.db_path, 'sock').unlink(missing_ok=True)
+            self.sock = None
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def ingest(self, line: str, received_at: float = None) -> bool:
+        """Record one "<agent_id> [<unix time>]" beat, keeping only the newest per agent"""
+        received_at = received_at or time.time()
+        parts = line.split()
+        try:
+            if not parts or len(parts) > 2 or len(parts[0]) > 64:
+                raise ValueError(line)
+            beat_at = float(parts[1]) if len(parts) == 2 else received_at
+        except ValueError:
+            with self._lock:
+                self.metrics['rejected'] += 1
+            return False
+        beat_at = min(beat_at, received_at + MAX_CLOCK_SKEW)
+
+        agent_id = parts[0]
+        with self._lock:
+            self.metrics['received'] += 1
+            previous = self.pending.get(agent_id)
+            if previous is not None:
+                self.metrics['coalesced'] += 1
+                if previous >= beat_at:
+                    return True
+            self.pending[agent_id] = beat_at
+        return True
+
+    def _read_lines(self, path: Path, offset: int) -> int:
+        """Ingest complete lines of a spool file from offset, returns the new offset"""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        end = data.rfind(b"\n") + 1  # a half-written last line waits for the next round
+        now = time.time()
+        for line in data[:end].decode('utf-8', 'replace').splitlines():
+            if line.strip():
+                self.ingest(line, now)
+        return offset + end
+
+    def read_spool(self):
+        """Pick up beats appended to the spool file since the last round"""
+        spool = _heartbeat_path(self.db_path, 'spool')
+        old = _heartbeat_path(self.db_path, 'spool.old')
+        if old.exists():
+            # Rotated one round ago: a writer that opened it before the rename is done by now
+            self._read_lines(old, self.old_spool_offset)
+            old.unlink()
+        if spool.exists() and spool.stat().st_size < self.spool_offset:
+            self.spool_offset = 0  # truncated by hand
+        self.spool_offset = self._read_lines(spool, self.spool_offset)
+        if self.spool_offset >= SPOOL_MAX_BYTES:
+            os.rename(spool, old)
+            self.old_spool_offset, self.spool_offset = self.spool_offset, 0
+
+    def flush(self) -> Dict:
+        """Write the newest pending beat per agent in one transaction"""
+        now = time.monotonic()
+        with self._lock:
+            received = self.metrics['received'] - self._received_at_last_flush
+            self.metrics['ingest_per_sec'] = round(received / max(now - self._last_flush, 1e-6), 1)
+            self._received_at_last_flush = self.metrics['received']
+            self._last_flush = now
+            batch, self.pending = self.pending, {}
+
+        if not batch:
+            return {'agents': 0, 'written': 0, 'ms': 0.0}
+
+        # A stored beat further ahead than any we accept is a bad clock, not a newer beat
+        future = _sql_time(time.time() + MAX_CLOCK_SKEW)
+        rows = [(ts, ts, agent_id, ts, future) for agent_id, ts in
+                ((agent_id, _sql_time(beat_at)) for agent_id, beat_at in sorted(batch.items()))]
+        start = time.perf_counter()
+        try:
+            cursor = self.conn.cursor()
+            # Never move a heartbeat backwards (a direct update may already be newer).
+            # datetime() compares any stored format as UTC; unparseable values get replaced
+            cursor.executemany('''
+                UPDATE agents
+                SET last_heartbeat = ?, updated_at = ?
+                WHERE id = ? AND (COALESCE(datetime(last_heartbeat), '') < ?
+                                  OR datetime(last_heartbeat) > ?)
+            ''', rows)
+            written = cursor.rowcount
+            self.conn.commit()
+        except sqlite3.OperationalError as e:
+            self.conn.rollback()
+            with self._lock:
+                self.metrics['flush_errors'] += 1
+                # Keep the beats for the next round unless newer ones arrived meanwhile
+                for agent_id, beat_at in batch.items():
+                    if self.pending.get(agent_id, 0) < beat_at:
+                        self.pending[agent_id] = beat_at
+            print(f"[Heartbeat] Flush failed, retrying next round: {e}")
+            return {'agents': len(batch), 'written': 0, 'ms': 0.0}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.metrics['flushes'] += 1
+            self.metrics['rows_written'] += written
+            self.metrics['skipped'] += len(rows) - written
+            self.metrics['last_flush_ms'] = round(elapsed_ms, 3)
+            self.metrics['max_flush_ms'] = round(max(self.metrics['max_flush_ms'], elapsed_ms), 3)
+            self.metrics['total_flush_ms'] += elapsed_ms
+        return {'agents': len(rows), 'written': written, 'ms': round(elapsed_ms, 3)}
+
+    def get_metrics(self) -> Dict:
+        """Counters plus derived rates"""
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics['pending'] = len(self.pending)
+        uptime = time.time() - metrics['started_at']
+        metrics['uptime_s'] = round(uptime, 1)
+        metrics['avg_ingest_per_sec'] = round(metrics['received'] / max(uptime, 1e-6), 1)
+        metrics['avg_flush_ms'] = round(metrics['total_flush_ms'] / max(metrics['flushes'], 1), 3)
+        metrics['total_flush_ms'] = round(metrics['total_flush_ms'], 3)
+        return metrics
+
+    def write_metrics(self):
+        """Publish metrics for --status (atomic replace)"""
+        path = _heartbeat_path(self.db_path, 'metrics.json')
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(self.get_metrics(), indent=2))
+        os.replace(tmp, path)
+
+    def _bind(self):
+        path = _heartbeat_path(self.db_path, 'sock')
+        path.unlink(missing_ok=True)  # we hold the pid lock, so any socket file is stale
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # Room for bursts (every agent beating at once); senders fall back to a direct write when full
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER_BYTES)
+        self.sock.bind(str(path))
+        os.chmod(path, 0o600)
+
+    def _receive(self):
+        """Socket reader thread: ingest datagrams until the socket is closed"""
+        while True:
+            try:
+                data = self.sock.recv(MAX_DATAGRAM)
+            except OSError:
+                return
+            self.ingest(data.decode('utf-8', 'replace'))
+
+    def run(self):
+        """Collect and flush until SIGTERM / Ctrl-C, flushing once more on exit"""
+        import signal
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        self._bind()
+        # Reading on its own thread keeps the socket drained while a flush waits on the DB
+        threading.Thread(target=self._receive, name='heartbeat-recv', daemon=True).start()
+        try:
+            while True:
+                time.sleep(self.flush_interval)
+                self.read_spool()
+                self.flush()
+                self.write_metrics()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.read_spool()
+            self.flush()
+            self.write_metrics()
+
+
+def _try_pid_lock(db_path: Path):
+    """Take the single-collector lock and record our pid, returns the open file or None"""
+    import fcntl
+    handle = open(_heartbeat_path(db_path, 'pid'), 'a+')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+def _print_status(db_path: Path):
+    running = collector_running(db_path)
+    print(f"\n💓 Heartbeat Collector ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}):\n")
+    print(f"  - Running: {'yes' if running else 'no'}")
+    path = _heartbeat_path(db_path, 'metrics.json')
+    if not path.exists():
+        print("  - No metrics yet")
+        return
+    m = json.loads(path.read_text())
+    print(f"  - Beats received: {m['received']} ({m['coalesced']} coalesced, {m['rejected']} rejected)")
+    print(f"  - Ingest rate: {m['ingest_per_sec']}/s last interval, {m['avg_ingest_per_sec']}/s average")
+    print(f"  - Flushes: {m['flushes']} ({m['flush_errors']} failed), {m['rows_written']} rows written")
+    print(f"  - Flush latency: last {m['last_flush_ms']} ms, avg {m['avg_flush_ms']} ms, max {m['max_flush_ms']} ms")
+    print(f"  - Pending: {m['pending']}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AI Team Heartbeat Collector')
+    parser.add_argument('--db', default=str(DB_PATH), help='Database path')
+    parser.add_argument('--interval', type=float, default=FLUSH_INTERVAL, help='Seconds between flushes')
+    parser.add_argument('--status', action='store_true', help='Show collector metrics')
+    parser.add_argument('--send', metavar='AGENT_ID', help='Send one heartbeat to the running collector')
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+
+    if args.status:
+        _print_status(db_path)
+        return
+
+    if args.send:
+        if send_heartbeat(args.send, db_path):
+            print(f"💓 Heartbeat queued for {args.send}")
+        else:
+            print("⚠️ Collector is not running")
+        return
+
+    lock = _try_pid_lock(db_path)
+    if lock is None:
+        print("⚠️ Heartbeat collector already running")
+        return
+    try:
+        with HeartbeatCollector(db_path, flush_interval=args.interval) as collector:
+            print(f"💓 Collecting heartbeats for {db_path} (flush every {args.interval}s)")
+            collector.run()
+    finally:
+        _heartbeat_path(db_path, 'pid').unlink(missing_ok=True)
+        lock.close()
+
+
+if __name__ == '__main__':
+    main()
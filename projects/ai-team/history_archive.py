@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+AI Team History Archive
+Monthly cold-storage files for old task_history rows, and queries across them
+
+Rows older than ARCHIVE_AFTER_DAYS move in chunks of CHUNK_ROWS into
+<db>.archive/history-YYYY-MM.db: each chunk is written to its month file
+first, then deleted from the live table in its own short transaction, so
+the live write lock is held for one small DELETE at a time. A month that
+can receive no more rows is sealed (VACUUMed, file made read-only) and is
+then ATTACHed immutable. task_history() reads the live table plus only
+the months a date range reaches.
+"""
+
+import os
+import sqlite3
+import stat
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from storage import database_path
+
+ARCHIVE_AFTER_DAYS = 30
+CHUNK_ROWS = 500
+
+HISTORY_COLUMNS = ('id', 'task_id', 'agent_id', 'action', 'old_status', 'new_status',
+                   'old_progress', 'new_progress', 'notes', 'timestamp')
+
+ARCHIVE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS task_history (
+    id INTEGER PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    agent_id TEXT,
+    action TEXT NOT NULL,
+    old_status TEXT,
+    new_status TEXT,
+    old_progress INTEGER,
+    new_progress INTEGER,
+    notes TEXT,
+    timestamp DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_task_history_task ON task_history(task_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_task_history_timestamp ON task_history(timestamp);
+'''
+
+
+def archive_dir(conn: sqlite3.Connection) -> Path:
+    """<live db file>.archive, next to the database the connection has open"""
+    return Path(f"{database_path(conn)}.archive")
+
+
+def _month_path(directory: Path, month: str) -> Path:
+    return directory / f"history-{month}.db"
+
+
+def _is_sealed(path: Path) -> bool:
+    return not path.stat().st_mode & stat.S_IWUSR
+
+
+def list_archives(conn: sqlite3.Connection) -> List[Dict]:
+    """[{month, path, bytes, sealed}] for every archive file, oldest first"""
+    directory = archive_dir(conn)
+    if not directory.is_dir():
+        return []
+    return [{'month': path.stem[len('history-'):], 'path': path, 'bytes': path.stat().st_size,
+             'sealed': _is_sealed(path)}
+            for path in sorted(directory.glob('history-????-??.db'))]
+
+
+def _open_month(directory: Path, month: str) -> sqlite3.Connection:
+    """Writable connection to a month file, unsealing it if rows arrive late"""
+    directory.mkdir(exist_ok=True)
+    path = _month_path(directory, month)
+    if path.exists() and _is_sealed(path):
+        os.chmod(path, 0o644)
+    archive = sqlite3.connect(str(path))
+    archive.executescript(ARCHIVE_SCHEMA)
+    return archive
+
+
+def _seal(path: Path):
+    archive = sqlite3.connect(str(path))
+    archive.execute('VACUUM')
+    archive.close()
+    os.chmod(path, 0o444)
+
+
+def archive_history(conn: sqlite3.Connection, older_than_days: int = ARCHIVE_AFTER_DAYS,
+                    chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """Move task_history rows older than the cutoff into monthly archive files
+
+    A chunk is copied with INSERT OR IGNORE (the archive keeps the live id)
+    and committed before it is deleted from the live table, so a crash in
+    between leaves the rows in both places and the next run finishes the
+    move. Returns {moved, chunks, months, sealed}.
+    """
+    directory = archive_dir(conn)
+    cutoff = conn.execute("SELECT datetime('now', ?)", (f"-{older_than_days} days",)).fetchone()[0]
+    columns = ', '.join(HISTORY_COLUMNS)
+    placeholders = ', '.join('?' * len(HISTORY_COLUMNS))
+    moved, chunks, months = 0, 0, set()
+    archives: Dict[str, sqlite3.Connection] = {}
+    try:
+        while True:
+            rows = conn.execute(f'''
+                SELECT strftime('%Y-%m', timestamp) AS month, {columns} FROM task_history
+                WHERE timestamp < ? ORDER BY timestamp LIMIT ?
+            ''', (cutoff, chunk_rows)).fetchall()
+            if not rows:
+                break
+            by_month: Dict[str, List[tuple]] = {}
+            for row in rows:
+                by_month.setdefault(row[0], []).append(tuple(row[1:]))
+            for month, batch in by_month.items():
+                if month not in archives:
+                    archives[month] = _open_month(directory, month)
+                archives[month].executemany(
+                    f'INSERT OR IGNORE INTO task_history ({columns}) VALUES ({placeholders})', batch)
+                archives[month].commit()
+            conn.executemany('DELETE FROM task_history WHERE id = ?', [(row['id'],) for row in rows])
+            conn.commit()
+            moved += len(rows)
+            chunks += 1
+            months.update(by_month)
+    finally:
+        for archive in archives.values():
+            archive.close()
+
+    # Months that ended before the cutoff can get no more rows
+    sealed = []
+    for archive in list_archives(conn):
+        if not archive['sealed'] and archive['month'] < cutoff[:7]:
+            _seal(archive['path'])
+            sealed.append(archive['month'])
+    return {'moved': moved, 'chunks': chunks, 'months': sorted(months), 'sealed': sealed}
+
+
+def _alias(month: str) -> str:
+    return f"archive_{month.replace('-', '_')}"
+
+
+def attach_archives(conn: sqlite3.Connection, archives: Iterable[Dict]) -> List[str]:
+    """ATTACH archive files read-only (sealed ones immutable), returns the schema names"""
+    aliases = []
+    for archive in archives:
+        flags = 'mode=ro&immutable=1' if archive['sealed'] else 'mode=ro'
+        alias = _alias(archive['month'])
+        conn.execute(f"ATTACH DATABASE 'file:{Path(archive['path']).resolve()}?{flags}' AS {alias}")
+        aliases.append(alias)
+    return aliases
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def task_history(conn: sqlite3.Connection, task_id: str = None, since: str = None,
+                 until: str = None, limit: int = None) -> List[Dict]:
+    """History rows for a task and/or date range (YYYY-MM-DD, until inclusive), oldest first
+
+    Reads the live table on conn, so the caller's uncommitted rows count,
+    plus the archive months the range overlaps. The archives are attached
+    to a connection of their own: ATTACH and DETACH fail while conn has a
+    transaction open. SQLite attaches at most SQLITE_LIMIT_ATTACHED files
+    at once, so longer ranges are read in batches and merged.
+    """
+    if not (task_id or since):
+        raise ValueError("Give a task ID or a --since date")
+    where, params = [], []
+    if task_id:
+        where.append('task_id = ?')
+        params.append(task_id)
+    if since:
+        where.append('timestamp >= ?')
+        params.append(since)
+    if until:
+        where.append("timestamp < date(?, '+1 day')")
+        params.append(until)
+    select = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM {{schema}}.task_history WHERE {' AND '.join(where)}"
+    order = ' ORDER BY timestamp, id' + (' LIMIT ?' if limit else '')
+
+    months = [a for a in list_archives(conn)
+              if (not since or _next_month(a['month']) > since[:7]) and (not until or a['month'] <= until[:7])]
+
+    rows: Dict[int, Dict] = {}
+    for row in conn.execute(select.format(schema='main') + order, params + ([limit] if limit else [])):
+        rows[row['id']] = dict(row)
+    if months:
+        archive_conn = sqlite3.connect('file::memory:', uri=True)
+        archive_conn.row_factory = sqlite3.Row
+        try:
+            batch_size = archive_conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+            for i in range(0, len(months), batch_size):
+                aliases = attach_archives(archive_conn, months[i:i + batch_size])
+                sql = ' UNION ALL '.join(select.format(schema=alias) for alias in aliases) + order
+                for row in archive_conn.execute(sql, params * len(aliases) + ([limit] if limit else [])):
+                    rows.setdefault(row['id'], dict(row))  # a crash mid-move can leave a row in both
+                for alias in aliases:
+                    archive_conn.execute(f'DETACH DATABASE {alias}')
+        finally:
+            archive_conn.close()
+
+    history = sorted(rows.values(), key=lambda r: (r['timestamp'] or '', r['id']))
+    return history[:limit] if limit else history
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+AI Team Agent Learnings
+Append-only learnings per agent and the budgeted view handed to subagents
+
+Each learning is one agent_learnings row (migration 10); UNIQUE (agent_id,
+content_hash) makes re-adding a known learning a no-op, so writers never
+read-modify-write a text blob.
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from migrations import learning_hash, normalize_learning
+
+# What a subagent gets in its task message: newest learnings first, at most
+# MAX_ITEMS, cut off once the estimated token count reaches TOKEN_BUDGET
+TOKEN_BUDGET = 400
+MAX_ITEMS = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token), no tokenizer needed"""
+    return len(text) // 4 + 1
+
+
+def add_learnings(cursor: sqlite3.Cursor, agent_id: str,
+                  learnings: Iterable[Tuple[str, Optional[str]]]) -> int:
+    """Append (content, source_task_id) learnings, the caller commits
+
+    Returns how many were new; blank and already known learnings are skipped.
+    """
+    rows = []
+    for content, source_task_id in learnings:
+        content = normalize_learning(content)
+        if content:
+            rows.append((agent_id, content, learning_hash(content), source_task_id))
+    if not rows:
+        return 0
+    cursor.executemany('''
+        INSERT OR IGNORE INTO agent_learnings (agent_id, content, content_hash, source_task_id)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+    return cursor.rowcount
+
+
+def add_learning(cursor: sqlite3.Cursor, agent_id: str, content: str, source_task_id: str = None) -> bool:
+    """Append one learning, False if the agent already has it; the caller commits"""
+    return add_learnings(cursor, agent_id, [(content, source_task_id)]) > 0
+
+
+class LearningsView:
+    """Newest learnings per agent within a token budget, cached per connection
+
+    A cached entry stays valid while the agent's newest learning id is
+    unchanged (one index seek), which holds because learnings are only
+    ever appended.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, token_budget: int = TOKEN_BUDGET,
+                 max_items: int = MAX_ITEMS):
+        self.conn = conn
+        self.token_budget = token_budget
+        self.max_items = max_items
+        self._cache: Dict[str, Tuple[Optional[int], List[Dict]]] = {}
+
+    def get(self, agent_id: str) -> List[Dict]:
+        """[{id, content, source_task_id, created_at}], newest first"""
+        newest = self.conn.execute('SELECT MAX(id) FROM agent_learnings WHERE agent_id = ?',
+                                   (agent_id,)).fetchone()[0]
+        cached = self._cache.get(agent_id)
+        if cached and cached[0] == newest:
+            return cached[1]
+
+        selected, used = [], 0
+        for row in self.conn.execute('''
+            SELECT id, content, source_task_id, created_at FROM agent_learnings
+            WHERE agent_id = ? ORDER BY id DESC LIMIT ?
+        ''', (agent_id, self.max_items)):
+            cost = estimate_tokens(row[1])
+            if selected and used + cost > self.token_budget:
+                break
+            selected.append({'id': row[0], 'content': row[1], 'source_task_id': row[2], 'created_at': row[3]})
+            used += cost
+        self._cache[agent_id] = (newest, selected)
+        return selected
+
+    def render(self, agent_id: str) -> str:
+        """The view as a markdown list, '' when the agent has no learnings"""
+        return '\n'.join(f"- {learning['content']}" for learning in self.get(agent_id))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+AI Team Assignment Matching
+Maximum-weight bipartite matching of idle agents to ready tasks
+
+Shortest augmenting paths with dual potentials (the Jonker-Volgenant
+variant of the Hungarian method, as in scipy's linear_sum_assignment). When
+NumPy is installed each row scan of the search runs on whole arrays; the
+plain Python solver keeps the scripts running on a bare interpreter, and
+both return the same matching. With more columns than rows only each
+row's best `rows` columns can be matched, so the rest are dropped before
+solving. Integer weights are solved exactly.
+"""
+
+import heapq
+from typing import List, Optional, Sequence
+
+try:
+    import numpy
+except ImportError:  # optional: the pure Python solver gives the same matching
+    numpy = None
+
+FORBIDDEN = None
+
+
+def max_weight_matching(weights: Sequence[Sequence[Optional[int]]]) -> List[int]:
+    """Column for each row maximizing the total weight, every row matched
+
+    weights is rows x columns with rows <= columns; FORBIDDEN (None) marks
+    pairs that must not be matched (NaN when weights is a NumPy array).
+    Raises ValueError when the rows cannot all be matched without a
+    forbidden pair.
+    """
+    rows = len(weights)
+    if not rows:
+        return []
+    if rows > len(weights[0]):
+        raise ValueError(f"{rows} rows cannot be matched to {len(weights[0])} columns")
+    if numpy is not None:
+        return _numpy_matching(numpy.asarray(weights, dtype=float))
+
+    # A row matched outside its own top `rows` columns could always move to
+    # one of them that no other row holds, so their union is enough
+    keep = set()
+    for row in weights:
+        allowed = [(w, -j) for j, w in enumerate(row) if w is not FORBIDDEN]
+        keep.update(-j for _, j in heapq.nlargest(rows, allowed))
+    columns = sorted(keep)
+    cols = len(columns)
+    if rows > cols:
+        raise ValueError(f"{rows} rows share only {cols} allowed columns")
+
+    inf = float('inf')
+    # Minimize cost = -weight; forbidden pairs cost inf and never relax a column
+    cost = [[inf if row[j] is FORBIDDEN else -row[j] for j in columns] for row in weights]
+    u = [0] * rows
+    v = [0] * cols
+    row4col = [-1] * cols
+    col4row = [-1] * rows
+    path = [-1] * cols
+
+    for current in range(rows):
+        shortest = [inf] * cols
+        remaining = list(range(cols))
+        scanned_rows = []
+        scanned_cols = []
+        min_value = 0
+        i = current
+        sink = -1
+        while sink == -1:
+            scanned_rows.append(i)
+            base = min_value - u[i]
+            row = cost[i]
+            lowest, index = inf, -1
+            for position, j in enumerate(remaining):
+                distance = shortest[j]
+                reduced = base + row[j] - v[j]
+                if reduced < distance:
+                    path[j] = i
+                    shortest[j] = distance = reduced
+                # Ties prefer a free column, which ends the search
+                if distance <= lowest and (distance < lowest or row4col[j] == -1):
+                    lowest, index = distance, position
+            if lowest == inf:
+                raise ValueError(f"Row {current} has no allowed column left")
+            min_value = lowest
+            j = remaining[index]
+            remaining[index] = remaining[-1]
+            remaining.pop()
+            scanned_cols.append(j)
+            if row4col[j] == -1:
+                sink = j
+            else:
+                i = row4col[j]
+
+        # Update the potentials of everything the search touched
+        u[current] += min_value
+        for i in scanned_rows:
+            if i != current:
+                u[i] += min_value - shortest[col4row[i]]
+        for j in scanned_cols:
+            v[j] -= min_value - shortest[j]
+
+        # Flip the augmenting path
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == current:
+                break
+
+    return [columns[j] for j in col4row]
+
+
+def _numpy_matching(weights) -> List[int]:
+    """max_weight_matching on a float array, each row scan over whole arrays
+
+    The same search as the plain Python loop, step for step: the unscanned
+    columns live in remaining[:count] and leave it by the same swap with
+    the last one, so ties are broken alike and both return one matching.
+    """
+    rows = len(weights)
+    allowed = ~numpy.isnan(weights)
+    # Stable sort of -weight: equal weights keep the lower column first, as nlargest does
+    order = numpy.argsort(numpy.where(allowed, -weights, numpy.inf), axis=1, kind='stable')[:, :rows]
+    columns = numpy.unique(order[numpy.take_along_axis(allowed, order, axis=1)])
+    cols = len(columns)
+    if rows > cols:
+        raise ValueError(f"{rows} rows share only {cols} allowed columns")
+
+    inf = numpy.inf
+    cost = numpy.where(allowed[:, columns], -weights[:, columns], inf)
+    u = numpy.zeros(rows)
+    v = numpy.zeros(cols)
+    row4col = numpy.full(cols, -1)
+    col4row = numpy.full(rows, -1)
+    path = numpy.full(cols, -1)
+
+    for current in range(rows):
+        shortest = numpy.full(cols, inf)
+        remaining = numpy.arange(cols)
+        count = cols
+        scanned_rows = []
+        scanned_cols = []
+        min_value = 0.0
+        i = current
+        sink = -1
+        while sink == -1:
+            scanned_rows.append(i)
+            todo = remaining[:count]
+            reduced = (min_value - u[i]) + cost[i, todo] - v[todo]
+            better = reduced < shortest[todo]
+            path[todo[better]] = i
+            shortest[todo[better]] = reduced[better]
+            distance = shortest[todo]
+            lowest = distance.min()
+            if lowest == inf:
+                raise ValueError(f"Row {current} has no allowed column left")
+            # Ties go to the last free column, else the first one
+            ties = numpy.flatnonzero(distance == lowest)
+            free = ties[row4col[todo[ties]] == -1]
+            index = int(free[-1] if len(free) else ties[0])
+            min_value = lowest
+            j = int(todo[index])
+            count -= 1
+            remaining[index] = remaining[count]
+            scanned_cols.append(j)
+            if row4col[j] == -1:
+                sink = j
+            else:
+                i = int(row4col[j])
+
+        # Every scanned row but current holds a scanned column
+        u[current] += min_value
+        others = numpy.array(scanned_rows[1:], dtype=int)
+        u[others] += min_value - shortest[col4row[others]]
+        scanned = numpy.array(scanned_cols, dtype=int)
+        v[scanned] -= min_value - shortest[scanned]
+
+        j = sink
+        while True:
+            i = int(path[j])
+            row4col[j] = i
+            col4row[i], j = j, int(col4row[i])
+            if i == current:
+                break
+
+    return [int(columns[j]) for j in col4row]
@@ -5,11 +5,16 @@ Automatically maintain agent contexts and clean up stale data
 """
 
 import os
-import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict
 
+from change_feed import prune_changes
+from history_archive import archive_history
+from learnings import add_learnings
+from storage import connect
+from transitions import can_transition, describe_failure, transition
+
 os.environ['TZ'] = 'Asia/Bangkok'
 
 DB_PATH = Path(__file__).parent / "team.db"
@@ -17,8 +22,7 @@ DB_PATH = Path(__file__).parent / "team.db"
 class MemoryMaintenance:
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
-        self.conn.row_factory = sqlite3.Row
+        self.conn = connect(db_path)
         self.actions = []
         
     def close(self):
@@ -36,7 +40,7 @@ class MemoryMaintenance:
         
         # Find stale agents
         cursor.execute('''
-            SELECT a.id, a.name, a.current_task_id, t.title as task_title
+            SELECT a.id, a.name, a.current_task_id, t.title as task_title, t.status as task_status
             FROM agents a
             LEFT JOIN tasks t ON a.current_task_id = t.id
             WHERE a.status = 'active'
@@ -47,118 +51,86 @@ class MemoryMaintenance:
         reset_count = 0
         
         for agent in stale_agents:
-            print(f"  🔄 Resetting {agent['name']} (stale)")
-            
-            # Reset agent to idle
+            # Reset agent to idle, unless it came back since we looked
             cursor.execute('''
                 UPDATE agents 
                 SET status = 'idle', current_task_id = NULL, last_heartbeat = datetime('now')
-                WHERE id = ?
-            ''', (agent['id'],))
+                WHERE id = ? AND status = 'active'
+                AND (last_heartbeat IS NULL OR last_heartbeat < datetime('now', '-1 hour'))
+                AND current_task_id IS ?
+            ''', (agent['id'], agent['current_task_id']))
+            if cursor.rowcount == 0:
+                self.conn.rollback()
+                print(f"  ⏭️ {agent['name']} recovered, not reset")
+                continue
             
-            # Move task back to todo if exists
-            if agent['current_task_id']:
-                cursor.execute('''
-                    UPDATE tasks 
-                    SET status = 'todo', assignee_id = NULL, updated_at = datetime('now')
-                    WHERE id = ?
-                ''', (agent['current_task_id'],))
-                
-                cursor.execute('''
-                    INSERT INTO task_history (task_id, agent_id, action, notes)
-                    VALUES (?, ?, 'updated', 'Reset: agent stale, task returned to todo')
-                ''', (agent['current_task_id'], agent['id']))
+            print(f"  🔄 Resetting {agent['name']} (stale)")
+            
+            # Move task back to todo if it is still where we saw it (done/blocked stay put)
+            if agent['current_task_id'] and can_transition(agent['task_status'], 'release'):
+                result = transition(cursor, agent['current_task_id'], 'release', agent_id=agent['id'],
+                                    notes='Reset: agent stale, task returned to todo',
+                                    expected=agent['task_status'])
+                if not result['ok']:
+                    print(f"  ⏭️ {describe_failure(result)}")
             
+            self.conn.commit()
             reset_count += 1
             self.actions.append(f"Reset {agent['name']}: stale agent")
         
-        self.conn.commit()
         return reset_count
 
     def update_agent_learnings(self) -> int:
-        """Update agent contexts with learnings from recent completed tasks"""
+        """Record a learning for each task completed in the last 7 days, once per task"""
         cursor = self.conn.cursor()
         
-        # Get agents with recent completed tasks
+        # Tasks that already produced a learning are skipped by the anti-join
         cursor.execute('''
-            SELECT DISTINCT a.id, a.name
-            FROM agents a
-            JOIN tasks t ON a.id = t.assignee_id
+            SELECT t.id, t.title, a.id AS agent_id, a.name
+            FROM tasks t
+            JOIN agents a ON a.id = t.assignee_id
             WHERE t.status = 'done'
             AND t.completed_at > datetime('now', '-7 days')
+            AND NOT EXISTS (SELECT 1 FROM agent_learnings l WHERE l.source_task_id = t.id)
+            ORDER BY t.completed_at
         ''')
         
-        agents = [dict(row) for row in cursor.fetchall()]
-        update_count = 0
+        by_agent: Dict[str, Dict] = {}
+        for row in cursor.fetchall():
+            agent = by_agent.setdefault(row['agent_id'], {'name': row['name'], 'learnings': []})
+            agent['learnings'].append((f"Completed: {row['title']}", row['id']))
         
-        for agent in agents:
-            # Get recent completed tasks
-            cursor.execute('''
-                SELECT title, expected_outcome, notes
-                FROM tasks
-                WHERE assignee_id = ? AND status = 'done'
-                AND completed_at > datetime('now', '-7 days')
-                ORDER BY completed_at DESC
-                LIMIT 5
-            ''', (agent['id'],))
-            
-            tasks = cursor.fetchall()
-            if not tasks:
-                continue
-            
-            # Generate learning summary
-            learnings = []
-            for task in tasks:
-                title = task[0]
-                learnings.append(f"- Completed: {title}")
-            
-            new_learning = "\n".join(learnings)
-            
-            # Get existing learnings
-            cursor.execute('''
-                SELECT learnings FROM agent_context WHERE agent_id = ?
-            ''', (agent['id'],))
-            row = cursor.fetchone()
-            existing = row[0] if row else ""
-            
-            # Merge learnings (keep recent 20 items)
-            combined = f"{new_learning}\n{existing}" if existing else new_learning
-            lines = combined.split('\n')
-            # Keep only non-empty lines
-            lines = [l for l in lines if l.strip()]
-            # Keep last 20
-            lines = lines[:20]
-            updated = '\n'.join(lines)
-            
-            # Update agent context
-            cursor.execute('''
-                UPDATE agent_context 
-                SET learnings = ?, last_updated = datetime('now')
-                WHERE agent_id = ?
-            ''', (updated, agent['id']))
-            
-            update_count += 1
-            self.actions.append(f"Updated learnings for {agent['name']}")
+        update_count = 0
+        for agent_id, agent in by_agent.items():
+            added = add_learnings(cursor, agent_id, agent['learnings'])
+            if added:
+                update_count += 1
+                self.actions.append(f"Added {added} learnings for {agent['name']}")
         
         self.conn.commit()
         return update_count
 
     def archive_old_history(self) -> int:
-        """Archive task history older than 30 days"""
-        cursor = self.conn.cursor()
+        """Move task history older than 30 days into monthly archive files"""
+        result = archive_history(self.conn)
         
-        cursor.execute('''
-            DELETE FROM task_history
-            WHERE timestamp < datetime('now', '-30 days')
-        ''')
+        if result['moved'] > 0:
+            self.actions.append(f"Archived {result['moved']} old history records "
+                                f"into {', '.join(result['months'])} ({result['chunks']} chunks)")
+        if result['sealed']:
+            self.actions.append(f"Sealed history archives {', '.join(result['sealed'])}")
         
-        deleted = cursor.rowcount
+        return result['moved']
+
+    def prune_change_feed(self) -> int:
+        """Drop change feed events older than 7 days"""
+        pruned = prune_changes(self.conn)
         self.conn.commit()
         
-        if deleted > 0:
-            self.actions.append(f"Archived {deleted} old history records")
+        if pruned > 0:
+            self.actions.append(f"Pruned {pruned} old change feed events")
         
-        return deleted
+        return pruned
 
     def run(self) -> Dict:
         """Run full maintenance"""
@@ -180,6 +152,11 @@ class MemoryMaintenance:
         archived = self.archive_old_history()
         print(f"   Archived {archived} records")
         
+        # 4. Prune change feed
+        print("\n4️⃣ Pruning change feed...")
+        pruned = self.prune_change_feed()
+        print(f"   Pruned {pruned} events")
+        
         print("\n" + "=" * 50)
         
         if self.actions:
@@ -193,6 +170,7 @@ class MemoryMaintenance:
             'stale_reset': stale_reset,
             'learnings_updated': learnings_updated,
             'archived': archived,
+            'changes_pruned': pruned,
             'actions': self.actions
         }
 
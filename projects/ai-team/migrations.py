@@ -0,0 +1,1283 @@
+#!/usr/bin/env python3
+"""
+AI Team Schema Migrations
+Versioned schema changes for team.db, tracked in PRAGMA user_version
+"""
+
+import hashlib
+import math
+import sqlite3
+from typing import Callable, Iterator, List, Sequence, Tuple, Union
+
+# Notification outbox: written in the same transaction as the state change,
+# drained asynchronously by notify_outbox.OutboxDispatcher
+OUTBOX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL DEFAULT 'telegram',
+    target TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'sent', 'dead')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    next_attempt_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_pending
+    ON outbox(next_attempt_at, id) WHERE status = 'pending';
+'''
+
+# Per-day task number sequence, bumped atomically inside the create transaction
+TASK_SEQUENCE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS task_sequences (
+    day TEXT PRIMARY KEY,              -- YYYYMMDD as used in T-YYYYMMDD-NNN
+    last_number INTEGER NOT NULL
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO task_sequences (day, last_number)
+SELECT SUBSTR(id, 3, 8), MAX(CAST(SUBSTR(id, 12) AS INTEGER))
+FROM tasks
+WHERE id GLOB 'T-[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]-*'
+GROUP BY SUBSTR(id, 3, 8);
+'''
+
+# Indexes for the hot queries (checked by benchmarks/query_plans.py)
+INDEX_PACK_SCHEMA = '''
+-- get_tasks / dashboard counts / auto-assign todo scan / stuck tasks, ordered like task list
+CREATE INDEX IF NOT EXISTS idx_tasks_status_due
+    ON tasks(status, due_date, priority);
+
+-- per-agent workload (find_best_agent) and recent completions (learnings)
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee_status
+    ON tasks(assignee_id, status, completed_at);
+
+-- completion date ranges (daily report)
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_at
+    ON tasks(completed_at) WHERE completed_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_task_history_task
+    ON task_history(task_id);
+
+-- archive_old_history
+CREATE INDEX IF NOT EXISTS idx_task_history_timestamp
+    ON task_history(timestamp);
+
+-- check_subagent_sessions (action IN (...) AND timestamp < ...)
+CREATE INDEX IF NOT EXISTS idx_task_history_action_ts
+    ON task_history(action, timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_agents_status
+    ON agents(status, last_heartbeat);
+
+-- alert cooldown lookups
+CREATE INDEX IF NOT EXISTS idx_agents_alert_type
+    ON agents(last_alert_type, last_alert_sent) WHERE last_alert_type IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_agents_alert_sent
+    ON agents(last_alert_sent) WHERE last_alert_sent IS NOT NULL;
+
+-- OutboxDispatcher.purge_sent of delivered messages
+CREATE INDEX IF NOT EXISTS idx_outbox_sent
+    ON outbox(sent_at) WHERE status = 'sent';
+'''
+
+# Counters behind v_dashboard_stats, recomputed from scratch by this query
+# (used for the migration backfill and `team_db.py dashboard --verify`).
+# The progress pair has AVG(progress) semantics since migration 16
+DASHBOARD_COUNTERS_RECOMPUTE = '''
+SELECT
+    (SELECT COUNT(*) FROM agents) AS total_agents,
+    (SELECT COUNT(*) FROM agents WHERE status = 'active') AS active_agents,
+    (SELECT COUNT(*) FROM agents WHERE status = 'idle') AS idle_agents,
+    (SELECT COUNT(*) FROM agents WHERE status = 'blocked') AS blocked_agents,
+    (SELECT COUNT(*) FROM projects) AS total_projects,
+    (SELECT COUNT(*) FROM projects WHERE status = 'active') AS active_projects,
+    (SELECT COUNT(*) FROM tasks) AS total_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'todo') AS todo_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'in_progress') AS in_progress_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'done') AS completed_tasks,
+    (SELECT COUNT(*) FROM tasks WHERE status = 'blocked') AS blocked_tasks,
+    (SELECT COALESCE(SUM(progress), 0) FROM tasks WHERE status != 'cancelled') AS progress_sum,
+    (SELECT COUNT(progress) FROM tasks WHERE status != 'cancelled') AS progress_count
+'''
+
+# Per-day open task counts recomputed from scratch (same shape as dashboard_due_counters)
+DASHBOARD_DUE_COUNTERS_RECOMPUTE = '''
+SELECT DATE(due_date) AS day, COUNT(*) AS open_tasks FROM tasks
+WHERE due_date IS NOT NULL AND status != 'done'
+GROUP BY DATE(due_date)
+'''
+
+DASHBOARD_COUNTER_COLUMNS = (
+    'total_agents', 'active_agents', 'idle_agents', 'blocked_agents',
+    'total_projects', 'active_projects',
+    'total_tasks', 'todo_tasks', 'in_progress_tasks', 'completed_tasks', 'blocked_tasks',
+    'progress_sum', 'progress_count',
+)
+
+# Single-row counters kept current by triggers; v_dashboard_stats becomes a
+# one-row lookup plus small per-day bucket sums for the date-relative fields
+DASHBOARD_COUNTERS_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS dashboard_counters (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_agents INTEGER NOT NULL DEFAULT 0,
+    active_agents INTEGER NOT NULL DEFAULT 0,
+    idle_agents INTEGER NOT NULL DEFAULT 0,
+    blocked_agents INTEGER NOT NULL DEFAULT 0,
+    total_projects INTEGER NOT NULL DEFAULT 0,
+    active_projects INTEGER NOT NULL DEFAULT 0,
+    total_tasks INTEGER NOT NULL DEFAULT 0,
+    todo_tasks INTEGER NOT NULL DEFAULT 0,
+    in_progress_tasks INTEGER NOT NULL DEFAULT 0,
+    completed_tasks INTEGER NOT NULL DEFAULT 0,
+    blocked_tasks INTEGER NOT NULL DEFAULT 0,
+    progress_sum INTEGER NOT NULL DEFAULT 0,     -- SUM(progress) of non-cancelled tasks
+    progress_count INTEGER NOT NULL DEFAULT 0    -- COUNT(*) of non-cancelled tasks
+);
+
+INSERT OR REPLACE INTO dashboard_counters (id, {', '.join(DASHBOARD_COUNTER_COLUMNS)})
+SELECT 1, * FROM ({DASHBOARD_COUNTERS_RECOMPUTE});
+
+-- Agents
+CREATE TRIGGER IF NOT EXISTS trg_counters_agents_insert AFTER INSERT ON agents
+BEGIN
+    UPDATE dashboard_counters SET
+        total_agents = total_agents + 1,
+        active_agents = active_agents + (NEW.status IS 'active'),
+        idle_agents = idle_agents + (NEW.status IS 'idle'),
+        blocked_agents = blocked_agents + (NEW.status IS 'blocked')
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_agents_delete AFTER DELETE ON agents
+BEGIN
+    UPDATE dashboard_counters SET
+        total_agents = total_agents - 1,
+        active_agents = active_agents - (OLD.status IS 'active'),
+        idle_agents = idle_agents - (OLD.status IS 'idle'),
+        blocked_agents = blocked_agents - (OLD.status IS 'blocked')
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_agents_update AFTER UPDATE OF status ON agents
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    UPDATE dashboard_counters SET
+        active_agents = active_agents - (OLD.status IS 'active') + (NEW.status IS 'active'),
+        idle_agents = idle_agents - (OLD.status IS 'idle') + (NEW.status IS 'idle'),
+        blocked_agents = blocked_agents - (OLD.status IS 'blocked') + (NEW.status IS 'blocked')
+    WHERE id = 1;
+END;
+
+-- Projects
+CREATE TRIGGER IF NOT EXISTS trg_counters_projects_insert AFTER INSERT ON projects
+BEGIN
+    UPDATE dashboard_counters SET
+        total_projects = total_projects + 1,
+        active_projects = active_projects + (NEW.status IS 'active')
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_projects_delete AFTER DELETE ON projects
+BEGIN
+    UPDATE dashboard_counters SET
+        total_projects = total_projects - 1,
+        active_projects = active_projects - (OLD.status IS 'active')
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_projects_update AFTER UPDATE OF status ON projects
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    UPDATE dashboard_counters SET
+        active_projects = active_projects - (OLD.status IS 'active') + (NEW.status IS 'active')
+    WHERE id = 1;
+END;
+
+-- Tasks
+CREATE TRIGGER IF NOT EXISTS trg_counters_tasks_insert AFTER INSERT ON tasks
+BEGIN
+    UPDATE dashboard_counters SET
+        total_tasks = total_tasks + 1,
+        todo_tasks = todo_tasks + (NEW.status IS 'todo'),
+        in_progress_tasks = in_progress_tasks + (NEW.status IS 'in_progress'),
+        completed_tasks = completed_tasks + (NEW.status IS 'done'),
+        blocked_tasks = blocked_tasks + (NEW.status IS 'blocked'),
+        progress_sum = progress_sum + CASE WHEN NEW.status IS NOT 'cancelled'
+                                           THEN COALESCE(NEW.progress, 0) ELSE 0 END,
+        progress_count = progress_count + (NEW.status IS NOT 'cancelled')
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_tasks_delete AFTER DELETE ON tasks
+BEGIN
+    UPDATE dashboard_counters SET
+        total_tasks = total_tasks - 1,
+        todo_tasks = todo_tasks - (OLD.status IS 'todo'),
+        in_progress_tasks = in_progress_tasks - (OLD.status IS 'in_progress'),
+        completed_tasks = completed_tasks - (OLD.status IS 'done'),
+        blocked_tasks = blocked_tasks - (OLD.status IS 'blocked'),
+        progress_sum = progress_sum - CASE WHEN OLD.status IS NOT 'cancelled'
+                                           THEN COALESCE(OLD.progress, 0) ELSE 0 END,
+        progress_count = progress_count - (OLD.status IS NOT 'cancelled')
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_tasks_update AFTER UPDATE OF status, progress ON tasks
+WHEN OLD.status IS NOT NEW.status OR OLD.progress IS NOT NEW.progress
+BEGIN
+    UPDATE dashboard_counters SET
+        todo_tasks = todo_tasks - (OLD.status IS 'todo') + (NEW.status IS 'todo'),
+        in_progress_tasks = in_progress_tasks - (OLD.status IS 'in_progress') + (NEW.status IS 'in_progress'),
+        completed_tasks = completed_tasks - (OLD.status IS 'done') + (NEW.status IS 'done'),
+        blocked_tasks = blocked_tasks - (OLD.status IS 'blocked') + (NEW.status IS 'blocked'),
+        progress_sum = progress_sum
+            - CASE WHEN OLD.status IS NOT 'cancelled' THEN COALESCE(OLD.progress, 0) ELSE 0 END
+            + CASE WHEN NEW.status IS NOT 'cancelled' THEN COALESCE(NEW.progress, 0) ELSE 0 END,
+        progress_count = progress_count - (OLD.status IS NOT 'cancelled') + (NEW.status IS NOT 'cancelled')
+    WHERE id = 1;
+END;
+
+-- Open (not done) tasks per due day, for the date-relative due_today / overdue counts
+CREATE TABLE IF NOT EXISTS dashboard_due_counters (
+    day TEXT PRIMARY KEY,              -- DATE(due_date)
+    open_tasks INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR REPLACE INTO dashboard_due_counters (day, open_tasks)
+{DASHBOARD_DUE_COUNTERS_RECOMPUTE};
+
+CREATE TRIGGER IF NOT EXISTS trg_due_counters_tasks_insert AFTER INSERT ON tasks
+WHEN NEW.due_date IS NOT NULL AND NEW.status != 'done'
+BEGIN
+    INSERT OR IGNORE INTO dashboard_due_counters (day, open_tasks) VALUES (DATE(NEW.due_date), 0);
+    UPDATE dashboard_due_counters SET open_tasks = open_tasks + 1 WHERE day = DATE(NEW.due_date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_due_counters_tasks_delete AFTER DELETE ON tasks
+WHEN OLD.due_date IS NOT NULL AND OLD.status != 'done'
+BEGIN
+    UPDATE dashboard_due_counters SET open_tasks = open_tasks - 1 WHERE day = DATE(OLD.due_date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_due_counters_tasks_update AFTER UPDATE OF status, due_date ON tasks
+WHEN (OLD.status IS NOT NEW.status OR OLD.due_date IS NOT NEW.due_date)
+BEGIN
+    UPDATE dashboard_due_counters SET open_tasks = open_tasks - 1
+    WHERE OLD.due_date IS NOT NULL AND OLD.status != 'done' AND day = DATE(OLD.due_date);
+    INSERT OR IGNORE INTO dashboard_due_counters (day, open_tasks)
+    SELECT DATE(NEW.due_date), 0 WHERE NEW.due_date IS NOT NULL AND NEW.status != 'done';
+    UPDATE dashboard_due_counters SET open_tasks = open_tasks + 1
+    WHERE NEW.due_date IS NOT NULL AND NEW.status != 'done' AND day = DATE(NEW.due_date);
+END;
+
+-- Same columns and order as before (dashboard.php and ai-team-monitor.sh read it)
+DROP VIEW IF EXISTS v_dashboard_stats;
+CREATE VIEW v_dashboard_stats AS
+SELECT
+    c.total_agents,
+    c.active_agents,
+    c.idle_agents,
+    c.blocked_agents,
+    c.total_projects,
+    c.active_projects,
+    c.total_tasks,
+    c.todo_tasks,
+    c.in_progress_tasks,
+    c.completed_tasks,
+    c.blocked_tasks,
+    ROUND(c.progress_sum * 1.0 / MAX(c.progress_count, 1), 1) AS avg_progress,
+    (SELECT COALESCE(SUM(open_tasks), 0) FROM dashboard_due_counters
+     WHERE day = DATE('now')) AS due_today,
+    (SELECT COALESCE(SUM(open_tasks), 0) FROM dashboard_due_counters
+     WHERE day < DATE('now')) AS overdue_tasks
+FROM dashboard_counters c
+WHERE c.id = 1;
+'''
+
+# Health columns are normally added by HealthMonitor.ensure_schema, but the
+# index pack needs them to exist first
+HEALTH_COLUMNS = {
+    'health_status': "TEXT DEFAULT 'unknown' CHECK (health_status IN ('healthy', 'stale', 'offline', 'unknown'))",
+    'last_alert_sent': 'DATETIME',
+    'last_alert_type': 'TEXT',
+}
+
+
+def _index_pack(conn: sqlite3.Connection):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(agents)')}
+    for name, definition in HEALTH_COLUMNS.items():
+        if name not in columns:
+            conn.execute(f'ALTER TABLE agents ADD COLUMN {name} {definition}')
+    for statement in _split_statements(INDEX_PACK_SCHEMA):
+        conn.execute(statement)
+
+
+# Keyset pagination of task lists on (due_date, priority, id); the status
+# variant supersedes idx_tasks_status_due from the index pack
+TASK_LIST_INDEX_SCHEMA = '''
+CREATE INDEX IF NOT EXISTS idx_tasks_list
+    ON tasks(due_date, priority, id);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_status_list
+    ON tasks(status, due_date, priority, id);
+
+DROP INDEX IF EXISTS idx_tasks_status_due;
+'''
+
+
+# Statuses that satisfy a dependency
+FINISHED_STATUSES = ('done', 'cancelled')
+
+# Ready-queue order; the same expression is indexed, so queries must use it verbatim
+PRIORITY_RANK_SQL = ("CASE priority WHEN 'critical' THEN 1 WHEN 'high' THEN 2 "
+                     "WHEN 'normal' THEN 3 WHEN 'low' THEN 4 END")
+
+# Unfinished prerequisites per task, recomputed from scratch (backfill / verify)
+OPEN_DEPENDENCIES_RECOMPUTE = '''
+SELECT COUNT(*) FROM task_dependencies d
+JOIN tasks p ON p.id = d.depends_on_task_id
+WHERE d.task_id = tasks.id AND p.status NOT IN ('done', 'cancelled')
+'''
+
+# tasks.open_dependencies counts unfinished prerequisites; triggers keep it
+# current so the ready queue (todo with no open dependencies) is an index scan
+DEPENDENCY_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS task_dependencies (
+    task_id TEXT NOT NULL,
+    depends_on_task_id TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (task_id, depends_on_task_id),
+    FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY (depends_on_task_id) REFERENCES tasks(id) ON DELETE CASCADE
+);
+
+-- dependents of a task (status trigger, cycle check walks the other way on the PK)
+CREATE INDEX IF NOT EXISTS idx_task_dependencies_on
+    ON task_dependencies(depends_on_task_id);
+
+UPDATE tasks SET open_dependencies = ({OPEN_DEPENDENCIES_RECOMPUTE});
+
+CREATE TRIGGER IF NOT EXISTS trg_deps_insert AFTER INSERT ON task_dependencies
+BEGIN
+    UPDATE tasks SET open_dependencies = open_dependencies + 1
+    WHERE id = NEW.task_id
+    AND EXISTS (SELECT 1 FROM tasks WHERE id = NEW.depends_on_task_id
+                AND status NOT IN ('done', 'cancelled'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_deps_delete AFTER DELETE ON task_dependencies
+BEGIN
+    UPDATE tasks SET open_dependencies = open_dependencies - 1
+    WHERE id = OLD.task_id
+    AND EXISTS (SELECT 1 FROM tasks WHERE id = OLD.depends_on_task_id
+                AND status NOT IN ('done', 'cancelled'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_deps_tasks_status AFTER UPDATE OF status ON tasks
+WHEN (OLD.status IN ('done', 'cancelled')) IS NOT (NEW.status IN ('done', 'cancelled'))
+BEGIN
+    UPDATE tasks
+    SET open_dependencies = open_dependencies
+        + CASE WHEN NEW.status IN ('done', 'cancelled') THEN -1 ELSE 1 END
+    WHERE id IN (SELECT task_id FROM task_dependencies WHERE depends_on_task_id = NEW.id);
+END;
+
+-- Foreign keys are not enforced on every connection, so drop edges here
+CREATE TRIGGER IF NOT EXISTS trg_deps_tasks_delete AFTER DELETE ON tasks
+BEGIN
+    UPDATE tasks SET open_dependencies = open_dependencies - 1
+    WHERE OLD.status NOT IN ('done', 'cancelled')
+    AND id IN (SELECT task_id FROM task_dependencies WHERE depends_on_task_id = OLD.id);
+    DELETE FROM task_dependencies WHERE task_id = OLD.id OR depends_on_task_id = OLD.id;
+END;
+
+-- AutoAssign ready queue: todo tasks whose prerequisites are finished, in
+-- assignment order (status leads so the planner prefers it over the list index)
+CREATE INDEX IF NOT EXISTS idx_tasks_ready
+    ON tasks(status, ({PRIORITY_RANK_SQL}), created_at)
+    WHERE open_dependencies = 0;
+'''
+
+
+def _dependency_queue(conn: sqlite3.Connection):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(tasks)')}
+    if 'open_dependencies' not in columns:
+        conn.execute('ALTER TABLE tasks ADD COLUMN open_dependencies INTEGER NOT NULL DEFAULT 0')
+    for statement in _split_statements(DEPENDENCY_SCHEMA):
+        conn.execute(statement)
+
+
+# Upper bounds (minutes) of the completion-duration histogram in daily_rollup;
+# one more bucket holds everything longer. Buckets add up across rows, so
+# percentiles for any date range come from summed counts.
+DURATION_BUCKETS = (15, 30, 60, 120, 240, 480, 960, 1920, 3840)
+DURATION_BUCKET_COLUMNS = tuple(f"duration_lt_{b}" for b in DURATION_BUCKETS) + (
+    f"duration_ge_{DURATION_BUCKETS[-1]}",)
+
+
+def _bucket_conditions(value: str) -> List[str]:
+    """One SQL boolean per histogram bucket for a duration expression"""
+    conditions = []
+    lower = None
+    for upper in DURATION_BUCKETS:
+        if lower is None:
+            conditions.append(f"({value} < {upper})")
+        else:
+            conditions.append(f"({value} >= {lower} AND {value} < {upper})")
+        lower = upper
+    conditions.append(f"({value} >= {lower})")
+    return conditions
+
+
+def _rollup_completion_delta(row: str, sign: str) -> str:
+    """SET list adding (+) or removing (-) one completed task row (NEW/OLD)"""
+    duration = f"{row}.actual_duration_minutes"
+    sets = [
+        f"completed = completed {sign} 1",
+        f"duration_total = duration_total {sign} COALESCE({duration}, 0)",
+        f"duration_count = duration_count {sign} ({duration} IS NOT NULL)",
+    ]
+    sets += [f"{column} = {column} {sign} COALESCE({condition}, 0)"
+             for column, condition in zip(DURATION_BUCKET_COLUMNS, _bucket_conditions(duration))]
+    return ',\n        '.join(sets)
+
+
+def _rollup_key(day: str, row: str, agent: str = None) -> Tuple[str, str]:
+    """(VALUES list, WHERE clause) for the daily_rollup row of a task"""
+    agent = agent or f"{row}.assignee_id"
+    values = f"{day}, COALESCE({row}.project_id, ''), COALESCE({agent}, '')"
+    where = (f"day = {day} AND project_id = COALESCE({row}.project_id, '') "
+             f"AND agent_id = COALESCE({agent}, '')")
+    return values, where
+
+
+# Completion columns of daily_rollup recomputed from tasks (backfill / verify);
+# a task counts on DATE(completed_at) for its project and assignee while it is done
+DAILY_ROLLUP_COMPLETIONS_RECOMPUTE = f'''
+SELECT DATE(completed_at) AS day, COALESCE(project_id, '') AS project_id,
+       COALESCE(assignee_id, '') AS agent_id,
+       COUNT(*) AS completed,
+       COALESCE(SUM(actual_duration_minutes), 0) AS duration_total,
+       COUNT(actual_duration_minutes) AS duration_count,
+       {', '.join(f"SUM(COALESCE({c}, 0)) AS {name}" for name, c in
+                  zip(DURATION_BUCKET_COLUMNS, _bucket_conditions('actual_duration_minutes')))}
+FROM tasks
+WHERE status = 'done' AND completed_at IS NOT NULL
+GROUP BY 1, 2, 3
+'''
+
+DAILY_ROLLUP_COMPLETION_COLUMNS = ('completed', 'duration_total', 'duration_count') + DURATION_BUCKET_COLUMNS
+
+
+def _daily_rollup_schema() -> str:
+    done_new = _rollup_key('DATE(NEW.completed_at)', 'NEW')
+    done_old = _rollup_key('DATE(OLD.completed_at)', 'OLD')
+    today_new = _rollup_key("DATE('now')", 'NEW')
+    today_old = _rollup_key("DATE('now')", 'OLD')
+    buckets = ',\n    '.join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in DURATION_BUCKET_COLUMNS)
+    return f'''
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day TEXT NOT NULL,                          -- UTC date, like the stored timestamps
+    project_id TEXT NOT NULL DEFAULT '',        -- '' for tasks without a project
+    agent_id TEXT NOT NULL DEFAULT '',          -- '' for unassigned tasks
+    completed INTEGER NOT NULL DEFAULT 0,       -- tasks done, by DATE(completed_at)
+    duration_total INTEGER NOT NULL DEFAULT 0,  -- SUM(actual_duration_minutes) of those
+    duration_count INTEGER NOT NULL DEFAULT 0,  -- how many of them have a duration
+    {buckets},
+    blocked INTEGER NOT NULL DEFAULT 0,         -- moves into blocked that day
+    reassigned INTEGER NOT NULL DEFAULT 0,      -- tasks taken away from agent_id that day
+    PRIMARY KEY (day, project_id, agent_id)
+) WITHOUT ROWID;
+
+INSERT OR REPLACE INTO daily_rollup (day, project_id, agent_id, {', '.join(DAILY_ROLLUP_COMPLETION_COLUMNS)})
+{DAILY_ROLLUP_COMPLETIONS_RECOMPUTE};
+
+-- Past blocks come from the audit log; reassignments were never recorded before
+INSERT OR IGNORE INTO daily_rollup (day, project_id, agent_id)
+SELECT DATE(h.timestamp), COALESCE(t.project_id, ''), COALESCE(t.assignee_id, '')
+FROM task_history h JOIN tasks t ON t.id = h.task_id
+WHERE h.action = 'blocked'
+GROUP BY 1, 2, 3;
+
+UPDATE daily_rollup SET blocked = (
+    SELECT COUNT(*) FROM task_history h JOIN tasks t ON t.id = h.task_id
+    WHERE h.action = 'blocked' AND DATE(h.timestamp) = daily_rollup.day
+    AND COALESCE(t.project_id, '') = daily_rollup.project_id
+    AND COALESCE(t.assignee_id, '') = daily_rollup.agent_id
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_tasks_insert AFTER INSERT ON tasks
+WHEN NEW.status = 'done' AND NEW.completed_at IS NOT NULL
+BEGIN
+    INSERT OR IGNORE INTO daily_rollup (day, project_id, agent_id) VALUES ({done_new[0]});
+    UPDATE daily_rollup SET
+        {_rollup_completion_delta('NEW', '+')}
+    WHERE {done_new[1]};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_tasks_delete AFTER DELETE ON tasks
+WHEN OLD.status = 'done' AND OLD.completed_at IS NOT NULL
+BEGIN
+    UPDATE daily_rollup SET
+        {_rollup_completion_delta('OLD', '-')}
+    WHERE {done_old[1]};
+END;
+
+-- Completing, reopening or editing a done task moves its contribution
+CREATE TRIGGER IF NOT EXISTS trg_rollup_tasks_update
+AFTER UPDATE OF status, completed_at, actual_duration_minutes, assignee_id, project_id ON tasks
+WHEN (OLD.status = 'done' OR NEW.status = 'done')
+AND (OLD.status IS NOT NEW.status OR OLD.completed_at IS NOT NEW.completed_at
+     OR OLD.actual_duration_minutes IS NOT NEW.actual_duration_minutes
+     OR OLD.assignee_id IS NOT NEW.assignee_id OR OLD.project_id IS NOT NEW.project_id)
+BEGIN
+    UPDATE daily_rollup SET
+        {_rollup_completion_delta('OLD', '-')}
+    WHERE OLD.status = 'done' AND OLD.completed_at IS NOT NULL AND {done_old[1]};
+    INSERT OR IGNORE INTO daily_rollup (day, project_id, agent_id)
+    SELECT {done_new[0]} WHERE NEW.status = 'done' AND NEW.completed_at IS NOT NULL;
+    UPDATE daily_rollup SET
+        {_rollup_completion_delta('NEW', '+')}
+    WHERE NEW.status = 'done' AND NEW.completed_at IS NOT NULL AND {done_new[1]};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_tasks_blocked AFTER UPDATE OF status ON tasks
+WHEN NEW.status = 'blocked' AND OLD.status IS NOT 'blocked'
+BEGIN
+    INSERT OR IGNORE INTO daily_rollup (day, project_id, agent_id) VALUES ({today_new[0]});
+    UPDATE daily_rollup SET blocked = blocked + 1 WHERE {today_new[1]};
+END;
+
+-- Reassigned or released: counted against the agent that lost the task
+CREATE TRIGGER IF NOT EXISTS trg_rollup_tasks_reassigned AFTER UPDATE OF assignee_id ON tasks
+WHEN COALESCE(OLD.assignee_id, '') != '' AND OLD.assignee_id IS NOT NEW.assignee_id
+BEGIN
+    INSERT OR IGNORE INTO daily_rollup (day, project_id, agent_id) VALUES ({today_old[0]});
+    UPDATE daily_rollup SET reassigned = reassigned + 1 WHERE {today_old[1]};
+END;
+'''
+
+
+DAILY_ROLLUP_SCHEMA = _daily_rollup_schema()
+
+
+# Duration sketches: log-spaced buckets with 2% relative accuracy (DDSketch
+# style). Bucket i holds durations in (GAMMA^(i-1), GAMMA^i] minutes, bucket 0
+# everything up to 1 minute and bucket -1 zero / negative durations. Counts
+# add up across keys and months, so any merge is a SUM(count) GROUP BY bucket.
+DURATION_SKETCH_ACCURACY = 0.02
+DURATION_SKETCH_GAMMA = (1 + DURATION_SKETCH_ACCURACY) / (1 - DURATION_SKETCH_ACCURACY)
+DURATION_SKETCH_MAX_MINUTES = 525600  # one year; longer durations share the last bucket
+DURATION_SKETCH_LAST_BUCKET = math.ceil(math.log(DURATION_SKETCH_MAX_MINUTES, DURATION_SKETCH_GAMMA))
+DURATION_SKETCH_DIMENSIONS = ('agent', 'project', 'priority', 'all')
+
+
+def duration_sketch_bounds() -> List[Tuple[float, int]]:
+    """(upper bound in minutes, bucket) rows of duration_sketch_buckets"""
+    return [(0.0, -1)] + [(DURATION_SKETCH_GAMMA ** i, i)
+                          for i in range(DURATION_SKETCH_LAST_BUCKET + 1)]
+
+
+def _sketch_bucket(value: str) -> str:
+    """Bucket of a duration expression, a PK lookup (no ln(): not every sqlite3 build has it)"""
+    return (f"COALESCE((SELECT bucket FROM duration_sketch_buckets WHERE upper >= {value} "
+            f"ORDER BY upper LIMIT 1), {DURATION_SKETCH_LAST_BUCKET})")
+
+
+def _sketch_keys(row: str) -> str:
+    """VALUES list of (dimension, key) a task row counts under"""
+    return (f"VALUES ('agent', COALESCE({row}.assignee_id, '')), "
+            f"('project', COALESCE({row}.project_id, '')), "
+            f"('priority', COALESCE({row}.priority, '')), ('all', '')")
+
+
+def _sketch_counted(row: str) -> str:
+    return (f"{row}.status = 'done' AND {row}.completed_at IS NOT NULL "
+            f"AND {row}.actual_duration_minutes IS NOT NULL")
+
+
+def _sketch_add(row: str) -> str:
+    return f'''INSERT INTO duration_sketches (dimension, key, month, bucket, count)
+    SELECT column1, column2, strftime('%Y-%m', {row}.completed_at),
+           {_sketch_bucket(f"{row}.actual_duration_minutes")}, 1
+    FROM ({_sketch_keys(row)})
+    WHERE {_sketch_counted(row)}
+    ON CONFLICT (dimension, key, bucket, month) DO UPDATE SET count = count + 1;'''
+
+
+def _sketch_remove(row: str) -> str:
+    return f'''UPDATE duration_sketches SET count = count - 1
+    WHERE {_sketch_counted(row)}
+    AND (dimension, key) IN ({_sketch_keys(row)})
+    AND month = strftime('%Y-%m', {row}.completed_at)
+    AND bucket = {_sketch_bucket(f"{row}.actual_duration_minutes")};'''
+
+
+# Sketch counts recomputed from tasks (backfill / verify), one row per
+# (dimension, key, month, bucket) for every done task with a duration
+DURATION_SKETCHES_RECOMPUTE = f'''
+SELECT dimension, key, strftime('%Y-%m', completed_at) AS month,
+       {_sketch_bucket('actual_duration_minutes')} AS bucket, COUNT(*) AS count
+FROM (
+    SELECT 'agent' AS dimension, COALESCE(assignee_id, '') AS key, completed_at, actual_duration_minutes
+    FROM tasks WHERE {_sketch_counted('tasks')}
+    UNION ALL
+    SELECT 'project', COALESCE(project_id, ''), completed_at, actual_duration_minutes
+    FROM tasks WHERE {_sketch_counted('tasks')}
+    UNION ALL
+    SELECT 'priority', COALESCE(priority, ''), completed_at, actual_duration_minutes
+    FROM tasks WHERE {_sketch_counted('tasks')}
+    UNION ALL
+    SELECT 'all', '', completed_at, actual_duration_minutes
+    FROM tasks WHERE {_sketch_counted('tasks')}
+)
+GROUP BY 1, 2, 3, 4
+'''
+
+DURATION_SKETCH_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS duration_sketch_buckets (
+    upper REAL PRIMARY KEY,    -- minutes, inclusive
+    bucket INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS duration_sketches (
+    dimension TEXT NOT NULL,   -- agent | project | priority | all
+    key TEXT NOT NULL,         -- agent / project id, priority, '' for all
+    month TEXT NOT NULL,       -- strftime('%Y-%m', completed_at), UTC
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, key, bucket, month)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_sketch_tasks_insert AFTER INSERT ON tasks
+WHEN {_sketch_counted('NEW')}
+BEGIN
+    {_sketch_add('NEW')}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sketch_tasks_delete AFTER DELETE ON tasks
+WHEN {_sketch_counted('OLD')}
+BEGIN
+    {_sketch_remove('OLD')}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sketch_tasks_update
+AFTER UPDATE OF status, completed_at, actual_duration_minutes, assignee_id, project_id, priority ON tasks
+WHEN (({_sketch_counted('OLD')}) OR ({_sketch_counted('NEW')}))
+AND (OLD.status IS NOT NEW.status OR OLD.completed_at IS NOT NEW.completed_at
+     OR OLD.actual_duration_minutes IS NOT NEW.actual_duration_minutes
+     OR OLD.assignee_id IS NOT NEW.assignee_id OR OLD.project_id IS NOT NEW.project_id
+     OR OLD.priority IS NOT NEW.priority)
+BEGIN
+    {_sketch_remove('OLD')}
+    {_sketch_add('NEW')}
+END;
+
+-- recalculate_durations only visits done tasks still missing a duration
+CREATE INDEX IF NOT EXISTS idx_tasks_missing_duration
+    ON tasks(status)
+    WHERE actual_duration_minutes IS NULL AND completed_at IS NOT NULL AND started_at IS NOT NULL;
+'''
+
+
+def _duration_sketches(conn: sqlite3.Connection):
+    statements = list(_split_statements(DURATION_SKETCH_SCHEMA))
+    for statement in statements[:2]:
+        conn.execute(statement)
+    conn.executemany('INSERT OR REPLACE INTO duration_sketch_buckets (upper, bucket) VALUES (?, ?)',
+                     duration_sketch_bounds())
+    conn.execute(f'''
+        INSERT OR REPLACE INTO duration_sketches (dimension, key, month, bucket, count)
+        {DURATION_SKETCHES_RECOMPUTE}
+    ''')
+    for statement in statements[2:]:
+        conn.execute(statement)
+
+
+# Full-text search. tasks and agent_context have TEXT keys, so their implicit
+# rowids may change on VACUUM; search_docs hands out stable docids instead and
+# the FTS5 tables index the content views through them (external content, the
+# text itself is stored once, in tasks / agent_context).
+TASK_SEARCH_COLUMNS = ('title', 'description', 'notes', 'acceptance_criteria')
+
+
+def _fts_sync(table: str, kind: str, row: str, key: str, columns: Sequence[str], delete: bool) -> str:
+    """Add (or with delete, remove) one row's text in an external-content FTS5 table"""
+    values = ', '.join(f"{row}.{c}" for c in columns)
+    if delete:
+        return f'''INSERT INTO {table} ({table}, rowid, {', '.join(columns)})
+    SELECT 'delete', docid, {values} FROM search_docs WHERE kind = '{kind}' AND ref = {row}.{key};'''
+    return f'''INSERT INTO {table} (rowid, {', '.join(columns)})
+    SELECT docid, {values} FROM search_docs WHERE kind = '{kind}' AND ref = {row}.{key};'''
+
+
+def _search_index_schema(table: str, kind: str, source: str, key: str, columns: Sequence[str]) -> str:
+    changed = ' OR '.join(f"OLD.{c} IS NOT NEW.{c}" for c in (key,) + tuple(columns))
+    return f'''
+CREATE VIEW IF NOT EXISTS {table}_content AS
+SELECT d.docid, {', '.join(f"s.{c}" for c in columns)}
+FROM search_docs d JOIN {source} s ON s.{key} = d.ref
+WHERE d.kind = '{kind}';
+
+CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+    {', '.join(columns)},
+    content = '{table}_content', content_rowid = 'docid',
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+
+INSERT OR IGNORE INTO search_docs (kind, ref) SELECT '{kind}', {key} FROM {source};
+
+INSERT INTO {table} ({table}) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_insert AFTER INSERT ON {source}
+BEGIN
+    INSERT OR IGNORE INTO search_docs (kind, ref) VALUES ('{kind}', NEW.{key});
+    {_fts_sync(table, kind, 'NEW', key, columns, delete=False)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_delete AFTER DELETE ON {source}
+BEGIN
+    {_fts_sync(table, kind, 'OLD', key, columns, delete=True)}
+    DELETE FROM search_docs WHERE kind = '{kind}' AND ref = OLD.{key};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+AFTER UPDATE OF {key}, {', '.join(columns)} ON {source}
+WHEN {changed}
+BEGIN
+    {_fts_sync(table, kind, 'OLD', key, columns, delete=True)}
+    UPDATE search_docs SET ref = NEW.{key} WHERE kind = '{kind}' AND ref = OLD.{key};
+    {_fts_sync(table, kind, 'NEW', key, columns, delete=False)}
+END;
+'''
+
+
+SEARCH_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS search_docs (
+    docid INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,        -- task | learning
+    ref TEXT NOT NULL,         -- tasks.id / agent_context.agent_id
+    UNIQUE (kind, ref)
+);
+''' + _search_index_schema('tasks_fts', 'task', 'tasks', 'id', TASK_SEARCH_COLUMNS) \
+    + _search_index_schema('learnings_fts', 'learning', 'agent_context', 'agent_id', ('learnings',))
+
+
+def normalize_learning(text: str) -> str:
+    """One learning as stored: list marker and surrounding / repeated whitespace removed"""
+    text = ' '.join(text.split())
+    return text[2:] if text.startswith(('- ', '* ')) else text
+
+
+def learning_hash(text: str) -> str:
+    """Dedupe key of a learning, case and whitespace insensitive (never change: stored)"""
+    return hashlib.sha1(normalize_learning(text).casefold().encode('utf-8')).hexdigest()
+
+
+# Learnings as rows instead of a text blob per agent: appends are one INSERT
+# OR IGNORE, UNIQUE (agent_id, content_hash) drops repeats. agent_learnings has
+# an INTEGER PRIMARY KEY, so learnings_fts indexes it directly.
+AGENT_LEARNINGS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS agent_learnings (
+    id INTEGER PRIMARY KEY,
+    agent_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    source_task_id TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (agent_id, content_hash)
+);
+
+-- newest first per agent (rowid order)
+CREATE INDEX IF NOT EXISTS idx_agent_learnings_agent ON agent_learnings(agent_id);
+
+CREATE INDEX IF NOT EXISTS idx_agent_learnings_task
+    ON agent_learnings(source_task_id) WHERE source_task_id IS NOT NULL;
+
+DROP TRIGGER IF EXISTS trg_learnings_fts_insert;
+DROP TRIGGER IF EXISTS trg_learnings_fts_delete;
+DROP TRIGGER IF EXISTS trg_learnings_fts_update;
+DROP TABLE IF EXISTS learnings_fts;
+DROP VIEW IF EXISTS learnings_fts_content;
+DELETE FROM search_docs WHERE kind = 'learning';
+
+CREATE VIRTUAL TABLE IF NOT EXISTS learnings_fts USING fts5(
+    content,
+    content = 'agent_learnings', content_rowid = 'id',
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_learnings_fts_insert AFTER INSERT ON agent_learnings
+BEGIN
+    INSERT INTO learnings_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_learnings_fts_delete AFTER DELETE ON agent_learnings
+BEGIN
+    INSERT INTO learnings_fts (learnings_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_learnings_fts_update AFTER UPDATE OF content ON agent_learnings
+BEGIN
+    INSERT INTO learnings_fts (learnings_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    INSERT INTO learnings_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+'''
+
+
+def _agent_learnings(conn: sqlite3.Connection):
+    for statement in _split_statements(AGENT_LEARNINGS_SCHEMA):
+        conn.execute(statement)
+    # Split the old blobs into rows. Maintenance prepended its entries, so
+    # lines are inserted bottom-up and the top line ends up newest. The
+    # blob column stays as it was but nothing reads or writes it any more.
+    rows = []
+    for agent_id, blob, updated in conn.execute(
+            "SELECT agent_id, learnings, last_updated FROM agent_context WHERE learnings IS NOT NULL"):
+        for line in reversed(blob.splitlines()):
+            content = normalize_learning(line)
+            if content:
+                rows.append((agent_id, content, learning_hash(content), updated))
+    conn.executemany('''
+        INSERT OR IGNORE INTO agent_learnings (agent_id, content, content_hash, created_at)
+        VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+    ''', rows)
+
+
+# Change feed: one row per task / agent / history change, seq only ever grows
+# (AUTOINCREMENT, so pruning never lets a seq be handed out again). Agent rows
+# are logged only for status, assignment and health changes, not heartbeats.
+def _change_row(entity: str, op: str, row: str, key: str, fields: Sequence[str]) -> str:
+    data = ', '.join(f"'{f}', {row}.{f}" for f in fields)
+    return f'''INSERT INTO changes (entity, entity_id, op, data)
+    VALUES ('{entity}', {row}.{key}, '{op}', json_object({data}));'''
+
+
+CHANGE_TASK_FIELDS = ('status', 'assignee_id', 'progress')
+CHANGE_AGENT_FIELDS = ('status', 'current_task_id', 'health_status')
+
+CHANGES_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,          -- task | agent | history
+    entity_id TEXT NOT NULL,       -- tasks.id / agents.id / task_history.task_id
+    op TEXT NOT NULL,              -- insert | update | delete
+    data TEXT,                     -- JSON: the fields consumers usually need
+    at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_tasks_insert AFTER INSERT ON tasks
+BEGIN
+    {_change_row('task', 'insert', 'NEW', 'id', CHANGE_TASK_FIELDS)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_tasks_update AFTER UPDATE ON tasks
+BEGIN
+    {_change_row('task', 'update', 'NEW', 'id', CHANGE_TASK_FIELDS)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_tasks_delete AFTER DELETE ON tasks
+BEGIN
+    {_change_row('task', 'delete', 'OLD', 'id', CHANGE_TASK_FIELDS)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_agents_insert AFTER INSERT ON agents
+BEGIN
+    {_change_row('agent', 'insert', 'NEW', 'id', CHANGE_AGENT_FIELDS)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_agents_update
+AFTER UPDATE OF {', '.join(('id', 'name', 'role') + CHANGE_AGENT_FIELDS)} ON agents
+WHEN {' OR '.join(f"OLD.{c} IS NOT NEW.{c}" for c in ('id', 'name', 'role') + CHANGE_AGENT_FIELDS)}
+BEGIN
+    {_change_row('agent', 'update', 'NEW', 'id', CHANGE_AGENT_FIELDS)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_agents_delete AFTER DELETE ON agents
+BEGIN
+    {_change_row('agent', 'delete', 'OLD', 'id', CHANGE_AGENT_FIELDS)}
+END;
+
+-- Archiving old history deletes rows but changes nothing, so only inserts count
+CREATE TRIGGER IF NOT EXISTS trg_changes_history_insert AFTER INSERT ON task_history
+BEGIN
+    {_change_row('history', 'insert', 'NEW', 'task_id', ('id', 'agent_id', 'action', 'new_status'))}
+END;
+'''
+
+
+# Term counts of each agent context for TF-IDF relevance (context_index.py).
+# agent_context_index records the last_updated they were built from; the
+# triggers drop them as soon as the context changes, since last_updated only
+# has one-second resolution.
+AGENT_CONTEXT_INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS agent_context_index (
+    agent_id TEXT PRIMARY KEY,
+    last_updated DATETIME,
+    terms INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS agent_context_terms (
+    agent_id TEXT NOT NULL,
+    term TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (agent_id, term)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_agent_context_index_update AFTER UPDATE OF context ON agent_context
+WHEN OLD.context IS NOT NEW.context
+BEGIN
+    DELETE FROM agent_context_index WHERE agent_id = OLD.agent_id;
+    DELETE FROM agent_context_terms WHERE agent_id = OLD.agent_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_agent_context_index_delete AFTER DELETE ON agent_context
+BEGIN
+    DELETE FROM agent_context_index WHERE agent_id = OLD.agent_id;
+    DELETE FROM agent_context_terms WHERE agent_id = OLD.agent_id;
+END;
+'''
+
+
+# Keyword -> role rules for auto-assign, the ones that used to be hard-coded
+# there. They only seed migration 13: runs read role_match_rules, so rules
+# are added or removed in the table (auto_assign.py --add-rule), not here.
+ROLE_MATCH_DEFAULTS = {
+    'dev': ['dev', 'solo-dev'],
+    'frontend': ['dev', 'ux-designer'],
+    'backend': ['dev', 'architect'],
+    'database': ['architect', 'dev'],
+    'api': ['dev', 'architect'],
+    'ui': ['ux-designer'],
+    'ux': ['ux-designer'],
+    'test': ['qa'],
+    'qa': ['qa'],
+    'doc': ['tech-writer'],
+    'document': ['tech-writer'],
+    'design': ['ux-designer'],
+    'plan': ['pm', 'analyst'],
+    'analyze': ['analyst'],
+    'review': ['qa'],
+}
+
+ROLE_MATCH_RULES_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS role_match_rules (
+    keyword TEXT NOT NULL,     -- matched as a whole word, plurals and -ed/-ing/-er forms included
+    role TEXT NOT NULL,        -- agents.role or agents.id
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (keyword, role)
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO role_match_rules (keyword, role) VALUES
+''' + ',\n'.join(f"    ('{keyword}', '{role}')"
+                  for keyword, roles in ROLE_MATCH_DEFAULTS.items() for role in roles) + ';\n'
+
+
+# Shortest and longest duration per daily_rollup row, so percentiles
+# interpolated inside the coarse buckets stay within real values. Adding a
+# task only widens the range; removing one of the extremes recomputes it from
+# that day's done tasks (a range on idx_tasks_completed_at).
+def _duration_range_recompute(aggregate: str) -> str:
+    # +status keeps the planner on the completed_at range, not every done task
+    return f'''(SELECT {aggregate}(actual_duration_minutes) FROM tasks
+        WHERE +status = 'done' AND completed_at >= daily_rollup.day
+        AND completed_at < DATE(daily_rollup.day, '+1 day')
+        AND DATE(completed_at) = daily_rollup.day
+        AND COALESCE(project_id, '') = daily_rollup.project_id
+        AND COALESCE(assignee_id, '') = daily_rollup.agent_id)'''
+
+
+DURATION_RANGE_RECOMPUTE = (f"duration_min = {_duration_range_recompute('MIN')},\n"
+                            f"    duration_max = {_duration_range_recompute('MAX')}")
+
+
+def _duration_range_schema() -> str:
+    done_new = _rollup_key('DATE(NEW.completed_at)', 'NEW')
+    done_old = _rollup_key('DATE(OLD.completed_at)', 'OLD')
+    counted = ("{row}.status = 'done' AND {row}.completed_at IS NOT NULL "
+               "AND {row}.actual_duration_minutes IS NOT NULL")
+    counted_new, counted_old = counted.format(row='NEW'), counted.format(row='OLD')
+    duration = 'NEW.actual_duration_minutes'
+    widen = (f"UPDATE daily_rollup SET duration_min = MIN(COALESCE(duration_min, {duration}), {duration}),\n"
+             f"        duration_max = MAX(COALESCE(duration_max, {duration}), {duration})")
+    # Only rows that lose their shortest or longest task need the recompute
+    extreme_old = ("(duration_min >= OLD.actual_duration_minutes "
+                   "OR duration_max <= OLD.actual_duration_minutes)")
+    return f'''
+UPDATE daily_rollup SET {DURATION_RANGE_RECOMPUTE}
+WHERE duration_count > 0;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_range_insert AFTER INSERT ON tasks
+WHEN {counted_new}
+BEGIN
+    INSERT OR IGNORE INTO daily_rollup (day, project_id, agent_id) VALUES ({done_new[0]});
+    {widen}
+    WHERE {done_new[1]};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_range_delete AFTER DELETE ON tasks
+WHEN {counted_old}
+BEGIN
+    UPDATE daily_rollup SET {DURATION_RANGE_RECOMPUTE}
+    WHERE {done_old[1]} AND {extreme_old};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_range_update
+AFTER UPDATE OF status, completed_at, actual_duration_minutes, assignee_id, project_id ON tasks
+WHEN (({counted_old}) OR ({counted_new}))
+AND (OLD.status IS NOT NEW.status OR OLD.completed_at IS NOT NEW.completed_at
+     OR OLD.actual_duration_minutes IS NOT NEW.actual_duration_minutes
+     OR OLD.assignee_id IS NOT NEW.assignee_id OR OLD.project_id IS NOT NEW.project_id)
+BEGIN
+    UPDATE daily_rollup SET {DURATION_RANGE_RECOMPUTE}
+    WHERE {counted_old} AND {done_old[1]} AND {extreme_old};
+    INSERT OR IGNORE INTO daily_rollup (day, project_id, agent_id)
+    SELECT {done_new[0]} WHERE {counted_new};
+    {widen}
+    WHERE {counted_new} AND {done_new[1]};
+END;
+'''
+
+
+def _duration_range(conn: sqlite3.Connection):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(daily_rollup)')}
+    for column in ('duration_min', 'duration_max'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE daily_rollup ADD COLUMN {column} INTEGER')
+    for statement in _split_statements(_duration_range_schema()):
+        conn.execute(statement)
+
+
+# Heartbeats written before update-heartbeat.sh switched to UTC hold Bangkok
+# local time (UTC+7, no DST), which sorts ahead of every real UTC beat and
+# stops the heartbeat collector from ever replacing them. Only values still
+# in the future are certainly local; older ones cannot be told apart and are
+# left alone. datetime() also rewrites 'T' separators and UTC offsets into
+# the CURRENT_TIMESTAMP format, so text comparisons hold.
+HEARTBEAT_UTC_SCHEMA = '''
+UPDATE agents SET last_heartbeat = datetime(last_heartbeat, '-7 hours')
+WHERE datetime(last_heartbeat) > datetime('now', '+1 minute');
+
+UPDATE agents SET last_heartbeat = datetime(last_heartbeat)
+WHERE datetime(last_heartbeat) IS NOT NULL AND datetime(last_heartbeat) IS NOT last_heartbeat;
+'''
+
+
+# avg_progress as AVG(progress) WHERE status != 'cancelled' computed it before
+# the counters: tasks with a NULL status or progress are not counted, and no
+# such tasks means NULL. Migration 4 counted both as 0 and showed 0.0 when
+# empty; this redefines progress_sum / progress_count and rebuilds the task
+# triggers and the view around them.
+def _progress_counted(row: str) -> str:
+    return f"CASE WHEN {row}.status != 'cancelled' AND {row}.progress IS NOT NULL THEN 1 ELSE 0 END"
+
+
+def _progress_added(row: str) -> str:
+    return f"CASE WHEN {row}.status != 'cancelled' THEN COALESCE({row}.progress, 0) ELSE 0 END"
+
+
+DASHBOARD_PROGRESS_SCHEMA = f'''
+UPDATE dashboard_counters SET (progress_sum, progress_count) = (
+    SELECT COALESCE(SUM(progress), 0), COUNT(progress) FROM tasks WHERE status != 'cancelled'
+) WHERE id = 1;
+
+DROP TRIGGER IF EXISTS trg_counters_tasks_insert;
+CREATE TRIGGER trg_counters_tasks_insert AFTER INSERT ON tasks
+BEGIN
+    UPDATE dashboard_counters SET
+        total_tasks = total_tasks + 1,
+        todo_tasks = todo_tasks + (NEW.status IS 'todo'),
+        in_progress_tasks = in_progress_tasks + (NEW.status IS 'in_progress'),
+        completed_tasks = completed_tasks + (NEW.status IS 'done'),
+        blocked_tasks = blocked_tasks + (NEW.status IS 'blocked'),
+        progress_sum = progress_sum + {_progress_added('NEW')},
+        progress_count = progress_count + {_progress_counted('NEW')}
+    WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS trg_counters_tasks_delete;
+CREATE TRIGGER trg_counters_tasks_delete AFTER DELETE ON tasks
+BEGIN
+    UPDATE dashboard_counters SET
+        total_tasks = total_tasks - 1,
+        todo_tasks = todo_tasks - (OLD.status IS 'todo'),
+        in_progress_tasks = in_progress_tasks - (OLD.status IS 'in_progress'),
+        completed_tasks = completed_tasks - (OLD.status IS 'done'),
+        blocked_tasks = blocked_tasks - (OLD.status IS 'blocked'),
+        progress_sum = progress_sum - {_progress_added('OLD')},
+        progress_count = progress_count - {_progress_counted('OLD')}
+    WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS trg_counters_tasks_update;
+CREATE TRIGGER trg_counters_tasks_update AFTER UPDATE OF status, progress ON tasks
+WHEN OLD.status IS NOT NEW.status OR OLD.progress IS NOT NEW.progress
+BEGIN
+    UPDATE dashboard_counters SET
+        todo_tasks = todo_tasks - (OLD.status IS 'todo') + (NEW.status IS 'todo'),
+        in_progress_tasks = in_progress_tasks - (OLD.status IS 'in_progress') + (NEW.status IS 'in_progress'),
+        completed_tasks = completed_tasks - (OLD.status IS 'done') + (NEW.status IS 'done'),
+        blocked_tasks = blocked_tasks - (OLD.status IS 'blocked') + (NEW.status IS 'blocked'),
+        progress_sum = progress_sum - {_progress_added('OLD')} + {_progress_added('NEW')},
+        progress_count = progress_count - {_progress_counted('OLD')} + {_progress_counted('NEW')}
+    WHERE id = 1;
+END;
+
+DROP VIEW IF EXISTS v_dashboard_stats;
+CREATE VIEW v_dashboard_stats AS
+SELECT
+    c.total_agents,
+    c.active_agents,
+    c.idle_agents,
+    c.blocked_agents,
+    c.total_projects,
+    c.active_projects,
+    c.total_tasks,
+    c.todo_tasks,
+    c.in_progress_tasks,
+    c.completed_tasks,
+    c.blocked_tasks,
+    ROUND(c.progress_sum * 1.0 / NULLIF(c.progress_count, 0), 1) AS avg_progress,
+    (SELECT COALESCE(SUM(open_tasks), 0) FROM dashboard_due_counters
+     WHERE day = DATE('now')) AS due_today,
+    (SELECT COALESCE(SUM(open_tasks), 0) FROM dashboard_due_counters
+     WHERE day < DATE('now')) AS overdue_tasks
+FROM dashboard_counters c
+WHERE c.id = 1;
+'''
+
+
+# role_match_rules took any keyword written to it directly. One the matcher
+# cannot use (upper case, accents, punctuation) either never matched or, for
+# non-ASCII text, broke every assignment snapshot. The table is rebuilt with
+# the check add_rule makes: keywords are trimmed and lowercased, and the ones
+# still not words of a-z0-9 separated by single spaces are dropped.
+def _role_keyword_check(column: str) -> str:
+    return (f"{column} GLOB '[a-z0-9]*' AND {column} NOT GLOB '*[^a-z0-9 ]*' "
+            f"AND {column} NOT GLOB '*  *' AND {column} NOT GLOB '* '")
+
+
+def _role_keyword_constraint(conn: sqlite3.Connection):
+    conn.execute(f'''
+        CREATE TABLE role_match_rules_checked (
+            -- matched as a whole word, plurals and -ed/-ing/-er forms included
+            keyword TEXT NOT NULL CHECK ({_role_keyword_check('keyword')}),
+            role TEXT NOT NULL,        -- agents.role or agents.id
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (keyword, role)
+        ) WITHOUT ROWID
+    ''')
+    normalized = 'lower(trim(keyword))'
+    for keyword, role in conn.execute(f'''
+        SELECT keyword, role FROM role_match_rules WHERE NOT ({_role_keyword_check(normalized)})
+    '''):
+        print(f"⚠️ Dropped role rule {keyword!r} -> {role!r}: keywords are lowercase letters and digits")
+    # Keywords that only differed in case or spaces merge into one rule
+    conn.execute(f'''
+        INSERT OR IGNORE INTO role_match_rules_checked (keyword, role, created_at)
+        SELECT {normalized}, role, created_at FROM role_match_rules
+        WHERE {_role_keyword_check(normalized)}
+    ''')
+    conn.execute('DROP TABLE role_match_rules')
+    conn.execute('ALTER TABLE role_match_rules_checked RENAME TO role_match_rules')
+
+
+# (version, description, script or callable(conn)) - append only, never edit a released entry
+MIGRATIONS: List[Tuple[int, str, Union[str, Callable[[sqlite3.Connection], None]]]] = [
+    (1, 'notification outbox', OUTBOX_SCHEMA),
+    (2, 'task id sequences', TASK_SEQUENCE_SCHEMA),
+    (3, 'hot query index pack', _index_pack),
+    (4, 'trigger-maintained dashboard counters', DASHBOARD_COUNTERS_SCHEMA),
+    (5, 'task list keyset indexes', TASK_LIST_INDEX_SCHEMA),
+    (6, 'task dependency ready queue', _dependency_queue),
+    (7, 'daily report rollup', DAILY_ROLLUP_SCHEMA),
+    (8, 'duration quantile sketches', _duration_sketches),
+    (9, 'full-text search', SEARCH_SCHEMA),
+    (10, 'append-only agent learnings', _agent_learnings),
+    (11, 'change feed', CHANGES_SCHEMA),
+    (12, 'agent context term index', AGENT_CONTEXT_INDEX_SCHEMA),
+    (13, 'role match rules', ROLE_MATCH_RULES_SCHEMA),
+    (14, 'rollup duration range', _duration_range),
+    (15, 'heartbeat times in UTC', HEARTBEAT_UTC_SCHEMA),
+    (16, 'dashboard progress as AVG', DASHBOARD_PROGRESS_SCHEMA),
+    (17, 'role keyword check', _role_keyword_constraint),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _split_statements(script: str) -> Iterator[str]:
+    """Split a DDL script into complete statements (trigger bodies stay intact)"""
+    buffer = ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            buffer = ''
+            if statement and statement != ';':
+                yield statement
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version recorded in the database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations, returns number of migrations applied"""
+    if get_version(conn) >= LATEST_VERSION:
+        return 0
+
+    if conn.in_transaction:
+        conn.commit()
+
+    # Re-check under the write lock so concurrent processes apply each step once
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = get_version(conn)
+        applied = 0
+        for version, _description, script in MIGRATIONS:
+            if version <= current:
+                continue
+            if callable(script):
+                script(conn)
+            else:
+                for statement in _split_statements(script):
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            applied += 1
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main():
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description='AI Team Schema Migrations')
+    parser.add_argument('--db', default=str(Path(__file__).parent / "team.db"), help='Database path')
+    parser.add_argument('--status', action='store_true', help='Show schema version only')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.status:
+            print(f"Schema version: {get_version(conn)} (latest: {LATEST_VERSION})")
+            return
+        applied = migrate(conn)
+        print(f"✅ Applied {applied} migrations (schema version {get_version(conn)})")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+AI Team Notification Outbox
+Queue Telegram notifications inside DB transactions and deliver them in the background
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from storage import connect
+
+os.environ['TZ'] = 'Asia/Bangkok'
+
+DB_PATH = Path(__file__).parent / "team.db"
+TELEGRAM_CHANNEL = "1268858185"
+
+# Dispatcher tuning
+BATCH_SIZE = 50            # Max outbox rows claimed per round
+MAX_MESSAGE_CHARS = 3500   # Telegram limit is 4096, keep headroom for joins
+MAX_ATTEMPTS = 8           # After this many failures a message is marked dead
+BACKOFF_BASE = 5           # Seconds, doubled per attempt
+BACKOFF_MAX = 900          # Never wait more than 15 minutes between retries
+POLL_INTERVAL = 2          # Seconds between empty polls
+IDLE_EXIT = 60             # Auto-started dispatchers exit after this much idle time
+
+
+def send_telegram_notification(message: str, target: str = TELEGRAM_CHANNEL) -> bool:
+    """Send notification to Telegram channel using OpenClaw message tool"""
+    try:
+        result = subprocess.run(
+            ["openclaw", "message", "send", "--channel", "telegram",
+             "--target", target, "--message", message],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        return result.returncode == 0
+    except Exception as e:
+        print(f"[Notification Error] Failed to send Telegram message: {e}")
+        return False
+
+
+def enqueue_notification(cursor: sqlite3.Cursor, message: str,
+                         target: str = TELEGRAM_CHANNEL, channel: str = 'telegram') -> int:
+    """Queue a notification in the caller's transaction (no commit, no I/O)"""
+    cursor.execute('''
+        INSERT INTO outbox (channel, target, message)
+        VALUES (?, ?, ?)
+    ''', (channel, target, message))
+    return cursor.lastrowid
+
+
+def _lock_path(db_path: Path) -> Path:
+    return Path(str(db_path) + '.outbox.lock')
+
+
+def _try_lock(db_path: Path):
+    """Take the single-dispatcher lock, returns the open file or None if held"""
+    import fcntl
+    handle = open(_lock_path(db_path), 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return handle
+    except OSError:
+        handle.close()
+        return None
+
+
+def start_dispatcher(db_path: Path = DB_PATH) -> bool:
+    """Start a detached dispatcher unless one is already running for this DB"""
+    try:
+        handle = _try_lock(db_path)
+        if handle is None:
+            return False
+        handle.close()
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), '--daemon',
+             '--idle-exit', str(IDLE_EXIT), '--db', str(db_path)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        return True
+    except Exception as e:
+        print(f"[Outbox] Failed to start dispatcher: {e}")
+        return False
+
+
+class OutboxDispatcher:
+    def __init__(self, db_path: Path = DB_PATH,
+                 sender: Callable[[str, str], bool] = send_telegram_notification,
+                 batch_size: int = BATCH_SIZE):
+        self.db_path = db_path
+        self.sender = sender
+        self.batch_size = batch_size
+        self.conn = connect(db_path)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _due_messages(self) -> List[Dict]:
+        """Get pending messages whose retry time has come, oldest first"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT id, channel, target, message, attempts
+            FROM outbox
+            WHERE status = 'pending' AND next_attempt_at <= datetime('now')
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        ''', (self.batch_size,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _build_batches(messages: List[Dict]) -> List[Dict]:
+        """Group messages per target and join them into as few sends as fit"""
+        batches = []
+        open_batch = {}
+        for msg in messages:
+            key = (msg['channel'], msg['target'])
+            batch = open_batch.get(key)
+            text = msg['message']
+            if batch and len(batch['text']) + 1 + len(text) <= MAX_MESSAGE_CHARS:
+                batch['text'] += "\n" + text
+                batch['ids'].append(msg['id'])
+            else:
+                batch = {'channel': msg['channel'], 'target': msg['target'],
+                         'text': text, 'ids': [msg['id']]}
+                open_batch[key] = batch
+                batches.append(batch)
+        return batches
+
+    def _mark_sent(self, ids: List[int]):
+        placeholders = ','.join('?' * len(ids))
+        self.conn.execute(f'''
+            UPDATE outbox
+            SET status = 'sent', sent_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+            WHERE id IN ({placeholders})
+        ''', ids)
+        self.conn.commit()
+
+    def _mark_failed(self, ids: List[int], error: str):
+        """Schedule a retry with exponential backoff, or give up after MAX_ATTEMPTS"""
+        placeholders = ','.join('?' * len(ids))
+        self.conn.execute(f'''
+            UPDATE outbox
+            SET attempts = attempts + 1,
+                last_error = ?,
+                status = CASE WHEN attempts + 1 >= ? THEN 'dead' ELSE 'pending' END,
+                next_attempt_at = datetime('now',
+                    '+' || MIN(? * (1 << attempts), ?) || ' seconds')
+            WHERE id IN ({placeholders})
+        ''', [error, MAX_ATTEMPTS, BACKOFF_BASE, BACKOFF_MAX] + ids)
+        self.conn.commit()
+
+    def dispatch_once(self) -> Dict:
+        """Deliver one round of due messages, returns delivery counts"""
+        messages = self._due_messages()
+        sent = failed = 0
+        batches = self._build_batches(messages)
+
+        for batch in batches:
+            try:
+                ok = self.sender(batch['text'], batch['target'])
+                error = 'sender returned failure'
+            except Exception as e:
+                ok = False
+                error = str(e)
+
+            if ok:
+                self._mark_sent(batch['ids'])
+                sent += len(batch['ids'])
+            else:
+                self._mark_failed(batch['ids'], error)
+                failed += len(batch['ids'])
+
+        return {'messages': len(messages), 'batches': len(batches),
+                'sent': sent, 'failed': failed}
+
+    def run(self, poll_interval: float = POLL_INTERVAL, idle_exit: float = None):
+        """Drain the outbox until stopped (or idle for idle_exit seconds)"""
+        idle_since = time.monotonic()
+        while True:
+            result = self.dispatch_once()
+            if result['messages']:
+                idle_since = time.monotonic()
+                if result['messages'] >= self.batch_size:
+                    continue
+            elif idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                return
+            time.sleep(poll_interval)
+
+    def get_status(self) -> Dict:
+        """Get outbox counts by status"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status')
+        counts = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.execute('''
+            SELECT MIN(created_at) FROM outbox WHERE status = 'pending'
+        ''')
+        oldest = cursor.fetchone()[0]
+        return {
+            'pending': counts.get('pending', 0),
+            'sent': counts.get('sent', 0),
+            'dead': counts.get('dead', 0),
+            'oldest_pending': oldest
+        }
+
+    def purge_sent(self, days: int = 7) -> int:
+        """Delete delivered messages older than N days"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            DELETE FROM outbox
+            WHERE status = 'sent' AND sent_at < datetime('now', ?)
+        ''', (f'-{int(days)} days',))
+        self.conn.commit()
+        return cursor.rowcount
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AI Team Notification Outbox')
+    parser.add_argument('--db', default=str(DB_PATH), help='Database path')
+    parser.add_argument('--once', action='store_true', help='Deliver due messages once and exit')
+    parser.add_argument('--daemon', action='store_true', help='Keep draining the outbox')
+    parser.add_argument('--idle-exit', type=float, help='Exit daemon after N idle seconds')
+    parser.add_argument('--status', action='store_true', help='Show outbox status')
+    parser.add_argument('--purge', type=int, metavar='DAYS', help='Delete sent messages older than DAYS')
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+
+    if args.daemon:
+        lock = _try_lock(db_path)
+        if lock is None:
+            print("⚠️ Dispatcher already running")
+            return
+        try:
+            with OutboxDispatcher(db_path) as dispatcher:
+                dispatcher.run(idle_exit=args.idle_exit)
+        finally:
+            lock.close()
+        return
+
+    with OutboxDispatcher(db_path) as dispatcher:
+        if args.once:
+            result = dispatcher.dispatch_once()
+            print(f"📤 Sent {result['sent']} messages in {result['batches']} batches, {result['failed']} failed")
+        elif args.purge is not None:
+            purged = dispatcher.purge_sent(args.purge)
+            print(f"🧹 Purged {purged} sent messages")
+        else:
+            status = dispatcher.get_status()
+            print(f"\n📬 Outbox Status ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}):\n")
+            print(f"  - Pending: {status['pending']}")
+            print(f"  - Sent: {status['sent']}")
+            print(f"  - Dead: {status['dead']}")
+            if status['oldest_pending']:
+                print(f"  - Oldest pending: {status['oldest_pending']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+AI Team Role Match Rules
+Keyword -> role rules for auto-assign, compiled into one matcher
+
+role_match_rules (migration 13) holds the rules. KeywordMatcher compiles
+every keyword's forms into one lookup table, so one pass over a task's
+words finds all of them. Keywords match whole words only ("ui" is not found
+in "build"), plus their plural and -ed/-ing/-er/-ation forms.
+"""
+
+import re
+import sqlite3
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+# Endings a keyword may carry and still count; a final e is dropped before
+# them (analyze -> analyzing) and a final consonant may double (plan -> planned)
+INFLECTIONS = ('s', 'es', 'ed', 'ing', 'er', 'ers', 'ation', 'ations')
+# Words are runs of a-z0-9 in the lowercased text. bytes.translate turns every
+# other byte into a space (non-ASCII characters encode to '?' first), which
+# splits a text about 2.5x faster than re.findall(r'[a-z0-9]+')
+_WORD_BYTES = bytes(c if chr(c) in 'abcdefghijklmnopqrstuvwxyz0123456789' else 32 for c in range(256))
+# What a keyword must be once lowercased; role_match_rules checks the same (migration 17)
+KEYWORD_RE = re.compile(r'[a-z0-9]+( [a-z0-9]+)*')
+
+
+def load_rules(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """{keyword: [roles]} from role_match_rules"""
+    rules: Dict[str, List[str]] = {}
+    for keyword, role in conn.execute('SELECT keyword, role FROM role_match_rules ORDER BY keyword, role'):
+        rules.setdefault(keyword, []).append(role)
+    return rules
+
+
+def add_rule(cursor: sqlite3.Cursor, keyword: str, role: str) -> bool:
+    """Let tasks naming keyword go to agents of role, False if known; the caller commits"""
+    keyword = keyword.strip().lower()
+    if not KEYWORD_RE.fullmatch(keyword):
+        raise ValueError(f"Keyword {keyword!r} must be words of letters and digits, separated by single spaces")
+    cursor.execute('INSERT OR IGNORE INTO role_match_rules (keyword, role) VALUES (?, ?)', (keyword, role))
+    return cursor.rowcount > 0
+
+
+def remove_rule(cursor: sqlite3.Cursor, keyword: str, role: str) -> bool:
+    """Drop one rule; the caller commits"""
+    cursor.execute('DELETE FROM role_match_rules WHERE keyword = ? AND role = ?', (keyword.strip().lower(), role))
+    return cursor.rowcount > 0
+
+
+def keyword_forms(keyword: str) -> Set[str]:
+    """keyword and its inflected forms; in a phrase only the last word is inflected"""
+    head, _, last = keyword.rpartition(' ')
+    prefix = head + ' ' if head else ''
+    stem, endings = last, INFLECTIONS
+    if last.endswith('e'):
+        stem, endings = last[:-1], ('e',) + tuple(e for e in INFLECTIONS if e != 's')
+    forms = {keyword} | {prefix + stem + ending for ending in endings}
+    if last[-1] not in 'aeiouwxy' and last[-1].isalpha():
+        forms |= {prefix + stem + last[-1] + ending for ending in endings if ending[0] in 'aeiou'}
+    return forms
+
+
+class KeywordMatcher:
+    """Every rule keyword found in a text with one tokenizing pass
+
+    All inflected forms of all keywords go into one table, so a text is
+    split into words once and the words are looked up in it (a set
+    intersection), however many rules there are. Phrases are looked up as
+    runs of up to as many words as the longest phrase has. Keywords match
+    in lowercase but are returned as given; ones that are not words of
+    letters and digits are skipped with a warning.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = []
+        self._forms: Dict[bytes, Tuple[str, ...]] = {}
+        for keyword in sorted(set(keywords)):
+            lowered = keyword.strip().lower()
+            if not KEYWORD_RE.fullmatch(lowered):
+                print(f"⚠️ Skipping role keyword {keyword!r}: not words of letters and digits")
+                continue
+            self.keywords.append(keyword)
+            for form in keyword_forms(lowered):
+                form = form.encode('ascii')
+                self._forms[form] = self._forms.get(form, ()) + (keyword,)
+        self._phrase_length = max((len(keyword.split()) for keyword in self.keywords), default=1)
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Keywords present in text"""
+        words = (text or '').lower().encode('ascii', 'replace').translate(_WORD_BYTES).split()
+        candidates = set(words)
+        for n in range(2, self._phrase_length + 1):
+            candidates.update(b' '.join(words[i:i + n]) for i in range(len(words) - n + 1))
+        found = self._forms.keys() & candidates
+        if len(found) == 1:
+            return frozenset(self._forms[found.pop()])
+        return frozenset(keyword for form in found for keyword in self._forms[form])
+
+
+@lru_cache(maxsize=8)
+def compile_rules(rules: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> KeywordMatcher:
+    """Matcher for a rule set, compiled once per distinct set"""
+    return KeywordMatcher(keyword for keyword, _ in rules)
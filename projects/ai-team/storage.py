@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+AI Team Storage Layer
+Shared SQLite connection setup (WAL + tuned pragmas)
+"""
+
+import sqlite3
+from pathlib import Path
+
+from migrations import migrate
+from tracing import TracedConnection, attach, tracing_enabled
+
+DB_PATH = Path(__file__).parent / "team.db"
+
+# Wait this long for a competing writer instead of failing with "database is locked"
+BUSY_TIMEOUT_MS = 10000
+
+# Per-connection pragmas (journal_mode=WAL is persistent and set separately)
+PRAGMAS = {
+    'busy_timeout': BUSY_TIMEOUT_MS,
+    'synchronous': 'NORMAL',     # Safe with WAL, avoids an fsync per commit
+    'cache_size': -16000,        # 16 MB page cache
+    'mmap_size': 134217728,      # 128 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+
+
+def _apply_pragmas(conn: sqlite3.Connection):
+    for name, value in PRAGMAS.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def enable_wal(conn: sqlite3.Connection) -> str:
+    """Switch the database to WAL mode (no-op when already enabled)"""
+    mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    if mode.lower() != 'wal':
+        mode = conn.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+    return mode
+
+
+def database_path(conn: sqlite3.Connection) -> Path:
+    """File behind the connection's main database"""
+    return Path(next(row[2] for row in conn.execute('PRAGMA database_list') if row[1] == 'main'))
+
+
+def connect(db_path: Path = DB_PATH, readonly: bool = False,
+            apply_migrations: bool = True, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a tuned connection to team.db
+
+    Read-write connections enable WAL and apply pending schema migrations.
+    Read-only connections open the file with mode=ro and never take write locks.
+    With AI_TEAM_TRACE=1 every statement is timed (see tracing.py).
+    """
+    timeout = BUSY_TIMEOUT_MS / 1000
+    traced = tracing_enabled()
+    factory = TracedConnection if traced else sqlite3.Connection
+    if readonly:
+        uri = f"file:{Path(db_path).resolve()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=timeout,
+                               check_same_thread=check_same_thread, factory=factory)
+    else:
+        conn = sqlite3.connect(str(db_path), timeout=timeout,
+                               check_same_thread=check_same_thread, factory=factory)
+    if traced:
+        attach(conn, db_path)
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
+
+    if not readonly:
+        enable_wal(conn)
+        if apply_migrations:
+            migrate(conn)
+    return conn
+
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+AI Team Task Dependencies
+Dependency edges with cycle detection, the ready queue and critical paths
+
+The ready queue itself lives in SQLite: tasks.open_dependencies counts
+unfinished prerequisites and triggers (migration 6) keep it current as
+tasks finish, so every process sees the same queue without rebuilding it.
+TaskGraph loads the open part of the DAG into memory for critical paths.
+"""
+
+import sqlite3
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from migrations import FINISHED_STATUSES, PRIORITY_RANK_SQL
+
+_FINISHED = ', '.join(f"'{s}'" for s in FINISHED_STATUSES)
+
+# Unassigned todo tasks with every prerequisite finished, served by idx_tasks_ready
+READY_TASKS_QUERY = f'''
+    SELECT id, title, description, priority, project_id,
+           prerequisites, acceptance_criteria, expected_outcome
+    FROM tasks
+    WHERE status = 'todo' AND open_dependencies = 0
+    AND (assignee_id IS NULL OR assignee_id = '')
+    ORDER BY {PRIORITY_RANK_SQL}, created_at
+'''
+
+
+def add_dependency(cursor: sqlite3.Cursor, task_id: str, depends_on: str) -> bool:
+    """Make task_id wait for depends_on, the caller commits
+
+    Returns False if the edge already exists. Raises ValueError for unknown
+    tasks or an edge that would close a cycle; the check and the insert are
+    one statement, so two concurrent adds cannot build a cycle between them.
+    """
+    cursor.execute('SELECT id FROM tasks WHERE id IN (?, ?)', (task_id, depends_on))
+    missing = {task_id, depends_on} - {row[0] for row in cursor.fetchall()}
+    if missing:
+        raise ValueError(f"Task {sorted(missing)[0]} not found")
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_task_id)
+        SELECT ?, ?
+        WHERE NOT EXISTS (
+            WITH RECURSIVE upstream(id) AS (
+                SELECT ?
+                UNION
+                SELECT d.depends_on_task_id
+                FROM task_dependencies d JOIN upstream u ON d.task_id = u.id
+            )
+            SELECT 1 FROM upstream WHERE id = ?
+        )
+    ''', (task_id, depends_on, depends_on, task_id))
+    if cursor.rowcount:
+        return True
+
+    cursor.execute('''
+        SELECT 1 FROM task_dependencies WHERE task_id = ? AND depends_on_task_id = ?
+    ''', (task_id, depends_on))
+    if cursor.fetchone():
+        return False
+    if task_id == depends_on:
+        raise ValueError(f"Task {task_id} cannot depend on itself")
+    raise ValueError(f"{depends_on} already depends on {task_id}, adding this would create a cycle")
+
+
+def remove_dependency(cursor: sqlite3.Cursor, task_id: str, depends_on: str) -> bool:
+    """Drop an edge, the caller commits"""
+    cursor.execute('''
+        DELETE FROM task_dependencies WHERE task_id = ? AND depends_on_task_id = ?
+    ''', (task_id, depends_on))
+    return cursor.rowcount > 0
+
+
+class TaskGraph:
+    """Open (unfinished) tasks and the dependency edges between them"""
+
+    def __init__(self, hours: Dict[str, float], projects: Dict[str, Optional[str]],
+                 edges: Iterable[Tuple[str, str]]):
+        self.hours = hours
+        self.projects = projects
+        self.depends_on: Dict[str, List[str]] = defaultdict(list)
+        self.dependents: Dict[str, List[str]] = defaultdict(list)
+        for task_id, prerequisite in edges:
+            # Finished prerequisites no longer constrain anything
+            if task_id in hours and prerequisite in hours:
+                self.depends_on[task_id].append(prerequisite)
+                self.dependents[prerequisite].append(task_id)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, project_id: str = None) -> 'TaskGraph':
+        """Read open tasks (optionally of one project) and their edges"""
+        query = f'''
+            SELECT id, project_id, estimated_hours FROM tasks
+            WHERE status NOT IN ({_FINISHED})
+        '''
+        params = []
+        if project_id:
+            query += ' AND project_id = ?'
+            params.append(project_id)
+        hours, projects = {}, {}
+        for task_id, project, estimate in conn.execute(query, params):
+            hours[task_id] = estimate or 0
+            projects[task_id] = project
+        edges = conn.execute(f'''
+            SELECT d.task_id, d.depends_on_task_id
+            FROM task_dependencies d JOIN tasks t ON t.id = d.task_id
+            WHERE t.status NOT IN ({_FINISHED})
+        ''')
+        return cls(hours, projects, edges)
+
+    def critical_paths(self) -> Dict[Optional[str], Dict]:
+        """Longest open dependency chain per project
+
+        Chains are weighted by estimated hours, then by task count (tasks
+        without an estimate add 0 hours). Returns {project_id: {tasks, hours, path}}.
+        """
+        # Kahn's order over the open DAG, edges across projects are ignored
+        pending = {t: sum(1 for p in self.depends_on[t] if self.projects[p] == self.projects[t])
+                   for t in self.hours}
+        queue = deque(t for t, n in pending.items() if n == 0)
+        best: Dict[str, Tuple[float, int]] = {}
+        previous: Dict[str, Optional[str]] = {}
+        while queue:
+            task_id = queue.popleft()
+            base, via = (0, 0), None
+            for prerequisite in self.depends_on[task_id]:
+                if self.projects[prerequisite] == self.projects[task_id] and best[prerequisite] > base:
+                    base, via = best[prerequisite], prerequisite
+            best[task_id] = (base[0] + self.hours[task_id], base[1] + 1)
+            previous[task_id] = via
+            for dependent in self.dependents[task_id]:
+                if self.projects[dependent] == self.projects[task_id]:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        queue.append(dependent)
+
+        ends: Dict[Optional[str], str] = {}
+        for task_id, score in best.items():
+            project = self.projects[task_id]
+            if project not in ends or score > best[ends[project]]:
+                ends[project] = task_id
+
+        result = {}
+        for project, end in ends.items():
+            path = []
+            node = end
+            while node is not None:
+                path.append(node)
+                node = previous[node]
+            hours, count = best[end]
+            result[project] = {'tasks': count, 'hours': round(hours, 1), 'path': path[::-1]}
+        return result
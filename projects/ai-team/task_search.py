@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+AI Team Full-Text Search
+BM25-ranked search over task text and agent learnings
+
+tasks_fts indexes title, description, notes and acceptance criteria
+(migration 9), learnings_fts the agent_learnings rows (migration 10);
+triggers keep both in sync. The text lives only in the source tables, the
+FTS5 tables hold the index.
+"""
+
+import re
+import sqlite3
+from typing import Dict, List
+
+# Title hits count most, then acceptance criteria, description and notes
+TASK_WEIGHTS = {'title': 10.0, 'description': 3.0, 'notes': 1.0, 'acceptance_criteria': 2.0}
+HIGHLIGHT = ('[', ']')
+SNIPPET_TOKENS = 12
+
+_TERM = re.compile(r'"[^"]*"\*?|\S+')
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, "quoted phrases"
+    stay phrases and a trailing * keeps prefix search (login* matches logins)"""
+    terms = []
+    for term in _TERM.findall(text):
+        prefix = term.endswith('*')
+        term = term.rstrip('*').strip('"')
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def search_tasks(conn: sqlite3.Connection, text: str, project_id: str = None, status: str = None,
+                 since: str = None, until: str = None, limit: int = 20, raw: bool = False) -> List[Dict]:
+    """Tasks matching text, best first, with a highlighted title and snippet
+
+    since / until (YYYY-MM-DD) filter on created_at, until is inclusive.
+    raw passes text to FTS5 unchanged (AND / OR / NOT, column:term ...).
+    """
+    query = fts_query(text) if not raw else text
+    if not query:
+        return []
+    weights = ', '.join(str(w) for w in TASK_WEIGHTS.values())
+    sql = f'''
+        SELECT tasks_fts.rowid AS docid, t.id, t.title, t.status, t.priority, t.project_id,
+               t.assignee_id, t.created_at, bm25(tasks_fts, {weights}) AS score
+        FROM tasks_fts
+        JOIN search_docs d ON d.docid = tasks_fts.rowid
+        JOIN tasks t ON t.id = d.ref
+        WHERE tasks_fts MATCH ?
+    '''
+    params = [query]
+    if project_id:
+        sql += ' AND t.project_id = ?'
+        params.append(project_id)
+    if status:
+        sql += ' AND t.status = ?'
+        params.append(status)
+    if since:
+        sql += ' AND t.created_at >= ?'
+        params.append(since)
+    if until:
+        sql += " AND t.created_at < date(?, '+1 day')"
+        params.append(until)
+    sql += ' ORDER BY score LIMIT ?'
+    params.append(limit)
+    rows = [dict(row) for row in conn.execute(sql, params)]
+    if not rows:
+        return rows
+
+    # Snippets cost more than ranking, build them for the returned rows only
+    open_, close = HIGHLIGHT
+    placeholders = ', '.join('?' * len(rows))
+    highlights = {row[0]: row[1:] for row in conn.execute(f'''
+        SELECT rowid, highlight(tasks_fts, 0, ?, ?),
+               snippet(tasks_fts, -1, ?, ?, '…', {SNIPPET_TOKENS})
+        FROM tasks_fts WHERE tasks_fts MATCH ? AND rowid IN ({placeholders})
+    ''', [open_, close, open_, close, query] + [row['docid'] for row in rows])}
+    for row in rows:
+        row['title_highlight'], row['snippet'] = highlights[row.pop('docid')]
+    return rows
+
+
+def search_learnings(conn: sqlite3.Connection, text: str, limit: int = 5, raw: bool = False) -> List[Dict]:
+    """Agent learnings matching text, best first, highlighted"""
+    query = fts_query(text) if not raw else text
+    if not query:
+        return []
+    open_, close = HIGHLIGHT
+    return [dict(row) for row in conn.execute('''
+        SELECT l.agent_id, l.source_task_id, l.created_at,
+               highlight(learnings_fts, 0, ?, ?) AS snippet, bm25(learnings_fts) AS score
+        FROM learnings_fts JOIN agent_learnings l ON l.id = learnings_fts.rowid
+        WHERE learnings_fts MATCH ?
+        ORDER BY score LIMIT ?
+    ''', (open_, close, query, limit))]
+
+
+def verify_search_index(conn: sqlite3.Connection, repair: bool = False) -> Dict:
+    """FTS5 integrity-check of both indexes against their source tables, repair rebuilds
+
+    The caller commits a repair.
+    """
+    broken = []
+    for table in ('tasks_fts', 'learnings_fts'):
+        try:
+            conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('integrity-check', 1)")
+        except sqlite3.DatabaseError:
+            broken.append(table)
+    missing = conn.execute('''
+        SELECT COUNT(*) FROM tasks WHERE id NOT IN (SELECT ref FROM search_docs WHERE kind = 'task')
+    ''').fetchone()[0]
+    if (broken or missing) and repair:
+        conn.execute("INSERT OR IGNORE INTO search_docs (kind, ref) SELECT 'task', id FROM tasks")
+        for table in ('tasks_fts', 'learnings_fts'):
+            conn.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+    return {'ok': not (broken or missing), 'broken': broken, 'missing': missing,
+            'repaired': bool((broken or missing) and repair)}
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Thin team_db client
+Sends the command line to a running `team_db.py serve` daemon over a Unix
+socket and prints its answer. When the daemon is not running the command
+runs in-process exactly like `python3 team_db.py ...`.
+
+Usage: python3 team_client.py task start T-20260202-001
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SOCKET_PATH = Path(__file__).parent / "team.sock"
+CONNECT_TIMEOUT = 0.5  # seconds; a live daemon accepts immediately
+# Seconds to wait for the answer once connected; a long `task import` fits,
+# a wedged daemon does not hold the caller forever
+RESPONSE_TIMEOUT = 300
+
+# Streaming commands would hold the daemon, which answers one request at a time
+LOCAL_COMMANDS = ('watch',)
+
+
+def write_message(sock: socket.socket, message: Dict):
+    """Send one JSON message and close our side of the stream"""
+    sock.sendall(json.dumps(message).encode('utf-8') + b"\n")
+    sock.shutdown(socket.SHUT_WR)
+
+
+def read_message(sock: socket.socket) -> Dict:
+    """Read one JSON message (the peer closes its side when done)"""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+
+def send_command(argv: List[str], socket_path: Path = SOCKET_PATH) -> Optional[Dict]:
+    """Run argv on the daemon, returns {exit, stdout, stderr}
+
+    None means the daemon did not run the command: it is not running, or
+    it was too busy to start on it and said so.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return None  # no socket, stale socket, no permission or timeout
+        # Commands such as `task import` may take a while once accepted
+        sock.settimeout(RESPONSE_TIMEOUT)
+        write_message(sock, {'argv': argv, 'cwd': os.getcwd()})
+        response = read_message(sock)
+        return None if response.get('busy') else response
+    finally:
+        sock.close()
+
+
+def main():
+    if sys.argv[1:2] and sys.argv[1] in LOCAL_COMMANDS:
+        response = None
+    else:
+        try:
+            response = send_command(sys.argv[1:])
+        except (OSError, ValueError) as e:
+            # The daemon accepted the command, so re-running it locally could apply it twice
+            print(f"❌ team_db daemon failed mid-request: {e}", file=sys.stderr)
+            sys.exit(1)
+    if response is None:
+        # Daemon is down or busy (or a local command): run in-process
+        sys.path.insert(0, str(Path(__file__).parent))
+        import team_db
+        team_db.main(sys.argv[1:])
+        return
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    sys.exit(response['exit'])
+
+
+if __name__ == '__main__':
+    main()
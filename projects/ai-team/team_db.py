@@ -5,17 +5,42 @@ Manage tasks, agents, and projects for the AI Team
 """
 
 import os
+import io
+import queue
 import sqlite3
+import csv
 import json
 import argparse
-import subprocess
+import signal
+import socket
 import sys
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable, Iterator, Sequence
 
 # Import health monitor
 from health_monitor import HealthMonitor
+from backup import KEEP_SNAPSHOTS, backup, list_snapshots, restore, snapshot, verify_backup
+from change_feed import CHANGE_ENTITIES, follow, latest_seq, read_changes
+from duration_sketch import duration_stats, verify_sketches
+from heartbeat_ingest import send_heartbeat
+from history_archive import list_archives, task_history
+from learnings import LearningsView, add_learning
+from storage import connect
+from migrations import (DAILY_ROLLUP_COMPLETIONS_RECOMPUTE, DAILY_ROLLUP_COMPLETION_COLUMNS,
+                        DASHBOARD_COUNTERS_RECOMPUTE, DASHBOARD_COUNTER_COLUMNS,
+                        DASHBOARD_DUE_COUNTERS_RECOMPUTE, DURATION_BUCKETS, DURATION_BUCKET_COLUMNS,
+                        DURATION_RANGE_RECOMPUTE)
+from notify_outbox import enqueue_notification, send_telegram_notification, start_dispatcher
+from task_graph import READY_TASKS_QUERY, TaskGraph, add_dependency, remove_dependency
+from task_search import search_learnings, search_tasks, verify_search_index
+from tracing import SORT_KEYS, get_tracer, query_profile, reset_profile, tracing_enabled
+from transitions import describe_failure, transition
+from team_client import SOCKET_PATH, read_message, write_message
 
 # Set timezone to Bangkok (+7)
 os.environ['TZ'] = 'Asia/Bangkok'
@@ -23,29 +48,93 @@ os.environ['TZ'] = 'Asia/Bangkok'
 DB_PATH = Path(__file__).parent / "team.db"
 TELEGRAM_CHANNEL = "1268858185"
 
-def send_telegram_notification(message: str) -> bool:
-    """Send notification to Telegram channel using OpenClaw message tool"""
-    try:
-        result = subprocess.run(
-            ["openclaw", "message", "send", "--channel", "telegram", 
-             "--target", TELEGRAM_CHANNEL, "--message", message],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.returncode == 0
-    except Exception as e:
-        print(f"[Notification Error] Failed to send Telegram message: {e}")
-        return False
+PRIORITIES = ('critical', 'high', 'normal', 'low')
+
+# Columns accepted by create_tasks_bulk / `task import` (same names as create_task)
+BULK_TASK_FIELDS = ('title', 'description', 'assignee_id', 'project_id', 'priority',
+                    'estimated_hours', 'due_date', 'prerequisites',
+                    'acceptance_criteria', 'expected_outcome')
+
+# Rows fetched per keyset page by iter_tasks / iter_agents
+PAGE_SIZE = 500
+
+# Daemon limits: seconds a client has to send its request, seconds a request
+# may wait for the writer before the client is told to run it itself, and
+# requests queued or running at once
+CLIENT_READ_TIMEOUT = 5
+QUEUE_WAIT = 2
+MAX_CLIENTS = 32
+
+# get_rollup grouping: --by value -> daily_rollup key column
+ROLLUP_GROUPS = {'day': 'day', 'project': 'project_id', 'agent': 'agent_id', 'total': "'total'"}
+ROLLUP_COLUMNS = DAILY_ROLLUP_COMPLETION_COLUMNS + ('blocked', 'reassigned')
+
+
+def duration_percentile(buckets: Sequence[int], fraction: float,
+                        shortest: float = None, longest: float = None) -> Optional[float]:
+    """Estimate a duration percentile (minutes) from daily_rollup histogram counts
+
+    Interpolates linearly inside the bucket holding the rank, narrowed to
+    the shortest / longest duration actually recorded when they are known;
+    without them the open-ended last bucket reports its lower bound.
+    """
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    lower = 0
+    for count, upper in zip(buckets, DURATION_BUCKETS + (None,)):
+        if count and seen + count >= rank:
+            break
+        seen += count
+        lower = upper
+    low = lower if shortest is None else max(lower, shortest)
+    high = upper if longest is None else (longest if upper is None else min(upper, longest))
+    if high is None:
+        return float(low)
+    high = max(high, low)
+    return round(low + (high - low) * (rank - seen) / count, 1)
+
+
+def iter_task_file(path: Path) -> Iterator[Dict]:
+    """Stream task dicts from a .jsonl or .csv file (one task per line/row)"""
+    path = Path(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.suffix.lower() == '.csv':
+            for row in csv.DictReader(f):
+                yield {k.strip(): (v if v != '' else None) for k, v in row.items() if k}
+        else:
+            for number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    task = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"Line {number}: invalid JSON ({e})") from None
+                if not isinstance(task, dict):
+                    raise ValueError(f"Line {number}: expected a JSON object, got {type(task).__name__}")
+                yield task
 
 class AITeamDB:
-    def __init__(self, db_path: Path = DB_PATH):
+    def __init__(self, db_path: Path = DB_PATH, spawn_dispatcher: bool = True):
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
-        self.conn.row_factory = sqlite3.Row
+        self.conn = connect(db_path)
+        self.spawn_dispatcher = spawn_dispatcher
+        self._view_columns: Dict[str, List[str]] = {}
+        self.learnings = LearningsView(self.conn)
         
     def close(self):
         self.conn.close()
+
+    def _commit_and_notify(self, message: str):
+        """Queue notification in the current transaction, commit, then wake the dispatcher"""
+        # Separate cursor keeps the caller's cursor.rowcount intact
+        enqueue_notification(self.conn.cursor(), message)
+        self.conn.commit()
+        if self.spawn_dispatcher:
+            start_dispatcher(self.db_path)
         
     def __enter__(self):
         return self
@@ -65,9 +154,10 @@ class AITeamDB:
         if not project_id:
             raise ValueError("project_id is required - every task must belong to a project")
         
-        task_id = f"T-{datetime.now().strftime('%Y%m%d')}-{self._get_next_task_number():03d}"
-        
         cursor = self.conn.cursor()
+        day, number = self._allocate_task_numbers(cursor)
+        task_id = f"T-{day}-{number:03d}"
+        
         cursor.execute('''
             INSERT INTO tasks (id, title, description, assignee_id, project_id,
                              priority, estimated_hours, due_date, status,
@@ -83,24 +173,102 @@ class AITeamDB:
             VALUES (?, 'created', ?)
         ''', (task_id, f"Task created with priority {priority}"))
         
-        self.conn.commit()
-        
-        # Send Telegram notification
+        # Send Telegram notification (delivered by the outbox dispatcher)
         assignee_str = assignee_id if assignee_id else "Unassigned"
         notification = f"🆕 Task {task_id}: {title} created (Assignee: {assignee_str})"
-        send_telegram_notification(notification)
+        self._commit_and_notify(notification)
         
         return task_id
     
+    def create_tasks_bulk(self, tasks: Iterable[Dict], chunk_size: int = 500) -> Dict:
+        """Create many tasks in one transaction
+        
+        Input is consumed in chunks so memory stays flat for huge imports.
+        Projects are validated once, IDs are reserved a chunk at a time and
+        one summary notification is queued. Any invalid row rolls back all.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id FROM projects')
+        project_ids = {row[0] for row in cursor.fetchall()}
+        
+        created = 0
+        first_id = last_id = None
+        iterator = iter(tasks)
+        
+        try:
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                
+                rows = []
+                for offset, task in enumerate(chunk, start=created + 1):
+                    if not isinstance(task, dict):
+                        raise ValueError(f"Row {offset}: expected a task object, got {type(task).__name__}")
+                    unknown = set(task) - set(BULK_TASK_FIELDS)
+                    if unknown:
+                        raise ValueError(f"Row {offset}: unknown fields {sorted(unknown)}")
+                    if not task.get('title'):
+                        raise ValueError(f"Row {offset}: title is required")
+                    if task.get('project_id') not in project_ids:
+                        raise ValueError(f"Row {offset}: unknown project_id {task.get('project_id')!r} "
+                                         "- every task must belong to a project")
+                    priority = task.get('priority') or 'normal'
+                    if priority not in PRIORITIES:
+                        raise ValueError(f"Row {offset}: invalid priority {priority!r}")
+                    rows.append((task['title'], task.get('description') or '',
+                                 task.get('assignee_id'), task['project_id'], priority,
+                                 task.get('estimated_hours'), task.get('due_date'),
+                                 task.get('prerequisites'), task.get('acceptance_criteria'),
+                                 task.get('expected_outcome')))
+                
+                day, first_number = self._allocate_task_numbers(cursor, len(rows))
+                ids = [f"T-{day}-{first_number + i:03d}" for i in range(len(rows))]
+                
+                cursor.executemany('''
+                    INSERT INTO tasks (id, title, description, assignee_id, project_id,
+                                     priority, estimated_hours, due_date, status,
+                                     prerequisites, acceptance_criteria, expected_outcome)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'todo', ?, ?, ?)
+                ''', [(task_id,) + row for task_id, row in zip(ids, rows)])
+                
+                cursor.executemany('''
+                    INSERT INTO task_history (task_id, action, notes)
+                    VALUES (?, 'created', ?)
+                ''', [(task_id, f"Task created with priority {row[4]} (bulk import)")
+                      for task_id, row in zip(ids, rows)])
+                
+                created += len(rows)
+                first_id = first_id or ids[0]
+                last_id = ids[-1]
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        if created:
+            # Send one summary notification instead of one per task
+            notification = f"🆕 Imported {created} tasks ({first_id} … {last_id})"
+            self._commit_and_notify(notification)
+        
+        return {'created': created, 'first_id': first_id, 'last_id': last_id}
+    
+    def _transition(self, cursor: sqlite3.Cursor, task_id: str, action: str, **kwargs) -> Optional[Dict]:
+        """Apply a guarded status change in the open transaction, None if it did not apply"""
+        result = transition(cursor, task_id, action, **kwargs)
+        if not result['ok']:
+            self.conn.rollback()
+            print(f"⚠️ {describe_failure(result)}")
+            return None
+        return result['task']
+
     def assign_task(self, task_id: str, agent_id: str) -> bool:
         """Assign task to an agent"""
         cursor = self.conn.cursor()
         
-        # Update task
-        cursor.execute('''
-            UPDATE tasks SET assignee_id = ?, status = 'todo', updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (agent_id, task_id))
+        task = self._transition(cursor, task_id, 'assign', agent_id=agent_id,
+                                notes=f"Assigned to {agent_id}")
+        if task is None:
+            return False
         
         # Update agent stats
         cursor.execute('''
@@ -110,82 +278,37 @@ class AITeamDB:
             WHERE id = ?
         ''', (task_id, agent_id))
         
-        # Log history
-        cursor.execute('''
-            INSERT INTO task_history (task_id, agent_id, action, notes)
-            VALUES (?, ?, 'assigned', ?)
-        ''', (task_id, agent_id, f"Assigned to {agent_id}"))
-        
         self.conn.commit()
-        return cursor.rowcount > 0
+        return True
     
     def start_task(self, task_id: str, agent_id: str = None) -> bool:
         """Start working on a task"""
         cursor = self.conn.cursor()
         
-        # Get task info before updating
-        cursor.execute('SELECT title, assignee_id FROM tasks WHERE id = ?', (task_id,))
-        row = cursor.fetchone()
-        if not row:
+        task = self._transition(cursor, task_id, 'start', agent_id=agent_id)
+        if task is None:
             return False
         
-        task_title = row[0]
-        assignee = agent_id or row[1] or "Unknown"
-        
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = 'in_progress', started_at = CURRENT_TIMESTAMP,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (task_id,))
-        
-        cursor.execute('''
-            INSERT INTO task_history (task_id, action, old_status, new_status)
-            SELECT id, 'started', 'todo', 'in_progress'
-            FROM tasks WHERE id = ?
-        ''', (task_id,))
+        assignee = agent_id or task['assignee_id'] or "Unknown"
         
-        self.conn.commit()
-        
-        # Send Telegram notification
+        # Send Telegram notification (delivered by the outbox dispatcher)
         notification = f"🚀 Task {task_id} started by {assignee}"
-        send_telegram_notification(notification)
+        self._commit_and_notify(notification)
         
-        return cursor.rowcount > 0
+        return True
     
     def send_to_review(self, task_id: str) -> bool:
         """Send task to review (in_progress -> review)"""
         cursor = self.conn.cursor()
         
-        # Get task info before updating
-        cursor.execute('SELECT title, status FROM tasks WHERE id = ?', (task_id,))
-        row = cursor.fetchone()
-        if not row:
+        if self._transition(cursor, task_id, 'review') is None:
             return False
         
-        old_status = row[1]
-        if old_status != 'in_progress':
-            print(f"⚠️ Task {task_id} must be in_progress to send to review")
-            return False
-        
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = 'review', updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (task_id,))
-        
-        cursor.execute('''
-            INSERT INTO task_history (task_id, action, old_status, new_status)
-            VALUES (?, 'updated', 'in_progress', 'review')
-        ''', (task_id,))
-        
-        self.conn.commit()
-        
-        # Send Telegram notification
+        # Send Telegram notification (delivered by the outbox dispatcher)
         notification = f"👀 Task {task_id} sent for review"
-        send_telegram_notification(notification)
+        self._commit_and_notify(notification)
         
-        return cursor.rowcount > 0
+        return True
     
     def update_progress(self, task_id: str, progress: int, notes: str = "") -> bool:
         """Update task progress (0-100)"""
@@ -214,190 +337,197 @@ class AITeamDB:
         """Mark task as completed"""
         cursor = self.conn.cursor()
         
-        # Get task info before updating
-        cursor.execute('SELECT title, started_at FROM tasks WHERE id = ?', (task_id,))
-        row = cursor.fetchone()
-        if not row:
+        task = self._transition(cursor, task_id, 'complete')
+        if task is None:
             return False
         
-        task_title = row[0]
-        
-        # Calculate actual duration if started_at exists
-        if row[1]:
-            # Calculate duration in minutes
-            cursor.execute('''
-                UPDATE tasks 
-                SET status = 'done', progress = 100, completed_at = CURRENT_TIMESTAMP,
-                    updated_at = CURRENT_TIMESTAMP,
-                    actual_duration_minutes = ROUND((strftime('%s', 'now') - strftime('%s', started_at)) / 60)
-                WHERE id = ?
-            ''', (task_id,))
-        else:
-            cursor.execute('''
-                UPDATE tasks 
-                SET status = 'done', progress = 100, completed_at = CURRENT_TIMESTAMP,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (task_id,))
-        
         # Update agent stats
         cursor.execute('''
             UPDATE agents 
             SET total_tasks_completed = total_tasks_completed + 1,
                 current_task_id = NULL, status = 'idle',
                 updated_at = CURRENT_TIMESTAMP
-            WHERE id = (SELECT assignee_id FROM tasks WHERE id = ?)
-        ''', (task_id,))
-        
-        cursor.execute('''
-            INSERT INTO task_history (task_id, action, old_status, new_status)
-            SELECT id, 'completed', status, 'done'
-            FROM tasks WHERE id = ?
-        ''', (task_id,))
-        
-        self.conn.commit()
+            WHERE id = ?
+        ''', (task['assignee_id'],))
         
-        # Send Telegram notification
+        # Send Telegram notification (delivered by the outbox dispatcher)
         notification = f"✅ Task {task_id} completed"
-        send_telegram_notification(notification)
+        self._commit_and_notify(notification)
         
-        return cursor.rowcount > 0
+        return True
     
     def block_task(self, task_id: str, reason: str) -> bool:
         """Block a task with reason"""
         cursor = self.conn.cursor()
         
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = 'blocked', blocked_reason = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (reason, task_id))
+        task = self._transition(cursor, task_id, 'block', reason=reason)
+        if task is None:
+            return False
         
         cursor.execute('''
             UPDATE agents 
             SET status = 'blocked', updated_at = CURRENT_TIMESTAMP
-            WHERE id = (SELECT assignee_id FROM tasks WHERE id = ?)
-        ''', (task_id,))
-        
-        cursor.execute('''
-            INSERT INTO task_history (task_id, action, notes)
-            VALUES (?, 'blocked', ?)
-        ''', (task_id, reason))
-        
-        self.conn.commit()
+            WHERE id = ?
+        ''', (task['assignee_id'],))
         
-        # Send Telegram notification
+        # Send Telegram notification (delivered by the outbox dispatcher)
         notification = f"🚫 Task {task_id} blocked: {reason}"
-        send_telegram_notification(notification)
+        self._commit_and_notify(notification)
         
-        return cursor.rowcount > 0
+        return True
     
     def unblock_task(self, task_id: str, agent_id: str = None) -> bool:
         """Unblock a task and resume (blocked -> in_progress)"""
         cursor = self.conn.cursor()
         
-        # Get task info before updating
-        cursor.execute('SELECT title, assignee_id, status FROM tasks WHERE id = ?', (task_id,))
-        row = cursor.fetchone()
-        if not row:
+        task = self._transition(cursor, task_id, 'unblock', agent_id=agent_id)
+        if task is None:
             return False
         
-        if row[2] != 'blocked':
-            print(f"⚠️ Task {task_id} is not blocked")
-            return False
-        
-        assignee = agent_id or row[1] or "Unknown"
-        
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = 'in_progress', updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (task_id,))
-        
         cursor.execute('''
             UPDATE agents 
             SET status = 'active', updated_at = CURRENT_TIMESTAMP
-            WHERE id = (SELECT assignee_id FROM tasks WHERE id = ?)
-        ''', (task_id,))
-        
-        cursor.execute('''
-            INSERT INTO task_history (task_id, action, old_status, new_status)
-            VALUES (?, 'unblocked', 'blocked', 'in_progress')
-        ''', (task_id,))
-        
-        self.conn.commit()
+            WHERE id = ?
+        ''', (task['assignee_id'],))
         
-        # Send Telegram notification
+        # Send Telegram notification (delivered by the outbox dispatcher)
         notification = f"🔄 Task {task_id} resumed"
-        send_telegram_notification(notification)
+        self._commit_and_notify(notification)
         
-        return cursor.rowcount > 0
+        return True
     
     def backlog_task(self, task_id: str, reason: str = "Waiting for requirements/resources") -> bool:
         """Move task to backlog (waiting for requirements/resources)"""
         cursor = self.conn.cursor()
         
-        # Get task info before updating
-        cursor.execute('SELECT title, status FROM tasks WHERE id = ?', (task_id,))
-        row = cursor.fetchone()
-        if not row:
+        if self._transition(cursor, task_id, 'backlog', reason=reason) is None:
             return False
         
-        old_status = row[1]
-        
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = 'backlog', blocked_reason = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (reason, task_id))
-        
-        cursor.execute('''
-            INSERT INTO task_history (task_id, action, old_status, new_status, notes)
-            VALUES (?, 'backlogged', ?, 'backlog', ?)
-        ''', (task_id, old_status, reason))
-        
-        self.conn.commit()
-        
-        # Send Telegram notification
+        # Send Telegram notification (delivered by the outbox dispatcher)
         notification = f"📋 Task {task_id} moved to backlog: {reason}"
-        send_telegram_notification(notification)
+        self._commit_and_notify(notification)
         
-        return cursor.rowcount > 0
+        return True
     
-    def get_tasks(self, status: str = None, assignee: str = None) -> List[Dict]:
-        """Get tasks with optional filters"""
-        cursor = self.conn.cursor()
-        
-        query = 'SELECT * FROM v_task_summary WHERE 1=1'
+    def get_tasks(self, status: str = None, assignee: str = None,
+                  columns: Sequence[str] = None, limit: int = None, after: str = None) -> List[Dict]:
+        """Get tasks with optional filters (see iter_tasks to stream large lists)"""
+        return list(self.iter_tasks(status, assignee, columns=columns, limit=limit, after=after))
+    
+    def iter_tasks(self, status: str = None, assignee: str = None, columns: Sequence[str] = None,
+                   limit: int = None, after: str = None, page_size: int = PAGE_SIZE) -> Iterator[Dict]:
+        """Stream tasks ordered by (due_date, priority, id), one keyset page at a time
+        
+        `columns` limits the v_task_summary columns returned, `after` is a task ID
+        to resume after. Each page is a separate short query, so memory stays at
+        one page and no read transaction is held while the caller works.
+        Bad columns or an unknown `after` raise ValueError right away.
+        """
+        fields = self._projection('v_task_summary', columns)
+        select = ', '.join(dict.fromkeys(list(fields) + ['due_date', 'priority', 'id']))
+        
+        query = f'SELECT {select} FROM v_task_summary WHERE 1=1'
         params = []
-        
         if status:
             query += ' AND status = ?'
             params.append(status)
         if assignee:
             query += ' AND assignee_id = ?'
             params.append(assignee)
-            
-        query += ' ORDER BY due_date, priority'
         
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        key = None
+        if after:
+            row = self.conn.execute(
+                'SELECT due_date, priority, id FROM tasks WHERE id = ?', (after,)
+            ).fetchone()
+            if not row:
+                raise ValueError(f"Task {after} not found")
+            key = tuple(row)
+        return self._task_pages(query, params, fields, key, limit, page_size)
+    
+    def _task_pages(self, query: str, params: List, fields: Sequence[str], key: Optional[tuple],
+                    limit: Optional[int], page_size: int) -> Iterator[Dict]:
+        """Yield rows page by page, resuming each page after the previous page's last key"""
+        past_nulls = False
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            if key is None:
+                keyset, key_params = (' AND due_date IS NOT NULL' if past_nulls else ''), []
+            elif key[0] is None:
+                # NULL due dates sort first and never compare greater in a row value
+                keyset, key_params = ' AND due_date IS NULL AND (priority, id) > (?, ?)', list(key[1:])
+            else:
+                keyset, key_params = ' AND (due_date, priority, id) > (?, ?, ?)', list(key)
+            
+            rows = self.conn.execute(
+                f'{query}{keyset} ORDER BY due_date, priority, id LIMIT ?',
+                params + key_params + [size]
+            ).fetchall()
+            for row in rows:
+                yield {name: row[name] for name in fields}
+            if remaining is not None:
+                remaining -= len(rows)
+            
+            if len(rows) == size:
+                last = rows[-1]
+                key = (last['due_date'], last['priority'], last['id'])
+            elif key is not None and key[0] is None:
+                # Ran out of undated tasks, continue with the dated ones
+                key, past_nulls = None, True
+            else:
+                return
+    
+    def _projection(self, view: str, columns: Optional[Sequence[str]]) -> Sequence[str]:
+        """Validate requested columns against the view (column names go into SQL)"""
+        if view not in self._view_columns:
+            cursor = self.conn.execute(f'SELECT * FROM {view} LIMIT 0')
+            self._view_columns[view] = [d[0] for d in cursor.description]
+        available = self._view_columns[view]
+        if not columns:
+            return available
+        unknown = [c for c in columns if c not in available]
+        if unknown:
+            raise ValueError(f"Unknown {view} column(s): {', '.join(unknown)}")
+        return list(columns)
     
     # ========== Agents ==========
     
-    def get_agents(self, status: str = None) -> List[Dict]:
+    def get_agents(self, status: str = None, columns: Sequence[str] = None,
+                   limit: int = None, after: str = None) -> List[Dict]:
         """Get all agents with their workload"""
-        cursor = self.conn.cursor()
+        return list(self.iter_agents(status, columns=columns, limit=limit, after=after))
+    
+    def iter_agents(self, status: str = None, columns: Sequence[str] = None, limit: int = None,
+                    after: str = None, page_size: int = PAGE_SIZE) -> Iterator[Dict]:
+        """Stream agents with their workload ordered by id, one keyset page at a time"""
+        fields = self._projection('v_agent_workload', columns)
+        select = ', '.join(dict.fromkeys(list(fields) + ['id']))
         
-        query = 'SELECT * FROM v_agent_workload WHERE 1=1'
+        query = f'SELECT {select} FROM v_agent_workload WHERE id > ?'
         params = []
-        
         if status:
             query += ' AND status = ?'
             params.append(status)
-            
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        
+        key = after or ''
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows = self.conn.execute(
+                f'{query} ORDER BY id LIMIT ?', [key] + params + [size]
+            ).fetchall()
+            for row in rows:
+                yield {name: row[name] for name in fields}
+            if len(rows) < size:
+                return
+            key = rows[-1]['id']
+            if remaining is not None:
+                remaining -= len(rows)
+    
+    def agent_exists(self, agent_id: str) -> bool:
+        """Whether an agent with this ID is registered"""
+        return self.conn.execute('SELECT 1 FROM agents WHERE id = ?', (agent_id,)).fetchone() is not None
     
     def update_agent_heartbeat(self, agent_id: str) -> bool:
         """Update agent heartbeat timestamp"""
@@ -436,41 +566,293 @@ class AITeamDB:
             }
         return {}
     
+    def verify_dashboard_counters(self, repair: bool = False) -> Dict:
+        """Recompute dashboard_counters from scratch and report drift per counter"""
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT {', '.join(DASHBOARD_COUNTER_COLUMNS)}
+            FROM dashboard_counters WHERE id = 1
+        ''')
+        stored = cursor.fetchone()
+        stored = dict(stored) if stored else {name: None for name in DASHBOARD_COUNTER_COLUMNS}
+        
+        cursor.execute(DASHBOARD_COUNTERS_RECOMPUTE)
+        actual = dict(cursor.fetchone())
+        
+        drift = {name: {'stored': stored[name], 'actual': actual[name]}
+                 for name in DASHBOARD_COUNTER_COLUMNS
+                 if stored[name] != actual[name]}
+        
+        # Per-day open task buckets behind due_today / overdue_tasks (empty buckets count as 0)
+        cursor.execute('SELECT day, open_tasks FROM dashboard_due_counters WHERE open_tasks != 0')
+        stored_due = {row['day']: row['open_tasks'] for row in cursor.fetchall()}
+        cursor.execute(DASHBOARD_DUE_COUNTERS_RECOMPUTE)
+        actual_due = {row['day']: row['open_tasks'] for row in cursor.fetchall()}
+        for day in sorted(set(stored_due) | set(actual_due)):
+            if stored_due.get(day, 0) != actual_due.get(day, 0):
+                drift[f"open_due:{day}"] = {'stored': stored_due.get(day, 0),
+                                            'actual': actual_due.get(day, 0)}
+        
+        if drift and repair:
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO dashboard_counters (id, {', '.join(DASHBOARD_COUNTER_COLUMNS)})
+                SELECT 1, * FROM ({DASHBOARD_COUNTERS_RECOMPUTE})
+            ''')
+            cursor.execute('DELETE FROM dashboard_due_counters')
+            cursor.execute(f'''
+                INSERT INTO dashboard_due_counters (day, open_tasks)
+                {DASHBOARD_DUE_COUNTERS_RECOMPUTE}
+            ''')
+            self.conn.commit()
+        
+        return {'ok': not drift, 'drift': drift, 'repaired': bool(drift and repair)}
+    
     def get_project_status(self) -> List[Dict]:
-        """Get all projects with status"""
+        """Get all projects with status and critical-path length of their open tasks"""
         cursor = self.conn.cursor()
         cursor.execute('SELECT * FROM v_project_status ORDER BY progress_pct DESC')
-        return [dict(row) for row in cursor.fetchall()]
+        projects = [dict(row) for row in cursor.fetchall()]
+        paths = TaskGraph.load(self.conn).critical_paths()
+        for project in projects:
+            path = paths.get(project['id'], {'tasks': 0, 'hours': 0, 'path': []})
+            project['critical_path_tasks'] = path['tasks']
+            project['critical_path_hours'] = path['hours']
+            project['critical_path'] = path['path']
+        return projects
+    
+    # ========== Dependencies ==========
+    
+    def add_dependency(self, task_id: str, depends_on: str) -> bool:
+        """Make a task wait for another (raises ValueError on unknown tasks or cycles)"""
+        cursor = self.conn.cursor()
+        try:
+            added = add_dependency(cursor, task_id, depends_on)
+        except ValueError:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return added
+    
+    def remove_dependency(self, task_id: str, depends_on: str) -> bool:
+        """Remove a dependency between two tasks"""
+        removed = remove_dependency(self.conn.cursor(), task_id, depends_on)
+        self.conn.commit()
+        return removed
+    
+    def get_dependencies(self, task_id: str) -> Dict[str, List[Dict]]:
+        """Prerequisites of a task and the tasks waiting for it"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT t.id, t.title, t.status FROM task_dependencies d
+            JOIN tasks t ON t.id = d.depends_on_task_id
+            WHERE d.task_id = ? ORDER BY t.id
+        ''', (task_id,))
+        depends_on = [dict(row) for row in cursor.fetchall()]
+        cursor.execute('''
+            SELECT t.id, t.title, t.status FROM task_dependencies d
+            JOIN tasks t ON t.id = d.task_id
+            WHERE d.depends_on_task_id = ? ORDER BY t.id
+        ''', (task_id,))
+        return {'depends_on': depends_on, 'dependents': [dict(row) for row in cursor.fetchall()]}
+    
+    def get_ready_tasks(self, limit: int = None) -> List[Dict]:
+        """Unassigned todo tasks whose prerequisites are all finished, in assignment order"""
+        query, params = READY_TASKS_QUERY, ()
+        if limit is not None:
+            query += ' LIMIT ?'
+            params = (limit,)
+        return [dict(row) for row in self.conn.execute(query, params)]
+    
+    def search(self, text: str, project_id: str = None, status: str = None, since: str = None,
+               until: str = None, limit: int = 20, raw: bool = False) -> Dict[str, List[Dict]]:
+        """Full-text search: BM25-ranked tasks (filtered) and matching agent learnings
+        
+        Raises ValueError for a query FTS5 cannot parse (only possible with raw).
+        """
+        try:
+            tasks = search_tasks(self.conn, text, project_id=project_id, status=status,
+                                 since=since, until=until, limit=limit, raw=raw)
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}") from e
+        # Learnings belong to agents, not projects, so task filters leave them out
+        learnings = []
+        if not (project_id or status or since or until):
+            try:
+                learnings = search_learnings(self.conn, text, raw=raw)
+            except sqlite3.OperationalError:
+                pass  # raw query naming task columns (title:...)
+        return {'tasks': tasks, 'learnings': learnings}
+    
+    def verify_search_index(self, repair: bool = False) -> Dict:
+        """Check the full-text indexes against tasks / agent_context, repair rebuilds them"""
+        result = verify_search_index(self.conn, repair)
+        if result['repaired']:
+            self.conn.commit()
+        return result
+    
+    def get_task_history(self, task_id: str = None, since: str = None, until: str = None,
+                         limit: int = None) -> List[Dict]:
+        """History of a task and/or date range, oldest first, including archived months
+        
+        Raises ValueError when neither a task nor a since date is given.
+        """
+        return task_history(self.conn, task_id=task_id, since=since, until=until, limit=limit)
+    
+    def get_history_archives(self) -> List[Dict]:
+        """Monthly history archive files: month, path, bytes, sealed"""
+        return list_archives(self.conn)
+    
+    # ========== Backups ==========
+    
+    def backup(self, dest: Path = None, keep: int = KEEP_SNAPSHOTS) -> Dict:
+        """Online backup to dest, or a rotated <db>.backup.<timestamp> snapshot when dest is None"""
+        if dest is None:
+            return snapshot(self.conn, keep=keep)
+        return backup(self.conn, Path(dest))
+    
+    def list_backups(self) -> List[Dict]:
+        """Snapshots next to the database, newest first"""
+        return list_snapshots(self.db_path)
+    
+    def restore_backup(self, source: Path) -> Dict:
+        """Verify a backup and copy it over the live database (current data snapshotted first)"""
+        return restore(self.conn, Path(source))
+    
+    # ========== Change Feed ==========
+    
+    def get_changes(self, since: int = 0, entities: Sequence[str] = None, limit: int = 500) -> List[Dict]:
+        """Task / agent / history change events after seq since, oldest first"""
+        return read_changes(self.conn, since, entities, limit)
+    
+    def watch(self, since: int = None, entities: Sequence[str] = None,
+              idle_timeout: float = None) -> Iterator[Dict]:
+        """Follow change events as they are committed (since None: from now on)"""
+        return follow(self.conn, latest_seq(self.conn) if since is None else since,
+                      entities, idle_timeout=idle_timeout)
     
     # ========== Reports ==========
     
+    def get_rollup(self, start: str, end: str = None, by: str = 'day') -> List[Dict]:
+        """Completions, durations, blocks and reassignments for days start..end (YYYY-MM-DD)
+
+        Reads daily_rollup only, grouped by day, project, agent or one total row.
+        """
+        if by not in ROLLUP_GROUPS:
+            raise ValueError(f"Unknown grouping {by!r} (use {', '.join(ROLLUP_GROUPS)})")
+        sums = ', '.join(f"COALESCE(SUM({c}), 0) AS {c}" for c in ROLLUP_COLUMNS)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT {ROLLUP_GROUPS[by]} AS key, {sums},
+                   MIN(duration_min) AS duration_min, MAX(duration_max) AS duration_max
+            FROM daily_rollup
+            WHERE day >= ? AND day <= ?
+            GROUP BY key ORDER BY key
+        ''', (start, end or start))
+        
+        rows = []
+        for row in cursor.fetchall():
+            row = dict(row)
+            buckets = [row.pop(c) for c in DURATION_BUCKET_COLUMNS]
+            row['avg_duration'] = (round(row['duration_total'] / row['duration_count'], 1)
+                                   if row['duration_count'] else None)
+            shortest, longest = row.pop('duration_min'), row.pop('duration_max')
+            row['p50_duration'] = duration_percentile(buckets, 0.5, shortest, longest)
+            row['p90_duration'] = duration_percentile(buckets, 0.9, shortest, longest)
+            rows.append(row)
+        return rows
+    
+    def verify_daily_rollup(self, repair: bool = False) -> Dict:
+        """Recompute the completion columns of daily_rollup from tasks and report drift"""
+        columns = DAILY_ROLLUP_COMPLETION_COLUMNS
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT day, project_id, agent_id, {', '.join(columns)} FROM daily_rollup
+            WHERE completed != 0 OR duration_count != 0
+        ''')
+        stored = {tuple(row[:3]): tuple(row[3:]) for row in cursor.fetchall()}
+        cursor.execute(DAILY_ROLLUP_COMPLETIONS_RECOMPUTE)
+        actual = {tuple(row[:3]): tuple(row[3:]) for row in cursor.fetchall()}
+        
+        empty = (0,) * len(columns)
+        drift = {}
+        for key in sorted(set(stored) | set(actual)):
+            if stored.get(key, empty) != actual.get(key, empty):
+                drift['/'.join(key)] = {'stored': dict(zip(columns, stored.get(key, empty))),
+                                        'actual': dict(zip(columns, actual.get(key, empty)))}
+        
+        if drift and repair:
+            cursor.execute(f"UPDATE daily_rollup SET {', '.join(f'{c} = 0' for c in columns)}")
+            cursor.execute(f'''
+                INSERT INTO daily_rollup (day, project_id, agent_id, {', '.join(columns)})
+                SELECT * FROM ({DAILY_ROLLUP_COMPLETIONS_RECOMPUTE}) WHERE 1
+                ON CONFLICT (day, project_id, agent_id) DO UPDATE SET
+                    {', '.join(f'{c} = excluded.{c}' for c in columns)}
+            ''')
+            cursor.execute(f'UPDATE daily_rollup SET {DURATION_RANGE_RECOMPUTE}')
+            self.conn.commit()
+        
+        return {'ok': not drift, 'drift': drift, 'repaired': bool(drift and repair)}
+    
+    def get_duration_stats(self, by: str = 'all', key: str = None, since: str = None) -> List[Dict]:
+        """Completion-duration count, p50/p90/p99 (minutes) and histogram per agent, project or priority
+
+        Reads duration_sketches only; since (YYYY-MM) drops earlier months.
+        """
+        return duration_stats(self.conn, by, key, since)
+    
+    def verify_duration_sketches(self, repair: bool = False) -> Dict:
+        """Recount duration_sketches from tasks and report drift"""
+        result = verify_sketches(self.conn, repair)
+        if result['repaired']:
+            self.conn.commit()
+        return result
+    
+    def get_query_profile(self, top: int = 20, sort: str = 'total') -> List[Dict]:
+        """Traced statement templates (AI_TEAM_TRACE=1 runs), most expensive first"""
+        if tracing_enabled():
+            get_tracer(self.db_path).flush()    # include this process's own statements
+        return query_profile(self.db_path, top, sort)
+    
+    def reset_query_profile(self) -> bool:
+        """Forget all traced statements"""
+        return reset_profile(self.db_path)
+    
     def generate_daily_report(self) -> str:
         """Generate daily report"""
         stats = self.get_dashboard_stats()
         tasks_done_today = self._get_tasks_completed_today()
+        today = datetime.now().strftime('%Y-%m-%d')
+        rollup = (self.get_rollup(today, by='total') or [{}])[0]
         
         report = f"""
-# AI Team Daily Report - {datetime.now().strftime('%Y-%m-%d')}
+# AI Team Daily Report - {today}
 
 ## 📊 Summary
 - Total Tasks: {stats.get('total_tasks', 0)}
-- Completed Today: {len(tasks_done_today)}
+- Completed Today: {rollup.get('completed', 0)}
 - In Progress: {stats.get('in_progress_tasks', 0)}
 - Blocked: {stats.get('blocked_tasks', 0)}
 - Active Agents: {stats.get('active_agents', 0)}
-
+"""
+        if rollup.get('p50_duration') is not None:
+            report += (f"- Task Duration: median {self.format_duration(round(rollup['p50_duration']))}, "
+                       f"p90 {self.format_duration(round(rollup['p90_duration']))}\n")
+        if rollup.get('blocked') or rollup.get('reassigned'):
+            report += f"- Blocks / Reassignments Today: {rollup['blocked']} / {rollup['reassigned']}\n"
+        report += """
 ## ✅ Tasks Completed Today
 """
         for task in tasks_done_today:
             report += f"- {task['id']}: {task['title']} (by {task['assignee']})\n"
         
         report += "\n## 🔄 In Progress\n"
-        in_progress = self.get_tasks(status='in_progress')
-        for task in in_progress[:5]:
+        in_progress = self.iter_tasks(status='in_progress', limit=5,
+                                      columns=('id', 'title', 'progress', 'assignee_name'))
+        for task in in_progress:
             report += f"- {task['id']}: {task['title']} ({task['progress']}%) - {task['assignee_name']}\n"
         
         report += "\n## 🚧 Blocked\n"
-        blocked = self.get_tasks(status='blocked')
+        blocked = self.iter_tasks(status='blocked', columns=('id', 'title', 'assignee_name'))
         for task in blocked:
             report += f"- {task['id']}: {task['title']} - {task['assignee_name']}\n"
         
@@ -517,27 +899,34 @@ class AITeamDB:
             'duration_formatted': self.format_duration(row[2])
         }
     
-    def _get_next_task_number(self) -> int:
-        """Get next task number for today"""
-        cursor = self.conn.cursor()
+    def _allocate_task_numbers(self, cursor: sqlite3.Cursor, count: int = 1) -> tuple:
+        """Reserve `count` task numbers for today, returns (YYYYMMDD, first number)
+        
+        Runs inside the caller's transaction: the upsert takes the write lock,
+        so concurrent creators can never receive the same number.
+        """
         today = datetime.now().strftime('%Y%m%d')
-        cursor.execute("""
-            SELECT COALESCE(MAX(CAST(SUBSTR(id, 12) AS INTEGER)), 0) FROM tasks 
-            WHERE id LIKE ?
-        """, (f'T-{today}-%',))
-        return cursor.fetchone()[0] + 1
+        cursor.execute('''
+            INSERT INTO task_sequences (day, last_number) VALUES (?, ?)
+            ON CONFLICT(day) DO UPDATE SET last_number = last_number + excluded.last_number
+            RETURNING last_number
+        ''', (today, count))
+        last_number = cursor.fetchone()[0]
+        return today, last_number - count + 1
     
     def _get_tasks_completed_today(self) -> List[Dict]:
         """Get tasks completed today"""
         cursor = self.conn.cursor()
         today = datetime.now().strftime('%Y-%m-%d')
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        # Range instead of DATE(completed_at) = ? so idx_tasks_completed_at is used
         cursor.execute('''
             SELECT t.id, t.title, a.name as assignee,
                    t.actual_duration_minutes
             FROM tasks t
             JOIN agents a ON t.assignee_id = a.id
-            WHERE DATE(t.completed_at) = ?
-        ''', (today,))
+            WHERE t.completed_at >= ? AND t.completed_at < ?
+        ''', (today, tomorrow))
         return [dict(row) for row in cursor.fetchall()]
     
     def recalculate_durations(self) -> int:
@@ -615,22 +1004,28 @@ class AITeamDB:
         }
 
     def get_agent_context(self, agent_id: str) -> dict:
-        """Get agent context from database"""
+        """Get agent context from database, learnings as the budgeted newest-first list"""
         cursor = self.conn.cursor()
         cursor.execute('''
-            SELECT context, learnings, preferences, last_updated
+            SELECT context, preferences, last_updated
             FROM agent_context WHERE agent_id = ?
         ''', (agent_id,))
         row = cursor.fetchone()
         if row:
             return {
                 'context': row[0],
-                'learnings': row[1],
-                'preferences': row[2],
-                'last_updated': row[3]
+                'learnings': self.learnings.render(agent_id),
+                'preferences': row[1],
+                'last_updated': row[2]
             }
         return None
 
+    def add_learning(self, agent_id: str, learning: str, source_task_id: str = None) -> bool:
+        """Append a learning, False if the agent already has it (or it is blank)"""
+        added = add_learning(self.conn.cursor(), agent_id, learning, source_task_id)
+        self.conn.commit()
+        return added
+
     def update_agent_context(self, agent_id: str, field: str, content: str) -> bool:
         """Update agent context field"""
         cursor = self.conn.cursor()
@@ -647,8 +1042,9 @@ class AITeamDB:
             return False
 
 
-def main():
-    parser = argparse.ArgumentParser(description='AI Team Database Manager')
+def build_parser() -> argparse.ArgumentParser:
+    """CLI definition, shared by direct runs and the `serve` daemon"""
+    parser = argparse.ArgumentParser(prog='team_db.py', description='AI Team Database Manager')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
     
     # Task commands
@@ -706,10 +1102,53 @@ def main():
     show_reqs = task_sub.add_parser('show-requirements', help='Show task requirements')
     show_reqs.add_argument('task_id', help='Task ID')
     
+    import_tasks = task_sub.add_parser('import', help='Bulk create tasks from a .jsonl or .csv file')
+    import_tasks.add_argument('file', help='Task file (fields: title, project_id, description, priority, ...)')
+    import_tasks.add_argument('--chunk-size', type=int, default=500, help='Rows per insert batch')
+    
+    depend = task_sub.add_parser('depend', help='Make a task wait for another task')
+    depend.add_argument('task_id', help='Task ID')
+    depend.add_argument('depends_on', help='Task ID that must be done first')
+    
+    undepend = task_sub.add_parser('undepend', help='Remove a task dependency')
+    undepend.add_argument('task_id', help='Task ID')
+    undepend.add_argument('depends_on', help='Task ID it no longer waits for')
+    
+    deps = task_sub.add_parser('deps', help='Show task dependencies')
+    deps.add_argument('task_id', help='Task ID')
+    
+    ready = task_sub.add_parser('ready', help='List unassigned todo tasks with all dependencies done')
+    ready.add_argument('--limit', type=int, help='Show at most N tasks')
+    
+    search = task_sub.add_parser('search', help='Full-text search over tasks and agent learnings')
+    search.add_argument('query', nargs='?', default='', help='Words to find ("quoted phrase", prefix*)')
+    search.add_argument('--project', help='Project ID')
+    search.add_argument('--status', choices=['backlog', 'todo', 'in_progress', 'review', 'done', 'blocked', 'cancelled'])
+    search.add_argument('--since', help='Created on or after this day (YYYY-MM-DD)')
+    search.add_argument('--until', help='Created on or before this day (YYYY-MM-DD)')
+    search.add_argument('--limit', type=int, default=20, help='Show at most N tasks')
+    search.add_argument('--raw', action='store_true', help='Pass the query to FTS5 as is (AND/OR/NOT, column:term)')
+    search.add_argument('--verify', action='store_true', help='Check the search index against the tasks')
+    search.add_argument('--repair', action='store_true', help='With --verify: rebuild the index')
+    
+    history = task_sub.add_parser('history', help='Task history, reading archived months when needed')
+    history.add_argument('task_id', nargs='?', help='Task ID (all tasks when omitted, needs --since)')
+    history.add_argument('--since', help='On or after this day (YYYY-MM-DD)')
+    history.add_argument('--until', help='On or before this day (YYYY-MM-DD)')
+    history.add_argument('--limit', type=int, help='Show at most N entries')
+    history.add_argument('--archives', action='store_true', help='List the monthly archive files')
+    
     list_tasks = task_sub.add_parser('list', help='List tasks')
     list_tasks.add_argument('--status', choices=['backlog', 'todo', 'in_progress', 'review', 'done', 'blocked', 'cancelled'],
                            help='Filter by status')
     list_tasks.add_argument('--agent', help='Filter by agent')
+    list_tasks.add_argument('--limit', type=int, help='Show at most N tasks')
+    list_tasks.add_argument('--after', help='Continue after this task ID (from a previous --limit page)')
+    
+    # Project commands
+    project_parser = subparsers.add_parser('project', help='Project management')
+    project_sub = project_parser.add_subparsers(dest='project_action')
+    project_sub.add_parser('status', help='Show project progress and critical path')
     
     # Agent commands
     agent_parser = subparsers.add_parser('agent', help='Agent management')
@@ -731,216 +1170,684 @@ def main():
     
     ctx_update = context_sub.add_parser('update', help='Update agent context')
     ctx_update.add_argument('agent_id', help='Agent ID')
-    ctx_update.add_argument('--field', choices=['context', 'learnings', 'preferences'], 
+    ctx_update.add_argument('--field', choices=['context', 'preferences'], 
                            default='context', help='Field to update')
     ctx_update.add_argument('--content', required=True, help='New content')
     
     ctx_learn = context_sub.add_parser('learn', help='Add learning to agent')
     ctx_learn.add_argument('agent_id', help='Agent ID')
     ctx_learn.add_argument('learning', help='Learning to add')
+    ctx_learn.add_argument('--task', help='Task the learning came from')
     
     # Dashboard commands
     dash_parser = subparsers.add_parser('dashboard', help='Dashboard')
     dash_parser.add_argument('--export', choices=['json', 'markdown'],
                             help='Export format')
+    dash_parser.add_argument('--verify', action='store_true',
+                            help='Recompute counters from scratch and report drift')
+    dash_parser.add_argument('--repair', action='store_true',
+                            help='With --verify: overwrite drifted counters')
     
     # Report commands
     report_parser = subparsers.add_parser('report', help='Generate reports')
     report_parser.add_argument('--daily', action='store_true', help='Daily report')
+    report_parser.add_argument('--from', dest='start', help='Range report from this day (YYYY-MM-DD, UTC)')
+    report_parser.add_argument('--to', dest='end', help='Last day of the range (default: --from)')
+    report_parser.add_argument('--by', choices=list(ROLLUP_GROUPS), default='day',
+                               help='Group the range report')
+    report_parser.add_argument('--verify', action='store_true',
+                               help='Compare the daily rollup against a full recount')
+    report_parser.add_argument('--repair', action='store_true', help='With --verify: rebuild drifted rows')
     
     # Health commands
+    stats_parser = subparsers.add_parser('stats', help='Statistics')
+    stats_sub = stats_parser.add_subparsers(dest='stats_action')
+    
+    durations = stats_sub.add_parser('durations', help='Completion-duration percentiles')
+    durations.add_argument('--by', choices=['agent', 'project', 'priority', 'all'], default='all')
+    durations.add_argument('--key', help='Only this agent / project / priority')
+    durations.add_argument('--since', help='First month to include (YYYY-MM, UTC)')
+    durations.add_argument('--histogram', action='store_true', help='Show the duration histogram')
+    durations.add_argument('--verify', action='store_true', help='Recount sketches from tasks and report drift')
+    durations.add_argument('--repair', action='store_true', help='With --verify: rebuild the sketches')
+    
+    queries = stats_sub.add_parser('queries', help='Slowest SQL statements of traced runs (AI_TEAM_TRACE=1)')
+    queries.add_argument('--top', type=int, default=20, help='How many statements to show (0: all)')
+    queries.add_argument('--sort', choices=SORT_KEYS, default='total', help='Rank by total, calls, mean, p99 or max')
+    queries.add_argument('--json', metavar='FILE', help='Also write the full profile to FILE')
+    queries.add_argument('--reset', action='store_true', help='Forget the collected profile')
+    
     health_parser = subparsers.add_parser('health', help='Health monitoring')
     health_sub = health_parser.add_subparsers(dest='health_action')
     
     health_check = health_sub.add_parser('check', help='Run health check once')
     health_status = health_sub.add_parser('status', help='Show current health status')
     
-    args = parser.parse_args()
+    # Backups
+    backup_parser = subparsers.add_parser('backup', help='Online backup, snapshot rotation, verify and restore')
+    backup_parser.add_argument('dest', nargs='?', help='Backup file (default: rotated team.db.backup.<timestamp>)')
+    backup_parser.add_argument('--keep', type=int, default=KEEP_SNAPSHOTS, help='Snapshots to keep when rotating')
+    backup_parser.add_argument('--list', action='store_true', help='List snapshots')
+    backup_parser.add_argument('--verify', metavar='FILE', help='Run integrity_check on a backup')
+    backup_parser.add_argument('--restore', metavar='FILE', help='Verify a backup and restore it over team.db')
     
-    with AITeamDB() as db:
-        if args.command == 'task':
-            if args.task_action == 'create':
-                task_id = db.create_task(
-                    title=args.title,
-                    description=args.desc,
-                    assignee_id=args.assign,
-                    project_id=args.project,
-                    priority=args.priority,
-                    due_date=args.due,
-                    prerequisites=args.prerequisites,
-                    acceptance_criteria=args.acceptance,
-                    goal=args.goal
-                )
-                print(f"✅ Task created: {task_id}")
+    # Change feed
+    watch = subparsers.add_parser('watch', help='Stream task, agent and history changes as NDJSON')
+    watch.add_argument('--since', type=int, help='Last seq already processed (default: the latest, or 0 with --once)')
+    watch.add_argument('--entity', nargs='+', choices=CHANGE_ENTITIES, help='Only these kinds of change')
+    watch.add_argument('--once', action='store_true', help='Print the changes after --since and exit')
+    watch.add_argument('--timeout', type=float, help='Exit after N seconds without a change')
+    
+    # Resident mode
+    serve = subparsers.add_parser('serve', help='Run as a daemon answering team_client.py over a Unix socket')
+    serve.add_argument('--socket', default=str(SOCKET_PATH), help='Socket path')
+    
+    return parser
+
+
+def run_command(args: argparse.Namespace, db: AITeamDB, parser: argparse.ArgumentParser):
+    """Execute one parsed CLI command against an open database"""
+    if args.command == 'task':
+        if args.task_action == 'create':
+            task_id = db.create_task(
+                title=args.title,
+                description=args.desc,
+                assignee_id=args.assign,
+                project_id=args.project,
+                priority=args.priority,
+                due_date=args.due,
+                prerequisites=args.prerequisites,
+                acceptance_criteria=args.acceptance,
+                goal=args.goal
+            )
+            print(f"✅ Task created: {task_id}")
+            if args.prerequisites:
+                print(f"   Prerequisites: {len(args.prerequisites.split(chr(10)))} items")
+            if args.acceptance:
+                print(f"   Acceptance Criteria: {len(args.acceptance.split(chr(10)))} items")
+            if args.goal:
+                print(f"   Goal: {args.goal[:50]}{'...' if len(args.goal) > 50 else ''}")
+            
+        elif args.task_action == 'assign':
+            if db.assign_task(args.task_id, args.agent_id):
+                print(f"✅ Task {args.task_id} assigned to {args.agent_id}")
+                
+        elif args.task_action == 'start':
+            if db.start_task(args.task_id):
+                print(f"✅ Task {args.task_id} started")
+        
+        elif args.task_action == 'review':
+            if db.send_to_review(args.task_id):
+                print(f"✅ Task {args.task_id} sent to review")
+                
+        elif args.task_action == 'progress':
+            if db.update_progress(args.task_id, args.percent, args.notes):
+                print(f"✅ Task {args.task_id} progress: {args.percent}%")
+                
+        elif args.task_action == 'done':
+            if db.complete_task(args.task_id):
+                print(f"✅ Task {args.task_id} completed")
+                
+        elif args.task_action == 'block':
+            if db.block_task(args.task_id, args.reason):
+                print(f"⚠️ Task {args.task_id} blocked: {args.reason}")
+        
+        elif args.task_action == 'backlog':
+            if db.backlog_task(args.task_id, args.reason):
+                print(f"📋 Task {args.task_id} moved to backlog: {args.reason}")
+        
+        elif args.task_action == 'unblock':
+            if db.unblock_task(args.task_id, args.agent):
+                print(f"✅ Task {args.task_id} unblocked and resumed")
+        
+        elif args.task_action == 'requirements':
+            if db.update_task_requirements(
+                args.task_id,
+                prerequisites=args.prerequisites,
+                acceptance_criteria=args.acceptance,
+                goal=args.goal
+            ):
+                print(f"✅ Task {args.task_id} requirements updated")
                 if args.prerequisites:
                     print(f"   Prerequisites: {len(args.prerequisites.split(chr(10)))} items")
                 if args.acceptance:
                     print(f"   Acceptance Criteria: {len(args.acceptance.split(chr(10)))} items")
                 if args.goal:
                     print(f"   Goal: {args.goal[:50]}{'...' if len(args.goal) > 50 else ''}")
+        
+        elif args.task_action == 'show-requirements':
+            reqs = db.get_task_requirements(args.task_id)
+            if reqs:
+                print(f"\n📋 Task {args.task_id} Requirements:\n")
+                if reqs['goal']:
+                    print(f"🎯 Goal:\n{reqs['goal']}\n")
+                if reqs['prerequisites']:
+                    print(f"✅ Prerequisites:\n{reqs['prerequisites']}\n")
+                if reqs['acceptance_criteria']:
+                    print(f"📌 Acceptance Criteria:\n{reqs['acceptance_criteria']}\n")
+                if not any([reqs['goal'], reqs['prerequisites'], reqs['acceptance_criteria']]):
+                    print("   No requirements defined yet.")
+            else:
+                print(f"⚠️ Task {args.task_id} not found")
                 
-            elif args.task_action == 'assign':
-                if db.assign_task(args.task_id, args.agent_id):
-                    print(f"✅ Task {args.task_id} assigned to {args.agent_id}")
-                    
-            elif args.task_action == 'start':
-                if db.start_task(args.task_id):
-                    print(f"✅ Task {args.task_id} started")
-            
-            elif args.task_action == 'review':
-                if db.send_to_review(args.task_id):
-                    print(f"✅ Task {args.task_id} sent to review")
-                    
-            elif args.task_action == 'progress':
-                if db.update_progress(args.task_id, args.percent, args.notes):
-                    print(f"✅ Task {args.task_id} progress: {args.percent}%")
-                    
-            elif args.task_action == 'done':
-                if db.complete_task(args.task_id):
-                    print(f"✅ Task {args.task_id} completed")
-                    
-            elif args.task_action == 'block':
-                if db.block_task(args.task_id, args.reason):
-                    print(f"⚠️ Task {args.task_id} blocked: {args.reason}")
-            
-            elif args.task_action == 'backlog':
-                if db.backlog_task(args.task_id, args.reason):
-                    print(f"📋 Task {args.task_id} moved to backlog: {args.reason}")
-            
-            elif args.task_action == 'unblock':
-                if db.unblock_task(args.task_id, args.agent):
-                    print(f"✅ Task {args.task_id} unblocked and resumed")
-            
-            elif args.task_action == 'requirements':
-                if db.update_task_requirements(
-                    args.task_id,
-                    prerequisites=args.prerequisites,
-                    acceptance_criteria=args.acceptance,
-                    goal=args.goal
-                ):
-                    print(f"✅ Task {args.task_id} requirements updated")
-                    if args.prerequisites:
-                        print(f"   Prerequisites: {len(args.prerequisites.split(chr(10)))} items")
-                    if args.acceptance:
-                        print(f"   Acceptance Criteria: {len(args.acceptance.split(chr(10)))} items")
-                    if args.goal:
-                        print(f"   Goal: {args.goal[:50]}{'...' if len(args.goal) > 50 else ''}")
-            
-            elif args.task_action == 'show-requirements':
-                reqs = db.get_task_requirements(args.task_id)
-                if reqs:
-                    print(f"\n📋 Task {args.task_id} Requirements:\n")
-                    if reqs['goal']:
-                        print(f"🎯 Goal:\n{reqs['goal']}\n")
-                    if reqs['prerequisites']:
-                        print(f"✅ Prerequisites:\n{reqs['prerequisites']}\n")
-                    if reqs['acceptance_criteria']:
-                        print(f"📌 Acceptance Criteria:\n{reqs['acceptance_criteria']}\n")
-                    if not any([reqs['goal'], reqs['prerequisites'], reqs['acceptance_criteria']]):
-                        print("   No requirements defined yet.")
+        elif args.task_action == 'import':
+            try:
+                result = db.create_tasks_bulk(iter_task_file(args.file), chunk_size=args.chunk_size)
+            except (ValueError, OSError) as e:
+                print(f"❌ Import failed, nothing was created: {e}")
+                sys.exit(1)
+            if result['created']:
+                print(f"✅ Imported {result['created']} tasks: {result['first_id']} … {result['last_id']}")
+            else:
+                print("⚠️ No tasks found in file")
+                
+        elif args.task_action == 'depend':
+            try:
+                if db.add_dependency(args.task_id, args.depends_on):
+                    print(f"🔗 Task {args.task_id} now waits for {args.depends_on}")
                 else:
-                    print(f"⚠️ Task {args.task_id} not found")
-                    
-            elif args.task_action == 'list':
-                tasks = db.get_tasks(status=args.status, assignee=args.agent)
-                print(f"\n📋 Tasks ({len(tasks)} total):\n")
-                for t in tasks:
-                    status_emoji = {
-                        'backlog': '📋', 'todo': '⬜', 'in_progress': '🔄',
-                        'review': '👀', 'done': '✅', 'blocked': '🚧', 'cancelled': '🚫'
-                    }.get(t['status'], '⬜')
-                    print(f"{status_emoji} {t['id']} | {t['title'][:40]}...")
-                    print(f"   Status: {t['status']} | Assignee: {t['assignee_name'] or 'Unassigned'}")
-                    if t['progress'] > 0:
-                        print(f"   Progress: {t['progress']}%")
-                    print()
-                    
-        elif args.command == 'agent':
-            if args.agent_action == 'list':
-                agents = db.get_agents(status=args.status)
-                print(f"\n🤖 Agents ({len(agents)} total):\n")
-                for a in agents:
-                    status_emoji = {
-                        'idle': '⚪', 'active': '🟢',
-                        'blocked': '🔴', 'offline': '⚫'
-                    }.get(a['status'], '⚪')
-                    print(f"{status_emoji} {a['name']} ({a['role']})")
-                    print(f"   Status: {a['status']}")
-                    print(f"   Tasks: {a['active_tasks']} active, {a['total_tasks_completed']} completed")
-                    if a['avg_progress']:
-                        print(f"   Avg Progress: {a['avg_progress']:.1f}%")
-                    print()
-                    
-            elif args.agent_action == 'heartbeat':
-                if db.update_agent_heartbeat(args.agent_id):
-                    print(f"💓 Heartbeat updated for {args.agent_id}")
+                    print(f"⚠️ Task {args.task_id} already depends on {args.depends_on}")
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+        
+        elif args.task_action == 'undepend':
+            if db.remove_dependency(args.task_id, args.depends_on):
+                print(f"✅ Task {args.task_id} no longer waits for {args.depends_on}")
+            else:
+                print(f"⚠️ Task {args.task_id} does not depend on {args.depends_on}")
+        
+        elif args.task_action == 'deps':
+            deps = db.get_dependencies(args.task_id)
+            print(f"\n🔗 Dependencies of {args.task_id}:\n")
+            print("Waits for:")
+            for t in deps['depends_on']:
+                mark = '✅' if t['status'] in ('done', 'cancelled') else '⏳'
+                print(f"  {mark} {t['id']} | {t['title'][:40]} ({t['status']})")
+            if not deps['depends_on']:
+                print("  (nothing)")
+            print("Blocks:")
+            for t in deps['dependents']:
+                print(f"  ⏸️ {t['id']} | {t['title'][:40]} ({t['status']})")
+            if not deps['dependents']:
+                print("  (nothing)")
+        
+        elif args.task_action == 'ready':
+            tasks = db.get_ready_tasks(limit=args.limit)
+            print(f"\n🟢 Ready tasks ({len(tasks)}):\n")
+            for t in tasks:
+                print(f"⬜ {t['id']} | {t['title'][:40]} [{t['priority']}]")
+        
+        elif args.task_action == 'search' and args.verify:
+            result = db.verify_search_index(repair=args.repair)
+            if result['ok']:
+                print("✅ Search index matches tasks and agent learnings")
+            else:
+                print(f"⚠️ Search index out of sync: {', '.join(result['broken']) or 'no broken index'}, "
+                      f"{result['missing']} rows not indexed")
+                if result['repaired']:
+                    print("🔧 Search index rebuilt")
+                else:
+                    sys.exit(1)
+        
+        elif args.task_action == 'search':
+            try:
+                found = db.search(args.query, project_id=args.project, status=args.status,
+                                  since=args.since, until=args.until, limit=args.limit, raw=args.raw)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            print(f"\n🔎 {len(found['tasks'])} task(s) for \"{args.query}\":\n")
+            for t in found['tasks']:
+                print(f"{t['id']} | {t['title_highlight']} [{t['status']}] {t['project_id']}")
+                if t['snippet'] != t['title_highlight']:
+                    print(f"   {' '.join(t['snippet'].split())}")
+            if found['learnings']:
+                print("\n🧠 Agent learnings:\n")
+                for learning in found['learnings']:
+                    print(f"{learning['agent_id']}: {' '.join(learning['snippet'].split())}")
+        
+        elif args.task_action == 'history' and args.archives:
+            archives = db.get_history_archives()
+            print(f"\n🗄️ {len(archives)} history archive(s):\n")
+            for a in archives:
+                print(f"{a['month']} | {a['bytes'] / 1e6:.1f} MB | {'sealed' if a['sealed'] else 'open'}")
+        
+        elif args.task_action == 'history':
+            try:
+                entries = db.get_task_history(args.task_id, since=args.since, until=args.until,
+                                              limit=args.limit)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            print(f"\n📜 {len(entries)} history entr{'y' if len(entries) == 1 else 'ies'}:\n")
+            for h in entries:
+                change = (f" {h['old_status'] or '-'} → {h['new_status']}" if h['new_status']
+                          else f" {h['old_progress']}% → {h['new_progress']}%" if h['new_progress'] is not None
+                          else '')
+                who = f" by {h['agent_id']}" if h['agent_id'] else ''
+                notes = f" — {h['notes']}" if h['notes'] else ''
+                print(f"{h['timestamp']} {h['task_id']} {h['action']}{change}{who}{notes}")
+        
+        elif args.task_action == 'list':
+            try:
+                tasks = db.iter_tasks(status=args.status, assignee=args.agent,
+                                      limit=args.limit, after=args.after,
+                                      columns=('id', 'title', 'status', 'assignee_name', 'progress'))
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            print("\n📋 Tasks:\n")
+            shown = 0
+            last_id = None
+            for t in tasks:
+                shown += 1
+                last_id = t['id']
+                status_emoji = {
+                    'backlog': '📋', 'todo': '⬜', 'in_progress': '🔄',
+                    'review': '👀', 'done': '✅', 'blocked': '🚧', 'cancelled': '🚫'
+                }.get(t['status'], '⬜')
+                print(f"{status_emoji} {t['id']} | {t['title'][:40]}...")
+                print(f"   Status: {t['status']} | Assignee: {t['assignee_name'] or 'Unassigned'}")
+                if t['progress'] > 0:
+                    print(f"   Progress: {t['progress']}%")
+                print()
+            print(f"📋 {shown} task(s) shown")
+            if args.limit and shown == args.limit:
+                print(f"➡️  Next page: --limit {args.limit} --after {last_id}")
+                
+    elif args.command == 'project':
+        if args.project_action == 'status':
+            projects = db.get_project_status()
+            print(f"\n📁 Projects ({len(projects)} total):\n")
+            for p in projects:
+                print(f"{p['id']} | {p['name']} ({p['status']})")
+                print(f"   Progress: {p['progress_pct']}% ({p['done_tasks']}/{p['total_tasks']} done, "
+                      f"{p['blocked_tasks']} blocked)")
+                if p['critical_path_tasks']:
+                    print(f"   Critical path: {p['critical_path_tasks']} task(s), "
+                          f"{p['critical_path_hours']}h: {' → '.join(p['critical_path'])}")
+                print()
+    
+    elif args.command == 'agent':
+        if args.agent_action == 'list':
+            agents = db.get_agents(status=args.status)
+            print(f"\n🤖 Agents ({len(agents)} total):\n")
+            for a in agents:
+                status_emoji = {
+                    'idle': '⚪', 'active': '🟢',
+                    'blocked': '🔴', 'offline': '⚫'
+                }.get(a['status'], '⚪')
+                print(f"{status_emoji} {a['name']} ({a['role']})")
+                print(f"   Status: {a['status']}")
+                print(f"   Tasks: {a['active_tasks']} active, {a['total_tasks_completed']} completed")
+                if a['avg_progress']:
+                    print(f"   Avg Progress: {a['avg_progress']:.1f}%")
+                print()
+                
+        elif args.agent_action == 'heartbeat':
+            # Coalesced by the collector when it runs, written directly otherwise.
+            # The collector drops unknown agents silently, so check before queueing
+            if not db.agent_exists(args.agent_id):
+                print(f"⚠️ Agent {args.agent_id} not found")
+                sys.exit(1)
+            if send_heartbeat(args.agent_id, db.db_path):
+                print(f"💓 Heartbeat queued for {args.agent_id}")
+            elif db.update_agent_heartbeat(args.agent_id):
+                print(f"💓 Heartbeat updated for {args.agent_id}")
+                
+        elif args.agent_action == 'context':
+            if args.context_action == 'show':
+                ctx = db.get_agent_context(args.agent_id)
+                if ctx:
+                    print(f"\n📝 Agent Context: {args.agent_id}\n")
+                    print(f"📋 Context:\n{ctx.get('context', 'Not set')}\n")
+                    print(f"🧠 Learnings:\n{ctx.get('learnings') or 'None'}\n")
+                    print(f"⚙️  Preferences:\n{ctx.get('preferences', 'None')}\n")
+                    print(f"🕐 Last Updated: {ctx.get('last_updated', 'Never')}")
+                else:
+                    print(f"⚠️ No context found for {args.agent_id}")
                     
-            elif args.agent_action == 'context':
-                if args.context_action == 'show':
-                    ctx = db.get_agent_context(args.agent_id)
-                    if ctx:
-                        print(f"\n📝 Agent Context: {args.agent_id}\n")
-                        print(f"📋 Context:\n{ctx.get('context', 'Not set')}\n")
-                        print(f"🧠 Learnings:\n{ctx.get('learnings', 'None')}\n")
-                        print(f"⚙️  Preferences:\n{ctx.get('preferences', 'None')}\n")
-                        print(f"🕐 Last Updated: {ctx.get('last_updated', 'Never')}")
-                    else:
-                        print(f"⚠️ No context found for {args.agent_id}")
-                        
-                elif args.context_action == 'update':
-                    if db.update_agent_context(args.agent_id, args.field, args.content):
-                        print(f"✅ Updated {args.field} for {args.agent_id}")
-                        
-                elif args.context_action == 'learn':
-                    ctx = db.get_agent_context(args.agent_id)
-                    if ctx:
-                        new_learning = f"- {args.learning}"
-                        existing = ctx.get('learnings', '')
-                        updated = f"{existing}\n{new_learning}" if existing else new_learning
-                        if db.update_agent_context(args.agent_id, 'learnings', updated):
-                            print(f"✅ Added learning to {args.agent_id}")
-                    else:
-                        print(f"⚠️ Agent {args.agent_id} not found")
+            elif args.context_action == 'update':
+                if db.update_agent_context(args.agent_id, args.field, args.content):
+                    print(f"✅ Updated {args.field} for {args.agent_id}")
                     
-        elif args.command == 'dashboard':
-            stats = db.get_dashboard_stats()
-            print("\n📊 Dashboard Stats:\n")
-            print(f"Total Tasks: {stats.get('total_tasks', stats.get(6, 0))}")
-            print(f"  - Todo: {stats.get('todo_tasks', stats.get(7, 0))}")
-            print(f"  - In Progress: {stats.get('in_progress_tasks', stats.get(8, 0))}")
-            print(f"  - Done: {stats.get('completed_tasks', stats.get(9, 0))}")
-            print(f"  - Blocked: {stats.get('blocked_tasks', stats.get(10, 0))}")
-            print(f"\nAgents:")
-            print(f"  - Total: {stats.get('total_agents', stats.get(0, 0))}")
-            print(f"  - Active: {stats.get('active_agents', stats.get(1, 0))}")
-            print(f"  - Idle: {stats.get('idle_agents', stats.get(2, 0))}")
-            print(f"  - Blocked: {stats.get('blocked_agents', stats.get(3, 0))}")
-            print(f"\nDue:")
-            print(f"  - Due Today: {stats.get('due_today', stats.get(12, 0))}")
-            print(f"  - Overdue: {stats.get('overdue_tasks', stats.get(13, 0))}")
-            
-        elif args.command == 'report':
-            if args.daily:
-                report = db.generate_daily_report()
-                print(report)
+            elif args.context_action == 'learn':
+                ctx = db.get_agent_context(args.agent_id)
+                if not ctx:
+                    print(f"⚠️ Agent {args.agent_id} not found")
+                elif db.add_learning(args.agent_id, args.learning, args.task):
+                    print(f"✅ Added learning to {args.agent_id}")
+                else:
+                    print(f"ℹ️ {args.agent_id} already has this learning")
                 
-        elif args.command == 'health':
-            # Health commands use their own context manager
-            db.close()
-            with HealthMonitor() as monitor:
-                if args.health_action == 'check':
-                    result = monitor.run_health_check()
-                    # Exit with error code if critical issues found
-                    if result['critical_count'] > 0:
-                        sys.exit(1)
-                elif args.health_action == 'status':
-                    monitor.print_health_status()
+    elif args.command == 'dashboard' and args.verify:
+        result = db.verify_dashboard_counters(repair=args.repair)
+        if result['ok']:
+            print("✅ Dashboard counters match a full recount")
+        else:
+            print(f"⚠️ Dashboard counters drifted ({len(result['drift'])} fields):")
+            for name, values in result['drift'].items():
+                print(f"  - {name}: stored {values['stored']}, actual {values['actual']}")
+            if result['repaired']:
+                print("🔧 Counters repaired")
+            else:
+                sys.exit(1)
+        
+    elif args.command == 'dashboard':
+        stats = db.get_dashboard_stats()
+        print("\n📊 Dashboard Stats:\n")
+        print(f"Total Tasks: {stats.get('total_tasks', stats.get(6, 0))}")
+        print(f"  - Todo: {stats.get('todo_tasks', stats.get(7, 0))}")
+        print(f"  - In Progress: {stats.get('in_progress_tasks', stats.get(8, 0))}")
+        print(f"  - Done: {stats.get('completed_tasks', stats.get(9, 0))}")
+        print(f"  - Blocked: {stats.get('blocked_tasks', stats.get(10, 0))}")
+        print(f"\nAgents:")
+        print(f"  - Total: {stats.get('total_agents', stats.get(0, 0))}")
+        print(f"  - Active: {stats.get('active_agents', stats.get(1, 0))}")
+        print(f"  - Idle: {stats.get('idle_agents', stats.get(2, 0))}")
+        print(f"  - Blocked: {stats.get('blocked_agents', stats.get(3, 0))}")
+        print(f"\nDue:")
+        print(f"  - Due Today: {stats.get('due_today', stats.get(12, 0))}")
+        print(f"  - Overdue: {stats.get('overdue_tasks', stats.get(13, 0))}")
+        
+    elif args.command == 'report':
+        if args.verify:
+            result = db.verify_daily_rollup(repair=args.repair)
+            if result['ok']:
+                print("✅ Daily rollup matches a full recount")
+            else:
+                print(f"⚠️ Daily rollup drifted ({len(result['drift'])} rows):")
+                for key, values in result['drift'].items():
+                    print(f"  - {key}: stored {values['stored']['completed']} done, "
+                          f"actual {values['actual']['completed']}")
+                if result['repaired']:
+                    print("🔧 Rollup repaired")
+                else:
+                    sys.exit(1)
+        elif args.start:
+            rows = db.get_rollup(args.start, args.end, by=args.by)
+            print(f"\n📈 Report {args.start} → {args.end or args.start} (by {args.by}):\n")
+            for r in rows:
+                median = db.format_duration(round(r['p50_duration'])) if r['p50_duration'] is not None else '-'
+                p90 = db.format_duration(round(r['p90_duration'])) if r['p90_duration'] is not None else '-'
+                print(f"{r['key'] or '(none)'}: {r['completed']} done | median {median} | p90 {p90} | "
+                      f"{r['blocked']} blocked | {r['reassigned']} reassigned")
+            if not rows:
+                print("No activity in this range")
+        elif args.daily:
+            report = db.generate_daily_report()
+            print(report)
+            
+    elif args.command == 'stats':
+        if args.stats_action == 'durations' and args.verify:
+            result = db.verify_duration_sketches(repair=args.repair)
+            if result['ok']:
+                print("✅ Duration sketches match a full recount")
+            else:
+                print(f"⚠️ Duration sketches drifted ({len(result['drift'])} buckets):")
+                for key, values in list(result['drift'].items())[:20]:
+                    print(f"  - {key}: stored {values['stored']}, actual {values['actual']}")
+                if result['repaired']:
+                    print("🔧 Sketches rebuilt")
                 else:
-                    # Default: show status
-                    monitor.print_health_status()
-            return  # Already closed db
+                    sys.exit(1)
+        elif args.stats_action == 'durations':
+            rows = db.get_duration_stats(args.by, key=args.key, since=args.since)
+            print(f"\n⏱️ Task durations by {args.by}{f' since {args.since}' if args.since else ''}:\n")
+            for r in rows:
+                percentiles = ' | '.join(f"{p} {db.format_duration(round(r[p]))}" for p in ('p50', 'p90', 'p99'))
+                print(f"{r['key'] or '(none)'}: {r['count']} done | {percentiles}")
+                if args.histogram:
+                    peak = max(r['histogram'].values())
+                    for label, count in r['histogram'].items():
+                        bar = '█' * round(20 * count / peak) if count else ''
+                        print(f"   {label + 'm':>8} {count:>6} {bar}")
+            if not rows:
+                print("No completed tasks with a duration")
+        elif args.stats_action == 'queries' and args.reset:
+            if db.reset_query_profile():
+                print("🗑️ Query profile cleared")
+            else:
+                print("No query profile to clear")
+        elif args.stats_action == 'queries':
+            profile = db.get_query_profile(args.top, args.sort)
+            if args.json:
+                Path(args.json).write_text(json.dumps(profile, indent=2, ensure_ascii=False))
+                print(f"💾 Profile written to {args.json}")
+            if not profile:
+                print("No traced queries yet - run commands with AI_TEAM_TRACE=1")
+            else:
+                print(f"\n🔎 Top {len(profile)} statements by {args.sort}:\n")
+                for i, q in enumerate(profile, 1):
+                    print(f"{i:>2}. {q['total_ms']:>10.1f} ms total | {q['calls']:>7} calls | "
+                          f"mean {q['mean_ms']:.3f} | p50 ≤{q['p50_ms']:g} p95 ≤{q['p95_ms']:g} "
+                          f"p99 ≤{q['p99_ms']:g} max {q['max_ms']:.1f} ms | "
+                          + (f"{q['vm_steps_per_call']} VM steps, " if q['vm_steps_per_call'] is not None else '')
+                          + f"{q['statements_per_call']:g} stmts/call")
+                    template = q['template']
+                    print(f"    {template if len(template) <= 160 else template[:157] + '...'}")
+                    for site in q['sites'][:3]:
+                        print(f"    ↳ {site['site']} ({site['calls']} calls, {site['total_ms']:.1f} ms)")
         else:
             parser.print_help()
+    
+    elif args.command == 'health':
+        # Health commands use their own context manager
+        with HealthMonitor(db.db_path) as monitor:
+            if args.health_action == 'check':
+                result = monitor.run_health_check()
+                # Exit with error code if critical issues found
+                if result['critical_count'] > 0:
+                    sys.exit(1)
+            elif args.health_action == 'status':
+                monitor.print_health_status()
+            else:
+                # Default: show status
+                monitor.print_health_status()
+    elif args.command == 'backup' and args.list:
+        snapshots = db.list_backups()
+        print(f"\n💾 {len(snapshots)} snapshot(s):\n")
+        for b in snapshots:
+            print(f"{b['taken']} | {b['bytes'] / 1e6:.1f} MB | {b['path']}")
+    
+    elif args.command == 'backup' and args.verify:
+        try:
+            result = verify_backup(args.verify)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if result['ok']:
+            print(f"✅ {args.verify}: integrity ok, {result['tasks']} tasks, schema v{result['user_version']} "
+                  f"({result['bytes'] / 1e6:.1f} MB checked in {result['seconds']} s)")
+        else:
+            print(f"❌ {args.verify}: integrity_check failed")
+            for error in result['errors'][:10]:
+                print(f"   {error}")
+            sys.exit(1)
+    
+    elif args.command == 'backup' and args.restore:
+        try:
+            result = db.restore_backup(args.restore)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Restored {result['restored']} ({result['tasks']} tasks)")
+        print(f"   Previous data saved to {result['pre_restore']}")
+    
+    elif args.command == 'backup':
+        result = db.backup(args.dest, keep=args.keep)
+        print(f"💾 Backup written: {result['path']} ({result['bytes'] / 1e6:.1f} MB in {result['seconds']} s, "
+              f"{result['mode']}, {result['restarts']} restarts)")
+        if result.get('rotated'):
+            print(f"🗑️ Rotated out {len(result['rotated'])} old snapshot(s)")
+    
+    elif args.command == 'watch':
+        # One JSON object per line; --once suits cron jobs that keep the last seq themselves
+        events = (db.get_changes(args.since or 0, args.entity, limit=-1) if args.once
+                  else db.watch(args.since, args.entity, idle_timeout=args.timeout))
+        try:
+            for event in events:
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+        except KeyboardInterrupt:
+            pass
+    else:
+        parser.print_help()
+
+
+def _handle_request(request: Dict, db: AITeamDB, parser: argparse.ArgumentParser) -> Dict:
+    """Run one client command, capturing its output and exit code like a separate process"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = 0
+    server_cwd = os.getcwd()
+    try:
+        # Relative paths (e.g. `task import tasks.csv`) resolve against the client's cwd
+        os.chdir(request.get('cwd') or server_cwd)
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            args = parser.parse_args(request.get('argv') or [])
+            if args.command == 'serve':
+                print("❌ Already running as the daemon", file=sys.stderr)
+                code = 2
+            elif args.command == 'watch' and not args.once:
+                print("❌ watch streams until stopped, run it without the daemon", file=sys.stderr)
+                code = 2
+            else:
+                run_command(args, db, parser)
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            code = e.code or 0
+        else:
+            stderr.write(f"{e.code}\n")
+            code = 1
+    except Exception:
+        stderr.write(traceback.format_exc())
+        code = 1
+    finally:
+        os.chdir(server_cwd)
+        if db.conn.in_transaction:
+            db.conn.rollback()
+    return {'exit': code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+
+class _Request:
+    """One client request on its way from a connection thread to the writer"""
+
+    def __init__(self, message: Dict):
+        self.message = message
+        self.response: Optional[Dict] = None
+        self.started = False
+        self.cancelled = False
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+
+def _serve_writer(requests: 'queue.Queue', db_path: Path):
+    """Run queued requests one at a time on the daemon's single AITeamDB"""
+    parser = build_parser()
+    with AITeamDB(db_path) as db:
+        while True:
+            request = requests.get()
+            if request is None:
+                return
+            with request.lock:
+                if request.cancelled:
+                    continue  # the client gave up waiting and ran the command itself
+                request.started = True
+            try:
+                request.response = _handle_request(request.message, db, parser)
+            except BaseException:
+                request.response = {'exit': 1, 'stdout': '', 'stderr': traceback.format_exc()}
+            finally:
+                request.done.set()
+
+
+def _serve_client(conn: socket.socket, requests: 'queue.Queue', slots: threading.BoundedSemaphore):
+    """Read one request, queue it for the writer and send back its answer
+
+    A client that does not send its request within CLIENT_READ_TIMEOUT is
+    dropped. One that finds MAX_CLIENTS requests queued already, or waits
+    more than QUEUE_WAIT for the writer to start on it, is told the daemon
+    is busy before anything ran, so it runs the command directly instead.
+    """
+    with conn:
+        try:
+            conn.settimeout(CLIENT_READ_TIMEOUT)
+            try:
+                request = _Request(read_message(conn))
+            except (OSError, ValueError):
+                return  # client stalled, went away or sent garbage
+            if not slots.acquire(blocking=False):
+                write_message(conn, {'busy': True})
+                return
+            try:
+                requests.put(request)
+                if not request.done.wait(QUEUE_WAIT):
+                    with request.lock:
+                        request.cancelled = not request.started
+                    if request.cancelled:
+                        write_message(conn, {'busy': True})
+                        return
+                    request.done.wait()
+            finally:
+                slots.release()
+            write_message(conn, request.response)
+        except OSError:
+            pass  # client went away before its answer
+
+
+def serve(socket_path: Path = SOCKET_PATH, db_path: Path = DB_PATH):
+    """Answer team_client.py commands from one warm AITeamDB until SIGTERM / Ctrl-C
+    
+    The accept loop only hands each connection to a thread of its own; one
+    writer thread owns the AITeamDB and runs requests one at a time, so the
+    daemon is still the only writer among its clients.
+    """
+    if socket_path.exists():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(socket_path))
+            print(f"⚠️ A daemon is already listening on {socket_path}")
+            sys.exit(1)
+        except ConnectionRefusedError:
+            socket_path.unlink()  # stale socket from a crashed daemon
+        finally:
+            probe.close()
+    
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(socket_path))
+    os.chmod(socket_path, 0o600)
+    server.listen(64)
+    # KeyboardInterrupt reaches the accept loop, SystemExit would be swallowed by _handle_request
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    
+    requests: queue.Queue = queue.Queue()
+    slots = threading.BoundedSemaphore(MAX_CLIENTS)
+    writer = threading.Thread(target=_serve_writer, args=(requests, db_path), name='team-db-writer', daemon=True)
+    writer.start()
+    print(f"🛰️ Serving team_db on {socket_path} (pid {os.getpid()})")
+    try:
+        while writer.is_alive():
+            conn, _ = server.accept()
+            threading.Thread(target=_serve_client, args=(conn, requests, slots), daemon=True).start()
+    except KeyboardInterrupt:
+        print("👋 Daemon stopped")
+    finally:
+        server.close()
+        socket_path.unlink(missing_ok=True)
+        requests.put(None)
+        writer.join(timeout=CLIENT_READ_TIMEOUT)
+
+
+def main(argv: List[str] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.command == 'serve':
+        serve(Path(args.socket))
+        return
+    
+    with AITeamDB() as db:
+        run_command(args, db, parser)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+AI Team Query Tracing
+Opt-in per-statement timing for every connection opened by storage.connect()
+
+With AI_TEAM_TRACE=1 in the environment, storage.connect() opens
+TracedConnection objects. Each statement is timed from execute() until its
+cursor is exhausted, re-executed or dropped, so time spent fetching rows
+counts too. Statements are grouped by normalized template. For each
+template the tracer keeps a log2 latency histogram, the call sites that
+issued it and, with AI_TEAM_TRACE_VM=1 as well, the VM steps it ran
+(set_progress_handler; high time with few steps means it waited for a lock
+or the disk). It also counts the
+statements SQLite started for it (set_trace_callback; above 1 means
+triggers fired). Stats are merged into the <db>.trace sidecar database
+every FLUSH_SECONDS and at exit, so short CLI runs and long-running daemons
+add up in one place; `team_db.py stats queries` reads it.
+"""
+
+import atexit
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TRACE_ENV = 'AI_TEAM_TRACE'
+TRACE_VM_ENV = 'AI_TEAM_TRACE_VM'  # also count VM steps; the progress handler slows long statements
+FLUSH_SECONDS = 30
+PROGRESS_STEPS = 1000         # progress handler granularity, VM instructions
+SITE_DEPTH = 2                # call-site frames recorded per statement
+MAX_TEMPLATE = 500
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN \(\?(?:, \?)+\)', re.IGNORECASE)
+
+_HERE = Path(__file__).resolve().parent
+_SKIP_FILES = {str(Path(__file__).resolve()), str(_HERE / 'storage.py')}
+
+PROFILE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS query_stats (
+    template TEXT PRIMARY KEY,
+    calls INTEGER NOT NULL,
+    total_us INTEGER NOT NULL,
+    max_us INTEGER NOT NULL,
+    vm_steps INTEGER NOT NULL,         -- progress handler ticks (x PROGRESS_STEPS instructions)
+    statements INTEGER NOT NULL,       -- statements SQLite started, triggers included
+    first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_seen DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS query_buckets (
+    template TEXT NOT NULL,
+    bucket INTEGER NOT NULL,           -- latency in (2^(bucket-1), 2^bucket] microseconds
+    calls INTEGER NOT NULL,
+    PRIMARY KEY (template, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS query_sites (
+    template TEXT NOT NULL,
+    site TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    total_us INTEGER NOT NULL,
+    PRIMARY KEY (template, site)
+) WITHOUT ROWID;
+'''
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals so statements group by template"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+@lru_cache(maxsize=4096)
+def _template(sql: str) -> str:
+    # IN (?, ?, ?) lists of any length are one template
+    template = _IN_LIST.sub('IN (?...)', normalize_sql(sql))
+    return template if len(template) <= MAX_TEMPLATE else template[:MAX_TEMPLATE] + '…'
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def tracing_enabled() -> bool:
+    return _env_flag(TRACE_ENV)
+
+
+def profile_path(db_path: Path) -> Path:
+    return Path(f"{db_path}.trace")
+
+
+def _bucket(seconds: float) -> int:
+    # ceil(log2(us)) for us >= 1, without the float log
+    return (max(math.ceil(seconds * 1e6), 1) - 1).bit_length()
+
+
+# Formatted call sites by their (code, line, code, line) frames; the same few
+# hundred lines issue every statement, so each label is built only once
+_sites: Dict[tuple, str] = {}
+
+
+def _call_site() -> str:
+    """file:line function of the nearest callers outside tracing/storage, innermost first"""
+    frame = sys._getframe(2)
+    key = ()
+    while frame is not None and len(key) < 2 * SITE_DEPTH:
+        code = frame.f_code
+        if code.co_filename not in _SKIP_FILES:
+            key += (code, frame.f_lineno)
+        frame = frame.f_back
+    site = _sites.get(key)
+    if site is None:
+        site = _sites[key] = ' ← '.join(f"{Path(code.co_filename).name}:{line} {code.co_name}"
+                                        for code, line in zip(key[::2], key[1::2])) or '?'
+    return site
+
+
+class _Counters:
+    """Progress-handler ticks and traced statements of one connection"""
+    __slots__ = ('vm', 'statements')
+
+    def __init__(self):
+        self.vm = 0
+        self.statements = 0
+
+
+class QueryTracer:
+    """Per-template stats of one process for one database, merged into its .trace file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Dict] = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, template: str, site: str, seconds: float, vm: int, statements: int):
+        with self.lock:
+            entry = self.stats.get(template)
+            if entry is None:
+                entry = self.stats[template] = {'calls': 0, 'total': 0.0, 'max': 0.0, 'vm': 0, 'statements': 0,
+                                                'buckets': Counter(), 'sites': {}}
+            entry['calls'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+            entry['vm'] += vm
+            entry['statements'] += statements
+            entry['buckets'][_bucket(seconds)] += 1
+            site_entry = entry['sites'].setdefault(site, [0, 0.0])
+            site_entry[0] += 1
+            site_entry[1] += seconds
+            due = time.monotonic() - self.last_flush >= FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Add the stats collected since the last flush to the .trace file"""
+        with self.lock:
+            stats, self.stats = self.stats, {}
+            self.last_flush = time.monotonic()
+        if not stats:
+            return
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        try:
+            conn.executescript(PROFILE_SCHEMA)
+            conn.executemany('''
+                INSERT INTO query_stats (template, calls, total_us, max_us, vm_steps, statements)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(template) DO UPDATE SET
+                    calls = calls + excluded.calls, total_us = total_us + excluded.total_us,
+                    max_us = MAX(max_us, excluded.max_us), vm_steps = vm_steps + excluded.vm_steps,
+                    statements = statements + excluded.statements, last_seen = CURRENT_TIMESTAMP
+            ''', [(template, e['calls'], round(e['total'] * 1e6), round(e['max'] * 1e6), e['vm'], e['statements'])
+                  for template, e in stats.items()])
+            conn.executemany('''
+                INSERT INTO query_buckets (template, bucket, calls) VALUES (?, ?, ?)
+                ON CONFLICT(template, bucket) DO UPDATE SET calls = calls + excluded.calls
+            ''', [(template, bucket, count) for template, e in stats.items() for bucket, count in e['buckets'].items()])
+            conn.executemany('''
+                INSERT INTO query_sites (template, site, calls, total_us) VALUES (?, ?, ?, ?)
+                ON CONFLICT(template, site) DO UPDATE SET
+                    calls = calls + excluded.calls, total_us = total_us + excluded.total_us
+            ''', [(template, site, calls, round(total * 1e6))
+                  for template, e in stats.items() for site, (calls, total) in e['sites'].items()])
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_tracers: Dict[str, QueryTracer] = {}
+_tracers_lock = threading.Lock()
+
+
+def get_tracer(db_path: Path) -> QueryTracer:
+    """The process-wide tracer for a database file, flushed at exit"""
+    path = profile_path(Path(db_path).resolve())
+    with _tracers_lock:
+        tracer = _tracers.get(str(path))
+        if tracer is None:
+            tracer = _tracers[str(path)] = QueryTracer(path)
+            atexit.register(_flush_at_exit, tracer)
+        return tracer
+
+
+def _flush_at_exit(tracer: QueryTracer):
+    try:
+        tracer.flush()
+    except sqlite3.Error as e:
+        # e.g. a throwaway database directory that is already gone
+        print(f"⚠️ Query trace not saved to {tracer.path}: {e}", file=sys.stderr)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execute + fetch time to the connection's tracer"""
+
+    _call: Optional[list] = None      # [template, site, seconds, vm, statements] of the open statement
+
+    def _run(self, fn, *args):
+        counters = self.connection._trace_counters
+        vm, statements = counters.vm, counters.statements
+        start = time.perf_counter()
+        try:
+            return fn(self, *args)
+        finally:
+            call = self._call
+            call[2] += time.perf_counter() - start
+            call[3] += counters.vm - vm
+            call[4] += counters.statements - statements
+
+    def _open(self, sql: str):
+        self._finish()
+        self._call = [_template(sql), _call_site(), 0.0, 0, 0]
+
+    def _finish(self):
+        call, self._call = self._call, None
+        if call is not None:
+            self.connection._tracer.record(*call)
+
+    def execute(self, sql, parameters=()):
+        self._open(sql)
+        try:
+            result = self._run(sqlite3.Cursor.execute, sql, parameters)
+        except BaseException:
+            self._finish()
+            raise
+        if self.description is None:
+            self._finish()            # no rows to fetch
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self._open(sql)
+        try:
+            return self._run(sqlite3.Cursor.executemany, sql, seq_of_parameters)
+        finally:
+            self._finish()
+
+    def executescript(self, script):
+        self._open(script)
+        try:
+            return self._run(sqlite3.Cursor.executescript, script)
+        finally:
+            self._finish()
+
+    def fetchone(self):
+        if self._call is None:
+            return sqlite3.Cursor.fetchone(self)
+        row = self._run(sqlite3.Cursor.fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        if self._call is None:
+            return sqlite3.Cursor.fetchmany(self, size)
+        rows = self._run(sqlite3.Cursor.fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        if self._call is None:
+            return sqlite3.Cursor.fetchall(self)
+        rows = self._run(sqlite3.Cursor.fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        if self._call is None:
+            return sqlite3.Cursor.__next__(self)
+        try:
+            return self._run(sqlite3.Cursor.__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        self._finish()
+        sqlite3.Cursor.close(self)
+
+    def __del__(self):
+        self._finish()
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements, commits and rollbacks are traced (see attach)"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+    def _timed(self, name: str, fn):
+        counters = self._trace_counters
+        vm, statements = counters.vm, counters.statements
+        start = time.perf_counter()
+        try:
+            return fn(self)
+        finally:
+            self._tracer.record(name, _call_site(), time.perf_counter() - start,
+                                counters.vm - vm, counters.statements - statements)
+
+    def commit(self):
+        return self._timed('COMMIT', sqlite3.Connection.commit)
+
+    def rollback(self):
+        return self._timed('ROLLBACK', sqlite3.Connection.rollback)
+
+
+def attach(conn: TracedConnection, db_path: Path):
+    """Start tracing a connection opened with factory=TracedConnection"""
+    counters = _Counters()
+
+    def on_progress():
+        counters.vm += 1
+        return 0
+
+    def on_statement(sql):
+        # The implicit BEGIN the sqlite3 module issues is not the caller's statement
+        if not sql.startswith('BEGIN'):
+            counters.statements += 1
+
+    conn._trace_counters = counters
+    conn._tracer = get_tracer(db_path)
+    if _env_flag(TRACE_VM_ENV):
+        conn.set_progress_handler(on_progress, PROGRESS_STEPS)
+    conn.set_trace_callback(on_statement)
+
+
+def _percentile(buckets: Dict[int, int], fraction: float) -> float:
+    """Upper bound (ms) of the histogram bucket holding the given fraction of calls"""
+    total = sum(buckets.values())
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen >= fraction * total:
+            return 2 ** bucket / 1000
+    return 0.0
+
+
+SORT_KEYS = ('total', 'calls', 'mean', 'p99', 'max')
+
+
+def query_profile(db_path: Path, top: int = 20, sort: str = 'total') -> List[Dict]:
+    """Top statement templates from the .trace file, most expensive first
+
+    Each entry: {template, calls, total_ms, mean_ms, p50_ms, p95_ms, p99_ms,
+    max_ms, vm_steps_per_call, statements_per_call, histogram, sites}, where
+    percentiles are log2 bucket upper bounds and sites are the call sites by
+    total time. vm_steps_per_call is None unless AI_TEAM_TRACE_VM=1 runs
+    counted any.
+    """
+    path = profile_path(Path(db_path).resolve())
+    if not path.exists():
+        return []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute('SELECT template, calls, total_us, max_us, vm_steps, statements FROM query_stats')
+        stats = {row[0]: row[1:] for row in rows}
+        buckets: Dict[str, Dict[int, int]] = {}
+        for template, bucket, calls in conn.execute('SELECT template, bucket, calls FROM query_buckets'):
+            buckets.setdefault(template, {})[bucket] = calls
+        sites: Dict[str, List] = {}
+        for template, site, calls, total_us in conn.execute(
+                'SELECT template, site, calls, total_us FROM query_sites ORDER BY total_us DESC'):
+            sites.setdefault(template, []).append({'site': site, 'calls': calls,
+                                                   'total_ms': round(total_us / 1000, 3)})
+    finally:
+        conn.close()
+
+    profile = []
+    for template, (calls, total_us, max_us, vm_steps, statements) in stats.items():
+        histogram = buckets.get(template, {})
+        profile.append({
+            'template': template,
+            'calls': calls,
+            'total_ms': round(total_us / 1000, 3),
+            'mean_ms': round(total_us / calls / 1000, 3),
+            'p50_ms': _percentile(histogram, 0.5),
+            'p95_ms': _percentile(histogram, 0.95),
+            'p99_ms': _percentile(histogram, 0.99),
+            'max_ms': round(max_us / 1000, 3),
+            'vm_steps_per_call': round(vm_steps * PROGRESS_STEPS / calls) if vm_steps else None,
+            'statements_per_call': round(statements / calls, 2),
+            'histogram': {f"<={2 ** bucket}us": count for bucket, count in sorted(histogram.items())},
+            'sites': sites.get(template, []),
+        })
+    key = {'total': 'total_ms', 'calls': 'calls', 'mean': 'mean_ms', 'p99': 'p99_ms', 'max': 'max_ms'}[sort]
+    profile.sort(key=lambda entry: entry[key], reverse=True)
+    return profile[:top] if top else profile
+
+
+def reset_profile(db_path: Path) -> bool:
+    """Delete the .trace file, returns whether there was one"""
+    path = profile_path(Path(db_path).resolve())
+    existed = path.exists()
+    path.unlink(missing_ok=True)
+    return existed
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+AI Team Task Transitions
+The allowed task status graph, applied as compare-and-swap updates
+
+Each transition is two statements in the caller's transaction:
+the history row is inserted from the current row only if its status is
+allowed (RETURNING the status it saw), then a conditional
+UPDATE ... WHERE status = <that status> RETURNING moves the task. If the
+task is missing or in another state nothing is written and the result
+says why, so a lost race is reported instead of overwritten.
+"""
+
+import sqlite3
+from typing import Dict
+
+# action: (statuses it may start from, resulting status, task_history action)
+TRANSITIONS = {
+    'assign':      (('backlog', 'todo', 'in_progress', 'review', 'blocked'), 'todo', 'assigned'),
+    'auto_assign': (('todo',), 'todo', 'auto_assigned'),
+    'start':       (('todo', 'review'), 'in_progress', 'started'),
+    'review':      (('in_progress',), 'review', 'updated'),
+    'complete':    (('todo', 'in_progress', 'review'), 'done', 'completed'),
+    'block':       (('todo', 'in_progress', 'review'), 'blocked', 'blocked'),
+    'unblock':     (('blocked',), 'in_progress', 'unblocked'),
+    'backlog':     (('todo', 'in_progress', 'review', 'blocked'), 'backlog', 'backlogged'),
+    'release':     (('todo', 'in_progress', 'review'), 'todo', 'updated'),
+}
+
+# Extra guards (auto-assign must not steal a task someone else just took,
+# nor one that gained an unfinished dependency since it was picked)
+_GUARDS = {
+    'auto_assign': "(assignee_id IS NULL OR assignee_id = '') AND open_dependencies = 0",
+}
+
+# Columns set besides status / updated_at
+_SETS = {
+    'assign': "assignee_id = :agent_id",
+    'auto_assign': "assignee_id = :agent_id",
+    'start': "started_at = CURRENT_TIMESTAMP",
+    'complete': """progress = 100, completed_at = CURRENT_TIMESTAMP,
+                   actual_duration_minutes = CASE WHEN started_at IS NOT NULL
+                       THEN ROUND((strftime('%s', 'now') - strftime('%s', started_at)) / 60)
+                       ELSE actual_duration_minutes END""",
+    'block': "blocked_reason = :reason",
+    'backlog': "blocked_reason = :reason",
+    'release': "assignee_id = NULL",
+}
+
+
+def can_transition(status: str, action: str) -> bool:
+    """Whether `action` is allowed from `status`"""
+    return status in TRANSITIONS[action][0]
+
+
+def transition(cursor: sqlite3.Cursor, task_id: str, action: str, agent_id: str = None,
+               reason: str = None, notes: str = None, expected: str = None) -> Dict:
+    """Apply one status change as a compare-and-swap, the caller commits
+
+    `expected` is the status the caller last saw (e.g. a monitor that read the
+    task as in_progress); the change only applies if the task is still in it.
+    Returns {ok, task_id, action, old_status, new_status, task} on success and
+    {ok: False, ..., error: not_found|not_allowed|conflict, current_status} if
+    nothing was written.
+    """
+    allowed, new_status, history_action = TRANSITIONS[action]
+    if expected is not None:
+        allowed = tuple(s for s in allowed if s == expected)
+    result = {'ok': False, 'task_id': task_id, 'action': action,
+              'old_status': None, 'new_status': new_status}
+
+    guard = f"status IN ({', '.join('?' * len(allowed))})" if allowed else "0"
+    if action in _GUARDS:
+        guard += f" AND {_GUARDS[action]}"
+
+    # History first: it records the status it saw and takes the write lock
+    cursor.execute(f'''
+        INSERT INTO task_history (task_id, agent_id, action, old_status, new_status, notes)
+        SELECT id, ?, ?, status, ?, ?
+        FROM tasks WHERE id = ? AND {guard}
+        RETURNING old_status
+    ''', (agent_id, history_action, new_status, notes if notes is not None else reason,
+          task_id) + allowed)
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute('SELECT status FROM tasks WHERE id = ?', (task_id,))
+        current = cursor.fetchone()
+        result['current_status'] = current[0] if current else None
+        if current is None:
+            result['error'] = 'not_found'
+        elif expected is not None and current[0] != expected:
+            result['error'] = 'conflict'
+        else:
+            result['error'] = 'not_allowed'
+        return result
+
+    old_status = row[0]
+    sets = f", {_SETS[action]}" if action in _SETS else ""
+    cursor.execute(f'''
+        UPDATE tasks
+        SET status = :new_status, updated_at = CURRENT_TIMESTAMP{sets}
+        WHERE id = :task_id AND status = :old_status
+        RETURNING id, title, status, assignee_id, progress, started_at, completed_at
+    ''', {'new_status': new_status, 'task_id': task_id, 'old_status': old_status,
+          'agent_id': agent_id, 'reason': reason})
+    task = cursor.fetchone()
+    if task is None:
+        # Cannot happen inside one write transaction; never leave a dangling history row
+        raise sqlite3.IntegrityError(f"Task {task_id} changed during {action}")
+
+    result.update(ok=True, old_status=old_status, task=dict(zip(
+        ('id', 'title', 'status', 'assignee_id', 'progress', 'started_at', 'completed_at'), task)))
+    return result
+
+
+def describe_failure(result: Dict) -> str:
+    """One-line explanation of a failed transition for CLI / log output"""
+    task_id, action = result['task_id'], result['action']
+    if result['error'] == 'not_found':
+        return f"Task {task_id} not found"
+    if result['error'] == 'conflict':
+        return (f"Task {task_id} changed underneath us (now {result['current_status']}), "
+                f"{action} skipped")
+    allowed = ', '.join(TRANSITIONS[action][0])
+    return f"Task {task_id} is {result['current_status']}, cannot {action} (allowed from: {allowed})"
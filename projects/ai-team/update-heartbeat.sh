@@ -9,6 +9,9 @@ set -e
 
 # Configuration
 DB_PATH="${HOME}/clawd/projects/ai-team/team.db"
+# heartbeat_ingest.py collector: beats appended here are batched into the DB
+HEARTBEAT_SPOOL="${DB_PATH}.heartbeat.spool"
+HEARTBEAT_PID="${DB_PATH}.heartbeat.pid"
 
 # Colors for terminal output
 RED='\033[0;31m'
@@ -39,10 +42,32 @@ fi
 # Heartbeat Functions
 # ====================
 
+# True when the heartbeat collector is running (pid file written by heartbeat_ingest.py)
+collector_running() {
+    local pid
+    [[ -f "$HEARTBEAT_PID" ]] || return 1
+    pid=$(cat "$HEARTBEAT_PID" 2>/dev/null)
+    [[ -n "$pid" ]] && kill -0 "$pid" 2>/dev/null
+}
+
+# Record a plain heartbeat: append to the collector spool (no sqlite3 process),
+# or write it directly when the collector is not running
+write_heartbeat() {
+    local agent_id="$1"
+    
+    if collector_running; then
+        echo "$agent_id ${EPOCHSECONDS:-$(date +%s)}" >> "$HEARTBEAT_SPOOL"
+        return $?
+    fi
+    
+    local ts=$(date -u '+%Y-%m-%d %H:%M:%S')
+    sqlite3 -cmd ".timeout 10000" "$DB_PATH" "UPDATE agents SET last_heartbeat = '$ts', updated_at = '$ts' WHERE id = '$agent_id';"
+}
+
 # Update heartbeat for a specific agent
 update_heartbeat() {
     local agent_id="$1"
-    local timestamp=$(date '+%Y-%m-%d %H:%M:%S')
+    local timestamp=$(date -u '+%Y-%m-%d %H:%M:%S')  # UTC, like CURRENT_TIMESTAMP
     
     if [[ -z "$agent_id" ]]; then
         log_error "Agent ID required"
@@ -50,12 +75,7 @@ update_heartbeat() {
     fi
     
     # Update the heartbeat
-    sqlite3 "$DB_PATH" << EOF
-UPDATE agents 
-SET last_heartbeat = '$timestamp', 
-    updated_at = '$timestamp'
-WHERE id = '$agent_id';
-EOF
+    write_heartbeat "$agent_id"
     
     if [[ $? -eq 0 ]]; then
         log_success "Heartbeat updated for $agent_id at $timestamp"
@@ -70,7 +90,7 @@ EOF
 update_heartbeat_on_task_start() {
     local agent_id="$1"
     local task_id="$2"
-    local timestamp=$(date '+%Y-%m-%d %H:%M:%S')
+    local timestamp=$(date -u '+%Y-%m-%d %H:%M:%S')  # UTC, like CURRENT_TIMESTAMP
     
     if [[ -z "$agent_id" ]]; then
         log_error "Agent ID required"
@@ -81,7 +101,7 @@ update_heartbeat_on_task_start() {
         log_warn "No task_id provided, updating heartbeat only"
     fi
     
-    sqlite3 "$DB_PATH" << EOF
+    sqlite3 -cmd ".timeout 10000" "$DB_PATH" << EOF
 UPDATE agents 
 SET last_heartbeat = '$timestamp',
     status = 'active',
@@ -124,8 +144,7 @@ start_periodic_heartbeat() {
     # Run in background
     (
         while true; do
-            local ts=$(date '+%Y-%m-%d %H:%M:%S')
-            sqlite3 "$DB_PATH" "UPDATE agents SET last_heartbeat = '$ts', updated_at = '$ts' WHERE id = '$agent_id';" 2>/dev/null
+            write_heartbeat "$agent_id" 2>/dev/null
             sleep $((interval_minutes * 60))
         done
     ) &
@@ -156,7 +175,7 @@ stop_periodic_heartbeat() {
 update_heartbeat_on_task_complete() {
     local agent_id="$1"
     local task_id="$2"
-    local timestamp=$(date '+%Y-%m-%d %H:%M:%S')
+    local timestamp=$(date -u '+%Y-%m-%d %H:%M:%S')  # UTC, like CURRENT_TIMESTAMP
     
     if [[ -z "$agent_id" ]]; then
         log_error "Agent ID required"
@@ -164,7 +183,7 @@ update_heartbeat_on_task_complete() {
     fi
     
     # Update agent heartbeat and set to idle if no other tasks
-    sqlite3 "$DB_PATH" << EOF
+    sqlite3 -cmd ".timeout 10000" "$DB_PATH" << EOF
 UPDATE agents 
 SET last_heartbeat = '$timestamp',
     status = CASE 
@@ -207,7 +226,7 @@ get_agent_status() {
     
     if [[ -z "$agent_id" ]]; then
         # Show all agents
-        sqlite3 "$DB_PATH" << EOF
+        sqlite3 -cmd ".timeout 10000" "$DB_PATH" << EOF
 .headers on
 .mode column
 SELECT id, name, status, current_task_id, 
@@ -218,7 +237,7 @@ ORDER BY last_heartbeat DESC;
 EOF
     else
         # Show specific agent
-        sqlite3 "$DB_PATH" << EOF
+        sqlite3 -cmd ".timeout 10000" "$DB_PATH" << EOF
 SELECT * FROM v_agent_status WHERE id = '$agent_id';
 EOF
     fi